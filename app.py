@@ -5,30 +5,27 @@ import os
 import sys
 import time
 from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict
 from pathlib import Path
 
 import httpx
 from dotenv import load_dotenv
 
-from collectors.base import BudgetManager
-from collectors.derivatives import DerivativesSnapshot, fetch_derivatives_context
-from collectors.flows import FlowSnapshot, fetch_flow_context
-from collectors.price import (
-    PriceSnapshot,
-    fetch_btc_multi_timeframe_candles,
-    fetch_btc_price,
-    fetch_macro_context,
-    fetch_spx_multi_timeframe_bundle,
-)
-from collectors.social import FearGreedSnapshot, fetch_fear_greed, fetch_news
-from config import COOLDOWN_SECONDS, validate_config, INTELLIGENCE_FLAGS
+from collectors import bundle as market_bundles
+from collectors.base import BudgetManager, SnapshotCache, deadline_passed, set_deadline, time_left
+from collectors.derivatives import DerivativesSnapshot
+from collectors.flows import FlowSnapshot
+from collectors.router import get_router
+from collectors.price import PriceSnapshot
+from collectors.service import collect
+from collectors.social import FearGreedSnapshot
+from config import COOLDOWN_SECONDS, validate_config, INTELLIGENCE_FLAGS, PROFILING, CYCLE_TRACES, CYCLE_DEADLINE
 from intelligence import IntelligenceBundle
 from intelligence.squeeze import detect_squeeze
 from intelligence.sentiment import analyze_sentiment
 from intelligence.volume_profile import compute_volume_profile
 from intelligence.liquidity import analyze_liquidity
 from intelligence.macro_correlation import analyze_macro_correlation
-from collectors.orderbook import fetch_orderbook
 from engine import AlertScore, compute_score
 from tools.outcome_tracker import resolve_outcomes
 from tools.paper_trader import Portfolio as PaperPortfolio
@@ -39,8 +36,14 @@ load_dotenv()
 # --- Config and Paths ---
 BUDGET_MANAGER_PATH = ".mvp_budget.json"
 STATE_STORE_PATH = ".mvp_alert_state.json"
+METRICS_PATH = "data/metrics.json"
+ROUTING_PATH = "data/routing.json"
+CYCLE_INTERVAL_SECONDS = 300
 
+from core import event_bus, metrics, snapshot_bus, tracing
+from core.async_writer import get_writer
 from core.logger import logger
+from core.profiling import CycleProfiler
 from core.infrastructure import PersistentLogger, AuditLogger, Notifier, AlertStateStore
 from core.formatting import format_alert_msg, print_market_overview, print_best_setup, print_timeframe_guide
 
@@ -53,15 +56,112 @@ def _latest_spx_price(spx_tf: dict, timeframe: str) -> float:
     return candles[-1].close
 
 
-def _collect_intelligence(candles, news, btc_price, macro=None, budget_manager=None):
-    """Call all intelligence layers. Never crashes. Returns whatever succeeded."""
+_DASHBOARD_RENDERER = None
+_SCORECARD = None
+_LAST_GOOD = SnapshotCache()
+
+
+def _report_scripts_on_path():
+    # scripts/pid-129 is not a package; its generators import as top-level modules
+    scripts_dir = str(Path(__file__).resolve().parent / "scripts" / "pid-129")
+    if scripts_dir not in sys.path:
+        sys.path.insert(0, scripts_dir)
+
+
+def _render_dashboard_html():
+    """Rebuild dashboard.html in-process; the renderer keeps unchanged panels between cycles."""
+    global _DASHBOARD_RENDERER
+    if _DASHBOARD_RENDERER is None:
+        _report_scripts_on_path()
+        from generate_dashboard import DashboardRenderer
+        _DASHBOARD_RENDERER = DashboardRenderer()
+    _DASHBOARD_RENDERER.render()
+
+
+def _write_scorecard():
+    """Update the scorecard in-process from its rolling windows; the file is rewritten only on change."""
+    global _SCORECARD
+    if _SCORECARD is None:
+        _report_scripts_on_path()
+        from generate_scorecard import Scorecard
+        _SCORECARD = Scorecard()
+    _SCORECARD.write()
+
+
+def _pause(seconds: float):
+    """Inter-collector rate-limit pause, visible as idle time on the cycle trace.
+
+    Never sleeps past the cycle deadline.
+    """
+    left = time_left()
+    if left is not None:
+        seconds = min(seconds, max(0.0, left))
+    with tracing.span("pause", "sleep"):
+        time.sleep(seconds)
+
+
+def _settle(source: str, value, good: bool, cached_inputs: dict):
+    """Remember a good result for later cycles, or stand in the last good one.
+
+    A source that came back empty or unhealthy is replaced by its last good
+    snapshot (if recent enough) and its age goes into cached_inputs, which
+    compute_score() records in degraded. Failing after the cycle deadline
+    passed counts as a deadline miss for the source.
+    """
+    if good:
+        _LAST_GOOD.put(source, value)
+        return value
+    if deadline_passed():
+        metrics.inc("deadline_misses", source=source)
+    hit = _LAST_GOOD.get(source, CYCLE_DEADLINE["max_cache_age_seconds"])
+    if hit is None:
+        return value
+    cached, age = hit
+    cached_inputs[source] = age
+    logger.warning(f"{source} unavailable this cycle; using the snapshot from {age:.0f}s ago")
+    return cached
+
+
+def _settle_candles(btc_tf: dict, cached_inputs: dict) -> dict:
+    """_settle() each timeframe on its own, as "candles:<tf>", so only a
+    series that came back empty is filled in from the cache."""
+    settled = dict(btc_tf)
+    for tf in ("5m", "15m", "1h", "4h"):
+        settled[tf] = _settle(f"candles:{tf}", btc_tf.get(tf, []), bool(btc_tf.get(tf)), cached_inputs)
+    return settled
+
+
+def _profiled_run(profiler: CycleProfiler, *args):
+    """run() under the cycle profiler and, if enabled, the cycle trace (logs/traces/)."""
+    if CYCLE_TRACES["enabled"]:
+        tracing.start_cycle()
+    try:
+        with profiler.cycle():
+            run(*args)
+    finally:
+        set_deadline(None)  # in case run() raised before clearing it
+        if profiler.written:
+            logger.info(f"Cycle profile written to {profiler.out_dir}: {[p.name for p in profiler.written]}")
+        if CYCLE_TRACES["enabled"]:
+            try:
+                tracing.finish_cycle(keep_files=CYCLE_TRACES["keep_files"])
+            except Exception as exc:
+                logger.warning(f"Failed to write cycle trace: {exc}")
+
+
+def _collect_intelligence(candles, news, btc_price, macro=None, budget_manager=None, cached_inputs=None):
+    """Call all intelligence layers. Never crashes. Returns whatever succeeded.
+
+    A cached order book stand-in is noted in cached_inputs (see _settle()).
+    """
     intel = IntelligenceBundle()
     degraded = []
 
     # Squeeze
     if INTELLIGENCE_FLAGS.get("squeeze_enabled", True):
         try:
-            intel.squeeze = detect_squeeze(candles)
+            with metrics.span("intel", layer="squeeze"):
+                intel.squeeze = detect_squeeze(candles)
         except Exception as e:
             logger.warning(f"Squeeze degraded: {e}")
             degraded.append("squeeze")
@@ -69,7 +169,8 @@ def _collect_intelligence(candles, news, btc_price, macro=None, budget_manager=N
     # Sentiment
     if INTELLIGENCE_FLAGS.get("sentiment_enabled", True) and news:
         try:
-            intel.sentiment = analyze_sentiment(news)
+            with metrics.span("intel", layer="sentiment"):
+                intel.sentiment = analyze_sentiment(news)
         except Exception as e:
             logger.warning(f"Sentiment degraded: {e}")
             degraded.append("sentiment")
@@ -77,7 +178,8 @@ def _collect_intelligence(candles, news, btc_price, macro=None, budget_manager=N
     # Volume Profile
     if INTELLIGENCE_FLAGS.get("volume_profile_enabled", True):
         try:
-            intel.volume_profile = compute_volume_profile(candles)
+            with metrics.span("intel", layer="volume_profile"):
+                intel.volume_profile = compute_volume_profile(candles)
         except Exception as e:
             logger.warning(f"Volume Profile degraded: {e}")
             degraded.append("volume_profile")
@@ -85,8 +187,15 @@ def _collect_intelligence(candles, news, btc_price, macro=None, budget_manager=N
     # Liquidity
     if INTELLIGENCE_FLAGS.get("liquidity_enabled", True):
         try:
-            orderbook = fetch_orderbook(budget_manager)
-            intel.liquidity = analyze_liquidity(orderbook)
+            with metrics.span("collect", source="orderbook"):
+                orderbook = collect("orderbook", budget_manager)
+            orderbook = _settle("orderbook", orderbook, orderbook.healthy,
+                                cached_inputs if cached_inputs is not None else {})
+            if orderbook.bids and orderbook.asks:
+                snapshot_bus.publish(bid_px=orderbook.bids[0][0], bid_sz=orderbook.bids[0][1],
+                                     ask_px=orderbook.asks[0][0], ask_sz=orderbook.asks[0][1], book_ts=orderbook.ts)
+            with metrics.span("intel", layer="liquidity"):
+                intel.liquidity = analyze_liquidity(orderbook)
         except Exception as e:
             logger.warning(f"Liquidity degraded: {e}")
             degraded.append("liquidity")
@@ -94,7 +203,8 @@ def _collect_intelligence(candles, news, btc_price, macro=None, budget_manager=N
     # Macro Correlation
     if INTELLIGENCE_FLAGS.get("macro_correlation_enabled", True) and macro:
         try:
-            intel.macro_correlation = analyze_macro_correlation(macro)
+            with metrics.span("intel", layer="macro_correlation"):
+                intel.macro_correlation = analyze_macro_correlation(macro)
         except Exception as e:
             logger.warning(f"Macro correlation degraded: {e}")
             degraded.append("macro_correlation")
@@ -109,6 +219,11 @@ def run(bm: BudgetManager, notif: Notifier, state: AlertStateStore, p_logger: Pe
     """Main function to execute the BTC alert monitoring process."""
     import time as _time
     cycle_start = _time.monotonic()
+    # Inputs are due by the deadline; whatever is not back by then is served
+    # from its last good snapshot so scoring starts on time
+    set_deadline(cycle_start + CYCLE_DEADLINE["collect_seconds"])
+    market_bundles.new_cycle()  # Bybit/OKX endpoints are fetched once per cycle, on first use
+    cached_inputs = {}  # source -> age (s) of the cached snapshot standing in for it
 
     # Log the start of the main execution, indicating configuration validation is next.
     logger.info("Starting main execution cycle.")
@@ -120,121 +235,143 @@ def run(bm: BudgetManager, notif: Notifier, state: AlertStateStore, p_logger: Pe
     btc_price = None # Initialize to None to handle exceptions gracefully
     sleep_duration = 1.0 # Base sleep duration
 
-    try:
-        logger.info("Fetching BTC price data...")
-        btc_price = fetch_btc_price(bm)
-        if btc_price.healthy:
-            logger.info(f"Successfully fetched live BTC price.", extra={'price': f"{btc_price.price:,.2f}", 'source': btc_price.source})
-        else:
-            logger.warning("Failed to fetch BTC price or data is unhealthy.", extra={'source': btc_price.source, 'healthy': btc_price.healthy})
-    except Exception as e:
-        logger.error("Exception occurred during BTC price fetch: %s", e, exc_info=True)
-        # Create a dummy unhealthy PriceSnapshot if fetch fails
-        btc_price = PriceSnapshot(price=0.0, timestamp=time.time(), source="error", healthy=False)
+    with metrics.span("collect", source="price"):
+        try:
+            logger.info("Fetching BTC price data...")
+            btc_price = collect("price", bm)
+            if btc_price.healthy:
+                logger.info(f"Successfully fetched live BTC price.", extra={'price': f"{btc_price.price:,.2f}", 'source': btc_price.source})
+                snapshot_bus.publish(price=btc_price.price, price_source=btc_price.source)
+            else:
+                logger.warning("Failed to fetch BTC price or data is unhealthy.", extra={'source': btc_price.source, 'healthy': btc_price.healthy})
+        except Exception as e:
+            logger.error("Exception occurred during BTC price fetch: %s", e, exc_info=True)
+            # Create a dummy unhealthy PriceSnapshot if fetch fails
+            btc_price = PriceSnapshot(price=0.0, timestamp=time.time(), source="error", healthy=False)
+    # Cached stand-ins are for scoring only: outcomes, the paper portfolio and
+    # the heartbeat must never settle or report at a price that no longer exists
+    live_price = btc_price
+    btc_price = _settle("price", btc_price, btc_price.healthy, cached_inputs)
     
     # Add a small delay to respect API rate limits or server load
-    time.sleep(sleep_duration)
+    _pause(sleep_duration)
 
-    btc_tf = {} # Initialize to empty dict
-    try:
-        logger.info("Fetching BTC multi-timeframe candles...")
-        btc_tf = fetch_btc_multi_timeframe_candles(bm)
-        logger.info(f"Collected BTC multi-timeframe candle data. Available timeframes: {list(btc_tf.keys())}")
+    with metrics.span("collect", source="candles"):
+        btc_tf = {} # Initialize to empty dict
+        try:
+            logger.info("Fetching BTC multi-timeframe candles...")
+            btc_tf = collect("candles", bm)
+            logger.info(f"Collected BTC multi-timeframe candle data. Available timeframes: {list(btc_tf.keys())}")
         
-        # Log health status for each collected timeframe
-        for tf in ["5m", "15m", "1h", "4h", "1d"]: # Check common timeframes
-            if tf in btc_tf:
-                if btc_tf[tf]: # Check if list of candles is not empty
-                    # Assuming each candle object has a 'healthy' attribute or similar check is needed
-                    # For now, we check if the list is non-empty, implying data was fetched
-                    logger.info(f"Collected {len(btc_tf[tf])} BTC {tf} candles.", extra={'timeframe': tf, 'candle_count': len(btc_tf[tf])})
+            # Log health status for each collected timeframe
+            for tf in ["5m", "15m", "1h", "4h", "1d"]: # Check common timeframes
+                if tf in btc_tf:
+                    if btc_tf[tf]: # Check if list of candles is not empty
+                        # Assuming each candle object has a 'healthy' attribute or similar check is needed
+                        # For now, we check if the list is non-empty, implying data was fetched
+                        logger.info(f"Collected {len(btc_tf[tf])} BTC {tf} candles.", extra={'timeframe': tf, 'candle_count': len(btc_tf[tf])})
+                    else:
+                        logger.warning("Collected BTC %s candles, but the list is empty.", tf, extra={'timeframe': tf})
                 else:
-                    logger.warning("Collected BTC %s candles, but the list is empty.", tf, extra={'timeframe': tf})
-            else:
-                logger.warning("BTC %s candles not found in fetch result.", tf, extra={'timeframe': tf})
-    except Exception as e:
-        logger.error("Exception occurred during BTC multi-timeframe candle fetch: %s", e, exc_info=True)
-        btc_tf = {} # Ensure btc_tf is an empty dict on error
+                    logger.warning("BTC %s candles not found in fetch result.", tf, extra={'timeframe': tf})
+        except Exception as e:
+            logger.error("Exception occurred during BTC multi-timeframe candle fetch: %s", e, exc_info=True)
+            btc_tf = {} # Ensure btc_tf is an empty dict on error
+    live_tf = {tf: c for tf, c in btc_tf.items() if c}
+    btc_tf = _settle_candles(btc_tf, cached_inputs)
     
-    time.sleep(sleep_duration) 
+    _pause(sleep_duration) 
 
     # --- Data Collection: SPX ---
-    spx_tf, spx_source_map = {}, {} # Initialize to empty dicts to handle potential errors gracefully
-    try:
-        logger.info("Fetching SPX multi-timeframe bundle...")
-        spx_tf, spx_source_map = fetch_spx_multi_timeframe_bundle(bm)
-        logger.info(f"Successfully fetched SPX data. Sources mapped: {spx_source_map}")
+    with metrics.span("collect", source="spx"):
+        spx_tf, spx_source_map = {}, {} # Initialize to empty dicts to handle potential errors gracefully
+        try:
+            logger.info("Fetching SPX multi-timeframe bundle...")
+            spx_tf, spx_source_map = collect("spx", bm)
+            logger.info(f"Successfully fetched SPX data. Sources mapped: {spx_source_map}")
         
-        # Log health status for fetched SPX data
-        for tf, candles in spx_tf.items():
-            if candles:
-                logger.info(f"Collected {len(candles)} SPX {tf} candles.", extra={'timeframe': tf, 'candle_count': len(candles)})
-            else:
-                 logger.warning("Collected SPX %s candles, but the list is empty.", tf, extra={'timeframe': tf})
-    except Exception as e:
-        logger.error("Exception occurred during SPX multi-timeframe bundle fetch: %s", e, exc_info=True)
-        spx_tf = {} # Ensure spx_tf is empty on error
-        spx_source_map = {}
+            # Log health status for fetched SPX data
+            for tf, candles in spx_tf.items():
+                if candles:
+                    logger.info(f"Collected {len(candles)} SPX {tf} candles.", extra={'timeframe': tf, 'candle_count': len(candles)})
+                else:
+                     logger.warning("Collected SPX %s candles, but the list is empty.", tf, extra={'timeframe': tf})
+        except Exception as e:
+            logger.error("Exception occurred during SPX multi-timeframe bundle fetch: %s", e, exc_info=True)
+            spx_tf = {} # Ensure spx_tf is empty on error
+            spx_source_map = {}
+    spx_tf, spx_source_map = _settle("spx", (spx_tf, spx_source_map), bool(spx_tf), cached_inputs)
     
-    time.sleep(sleep_duration) # Short delay after SPX fetch
+    _pause(sleep_duration) # Short delay after SPX fetch
 
     # --- Data Collection: Macro Context (reuses SPX data) ---
-    macro = {"spx": [], "vix": [], "nq": []}
-    try:
-        logger.info("Fetching macro context data (reusing SPX 5m candles)...")
-        # Pass a subset of SPX data if available
-        prefetched_spx_5m = spx_tf.get("5m", []) if spx_tf else []
-        macro = fetch_macro_context(bm, prefetched_spx=prefetched_spx_5m)
-        logger.info(f"Macro context fetched successfully.")
-    except Exception as e:
-        logger.error("Exception occurred during macro context fetch: %s", e, exc_info=True)
-        # Fallback dictionary
+    with metrics.span("collect", source="macro"):
         macro = {"spx": [], "vix": [], "nq": []}
+        try:
+            logger.info("Fetching macro context data (reusing SPX 5m candles)...")
+            # Pass a subset of SPX data if available
+            prefetched_spx_5m = spx_tf.get("5m", []) if spx_tf else []
+            macro = collect("macro", bm, prefetched_spx=prefetched_spx_5m)
+            logger.info(f"Macro context fetched successfully.")
+        except Exception as e:
+            logger.error("Exception occurred during macro context fetch: %s", e, exc_info=True)
+            # Fallback dictionary
+            macro = {"spx": [], "vix": [], "nq": []}
+    macro = _settle("macro", macro, any(macro.values()), cached_inputs)
     
-    time.sleep(sleep_duration)
+    _pause(sleep_duration)
 
     # --- Data Collection: Derivatives & Flows ---
-    derivatives = None
-    try:
-        logger.info("Fetching derivatives context data...")
-        derivatives = fetch_derivatives_context(bm)
-        logger.info(f"Derivatives context fetched.", extra={'source': derivatives.source, 'healthy': derivatives.healthy})
-    except Exception as e:
-        logger.error("Exception occurred during derivatives context fetch: %s", e, exc_info=True)
-        derivatives = DerivativesSnapshot(funding_rate=0.0, oi_change_pct=0.0, basis_pct=0.0, source="error", healthy=False, meta={"provider": "error"})
+    with metrics.span("collect", source="derivatives"):
+        derivatives = None
+        try:
+            logger.info("Fetching derivatives context data...")
+            derivatives = collect("derivatives", bm)
+            logger.info(f"Derivatives context fetched.", extra={'source': derivatives.source, 'healthy': derivatives.healthy})
+        except Exception as e:
+            logger.error("Exception occurred during derivatives context fetch: %s", e, exc_info=True)
+            derivatives = DerivativesSnapshot(funding_rate=0.0, oi_change_pct=0.0, basis_pct=0.0, source="error", healthy=False, meta={"provider": "error"})
+    derivatives = _settle("derivatives", derivatives, derivatives.healthy, cached_inputs)
     
-    time.sleep(sleep_duration)
+    _pause(sleep_duration)
     
-    flows = None
-    try:
-        logger.info("Fetching flows context data...")
-        flows = fetch_flow_context(bm)
-        logger.info(f"Flows context fetched.", extra={'source': flows.source, 'healthy': flows.healthy})
-    except Exception as e:
-        logger.error("Exception occurred during flows context fetch: %s", e, exc_info=True)
-        flows = FlowSnapshot(taker_ratio=1.0, long_short_ratio=1.0, crowding_score=0.0, healthy=False, source="error", meta={"provider": "error"})
+    with metrics.span("collect", source="flows"):
+        flows = None
+        try:
+            logger.info("Fetching flows context data...")
+            flows = collect("flows", bm)
+            logger.info(f"Flows context fetched.", extra={'source': flows.source, 'healthy': flows.healthy})
+        except Exception as e:
+            logger.error("Exception occurred during flows context fetch: %s", e, exc_info=True)
+            flows = FlowSnapshot(taker_ratio=1.0, long_short_ratio=1.0, crowding_score=0.0, healthy=False, source="error", meta={"provider": "error"})
+    flows = _settle("flows", flows, flows.healthy, cached_inputs)
+    snapshot_bus.publish(flows=asdict(flows), derivatives=asdict(derivatives))
     
-    time.sleep(sleep_duration)
+    _pause(sleep_duration)
 
     # --- Data Collection: Social / News ---
-    fg = None
-    try:
-        logger.info("Fetching Fear & Greed index...")
-        fg = fetch_fear_greed(bm)
-        logger.info(f"Fear & Greed index fetched.", extra={'value': fg.value, 'label': fg.label, 'healthy': fg.healthy})
-    except Exception as e:
-        logger.error("Exception occurred during Fear & Greed fetch: %s", e, exc_info=True)
-        # Create a dummy healthy snapshot if fetch fails
-        fg = FearGreedSnapshot(value=50, label="Neutral", healthy=False)
+    with metrics.span("collect", source="fear_greed"):
+        fg = None
+        try:
+            logger.info("Fetching Fear & Greed index...")
+            fg = collect("fear_greed", bm)
+            logger.info(f"Fear & Greed index fetched.", extra={'value': fg.value, 'label': fg.label, 'healthy': fg.healthy})
+        except Exception as e:
+            logger.error("Exception occurred during Fear & Greed fetch: %s", e, exc_info=True)
+            # Create a dummy healthy snapshot if fetch fails
+            fg = FearGreedSnapshot(value=50, label="Neutral", healthy=False)
+    fg = _settle("fear_greed", fg, fg.healthy, cached_inputs)
     
-    news = [] # Initialize as empty list
-    try:
-        logger.info("Fetching latest news headlines...")
-        news = fetch_news(bm)
-        logger.info(f"Fetched {len(news)} news headlines.", extra={'headline_count': len(news)})
-    except Exception as e:
-        logger.error("Exception occurred during news fetch: %s", e, exc_info=True)
-        news = [] # Ensure news is an empty list on error
+    with metrics.span("collect", source="news"):
+        news = [] # Initialize as empty list
+        try:
+            logger.info("Fetching latest news headlines...")
+            news = collect("news", bm)
+            logger.info(f"Fetched {len(news)} news headlines.", extra={'headline_count': len(news)})
+        except Exception as e:
+            logger.error("Exception occurred during news fetch: %s", e, exc_info=True)
+            news = [] # Ensure news is an empty list on error
+    news = _settle("news", news, bool(news), cached_inputs)
 
     # --- Alert Computation Phase ---
     logger.info("Starting alert computation. Processing BTC and SPX data across timeframes.")
@@ -248,6 +385,7 @@ def run(bm: BudgetManager, notif: Notifier, state: AlertStateStore, p_logger: Pe
     # Iterate through common timeframes to compute scores for BTC and SPX
     for tf in ["5m", "15m", "1h"]: # Focused on 5m, 15m, 1h as per original logic
         intel = IntelligenceBundle() # Initialize for each timeframe
+        tf_cached = dict(cached_inputs) # plus this timeframe's order book, if cached
         # Compute score for BTC if data is available
         if btc_price and btc_tf.get(tf) and btc_tf.get("15m", []) and btc_tf.get("1h", []):
             try:
@@ -258,22 +396,24 @@ def run(bm: BudgetManager, notif: Notifier, state: AlertStateStore, p_logger: Pe
 
 
                 # All intelligence layers are now prepared in 'intel' bundle
-                intel = _collect_intelligence(candles, news, btc_price, macro=macro, budget_manager=bm)
-                computed_alert = compute_score(
-                    symbol="BTC",
-                    timeframe=tf,
-                    price=btc_price, # Pass full snapshot object
-                    candles=candles, # Corrected to 'candles'
-                    candles_15m=btc_tf.get("15m", []),
-                    candles_1h=btc_tf.get("1h", []),
-                    fg=fg,
-                    news=news,
-                    derivatives=derivatives,
-                    flows=flows,
-                    macro=macro,
-                    intel=intel,
-                    candles_4h=btc_tf.get("4h", []),
-                )
+                intel = _collect_intelligence(candles, news, btc_price, macro=macro, budget_manager=bm, cached_inputs=tf_cached)
+                with metrics.span("score", symbol="BTC", timeframe=tf):
+                    computed_alert = compute_score(
+                        symbol="BTC",
+                        timeframe=tf,
+                        price=btc_price, # Pass full snapshot object
+                        candles=candles, # Corrected to 'candles'
+                        candles_15m=btc_tf.get("15m", []),
+                        candles_1h=btc_tf.get("1h", []),
+                        fg=fg,
+                        news=news,
+                        derivatives=derivatives,
+                        flows=flows,
+                        macro=macro,
+                        intel=intel,
+                        candles_4h=btc_tf.get("4h", []),
+                        cached_inputs=tf_cached,
+                    )
                 alerts.append(computed_alert)
                 a_logger.log_cycle("BTC", tf, computed_alert.confidence, computed_alert.action)
                 logger.info(f"Computed alert score for BTC {tf}.", extra={'symbol': 'BTC', 'timeframe': tf, 'score_confidence': computed_alert.confidence, 'action': computed_alert.action})
@@ -289,21 +429,23 @@ def run(bm: BudgetManager, notif: Notifier, state: AlertStateStore, p_logger: Pe
                 spx_latest_close = spx_tf[tf][-1].close if spx_tf[tf] else 0.0
                 spx_price_snapshot = PriceSnapshot(price=spx_latest_close, timestamp=time.time(), source=spx_source_map.get(tf, "yahoo"), healthy=True)
                 
-                computed_alert = compute_score(
-                    "SPX_PROXY", # Use a distinct symbol for SPX proxy alerts
-                    tf,
-                    spx_price_snapshot,
-                    spx_tf[tf],
-                    spx_tf.get("15m", []),
-                    spx_tf.get("1h", []),
-                    # Use a dummy FearGreed if SPX, as it's market-wide, not specific to BTC fear
-                    FearGreedSnapshot(50, "Neutral", healthy=False), 
-                    [], # News might be too specific for SPX proxy, or could be included if relevant
-                    DerivativesSnapshot(0.0, 0.0, 0.0, healthy=False, source="none", meta={"provider": "none"}), # No derivatives for SPX proxy
-                    FlowSnapshot(1.0, 1.0, 0.0, healthy=False, source="none", meta={"provider": "none"}), # No flows for SPX proxy
-                    macro, # Macro context is relevant for SPX
-                    candles_4h=spx_tf.get("4h", []),
-                )
+                with metrics.span("score", symbol="SPX_PROXY", timeframe=tf):
+                    computed_alert = compute_score(
+                        "SPX_PROXY", # Use a distinct symbol for SPX proxy alerts
+                        tf,
+                        spx_price_snapshot,
+                        spx_tf[tf],
+                        spx_tf.get("15m", []),
+                        spx_tf.get("1h", []),
+                        # Use a dummy FearGreed if SPX, as it's market-wide, not specific to BTC fear
+                        FearGreedSnapshot(50, "Neutral", healthy=False), 
+                        [], # News might be too specific for SPX proxy, or could be included if relevant
+                        DerivativesSnapshot(0.0, 0.0, 0.0, healthy=False, source="none", meta={"provider": "none"}), # No derivatives for SPX proxy
+                        FlowSnapshot(1.0, 1.0, 0.0, healthy=False, source="none", meta={"provider": "none"}), # No flows for SPX proxy
+                        macro, # Macro context is relevant for SPX
+                        candles_4h=spx_tf.get("4h", []),
+                        cached_inputs={k: v for k, v in cached_inputs.items() if k in ("spx", "macro")},
+                    )
                 alerts.append(computed_alert)
                 a_logger.log_cycle("SPX_PROXY", tf, computed_alert.confidence, computed_alert.action)
                 logger.info(f"Computed alert score for SPX_PROXY {tf}.", extra={'symbol': 'SPX_PROXY', 'timeframe': tf, 'score_confidence': computed_alert.confidence, 'action': computed_alert.action})
@@ -311,6 +453,7 @@ def run(bm: BudgetManager, notif: Notifier, state: AlertStateStore, p_logger: Pe
                 logger.error("Exception during SPX_PROXY %s score computation: %s", tf, e, exc_info=True, extra={'symbol': 'SPX_PROXY', 'timeframe': tf})
         else:
             logger.warning("Skipping SPX_PROXY %s analysis due to missing or incomplete data.", tf, extra={'symbol': 'SPX_PROXY', 'timeframe': tf})
+    set_deadline(None)  # notifications, execution and housekeeping are not bound by it
 
     logger.info(f"Total alerts generated: {len(alerts)}. Starting alert filtering and notification phase.")
     
@@ -335,7 +478,9 @@ def run(bm: BudgetManager, notif: Notifier, state: AlertStateStore, p_logger: Pe
             current_price_for_state = 0.0 # Fallback for unknown symbols
 
         # Check if the alert should be sent using the state store
-        if not state.should_send(alert, current_price_for_state):
+        with tracing.span("state_check", "state", symbol=alert.symbol, timeframe=alert.timeframe):
+            send = state.should_send(alert, current_price_for_state)
+        if not send:
             logger.debug("Alert filtered by state store: %s %s", alert.symbol, alert.timeframe, extra={'symbol': alert.symbol, 'timeframe': alert.timeframe, 'action': alert.action})
             continue # Skip to the next alert if should_send returns False
         
@@ -356,7 +501,8 @@ def run(bm: BudgetManager, notif: Notifier, state: AlertStateStore, p_logger: Pe
         logger.info(f">>> SENDING ALERT <<<", extra={'symbol': alert.symbol, 'timeframe': alert.timeframe, 'action': alert.action, 'message_preview': msg[:100]})
         
         # Send the notification
-        notif.send(msg)
+        with metrics.span("notify", symbol=alert.symbol, timeframe=alert.timeframe):
+            notif.send(msg)
         
         # Save the state after sending the alert
         state.save(alert, current_price_for_state)
@@ -386,16 +532,20 @@ def run(bm: BudgetManager, notif: Notifier, state: AlertStateStore, p_logger: Pe
                 "tier": alert.tier,
                 "timeframe": alert.timeframe,
             }
-            result = execute_trade(alert_dict, mode=exec_mode)
+            with metrics.span("execute", mode=exec_mode):
+                result = execute_trade(alert_dict, mode=exec_mode)
             logger.info(f"[EXECUTOR] {result['status']} | {result.get('reason','')}")
 
     health = {
-        "btc_price": btc_price.healthy if btc_price else False,
-        "candle_timeframes": list(btc_tf.keys()),
+        "btc_price": live_price.healthy,
+        "candle_timeframes": list(live_tf.keys()),
         "spx_available": bool(spx_tf),
         "news_count": len(news),
+        "cached_inputs": {k: round(v) for k, v in cached_inputs.items()},
         "alerts_total": len(alerts),
         "alerts_sent": sum(1 for a in alerts if a.action != "SKIP"),
+        "writer": get_writer().stats(),
+        "log_dropped": sum(getattr(h, "dropped", 0) for h in logger.handlers),
     }
     logger.info("Cycle health summary", extra=health)
 
@@ -408,30 +558,47 @@ def run(bm: BudgetManager, notif: Notifier, state: AlertStateStore, p_logger: Pe
     
     # Resolve outcomes for pending alerts
     try:
-        resolve_outcomes()
-        if btc_price and btc_price.healthy:
-            portfolio.update(btc_price.price)
+        # This cycle's alerts must be on disk for the tracker and the report scripts
+        with tracing.span("writer_flush", "io"):
+            flushed = get_writer().flush()
+        if not flushed:
+            logger.warning("Background writer did not drain before outcome tracking", extra=get_writer().stats())
+        with metrics.span("housekeeping", task="outcomes"):
+            resolve_outcomes(candles=live_tf, price=live_price)
+        if live_price.healthy:
+            with metrics.span("housekeeping", task="portfolio"):
+                portfolio.update(live_price.price)
         
-        # Generate reporting artifacts
-        os.system(f"{sys.executable} scripts/pid-129/generate_scorecard.py")
+        # Generate reporting artifacts, unless a generator is running with
+        # --watch and refreshes itself from cycle events
+        if not event_bus.has_subscriber("scorecard"):
+            try:
+                with metrics.span("housekeeping", task="scorecard"):
+                    _write_scorecard()
+            except Exception as e:
+                logger.warning(f"Scorecard generation failed: {e}")
         
         # Part 2: Re-enable Dashboard HTML Auto-Generation (only if non-SKIP alerts produced)
-        if any(a.action != "SKIP" for a in alerts):
-            import subprocess
+        if not event_bus.has_subscriber("dashboard_html") and any(a.action != "SKIP" for a in alerts):
             try:
-                subprocess.run([sys.executable, "scripts/pid-129/generate_dashboard.py"],
-                               capture_output=True, timeout=30, check=True)
-                logger.info("Dashboard HTML regenerated.")
+                started = _time.monotonic()
+                with metrics.span("housekeeping", task="dashboard_html"):
+                    _render_dashboard_html()
+                logger.info(f"Dashboard HTML regenerated in {(_time.monotonic() - started) * 1000:.0f}ms.")
             except Exception as e:
                 logger.warning(f"Dashboard HTML generation failed: {e}")
     except Exception as e:
         logger.error(f"Error during loop house-keeping: {e}")
 
     cycle_elapsed = _time.monotonic() - cycle_start
+    metrics.observe("cycle_seconds", cycle_elapsed)
+    metrics.set_gauge("cycle_budget_utilization", cycle_elapsed / CYCLE_INTERVAL_SECONDS)
+    for source, used in bm.utilization().items():
+        metrics.set_gauge("api_budget_utilization", used, source=source)
     logger.info(f"Cycle completed in {cycle_elapsed:.2f}s", extra={
         "cycle_duration_s": round(cycle_elapsed, 2),
         "alerts_generated": len(alerts),
-        "btc_price_healthy": btc_price.healthy if btc_price else False,
+        "btc_price_healthy": live_price.healthy,
     })
 
     # Write engine heartbeat so the dashboard can distinguish "engine alive, no signals"
@@ -440,16 +607,25 @@ def run(bm: BudgetManager, notif: Notifier, state: AlertStateStore, p_logger: Pe
         from datetime import datetime, timezone as _tz
         heartbeat = {
             "timestamp": datetime.now(_tz.utc).isoformat(),
-            "btc_price": round(btc_price.price, 2) if btc_price and btc_price.healthy else None,
-            "btc_price_healthy": btc_price.healthy if btc_price else False,
+            "btc_price": round(live_price.price, 2) if live_price.healthy else None,
+            "btc_price_healthy": live_price.healthy,
             "alerts_generated": len(alerts),
             "alerts_sent": sum(1 for a in alerts if a.action != "SKIP"),
             "cycle_duration_s": round(cycle_elapsed, 2),
         }
         Path("data").mkdir(exist_ok=True)
         Path("data/last_cycle.json").write_text(json.dumps(heartbeat))
+        # The only notifying publish: readers in wait() wake once per cycle,
+        # not on the price/book/flow updates published mid-cycle
+        snapshot_bus.publish(notify=True, heartbeat_ts=time.time(), cycle_s=cycle_elapsed, heartbeat=heartbeat)
+        event_bus.publish(event_bus.CYCLE_COMPLETED, heartbeat)
     except Exception as exc:
         logger.warning(f"Failed to write cycle heartbeat: {exc}")
+    try:
+        metrics.get_registry().save(METRICS_PATH)
+        get_router().save(ROUTING_PATH)
+    except Exception as exc:
+        logger.warning(f"Failed to write metrics snapshot: {exc}")
 
 
 
@@ -470,10 +646,12 @@ if __name__ == "__main__":
     p_logger = PersistentLogger()
     a_logger = AuditLogger()
     portfolio = PaperPortfolio()
+    # Profiles on request (data/profile_request.json) and for cycles over the slow threshold
+    profiler = CycleProfiler(**PROFILING)
 
     # Check if the script is run with '--once' argument
     if "--once" in sys.argv:
-        run(bm, notif, state, p_logger, a_logger, portfolio)
+        _profiled_run(profiler, bm, notif, state, p_logger, a_logger, portfolio)
         logger.info("Script finished execution in --once mode.")
     else:
         # Run in a continuous loop with a 5-minute interval
@@ -485,13 +663,13 @@ if __name__ == "__main__":
                 sys.exit(0)
 
             try:
-                run(bm, notif, state, p_logger, a_logger, portfolio)
+                _profiled_run(profiler, bm, notif, state, p_logger, a_logger, portfolio)
             except Exception as exc:
                 logger.error("Unhandled exception in main loop: %s", exc, exc_info=True)
             
             # Calculate sleep time to align with 5-minute intervals (300 seconds)
             current_time_seconds = time.time()
-            interval_seconds = 300
+            interval_seconds = CYCLE_INTERVAL_SECONDS
             sleep_duration = interval_seconds - (current_time_seconds % interval_seconds)
             logger.info(f"Sleeping for {sleep_duration:.2f} seconds before next cycle.")
             time.sleep(sleep_duration)
@@ -2,15 +2,86 @@ import json
 import random
 import threading
 import time
+from contextlib import contextmanager
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlsplit
 
 import httpx
 
+from collectors.router import get_router
 from config import HTTP_RETRY
+from core import metrics, tracing
 
 
+class DeadlineExceeded(TimeoutError):
+    """The cycle deadline passed before an upstream call could complete."""
+
+
+# time.monotonic() by which the current engine cycle needs its inputs. It is
+# process-wide rather than thread-local, so collectors that fan out to worker
+# threads (news feeds) see it too. None outside a cycle.
+_deadline: Optional[float] = None
+
+
+@contextmanager
+def cycle_deadline(seconds: float) -> Iterator[None]:
+    """Bound every collector call made inside the block to `seconds` from now."""
+    global _deadline
+    _deadline = time.monotonic() + seconds
+    try:
+        yield
+    finally:
+        _deadline = None
+
+
+def set_deadline(deadline: Optional[float]) -> None:
+    """Set (a time.monotonic() value) or clear (None) the cycle deadline."""
+    global _deadline
+    _deadline = deadline
+
+
+def time_left() -> Optional[float]:
+    """Seconds until the cycle deadline, or None when no deadline is set."""
+    deadline = _deadline
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def deadline_passed() -> bool:
+    left = time_left()
+    return left is not None and left <= 0
+
+
+def deadline_timeout(timeout: float, what: str = "request") -> float:
+    """Clip an HTTP timeout to the time left; raise DeadlineExceeded if there is none."""
+    left = time_left()
+    if left is None:
+        return timeout
+    if left <= 0:
+        raise DeadlineExceeded(f"cycle deadline passed before {what}")
+    return min(timeout, left)
+
+
+class SnapshotCache:
+    """Last good result per source, standing in when a later fetch fails or runs out of time."""
+
+    def __init__(self):
+        self._entries: Dict[str, Tuple[float, Any]] = {}
+        self._lock = threading.Lock()
+
+    def put(self, source: str, value: Any) -> None:
+        with self._lock:
+            self._entries[source] = (time.time(), value)
+
+    def get(self, source: str, max_age_seconds: float) -> Optional[Tuple[Any, float]]:
+        """(value, age in seconds) of the last good result, or None if there is none this recent."""
+        with self._lock:
+            entry = self._entries.get(source)
+        if entry is None:
+            return None
+        age = time.time() - entry[0]
+        return (entry[1], age) if age <= max_age_seconds else None
 
 
 @dataclass
@@ -72,8 +143,14 @@ class BudgetManager:
             return
 
     def can_call(self, source: str) -> bool:
+        """Within the rate-limit budget and not behind an open circuit breaker."""
+        if not get_router().allow(source):
+            return False
         with self._lock:
-            return self._buckets.get(source, _SourceBucket(5, 60)).can_call()
+            allowed = self._buckets.get(source, _SourceBucket(5, 60)).can_call()
+        if not allowed:
+            metrics.inc("api_budget_denied", source=source)
+        return allowed
 
     def record_call(self, source: str):
         with self._lock:
@@ -81,19 +158,32 @@ class BudgetManager:
                 self._buckets[source].record()
                 self._save()
 
-    def mark_source_broken(self, source: str, duration_seconds: float = 300.0):
-        """Temporarily exhaust a source's budget to skip it for duration_seconds.
-        Useful when hitting 403 Forbidden which is often session-based."""
+    def try_acquire(self, source: str) -> bool:
+        """can_call() and record_call() under one lock, so concurrent callers can't both be admitted."""
         with self._lock:
             bucket = self._buckets.get(source)
-            if bucket:
-                now = time.time()
-                # We fill with dummy timestamps in the window to block 'can_call'
-                # but we want it to expire in duration_seconds.
-                # Actually _prune uses window_seconds. 
-                # To block for a specific time, we can just put a bunch of timestamps 'now'.
-                bucket.timestamps = [now] * bucket.max_calls
-                self._save()
+            if bucket is None:
+                return _SourceBucket(5, 60).can_call()
+            if not bucket.can_call():
+                metrics.inc("api_budget_denied", source=source)
+                return False
+            bucket.record()
+            self._save()
+            return True
+
+    def utilization(self) -> Dict[str, float]:
+        """Calls in each source's window as a fraction of its allowance."""
+        with self._lock:
+            out = {}
+            for source, bucket in self._buckets.items():
+                bucket._prune()
+                out[source] = len(bucket.timestamps) / bucket.max_calls
+            return out
+
+    def mark_source_broken(self, source: str, duration_seconds: float = 300.0):
+        """Open the source's circuit breaker for duration_seconds; it is then probed half-open.
+        Useful when hitting 403 Forbidden which is often session-based."""
+        get_router().trip(source, duration_seconds)
 
 
 def _is_retriable_status(code: int) -> bool:
@@ -101,8 +191,29 @@ def _is_retriable_status(code: int) -> bool:
     return code >= 500
 
 
-def _request(url: str, params: Optional[dict], timeout: float) -> httpx.Response:
+def _is_venue_failure(code: int) -> bool:
+    # Blocked, rate-limited or down; other 4xx are about the request, not the venue
+    return code in (403, 429) or code >= 500
+
+
+def _provider(url: str) -> str:
+    """Metric label for an upstream: the registered domain name (api.bybit.com -> bybit)."""
+    parts = (urlsplit(url).hostname or "unknown").split(".")
+    return parts[-2] if len(parts) >= 2 else parts[0]
+
+
+def _check_backoff(provider: str, sleep_s: float, exc: Exception) -> None:
+    """Give up instead of sleeping through the cycle deadline (Retry-After included)."""
+    left = time_left()
+    if left is not None and sleep_s >= left:
+        metrics.inc("provider_requests", provider=provider, result="deadline")
+        raise DeadlineExceeded(f"{provider} retry in {sleep_s:.1f}s would pass the cycle deadline") from exc
+
+
+def _request(url: str, params: Optional[dict], timeout: float, client: Optional[httpx.Client] = None) -> httpx.Response:
     last_exc: Optional[Exception] = None
+    provider = _provider(url)
+    path = urlsplit(url).path  # trace label
     user_agents = [
         "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36",
         "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36",
@@ -126,12 +237,31 @@ def _request(url: str, params: Optional[dict], timeout: float) -> httpx.Response
             headers["Referer"] = "https://finance.yahoo.com/"
 
         try:
-            resp = httpx.get(url, params=params, headers=headers, timeout=timeout)
+            attempt_timeout = deadline_timeout(timeout, f"GET {provider}{path}")
+        except DeadlineExceeded:
+            metrics.inc("provider_requests", provider=provider, result="deadline")
+            raise
+
+        started = time.perf_counter()
+        try:
+            resp = (client or httpx).get(url, params=params, headers=headers, timeout=attempt_timeout)
             resp.raise_for_status()
+            elapsed = time.perf_counter() - started
+            metrics.observe("provider_request_seconds", elapsed, provider=provider)
+            metrics.inc("provider_requests", provider=provider, result="ok")
+            tracing.record(f"GET {provider}", "http", started, elapsed, {"path": path, "attempt": attempt, "result": "ok"})
+            get_router().record_call(provider, True)
             return resp
         except httpx.HTTPStatusError as exc:
+            elapsed = time.perf_counter() - started
+            result = f"http_{exc.response.status_code}"
+            metrics.observe("provider_request_seconds", elapsed, provider=provider)
+            metrics.inc("provider_requests", provider=provider, result=result)
+            tracing.record(f"GET {provider}", "http", started, elapsed, {"path": path, "attempt": attempt, "result": result})
             last_exc = exc
             if not _is_retriable_status(exc.response.status_code) or attempt == HTTP_RETRY["attempts"] - 1:
+                if _is_venue_failure(exc.response.status_code):
+                    get_router().record_call(provider, False)
                 raise
             
             # Handle Retry-After header
@@ -144,21 +274,34 @@ def _request(url: str, params: Optional[dict], timeout: float) -> httpx.Response
                     sleep_s = HTTP_RETRY["backoff_seconds"] * (2**attempt)
             else:
                 sleep_s = HTTP_RETRY["backoff_seconds"] * (2**attempt) + random.uniform(0, HTTP_RETRY["jitter_seconds"])
-            
-            time.sleep(sleep_s)
+            _check_backoff(provider, sleep_s, exc)
+            metrics.inc("provider_retries", provider=provider)
+            with tracing.span(f"backoff {provider}", "sleep", seconds=round(sleep_s, 2)):
+                time.sleep(sleep_s)
             
         except (httpx.RequestError, httpx.TimeoutException) as exc:
+            elapsed = time.perf_counter() - started
+            result = "timeout" if isinstance(exc, httpx.TimeoutException) else "network_error"
+            metrics.observe("provider_request_seconds", elapsed, provider=provider)
+            metrics.inc("provider_requests", provider=provider, result=result)
+            tracing.record(f"GET {provider}", "http", started, elapsed, {"path": path, "attempt": attempt, "result": result})
             last_exc = exc
             if attempt == HTTP_RETRY["attempts"] - 1:
+                get_router().record_call(provider, False)
                 raise
             sleep_s = HTTP_RETRY["backoff_seconds"] * (2**attempt) + random.uniform(0, HTTP_RETRY["jitter_seconds"])
-            time.sleep(sleep_s)
+            _check_backoff(provider, sleep_s, exc)
+            metrics.inc("provider_retries", provider=provider)
+            with tracing.span(f"backoff {provider}", "sleep", seconds=round(sleep_s, 2)):
+                time.sleep(sleep_s)
             
     raise last_exc if last_exc else RuntimeError("request failed")
 
 
-def request_json(url: str, params: Optional[dict] = None, timeout: float = 10.0) -> dict:
-    return _request(url, params, timeout).json()
+def request_json(url: str, params: Optional[dict] = None, timeout: float = 10.0,
+                 client: Optional[httpx.Client] = None) -> dict:
+    """GET url as JSON; pass a pooled client to reuse its keep-alive connection."""
+    return _request(url, params, timeout, client).json()
 
 
 def request_text(url: str, params: Optional[dict] = None, timeout: float = 10.0) -> str:
@@ -0,0 +1,125 @@
+"""
+Per-venue market bundles: every Bybit or OKX endpoint a cycle needs, fetched once.
+
+The derivatives, flow and order book collectors each used to call their
+venue separately. That meant tickers and open interest, then the
+account ratio, then the order book once per scored timeframe: a budget
+charge and a fresh TLS connection for every call. Now the first of them to
+need a venue in a cycle fetches that venue's whole bundle, which holds
+every endpoint in VENUES. The requests go back to back over the venue's
+pooled keep-alive connection and are charged to the budget as one call.
+The collectors then parse their snapshots from the shared payloads.
+
+Bundles are single-flight. Concurrent callers wait for the one fetch in
+progress, and later callers reuse its payloads until the bundle is
+max_age_seconds old or the engine starts a new cycle (new_cycle()). An
+endpoint that failed re-raises its error from get(), so the collectors'
+fallback and 403 handling work as before. A venue-wide failure (network,
+timeout, 403/429/5xx, cycle deadline) fails the rest of the bundle at once
+rather than paying each endpoint's retries.
+"""
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+import httpx
+
+from collectors.base import BudgetManager, _is_venue_failure, request_json
+from config import MARKET_BUNDLES
+from core import tracing
+
+VENUES: Dict[str, Dict[str, Tuple[str, Dict[str, Any]]]] = {
+    "bybit": {
+        "tickers": ("https://api.bybit.com/v5/market/tickers", {"category": "linear", "symbol": "BTCUSDT"}),
+        "open_interest": ("https://api.bybit.com/v5/market/open-interest",
+                          {"category": "linear", "symbol": "BTCUSDT", "intervalTime": "5min", "limit": 2}),
+        "account_ratio": ("https://api.bybit.com/v5/market/account-ratio",
+                          {"category": "linear", "symbol": "BTCUSDT", "period": "5min", "limit": 2}),
+        "orderbook": ("https://api.bybit.com/v5/market/orderbook",
+                      {"category": "linear", "symbol": "BTCUSDT", "limit": 200}),
+    },
+    "okx": {
+        "ticker": ("https://www.okx.com/api/v5/market/ticker", {"instId": "BTC-USDT-SWAP"}),
+        "index_ticker": ("https://www.okx.com/api/v5/market/index-tickers", {"instId": "BTC-USDT"}),
+        "funding_rate": ("https://www.okx.com/api/v5/public/funding-rate", {"instId": "BTC-USDT-SWAP"}),
+        "open_interest": ("https://www.okx.com/api/v5/rubik/stat/contracts/open-interest-history",
+                          {"instId": "BTC-USDT-SWAP", "period": "5m", "limit": 2}),
+        "long_short_ratio": ("https://www.okx.com/api/v5/rubik/stat/contracts/long-short-account-ratio",
+                             {"ccy": "BTC", "period": "5m"}),
+        "books": ("https://www.okx.com/api/v5/market/books", {"instId": "BTC-USDT-SWAP", "sz": "200"}),
+    },
+}
+
+_clients: Dict[str, httpx.Client] = {}
+_bundles: Dict[str, "MarketBundle"] = {}
+_lock = threading.Lock()
+
+
+def _client(venue: str) -> httpx.Client:
+    """The venue's long-lived client: one keep-alive connection, reused across bundles."""
+    client = _clients.get(venue)
+    if client is None:
+        client = _clients[venue] = httpx.Client(
+            limits=httpx.Limits(max_connections=1, max_keepalive_connections=1))
+    return client
+
+
+def _endpoint_only(exc: Exception) -> bool:
+    """A 4xx about this one request, as opposed to a venue-wide failure."""
+    return isinstance(exc, httpx.HTTPStatusError) and not _is_venue_failure(exc.response.status_code)
+
+
+class MarketBundle:
+    def __init__(self, venue: str):
+        self.venue = venue
+        self.created = time.monotonic()
+        self.fetched_at: Optional[float] = None
+        self.payloads: Dict[str, Any] = {}
+        self.errors: Dict[str, Exception] = {}
+        self._fetch_lock = threading.Lock()
+
+    def expired(self, max_age_seconds: float) -> bool:
+        return time.monotonic() - self.created > max_age_seconds
+
+    def ensure(self, budget: BudgetManager, timeout: float, client: Optional[httpx.Client] = None) -> None:
+        """Fetch every endpoint once; callers arriving mid-fetch wait for it."""
+        with self._fetch_lock:
+            if self.fetched_at is not None:
+                return
+            budget.record_call(self.venue)
+            with tracing.span(f"bundle {self.venue}", "http", endpoints=len(VENUES[self.venue])):
+                pending = list(VENUES[self.venue].items())
+                while pending:
+                    name, (url, params) = pending.pop(0)
+                    try:
+                        self.payloads[name] = request_json(url, params=params, timeout=timeout, client=client)
+                    except Exception as exc:
+                        self.errors[name] = exc
+                        if not _endpoint_only(exc):
+                            # The venue is down, blocking us or out of time: don't retry it per endpoint
+                            self.errors.update((rest, exc) for rest, _ in pending)
+                            pending = []
+            self.fetched_at = time.time()
+
+    def get(self, name: str) -> Any:
+        """The endpoint's payload, or its fetch error re-raised."""
+        if name in self.errors:
+            raise self.errors[name]
+        return self.payloads[name]
+
+
+def market_bundle(venue: str, budget: BudgetManager, timeout: float = 10.0) -> MarketBundle:
+    """This cycle's bundle for venue, fetched on first use (single-flight)."""
+    with _lock:
+        bundle = _bundles.get(venue)
+        if bundle is None or bundle.expired(MARKET_BUNDLES["max_age_seconds"]):
+            bundle = _bundles[venue] = MarketBundle(venue)
+        client = _client(venue)
+    bundle.ensure(budget, timeout, client)
+    return bundle
+
+
+def new_cycle() -> None:
+    """Drop the previous cycle's bundles so the next caller fetches fresh ones."""
+    with _lock:
+        _bundles.clear()
@@ -1,8 +1,11 @@
 import logging
+import time
 from dataclasses import dataclass, field
 from typing import Dict
 
 from collectors.base import BudgetManager, request_json
+from collectors.bundle import market_bundle
+from collectors.router import get_router
 
 logger = logging.getLogger(__name__)
 
@@ -24,12 +27,8 @@ def _safe_pct_change(old: float, new: float) -> float:
 
 
 def _fetch_bybit(budget: BudgetManager, timeout: float) -> DerivativesSnapshot:
-    budget.record_call("bybit")
-    ticker_payload = request_json(
-        "https://api.bybit.com/v5/market/tickers",
-        params={"category": "linear", "symbol": "BTCUSDT"},
-        timeout=timeout,
-    )
+    bundle = market_bundle("bybit", budget, timeout)
+    ticker_payload = bundle.get("tickers")
     ticker_rows = ticker_payload.get("result", {}).get("list", [])
     if not ticker_rows:
         return DerivativesSnapshot(0.0, 0.0, 0.0, source="bybit", healthy=False, meta={"provider": "bybit"})
@@ -39,12 +38,7 @@ def _fetch_bybit(budget: BudgetManager, timeout: float) -> DerivativesSnapshot:
     index = float(row.get("indexPrice", 0.0))
     basis_pct = ((mark - index) / index) * 100.0 if index else 0.0
 
-    budget.record_call("bybit")
-    oi_payload = request_json(
-        "https://api.bybit.com/v5/market/open-interest",
-        params={"category": "linear", "symbol": "BTCUSDT", "intervalTime": "5min", "limit": 2},
-        timeout=timeout,
-    )
+    oi_payload = bundle.get("open_interest")
     oi_rows = oi_payload.get("result", {}).get("list", [])
     if len(oi_rows) < 2:
         return DerivativesSnapshot(float(row.get("fundingRate", 0.0)), 0.0, basis_pct, source="bybit", healthy=True, meta={"provider": "bybit"})
@@ -62,12 +56,8 @@ def _fetch_bybit(budget: BudgetManager, timeout: float) -> DerivativesSnapshot:
 
 
 def _fetch_okx(budget: BudgetManager, timeout: float) -> DerivativesSnapshot:
-    budget.record_call("okx")
-    ticker_payload = request_json(
-        "https://www.okx.com/api/v5/market/ticker",
-        params={"instId": "BTC-USDT-SWAP"},
-        timeout=timeout,
-    )
+    bundle = market_bundle("okx", budget, timeout)
+    ticker_payload = bundle.get("ticker")
     rows = ticker_payload.get("data", [])
     if not rows:
         return DerivativesSnapshot(0.0, 0.0, 0.0, source="okx", healthy=False, meta={"provider": "okx"})
@@ -75,36 +65,21 @@ def _fetch_okx(budget: BudgetManager, timeout: float) -> DerivativesSnapshot:
     row = rows[0]
     mark = float(row.get("last", 0.0))
 
-    budget.record_call("okx")
-    index_payload = request_json(
-        "https://www.okx.com/api/v5/market/index-tickers",
-        params={"instId": "BTC-USDT"},
-        timeout=timeout,
-    )
+    index_payload = bundle.get("index_ticker")
     idx_rows = index_payload.get("data", [])
     index = float(idx_rows[0].get("idxPx", 0.0)) if idx_rows else 0.0
 
     # Fetch REAL funding rate from OKX
     funding_rate = 0.0
     try:
-        budget.record_call("okx")
-        fr_payload = request_json(
-            "https://www.okx.com/api/v5/public/funding-rate",
-            params={"instId": "BTC-USDT-SWAP"},
-            timeout=timeout,
-        )
+        fr_payload = bundle.get("funding_rate")
         fr_rows = fr_payload.get("data", [])
         if fr_rows:
             funding_rate = float(fr_rows[0].get("fundingRate", 0.0))
     except Exception:
         pass
 
-    budget.record_call("okx")
-    oi_payload = request_json(
-        "https://www.okx.com/api/v5/rubik/stat/contracts/open-interest-history",
-        params={"instId": "BTC-USDT-SWAP", "period": "5m", "limit": 2},
-        timeout=timeout,
-    )
+    oi_payload = bundle.get("open_interest")
     oi_rows = oi_payload.get("data", [])
     basis_pct = ((mark - index) / index) * 100.0 if index else 0.0
 
@@ -145,20 +120,24 @@ def _fetch_bitunix(budget: BudgetManager, timeout: float) -> DerivativesSnapshot
 
 
 def fetch_derivatives_context(budget: BudgetManager, timeout: float = 10.0) -> DerivativesSnapshot:
-    """Provider chain: Bybit → OKX → Bitunix → unhealthy fallback."""
-    providers = [
-        ("bybit", lambda: _fetch_bybit(budget, timeout)),
-        ("okx", lambda: _fetch_okx(budget, timeout)),
-        ("bitunix", lambda: _fetch_bitunix(budget, timeout)),
-    ]
-    for name, fetcher in providers:
+    """Provider chain in router order (static: Bybit → OKX → Bitunix) → unhealthy fallback."""
+    providers = {
+        "bybit": lambda: _fetch_bybit(budget, timeout),
+        "okx": lambda: _fetch_okx(budget, timeout),
+        "bitunix": lambda: _fetch_bitunix(budget, timeout),
+    }
+    router = get_router()
+    for name in router.order("derivatives", list(providers)):
         if not budget.can_call(name):
             continue
+        started = time.perf_counter()
         try:
-            result = fetcher()
+            result = providers[name]()
+            router.record("derivatives", name, result.healthy, time.perf_counter() - started)
             if result.healthy:
                 return result
         except Exception as e:
+            router.record("derivatives", name, False, time.perf_counter() - started)
             logger.warning(f"Derivatives provider {name} failed: {e}")
             if "403" in str(e):
                 budget.mark_source_broken(name)
@@ -1,9 +1,12 @@
 import logging
+import time
 from dataclasses import dataclass, field
 from datetime import datetime
 from typing import Dict
 
-from collectors.base import BudgetManager, request_json
+from collectors.base import BudgetManager
+from collectors.bundle import market_bundle
+from collectors.router import get_router
 
 logger = logging.getLogger(__name__)
 
@@ -19,12 +22,7 @@ class FlowSnapshot:
 
 
 def _fetch_bybit_flow(budget: BudgetManager, timeout: float) -> FlowSnapshot:
-    budget.record_call("bybit")
-    payload = request_json(
-        "https://api.bybit.com/v5/market/account-ratio",
-        params={"category": "linear", "symbol": "BTCUSDT", "period": "5min", "limit": 2},
-        timeout=timeout,
-    )
+    payload = market_bundle("bybit", budget, timeout).get("account_ratio")
     rows = payload.get("result", {}).get("list", [])
     if not rows:
         return FlowSnapshot(1.0, 1.0, 0.0, healthy=False, source="bybit", meta={"provider": "bybit"})
@@ -41,12 +39,7 @@ def _fetch_bybit_flow(budget: BudgetManager, timeout: float) -> FlowSnapshot:
 
 
 def _fetch_okx_flow(budget: BudgetManager, timeout: float) -> FlowSnapshot:
-    budget.record_call("okx")
-    payload = request_json(
-        "https://www.okx.com/api/v5/rubik/stat/contracts/long-short-account-ratio",
-        params={"ccy": "BTC", "period": "5m"},
-        timeout=timeout,
-    )
+    payload = market_bundle("okx", budget, timeout).get("long_short_ratio")
     rows = payload.get("data", [])
     if not rows:
         return FlowSnapshot(1.0, 1.0, 0.0, healthy=False, source="okx", meta={"provider": "okx"})
@@ -65,19 +58,23 @@ def _fetch_okx_flow(budget: BudgetManager, timeout: float) -> FlowSnapshot:
 
 
 def fetch_flow_context(budget: BudgetManager, timeout: float = 10.0) -> FlowSnapshot:
-    """Provider chain: Bybit → OKX → unhealthy fallback."""
-    providers = [
-        ("bybit", lambda: _fetch_bybit_flow(budget, timeout)),
-        ("okx", lambda: _fetch_okx_flow(budget, timeout)),
-    ]
-    for name, fetcher in providers:
+    """Provider chain in router order (static: Bybit → OKX) → unhealthy fallback."""
+    providers = {
+        "bybit": lambda: _fetch_bybit_flow(budget, timeout),
+        "okx": lambda: _fetch_okx_flow(budget, timeout),
+    }
+    router = get_router()
+    for name in router.order("flows", list(providers)):
         if not budget.can_call(name):
             continue
+        started = time.perf_counter()
         try:
-            result = fetcher()
+            result = providers[name]()
+            router.record("flows", name, result.healthy, time.perf_counter() - started)
             if result.healthy:
                 return result
         except Exception as e:
+            router.record("flows", name, False, time.perf_counter() - started)
             logger.warning(f"Flow provider {name} failed: {e}")
             if "403" in str(e):
                 budget.mark_source_broken(name)
@@ -1,7 +1,15 @@
 from dataclasses import dataclass, field
-from typing import List, Tuple, Dict, Any
+from typing import List, Optional, Tuple, Dict, Any
 from datetime import datetime
+import logging
 import math
+import time
+
+from collectors.base import request_json
+from collectors.bundle import market_bundle
+from collectors.router import get_router
+
+logger = logging.getLogger(__name__)
 
 @dataclass
 class OrderBookSnapshot:
@@ -20,69 +28,70 @@ class OrderBookSnapshot:
             self.mid_price = 0.0 # Or handle as error
             self.healthy = False
 
-def fetch_orderbook(budget_manager) -> OrderBookSnapshot:
-    """Provider chain: Bybit → OKX → Bitunix → unhealthy fallback."""
-    from collectors.base import request_json
-    import logging
-    _logger = logging.getLogger(__name__)
+def _fetch_bybit_book(budget_manager) -> Optional[OrderBookSnapshot]:
+    payload = market_bundle("bybit", budget_manager).get("orderbook")
+    result = payload.get("result", {})
+    bids = [(float(p), float(q)) for p, q in result.get("b", [])]
+    asks = [(float(p), float(q)) for p, q in result.get("a", [])]
+    if bids and asks:
+        ts_ms = payload.get("time", int(datetime.now().timestamp() * 1000))
+        return OrderBookSnapshot(ts=int(ts_ms / 1000), bids=bids, asks=asks)
+    return None
 
-    # Provider 1: Bybit
-    if budget_manager and budget_manager.can_call("bybit"):
-        try:
-            budget_manager.record_call("bybit")
-            payload = request_json(
-                "https://api.bybit.com/v5/market/orderbook",
-                params={"category": "linear", "symbol": "BTCUSDT", "limit": 200},
-                timeout=5.0
-            )
-            result = payload.get("result", {})
-            bids = [(float(p), float(q)) for p, q in result.get("b", [])]
-            asks = [(float(p), float(q)) for p, q in result.get("a", [])]
-            if bids and asks:
-                ts_ms = payload.get("time", int(datetime.now().timestamp() * 1000))
-                return OrderBookSnapshot(ts=int(ts_ms / 1000), bids=bids, asks=asks)
-        except Exception as e:
-            _logger.warning("Bybit orderbook failed: %s", e)
-            if "403" in str(e) and budget_manager:
-                budget_manager.mark_source_broken("bybit")
 
-    # Provider 2: OKX
-    if budget_manager and budget_manager.can_call("okx"):
-        try:
-            budget_manager.record_call("okx")
-            payload = request_json(
-                "https://www.okx.com/api/v5/market/books",
-                params={"instId": "BTC-USDT-SWAP", "sz": "200"},
-                timeout=5.0
-            )
-            data_list = payload.get("data", [])
-            if data_list:
-                book = data_list[0]
-                bids = [(float(row[0]), float(row[1])) for row in book.get("bids", [])]
-                asks = [(float(row[0]), float(row[1])) for row in book.get("asks", [])]
-                if bids and asks:
-                    ts_ms = int(book.get("ts", datetime.now().timestamp() * 1000))
-                    return OrderBookSnapshot(ts=int(ts_ms / 1000), bids=bids, asks=asks)
-        except Exception as e:
-            _logger.warning("OKX orderbook failed: %s", e)
+def _fetch_okx_book(budget_manager) -> Optional[OrderBookSnapshot]:
+    payload = market_bundle("okx", budget_manager).get("books")
+    data_list = payload.get("data", [])
+    if data_list:
+        book = data_list[0]
+        bids = [(float(row[0]), float(row[1])) for row in book.get("bids", [])]
+        asks = [(float(row[0]), float(row[1])) for row in book.get("asks", [])]
+        if bids and asks:
+            ts_ms = int(book.get("ts", datetime.now().timestamp() * 1000))
+            return OrderBookSnapshot(ts=int(ts_ms / 1000), bids=bids, asks=asks)
+    return None
+
 
-    # Provider 3: Bitunix
-    if budget_manager and budget_manager.can_call("bitunix"):
+def _fetch_bitunix_book(budget_manager) -> Optional[OrderBookSnapshot]:
+    budget_manager.record_call("bitunix")
+    payload = request_json(
+        "https://fapi.bitunix.com/api/v1/futures/market/depth",
+        params={"symbol": "BTCUSDT", "limit": "50"},
+        timeout=5.0
+    )
+    if payload.get("code") == 0 and payload.get("data"):
+        data = payload["data"]
+        bids = [(float(row[0]), float(row[1])) for row in data.get("bids", [])]
+        asks = [(float(row[0]), float(row[1])) for row in data.get("asks", [])]
+        if bids and asks:
+            return OrderBookSnapshot(ts=int(datetime.now().timestamp()), bids=bids, asks=asks)
+    return None
+
+
+_BOOK_PROVIDERS = {"bybit": _fetch_bybit_book, "okx": _fetch_okx_book, "bitunix": _fetch_bitunix_book}
+
+
+def fetch_orderbook(budget_manager) -> OrderBookSnapshot:
+    """Provider chain in router order (static: Bybit → OKX → Bitunix) → unhealthy fallback.
+
+    Bybit and OKX books come from the venue's market bundle, so the three
+    per-timeframe calls in a cycle cost one fetch.
+    """
+    router = get_router()
+    for name in router.order("orderbook", list(_BOOK_PROVIDERS)):
+        if not (budget_manager and budget_manager.can_call(name)):
+            continue
+        started = time.perf_counter()
         try:
-            budget_manager.record_call("bitunix")
-            payload = request_json(
-                "https://fapi.bitunix.com/api/v1/futures/market/depth",
-                params={"symbol": "BTCUSDT", "limit": "50"},
-                timeout=5.0
-            )
-            if payload.get("code") == 0 and payload.get("data"):
-                data = payload["data"]
-                bids = [(float(row[0]), float(row[1])) for row in data.get("bids", [])]
-                asks = [(float(row[0]), float(row[1])) for row in data.get("asks", [])]
-                if bids and asks:
-                    return OrderBookSnapshot(ts=int(datetime.now().timestamp()), bids=bids, asks=asks)
+            snapshot = _BOOK_PROVIDERS[name](budget_manager)
+            router.record("orderbook", name, snapshot is not None, time.perf_counter() - started)
+            if snapshot is not None:
+                return snapshot
         except Exception as e:
-            _logger.warning("Bitunix orderbook failed: %s", e)
+            router.record("orderbook", name, False, time.perf_counter() - started)
+            logger.warning("%s orderbook failed: %s", name.capitalize(), e)
+            if "403" in str(e):
+                budget_manager.mark_source_broken(name)
 
     return OrderBookSnapshot(ts=int(datetime.now().timestamp()), bids=[], asks=[], healthy=False)
 
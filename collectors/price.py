@@ -4,7 +4,8 @@ import time
 from dataclasses import dataclass, field
 from typing import Dict, List, Tuple
 
-from collectors.base import BudgetManager, request_json
+from collectors.base import BudgetManager, deadline_timeout, request_json
+from collectors.router import get_router
 from utils import Candle
 
 
@@ -53,51 +54,82 @@ def _fetch_bitstamp_price(budget: BudgetManager, timeout: float) -> PriceSnapsho
         logging.error(f"Bitstamp price fetch failed: {exc}")
         return PriceSnapshot(0.0, time.time(), source="bitstamp", healthy=False, meta={"provider": "bitstamp"})
 
+def _fetch_kraken_price(budget: BudgetManager, timeout: float) -> PriceSnapshot:
+    if not budget.can_call("kraken"):
+        return PriceSnapshot(0.0, time.time(), source="kraken", healthy=False, meta={"provider": "kraken"})
+    try:
+        budget.record_call("kraken")
+        payload = request_json("https://api.kraken.com/0/public/Ticker", params={"pair": "XXBTZUSD"}, timeout=timeout)
+        price = float(payload["result"]["XXBTZUSD"]["c"][0])
+        return PriceSnapshot(price, time.time(), source="kraken", meta={"provider": "kraken"})
+    except Exception as exc:
+        logging.error(f"Kraken price fetch failed: {exc}")
+        return PriceSnapshot(0.0, time.time(), source="kraken", healthy=False, meta={"provider": "kraken"})
+
+
+def _fetch_coingecko_price(budget: BudgetManager, timeout: float) -> PriceSnapshot:
+    if not budget.can_call("coingecko"):
+        return PriceSnapshot(0.0, time.time(), source="coingecko", healthy=False, meta={"provider": "coingecko"})
+    try:
+        budget.record_call("coingecko")
+        payload = request_json(
+            "https://api.coingecko.com/api/v3/simple/price",
+            params={"ids": "bitcoin", "vs_currencies": "usd"},
+            timeout=timeout,
+        )
+        return PriceSnapshot(float(payload["bitcoin"]["usd"]), time.time(), source="coingecko", meta={"provider": "coingecko"})
+    except Exception as exc:
+        logging.error(f"CoinGecko price fetch failed: {exc}")
+        return PriceSnapshot(0.0, time.time(), source="coingecko", healthy=False, meta={"provider": "coingecko"})
+
+
+def _fetch_freecryptoapi_price(budget: BudgetManager, timeout: float) -> PriceSnapshot:
+    token = os.getenv("FREECRYPTOAPI_TOKEN", "").strip()
+    if not token or not budget.can_call("freecryptoapi"):
+        return PriceSnapshot(0.0, time.time(), source="freecryptoapi", healthy=False, meta={"provider": "freecryptoapi"})
+    try:
+        budget.record_call("freecryptoapi")
+        import httpx
+        resp = httpx.get(
+            "https://api.freecryptoapi.com/v1/getData",
+            params={"symbol": "BTC"},
+            headers={"Authorization": f"Bearer {token}"},
+            timeout=deadline_timeout(timeout, "GET freecryptoapi"),
+        )
+        resp.raise_for_status()
+        payload = resp.json()
+        if payload.get("status") == "success" and payload.get("symbols"):
+            price = float(payload["symbols"][0]["last"])
+            return PriceSnapshot(price, time.time(), source="freecryptoapi", meta={"provider": "freecryptoapi"})
+    except Exception as exc:
+        logging.error(f"FreeCryptoAPI price fetch failed: {exc}")
+    return PriceSnapshot(0.0, time.time(), source="freecryptoapi", healthy=False, meta={"provider": "freecryptoapi"})
+
+
+_PRICE_PROVIDERS = {
+    "kraken": _fetch_kraken_price,
+    "coingecko": _fetch_coingecko_price,
+    "freecryptoapi": _fetch_freecryptoapi_price,
+    "binance": _fetch_binance_price,
+    "coinbase": _fetch_coinbase_price,
+    "bitstamp": _fetch_bitstamp_price,
+}
+
+
 def fetch_btc_price(budget: BudgetManager, timeout: float = 10.0) -> PriceSnapshot:
-    if budget.can_call("kraken"):
-        try:
-            budget.record_call("kraken")
-            payload = request_json("https://api.kraken.com/0/public/Ticker", params={"pair": "XXBTZUSD"}, timeout=timeout)
-            price = float(payload["result"]["XXBTZUSD"]["c"][0])
-            return PriceSnapshot(price, time.time(), source="kraken", meta={"provider": "kraken"})
-        except Exception as exc:
-            logging.error(f"Kraken price fetch failed: {exc}")
-
-    if budget.can_call("coingecko"):
-        try:
-            budget.record_call("coingecko")
-            payload = request_json(
-                "https://api.coingecko.com/api/v3/simple/price",
-                params={"ids": "bitcoin", "vs_currencies": "usd"},
-                timeout=timeout,
-            )
-            return PriceSnapshot(float(payload["bitcoin"]["usd"]), time.time(), source="coingecko", meta={"provider": "coingecko"})
-        except Exception as exc:
-            logging.error(f"CoinGecko price fetch failed: {exc}")
-
-    if budget.can_call("freecryptoapi"):
-        try:
-            token = os.getenv("FREECRYPTOAPI_TOKEN", "").strip()
-            if token:
-                budget.record_call("freecryptoapi")
-                import httpx
-                resp = httpx.get(
-                    "https://api.freecryptoapi.com/v1/getData",
-                    params={"symbol": "BTC"},
-                    headers={"Authorization": f"Bearer {token}"},
-                    timeout=timeout,
-                )
-                resp.raise_for_status()
-                payload = resp.json()
-                if payload.get("status") == "success" and payload.get("symbols"):
-                    price = float(payload["symbols"][0]["last"])
-                    return PriceSnapshot(price, time.time(), source="freecryptoapi", meta={"provider": "freecryptoapi"})
-        except Exception as exc:
-            logging.error(f"FreeCryptoAPI price fetch failed: {exc}")
-
-    for provider in (_fetch_binance_price, _fetch_coinbase_price, _fetch_bitstamp_price):
-        snap = provider(budget, timeout)
-        if snap.healthy and snap.price > 0:
+    """Provider chain in router order (static: Kraken → CoinGecko → FreeCryptoAPI → Binance → Coinbase → Bitstamp)."""
+    providers = dict(_PRICE_PROVIDERS)
+    if not os.getenv("FREECRYPTOAPI_TOKEN", "").strip():
+        del providers["freecryptoapi"]
+    router = get_router()
+    for name in router.order("price", list(providers)):
+        if not budget.can_call(name):
+            continue
+        started = time.perf_counter()
+        snap = providers[name](budget, timeout)
+        ok = snap.healthy and snap.price > 0
+        router.record("price", name, ok, time.perf_counter() - started)
+        if ok:
             return snap
 
     return PriceSnapshot(0.0, time.time(), source="none", healthy=False, meta={"provider": "none"})
@@ -203,25 +235,34 @@ def _fetch_bitstamp_ohlc(budget: BudgetManager, step: int, limit: int) -> List[C
 
 
 def fetch_btc_multi_timeframe_candles(budget: BudgetManager, limit: int = 120) -> Dict[str, List[Candle]]:
+    """Each timeframe from the first provider in router order (static: Kraken → Bybit → Binance → Coinbase → Bitstamp)."""
     frames = {
         "5m": {"kraken": 5, "bybit": "5", "binance": "5m", "coinbase": 300, "bitstamp": 300},
         "15m": {"kraken": 15, "bybit": "15", "binance": "15m", "coinbase": 900, "bitstamp": 900},
         "1h": {"kraken": 60, "bybit": "60", "binance": "1h", "coinbase": 3600, "bitstamp": 3600},
         "4h": {"kraken": 240, "bybit": "240", "binance": "4h", "coinbase": 14400, "bitstamp": 14400},
     }
+    fetchers = {
+        "kraken": lambda m: _fetch_kraken_ohlc(budget, interval=m["kraken"], limit=limit),
+        "bybit": lambda m: _fetch_bybit_ohlc(budget, interval=m["bybit"], limit=limit),
+        "binance": lambda m: _fetch_binance_ohlc(budget, interval=m["binance"], limit=limit),
+        "coinbase": lambda m: _fetch_coinbase_ohlc(budget, granularity=m["coinbase"], limit=limit),
+        "bitstamp": lambda m: _fetch_bitstamp_ohlc(budget, step=m["bitstamp"], limit=limit),
+    }
+    router = get_router()
     out = {}
     for label, m in frames.items():
         if out:
             time.sleep(1.0)
-        candles = _fetch_kraken_ohlc(budget, interval=m["kraken"], limit=limit)
-        if not candles:
-            candles = _fetch_bybit_ohlc(budget, interval=m["bybit"], limit=limit)
-        if not candles:
-            candles = _fetch_binance_ohlc(budget, interval=m["binance"], limit=limit)
-        if not candles:
-            candles = _fetch_coinbase_ohlc(budget, granularity=m["coinbase"], limit=limit)
-        if not candles:
-            candles = _fetch_bitstamp_ohlc(budget, step=m["bitstamp"], limit=limit)
+        candles = []
+        for name in router.order("candles", list(fetchers)):
+            if not budget.can_call(name):
+                continue
+            started = time.perf_counter()
+            candles = fetchers[name](m)
+            router.record("candles", name, bool(candles), time.perf_counter() - started)
+            if candles:
+                break
         out[label] = candles
     return out
 
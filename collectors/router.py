@@ -0,0 +1,222 @@
+"""
+Latency- and reliability-aware ordering of provider fallback chains.
+
+Each chain (price, candles, derivatives, flows, orderbook) asks the router
+for its provider order instead of walking a hard-coded list:
+
+    for name in router.order("derivatives", ["bybit", "okx", "bitunix"]):
+        ...
+        router.record("derivatives", name, ok, seconds)
+
+Per (endpoint, provider) the router keeps an EWMA of attempt latency and of
+success. Providers are ranked by expected seconds to a good answer,
+latency / success, where a failed attempt counts at least
+failure_penalty_seconds. Providers with no history rank at
+prior_latency_seconds and keep their listed order among themselves, so the
+static order remains the cold-start default.
+
+A provider that has not been tried on an endpoint for probe_interval_seconds
+is moved to the front once, so a venue that was demoted gets the chance to
+earn its place back. This costs at most one call per provider per interval.
+
+Per provider (venue), a circuit breaker fed by every HTTP attempt in
+collectors.base._request opens after failure_threshold consecutive
+failures, or at once on mark_source_broken() (403s). While it is open,
+BudgetManager.can_call() refuses the provider and the router ranks it last.
+After the cool-down it goes half-open and the router probes it first: one
+success closes it, one failure re-opens it for twice as long (up to
+max_open_seconds).
+
+table() is the routing table for monitoring. The engine saves it to
+data/routing.json each cycle and the dashboard server serves it on
+/api/routing.
+"""
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+from config import ROUTING
+from core import metrics
+
+DEFAULT_TABLE_PATH = Path("data/routing.json")
+
+
+class CircuitBreaker:
+    """closed -> open (after repeated failures) -> half_open (after the cool-down) -> closed or open."""
+
+    def __init__(self, failure_threshold: int, open_seconds: float, max_open_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.base_open_seconds = open_seconds
+        self.max_open_seconds = max_open_seconds
+        self.open_seconds = open_seconds
+        self.failures = 0
+        self.opened_until = 0.0
+        self.tripped = False
+
+    @property
+    def state(self) -> str:
+        if not self.tripped:
+            return "closed"
+        return "open" if time.time() < self.opened_until else "half_open"
+
+    def allow(self) -> bool:
+        return self.state != "open"
+
+    def trip(self, seconds: Optional[float] = None) -> None:
+        self.tripped = True
+        self.opened_until = time.time() + (self.open_seconds if seconds is None else seconds)
+
+    def record(self, ok: bool) -> bool:
+        """Feed one attempt's outcome; returns True if this opened the breaker."""
+        if ok:
+            self.failures = 0
+            self.tripped = False
+            self.open_seconds = self.base_open_seconds
+            return False
+        self.failures += 1
+        if self.tripped and self.state == "half_open":
+            self.open_seconds = min(self.open_seconds * 2, self.max_open_seconds)
+            self.trip()
+            return True
+        if not self.tripped and self.failures >= self.failure_threshold:
+            self.trip()
+            return True
+        return False
+
+
+class _RouteStats:
+    __slots__ = ("latency", "success", "attempts", "failures", "last_tried")
+
+    def __init__(self, prior_latency: float, created: float):
+        self.latency = prior_latency
+        self.success = 1.0
+        self.attempts = 0
+        self.failures = 0
+        self.last_tried = created  # probing starts one interval after start-up
+
+
+class ProviderRouter:
+    def __init__(self, ewma_alpha: float = 0.2, probe_interval_seconds: float = 900.0,
+                 failure_threshold: int = 3, open_seconds: float = 60.0, max_open_seconds: float = 900.0,
+                 failure_penalty_seconds: float = 5.0, prior_latency_seconds: float = 1.0):
+        self.alpha = ewma_alpha
+        self.probe_interval = probe_interval_seconds
+        self.failure_threshold = failure_threshold
+        self.open_seconds = open_seconds
+        self.max_open_seconds = max_open_seconds
+        self.failure_penalty = failure_penalty_seconds
+        self.prior_latency = prior_latency_seconds
+        self._stats: Dict[Tuple[str, str], _RouteStats] = {}
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def _route(self, endpoint: str, provider: str) -> _RouteStats:
+        stats = self._stats.get((endpoint, provider))
+        if stats is None:
+            stats = self._stats[(endpoint, provider)] = _RouteStats(self.prior_latency, time.time())
+        return stats
+
+    def _breaker(self, provider: str) -> CircuitBreaker:
+        breaker = self._breakers.get(provider)
+        if breaker is None:
+            breaker = self._breakers[provider] = CircuitBreaker(
+                self.failure_threshold, self.open_seconds, self.max_open_seconds)
+        return breaker
+
+    @staticmethod
+    def _cost(stats: _RouteStats) -> float:
+        return stats.latency / max(stats.success, 0.05)
+
+    def order(self, endpoint: str, providers: Sequence[str]) -> List[str]:
+        """providers in the order to try them for endpoint; a due probe or half-open provider goes first."""
+        now = time.time()
+        with self._lock:
+            stats = {p: self._route(endpoint, p) for p in providers}
+            states = {p: self._breaker(p).state for p in providers}
+            ranked = sorted(providers, key=lambda p: (states[p] == "open", self._cost(stats[p])))
+            due = [p for p in ranked[1:] if states[p] == "half_open"
+                   or (states[p] == "closed" and now - stats[p].last_tried >= self.probe_interval)]
+        if due:
+            probe = min(due, key=lambda p: (states[p] != "half_open", stats[p].last_tried))
+            ranked.remove(probe)
+            ranked.insert(0, probe)
+            metrics.inc("provider_probes", endpoint=endpoint, provider=probe)
+        return ranked
+
+    def record(self, endpoint: str, provider: str, ok: bool, seconds: float) -> None:
+        """One provider attempt on a chain: ok means it produced a usable result."""
+        with self._lock:
+            stats = self._route(endpoint, provider)
+            cost = seconds if ok else max(seconds, self.failure_penalty)
+            stats.latency += self.alpha * (cost - stats.latency)
+            stats.success += self.alpha * ((1.0 if ok else 0.0) - stats.success)
+            stats.attempts += 1
+            stats.failures += 0 if ok else 1
+            stats.last_tried = time.time()
+
+    def allow(self, provider: str) -> bool:
+        """False while the provider's circuit breaker is open."""
+        with self._lock:
+            return self._breaker(provider).allow()
+
+    def record_call(self, provider: str, ok: bool) -> None:
+        """Outcome of one upstream HTTP request (after its retries), for the provider's breaker."""
+        with self._lock:
+            opened = self._breaker(provider).record(ok)
+        if opened:
+            metrics.inc("provider_breaker_opened", provider=provider)
+
+    def trip(self, provider: str, seconds: Optional[float] = None) -> None:
+        """Open the provider's breaker now, e.g. on a 403 from a geo-block."""
+        with self._lock:
+            self._breaker(provider).trip(seconds)
+        metrics.inc("provider_breaker_opened", provider=provider)
+
+    def table(self) -> Dict[str, Any]:
+        """Routing state for monitoring: ranked routes per endpoint and every breaker."""
+        now = time.time()
+        with self._lock:
+            endpoints: Dict[str, List[Dict[str, Any]]] = {}
+            for (endpoint, provider), stats in self._stats.items():
+                endpoints.setdefault(endpoint, []).append({
+                    "provider": provider,
+                    "latency_s": round(stats.latency, 3),
+                    "success": round(stats.success, 3),
+                    "cost_s": round(self._cost(stats), 3),
+                    "attempts": stats.attempts,
+                    "failures": stats.failures,
+                    "idle_s": round(now - stats.last_tried, 1),
+                    "breaker": self._breaker(provider).state,
+                })
+            breakers = {
+                provider: {"state": b.state, "failures": b.failures,
+                           "open_for_s": round(max(0.0, b.opened_until - now), 1) if b.tripped else 0.0}
+                for provider, b in self._breakers.items()
+            }
+        for routes in endpoints.values():
+            routes.sort(key=lambda r: (r["breaker"] == "open", r["cost_s"]))
+        return {"ts": now, "endpoints": endpoints, "breakers": breakers}
+
+    def save(self, path: Union[str, Path] = DEFAULT_TABLE_PATH) -> None:
+        """Write table() atomically, for the dashboard server's /api/routing."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(self.table(), separators=(",", ":")), encoding="utf-8")
+        os.replace(tmp, path)
+
+
+_router: Optional[ProviderRouter] = None
+_router_lock = threading.Lock()
+
+
+def get_router() -> ProviderRouter:
+    """The process-wide router, configured from config.ROUTING."""
+    global _router
+    with _router_lock:
+        if _router is None:
+            _router = ProviderRouter(**ROUTING)
+        return _router
@@ -0,0 +1,269 @@
+"""
+Shared collector daemon: one process owns the upstream connections, the
+rate-limit budget and the provider router, and serves timestamped snapshots
+to every consumer over local HTTP.
+
+    python -m collectors.service [--host 127.0.0.1] [--port 8787]
+
+    GET /snapshot/<source>[?max_age=<s>]   {"source", "ts", "ok", "age", "data"}
+    GET /health                            per-source age, budget use, routing table
+    GET /metrics                           OpenMetrics text of the daemon's registry
+
+Sources are those in SOURCES: price, candles, spx, macro, derivatives, flows,
+fear_greed, news and orderbook. A read that finds its source older than
+max_age refreshes it upstream first. max_age is never below the source's
+min_refresh_seconds, and concurrent reads of a stale source wait for that one
+refresh. Upstream traffic is therefore capped per source per interval, however
+many engines, dashboards and tools are reading.
+
+Consumers call collect(source, budget). It reads from the daemon when one is
+listening and otherwise runs the collector in-process with the caller's
+budget, exactly as before. The engine, dashboard and tools therefore work the
+same with or without the daemon.
+"""
+import argparse
+import json
+import logging
+import threading
+import time
+from dataclasses import asdict, is_dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+import httpx
+
+from collectors.base import BudgetManager, deadline_timeout
+from collectors.derivatives import DerivativesSnapshot, fetch_derivatives_context
+from collectors.flows import FlowSnapshot, fetch_flow_context
+from collectors.orderbook import OrderBookSnapshot, fetch_orderbook
+from collectors.price import (
+    PriceSnapshot,
+    fetch_btc_multi_timeframe_candles,
+    fetch_btc_price,
+    fetch_macro_context,
+    fetch_spx_multi_timeframe_bundle,
+)
+from collectors.router import get_router
+from collectors.social import FearGreedSnapshot, Headline, fetch_fear_greed, fetch_news
+from config import COLLECTOR_SERVICE
+from core import metrics
+from utils import Candle
+
+logger = logging.getLogger(__name__)
+
+
+RETRY_SECONDS = 5.0  # how long a failed (unhealthy or empty) result stands before a read retries it
+
+
+class ServiceUnavailable(ConnectionError):
+    """No collector daemon is listening."""
+
+
+def _encode(value: Any) -> Any:
+    if is_dataclass(value):
+        return asdict(value)
+    if isinstance(value, dict):
+        return {k: _encode(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_encode(v) for v in value]
+    return value
+
+
+def _usable(value: Any) -> bool:
+    if getattr(value, "healthy", True) is False:
+        return False
+    if isinstance(value, tuple):
+        return bool(value and value[0])
+    if isinstance(value, dict):
+        return any(value.values())
+    return not isinstance(value, list) or bool(value)
+
+
+def _candle_map(data: Dict[str, list]) -> Dict[str, list]:
+    return {k: [Candle(**c) for c in rows] for k, rows in data.items()}
+
+
+def _orderbook(data: Dict[str, Any]) -> OrderBookSnapshot:
+    book = OrderBookSnapshot(ts=data["ts"], bids=[tuple(l) for l in data["bids"]], asks=[tuple(l) for l in data["asks"]])
+    book.healthy = book.healthy and data.get("healthy", True)
+    return book
+
+
+# source -> (in-process collector(budget, **kwargs), decoder of the served JSON)
+SOURCES: Dict[str, Tuple[Callable[..., Any], Callable[[Any], Any]]] = {
+    "price": (fetch_btc_price, lambda d: PriceSnapshot(**d)),
+    "candles": (fetch_btc_multi_timeframe_candles, _candle_map),
+    "spx": (fetch_spx_multi_timeframe_bundle, lambda d: (_candle_map(d[0]), d[1])),
+    "macro": (fetch_macro_context, _candle_map),
+    "derivatives": (fetch_derivatives_context, lambda d: DerivativesSnapshot(**d)),
+    "flows": (fetch_flow_context, lambda d: FlowSnapshot(**d)),
+    "fear_greed": (fetch_fear_greed, lambda d: FearGreedSnapshot(**d)),
+    "news": (fetch_news, lambda d: [Headline(**h) for h in d]),
+    "orderbook": (fetch_orderbook, _orderbook),
+}
+
+
+class CollectorService:
+    """The daemon's snapshot cache: read-through, refreshed at most once per source interval."""
+
+    def __init__(self, budget: BudgetManager, min_refresh_seconds: Optional[Dict[str, float]] = None):
+        self.budget = budget
+        self.min_refresh = dict(COLLECTOR_SERVICE["min_refresh_seconds"] if min_refresh_seconds is None
+                                else min_refresh_seconds)
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._locks = {source: threading.Lock() for source in SOURCES}
+
+    def _fetch(self, source: str) -> Any:
+        collector = SOURCES[source][0]
+        if source == "macro":
+            # Reuse the SPX 5m candles this daemon already holds instead of fetching them twice
+            spx_tf, _ = SOURCES["spx"][1](self.snapshot("spx")["data"])
+            return collector(self.budget, prefetched_spx=spx_tf.get("5m", []))
+        return collector(self.budget)
+
+    def snapshot(self, source: str, max_age: Optional[float] = None) -> Dict[str, Any]:
+        """The cached entry for source, refreshed first if older than max_age.
+
+        A failed result is only reused for RETRY_SECONDS, whatever the source's interval.
+        """
+        if source not in SOURCES:
+            raise KeyError(source)
+        max_age = max(self.min_refresh.get(source, 0.0), max_age or 0.0)
+
+        def fresh(entry):
+            return entry is not None and time.time() - entry["ts"] <= (max_age if entry["ok"] else RETRY_SECONDS)
+
+        entry = self._entries.get(source)
+        if fresh(entry):
+            metrics.inc("collector_service_reads", source=source, result="hit")
+            return entry
+        with self._locks[source]:
+            entry = self._entries.get(source)
+            if fresh(entry):
+                metrics.inc("collector_service_reads", source=source, result="shared")
+                return entry
+            with metrics.span("collect", source=source):
+                value = self._fetch(source)
+            entry = {"source": source, "ts": time.time(), "ok": _usable(value), "data": _encode(value)}
+            self._entries[source] = entry
+            metrics.inc("collector_service_reads", source=source, result="refresh" if entry["ok"] else "failed")
+            return entry
+
+    def health(self) -> Dict[str, Any]:
+        now = time.time()
+        return {
+            "sources": {s: {"age": round(now - e["ts"], 1), "ok": e["ok"]} for s, e in self._entries.items()},
+            "budget": self.budget.utilization(),
+            "routing": get_router().table(),
+        }
+
+
+class CollectorHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    service: CollectorService  # set on the class by serve()
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path.startswith("/snapshot/"):
+            source = url.path[len("/snapshot/"):]
+            max_age = parse_qs(url.query).get("max_age", [None])[0]
+            try:
+                entry = self.service.snapshot(source, float(max_age) if max_age else None)
+            except KeyError:
+                self._json({"error": f"unknown source {source!r}"}, 404)
+                return
+            except Exception as exc:
+                logger.warning(f"Collector {source} failed: {exc}")
+                self._json({"error": str(exc)}, 502)
+                return
+            self._json(dict(entry, age=time.time() - entry["ts"]))
+        elif url.path == "/health":
+            self._json(self.service.health())
+        elif url.path == "/metrics":
+            body = metrics.render(metrics.get_registry().snapshot()).encode("utf-8")
+            self._send(body, "application/openmetrics-text; version=1.0.0; charset=utf-8")
+        else:
+            self._json({"error": "not found"}, 404)
+
+    def _json(self, data: Any, status: int = 200) -> None:
+        self._send(json.dumps(data, separators=(",", ":")).encode("utf-8"), "application/json", status)
+
+    def _send(self, body: bytes, content_type: str, status: int = 200) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, fmt, *args):
+        return
+
+
+def serve(host: str = COLLECTOR_SERVICE["host"], port: int = COLLECTOR_SERVICE["port"],
+          service: Optional[CollectorService] = None) -> ThreadingHTTPServer:
+    """Bind the daemon's HTTP server (call serve_forever() on the result)."""
+    handler = type("BoundCollectorHandler", (CollectorHandler,),
+                   {"service": service or CollectorService(BudgetManager(COLLECTOR_SERVICE["budget_path"]))})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+_client: Optional[httpx.Client] = None
+_client_lock = threading.Lock()
+
+
+def _service_client() -> httpx.Client:
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = httpx.Client(base_url=f"http://{COLLECTOR_SERVICE['host']}:{COLLECTOR_SERVICE['port']}")
+        return _client
+
+
+def read(source: str, max_age: Optional[float] = None) -> Tuple[Any, float]:
+    """(snapshot, age in seconds) from the daemon; ServiceUnavailable if none is running."""
+    params = {"max_age": max_age} if max_age is not None else None
+    timeout = deadline_timeout(COLLECTOR_SERVICE["timeout_seconds"], f"collector service {source}")
+    try:
+        resp = _service_client().get(f"/snapshot/{source}", params=params, timeout=timeout)
+    except httpx.ConnectError as exc:
+        raise ServiceUnavailable(str(exc)) from exc
+    resp.raise_for_status()
+    payload = resp.json()
+    return SOURCES[source][1](payload["data"]), payload["age"]
+
+
+def collect(source: str, budget: Optional[BudgetManager] = None, max_age: Optional[float] = None,
+            local: bool = True, **kwargs) -> Any:
+    """source's snapshot from the daemon if one is running, else collected in-process with budget.
+
+    kwargs go to the in-process collector only. With local=False a missing
+    daemon raises ServiceUnavailable instead of calling upstream.
+    """
+    try:
+        return read(source, max_age)[0]
+    except ServiceUnavailable:
+        if not local:
+            raise
+    return SOURCES[source][0](budget, **kwargs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Shared collector daemon")
+    parser.add_argument("--host", default=COLLECTOR_SERVICE["host"])
+    parser.add_argument("--port", type=int, default=COLLECTOR_SERVICE["port"])
+    parser.add_argument("--budget-path", default=COLLECTOR_SERVICE["budget_path"])
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    server = serve(args.host, args.port, CollectorService(BudgetManager(args.budget_path)))
+    logger.info(f"Collector service on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
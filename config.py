@@ -88,6 +88,13 @@ TP_MULTIPLIERS = {
     "default": {"tp1": 1.6, "tp2": 2.8, "inv": 1.1},
 }
 
+# Outcome tracking: how a bar that touches both the stop and a target is scored.
+# "stop_first" (conservative), "target_first", or "open_distance" (the level
+# nearer the bar open is assumed to be hit first).
+OUTCOME_RESOLUTION = {
+    "same_bar": "stop_first",
+}
+
 
 INTELLIGENCE_FLAGS = {
     "squeeze_enabled": True,
@@ -163,16 +170,75 @@ MACRO_CORRELATION = {
     "min_candles": 25,
 }
 
+# Live-loop profiling (core/profiling.py). Cycles slower than slow_cycle_seconds
+# leave their sampled stacks in logs/profiles/; more on demand via the control file.
+PROFILING = {
+    "slow_cycle_seconds": 90.0,
+    "sample_interval_seconds": 0.02,
+    "keep_files": 40,
+}
+
+# Chrome Trace Event timeline of every engine cycle in logs/traces/ (core/tracing.py)
+CYCLE_TRACES = {
+    "enabled": True,
+    "keep_files": 48,
+}
+
+# Per-cycle input deadline (collectors/base.py), counted from the start of the
+# cycle. Upstream calls still pending when it passes give up, and the source
+# falls back to its last good snapshot if that is at most max_cache_age_seconds old.
+CYCLE_DEADLINE = {
+    "collect_seconds": 60.0,
+    "max_cache_age_seconds": 1800.0,
+}
+
+# Adaptive provider routing and circuit breakers (collectors/router.py)
+ROUTING = {
+    "ewma_alpha": 0.2,
+    "probe_interval_seconds": 900.0,
+    "failure_threshold": 3,
+    "open_seconds": 60.0,
+    "max_open_seconds": 900.0,
+    "failure_penalty_seconds": 5.0,
+    "prior_latency_seconds": 1.0,
+}
+
+# Per-venue market bundles (collectors/bundle.py): one fetch of every Bybit/OKX
+# endpoint per cycle, reused by the derivatives, flow and order book collectors
+MARKET_BUNDLES = {
+    "max_age_seconds": 30.0,
+}
+
+# Shared collector daemon (collectors/service.py). Consumers read snapshots from
+# it when it is running and collect in-process otherwise. A read refreshes a
+# source upstream only once it is older than its min_refresh_seconds.
+COLLECTOR_SERVICE = {
+    "host": "127.0.0.1",
+    "port": 8787,
+    "timeout_seconds": 30.0,
+    "budget_path": ".mvp_budget.json",
+    "min_refresh_seconds": {
+        "price": 5, "candles": 15, "spx": 60, "macro": 60, "derivatives": 30,
+        "flows": 30, "fear_greed": 600, "news": 300, "orderbook": 10,
+    },
+}
 
 
-def validate_config() -> None:
-    for tf, cfg in TIMEFRAME_RULES.items():
+
+def validate_timeframe_rules(rules: dict) -> None:
+    for tf, cfg in rules.items():
         if cfg["trade_long"] <= cfg["watch_long"]:
             raise ValueError(f"{tf}: trade_long must be > watch_long")
         if cfg["trade_short"] >= cfg["watch_short"]:
             raise ValueError(f"{tf}: trade_short must be < watch_short")
         if cfg["min_rr"] <= 0:
             raise ValueError(f"{tf}: min_rr must be > 0")
+
+
+def validate_config() -> None:
+    validate_timeframe_rules(TIMEFRAME_RULES)
+    if OUTCOME_RESOLUTION["same_bar"] not in ("stop_first", "target_first", "open_distance"):
+        raise ValueError("OUTCOME_RESOLUTION['same_bar']: must be stop_first, target_first or open_distance")
     for tf, seconds in STALE_SECONDS.items():
         if seconds <= 0:
             raise ValueError(f"{tf}: stale seconds must be > 0")
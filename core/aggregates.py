@@ -0,0 +1,370 @@
+"""
+Materialized outcome aggregates for the dashboard and dashboard.html.
+
+Win rate by reason code, hour and rubric score, and the portfolio
+breakdowns (direction, timeframe, recipe, session, regime, timeframe x
+regime x session segment, confidence bin) used to be recomputed by scanning
+every alert and closed trade on each rebuild. OutcomeAggregates keeps them
+as running buckets in two ledgers:
+
+    alerts  - resolved alerts from the alert store (outcome + r_multiple)
+    trades  - closed trades from the paper portfolio
+
+A resolved outcome touches one bucket per dimension it falls in (one per
+reason code for "code"), so keeping up costs O(codes) per outcome. The
+buckets and the read watermarks (alert log rows, patch log offset, closed
+trade count) are persisted in data/outcome_aggregates.json, so a restart
+resumes where the last sync stopped instead of re-scanning the history.
+
+Any process may sync: the buckets only depend on the sources, so the file
+is replaced atomically and a newer copy written by another process is
+adopted before catching up. If a source shrinks or is replaced, its ledger
+is rebuilt from scratch once.
+"""
+import json
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+from statistics import median
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+DEFAULT_AGGREGATES_PATH = Path("data/outcome_aggregates.json")
+FORMAT_VERSION = 1
+
+RESOLVED_OUTCOMES = ("WIN_TP1", "WIN_TP2", "LOSS", "TIMEOUT")
+CONFIDENCE_BINS = ((0, 20), (21, 40), (41, 60), (61, 80), (81, 100))
+# Dimensions whose buckets keep their R values, for the median
+MEDIAN_DIMS = ("timeframe", "segment")
+
+
+def _is_tracked(alert: Dict[str, Any]) -> bool:
+    # Same junk filter as the dashboard's alert list
+    if alert.get("strategy") in (None, "TEST", "SYNTHETIC"):
+        return False
+    return alert.get("symbol") not in ("SPX", "SPX_PROXY")
+
+
+def _empty_ledger() -> Dict[str, Any]:
+    return {"all": _empty_bucket(), "streak": 0, "dims": {}}
+
+
+def _empty_bucket(keep_rs: bool = False) -> Dict[str, Any]:
+    bucket = {"n": 0, "wins": 0, "losses": 0, "hits": 0, "r": 0.0, "win_r": 0.0, "loss_r": 0.0,
+              "loss_run": 0, "max_loss_run": 0}
+    if keep_rs:
+        bucket["rs"] = []
+    return bucket
+
+
+def _add(bucket: Dict[str, Any], r: float, outcome: str) -> None:
+    bucket["n"] += 1
+    bucket["r"] += r
+    if r > 0:
+        bucket["wins"] += 1
+        bucket["win_r"] += r
+    elif r < 0:
+        bucket["losses"] += 1
+        bucket["loss_r"] += r
+    # wins/losses go by the sign of R; hits and loss runs by the outcome label
+    if outcome.startswith("WIN"):
+        bucket["hits"] += 1
+    if outcome in ("LOSS", "TIMEOUT"):
+        bucket["loss_run"] += 1
+        bucket["max_loss_run"] = max(bucket["max_loss_run"], bucket["loss_run"])
+    else:
+        bucket["loss_run"] = 0
+    if "rs" in bucket:
+        bucket["rs"].append(r)
+
+
+def summary(bucket: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Derived figures of one bucket (unrounded)."""
+    bucket = bucket or _empty_bucket()
+    n = bucket["n"]
+    rs = bucket.get("rs")
+    return {
+        "count": n,
+        "wins": bucket["wins"],
+        "losses": bucket["losses"],
+        "hits": bucket["hits"],
+        "win_rate": bucket["wins"] / n if n else 0.0,
+        "hit_rate": bucket["hits"] / n if n else 0.0,
+        "total_r": bucket["r"],
+        "avg_r": bucket["r"] / n if n else 0.0,
+        "median_r": median(rs) if rs else 0.0,
+        "gross_profit": bucket["win_r"],
+        "gross_loss": abs(bucket["loss_r"]),
+        "max_loss_streak": bucket["max_loss_run"],
+    }
+
+
+def _hour(timestamp: Any) -> Optional[int]:
+    try:
+        return datetime.fromisoformat(str(timestamp).replace("Z", "+00:00")).hour
+    except ValueError:
+        return None
+
+
+def _rubric_score(alert: Dict[str, Any]) -> Optional[int]:
+    rubric = (alert.get("decision_trace") or {}).get("rubric") or {}
+    score = rubric.get("score")
+    if score is None:
+        score = rubric.get("confluence_score")
+    return int(score) if isinstance(score, (int, float)) else None
+
+
+def _recipe(alert: Optional[Dict[str, Any]]) -> str:
+    if alert is None:
+        return "UNKNOWN"
+    if alert.get("recipe_name"):
+        return alert["recipe_name"]
+    for code in (alert.get("decision_trace") or {}).get("codes", []):
+        if code.endswith("_RECIPE"):
+            return code.replace("_RECIPE", "")
+    return "NO_RECIPE"
+
+
+def confidence_bin(confidence: Any) -> Optional[str]:
+    try:
+        conf = int(confidence or 0)
+    except (TypeError, ValueError):
+        return None
+    for lo, hi in CONFIDENCE_BINS:
+        if lo <= conf <= hi:
+            return f"{lo}-{hi}"
+    return None
+
+
+def _trade_key(trade: Dict[str, Any]) -> List[Any]:
+    return [trade.get("alert_id"), trade.get("exit_at")]
+
+
+class OutcomeAggregates:
+    """Running outcome buckets persisted next to the data they summarize."""
+
+    def __init__(self, path: Union[str, Path] = DEFAULT_AGGREGATES_PATH):
+        self.path = Path(path)
+        self._lock = threading.RLock()
+        self._mtime = None
+        self._reset()
+        self._adopt()
+
+    def _reset(self) -> None:
+        self.sources = {
+            "alerts": None,  # AlertStore.changes() cursor
+            "trades": {"n": 0, "first": None},
+        }
+        self.counted = set()  # alert ids already booked in the alerts ledger
+        self.ledgers = {"alerts": _empty_ledger(), "trades": _empty_ledger()}
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    def _adopt(self) -> None:
+        """Load the file if another process (or a restart) left a newer copy."""
+        try:
+            mtime = self.path.stat().st_mtime_ns
+        except OSError:
+            return
+        if mtime == self._mtime:
+            return
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return
+        self._mtime = mtime
+        if data.get("version") != FORMAT_VERSION:
+            return
+        self.sources = data["sources"]
+        self.counted = set(data["counted"])
+        self.ledgers = data["ledgers"]
+
+    def save(self) -> None:
+        data = {
+            "version": FORMAT_VERSION,
+            "sources": self.sources,
+            "counted": sorted(self.counted, key=str),
+            "ledgers": self.ledgers,
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(data, separators=(",", ":")), encoding="utf-8")
+        os.replace(tmp, self.path)
+        self._mtime = self.path.stat().st_mtime_ns
+
+    # ------------------------------------------------------------------
+    # Updates
+    # ------------------------------------------------------------------
+
+    def _book(self, ledger: str, r: float, outcome: str, keys: Dict[str, Iterable[str]]) -> None:
+        led = self.ledgers[ledger]
+        _add(led["all"], r, outcome)
+        if r < 0:
+            led["streak"] = led["streak"] - 1 if led["streak"] < 0 else -1
+        elif r > 0:
+            led["streak"] = led["streak"] + 1 if led["streak"] > 0 else 1
+        for dim, values in keys.items():
+            buckets = led["dims"].setdefault(dim, {})
+            for value in values:
+                bucket = buckets.get(value)
+                if bucket is None:
+                    bucket = buckets[value] = _empty_bucket(dim in MEDIAN_DIMS)
+                _add(bucket, r, outcome)
+
+    def add_alert(self, alert: Dict[str, Any]) -> bool:
+        """Book one resolved alert; False if it is unresolved, filtered or already booked."""
+        r = alert.get("r_multiple")
+        if alert.get("outcome") not in RESOLVED_OUTCOMES or not isinstance(r, (int, float)):
+            return False
+        if not _is_tracked(alert):
+            return False
+        alert_id = alert.get("alert_id") or alert.get("id")
+        if alert_id is not None:
+            if alert_id in self.counted:
+                return False
+            self.counted.add(alert_id)
+        codes = [c for c in (alert.get("decision_trace") or {}).get("codes", [])
+                 if not c.startswith(("REGIME_", "SESSION_"))]
+        hour, score = _hour(alert.get("timestamp", "")), _rubric_score(alert)
+        self._book("alerts", r, alert["outcome"], {
+            "code": codes,
+            "hour": [] if hour is None else [str(hour)],
+            "rubric": [] if score is None else [str(score)],
+            "direction": [alert.get("direction", "NEUTRAL")],
+            "timeframe": [alert.get("timeframe", "UNKNOWN")],
+            "recipe": [_recipe(alert)],
+            "session": [str(alert.get("session") or "UNKNOWN").lower()],
+            "regime": [str(alert.get("regime") or "UNKNOWN").lower()],
+        })
+        return True
+
+    def add_trade(self, trade: Dict[str, Any], alert: Optional[Dict[str, Any]] = None) -> bool:
+        """Book one closed trade; alert is the alert it came from, if known."""
+        r = trade.get("r_multiple")
+        if not isinstance(r, (int, float)):
+            return False
+        tf = trade.get("timeframe", "UNKNOWN")
+        conf_bin = confidence_bin(trade.get("confidence"))
+        segment = "|".join((str(tf), str(trade.get("regime") or "unknown").lower(),
+                            str(trade.get("session") or "unknown").lower()))
+        self._book("trades", r, str(trade.get("outcome") or "").upper(), {
+            "direction": [trade.get("direction", "NEUTRAL")],
+            "timeframe": [tf],
+            "recipe": [_recipe(alert)],
+            "session": [str((alert or {}).get("session") or "unknown").lower()],
+            "regime": [str((alert or {}).get("regime") or "unknown").lower()],
+            "segment": [segment],
+            "confidence": [] if conf_bin is None else [conf_bin],
+        })
+        return True
+
+    def sync(self, store=None, closed_trades: Optional[List[Dict[str, Any]]] = None) -> bool:
+        """Catch up with the alert store and/or the portfolio's closed trades.
+
+        Only records past the stored watermarks are read. Returns True (and
+        rewrites the file) if anything was booked.
+        """
+        with self._lock:
+            self._adopt()
+            changed = False
+            if store is not None:
+                changed |= self._sync_alerts(store)
+            if closed_trades is not None:
+                changed |= self._sync_trades(closed_trades, store)
+            if changed:
+                self.save()
+            return changed
+
+    def _sync_alerts(self, store) -> bool:
+        cursor, records, patched, reset = store.changes(self.sources["alerts"])
+        if reset:
+            # Log rotated or rewritten: rebuild this ledger once
+            self.ledgers["alerts"] = _empty_ledger()
+            self.counted.clear()
+        # New rows come back with their patches applied ...
+        for rec in records:
+            self.add_alert(rec)
+        # ... older rows are booked when a patch resolves them
+        for alert_id in patched:
+            if alert_id in self.counted:
+                continue
+            rec = store.get(alert_id)
+            if rec is not None:
+                self.add_alert(rec)
+        changed = cursor != self.sources["alerts"]
+        self.sources["alerts"] = cursor
+        return changed
+
+    def _sync_trades(self, closed_trades: List[Dict[str, Any]], store=None) -> bool:
+        src = self.sources["trades"]
+        first = _trade_key(closed_trades[0]) if closed_trades else None
+        if len(closed_trades) < src["n"] or (src["n"] and first != src["first"]):
+            # Portfolio reset: rebuild this ledger once
+            self.ledgers["trades"] = _empty_ledger()
+            src.update(n=0)
+        new = closed_trades[src["n"]:]
+        for trade in new:
+            alert_id = trade.get("alert_id")
+            alert = store.get(alert_id) if store is not None and alert_id else None
+            self.add_trade(trade, alert)
+        src.update(n=len(closed_trades), first=first)
+        return bool(new)
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    def total(self, ledger: str) -> Dict[str, Any]:
+        with self._lock:
+            led = self.ledgers[ledger]
+            return dict(summary(led["all"]), streak=led["streak"])
+
+    def breakdown(self, ledger: str, dim: str) -> Dict[str, Dict[str, Any]]:
+        """summary() per value of one dimension."""
+        with self._lock:
+            buckets = self.ledgers[ledger]["dims"].get(dim, {})
+            return {key: summary(bucket) for key, bucket in buckets.items()}
+
+    def code_edge(self, min_trades: int = 5) -> Dict[str, Dict[str, Any]]:
+        """Win rate per reason code across resolved alerts."""
+        result = {}
+        for code, s in self.breakdown("alerts", "code").items():
+            if s["count"] < min_trades:
+                continue
+            result[code] = {
+                "wins": s["wins"],
+                "losses": s["count"] - s["wins"],
+                "total": s["count"],
+                "wr": round(s["win_rate"], 3),
+            }
+        return result
+
+    def _rate_table(self, dim: str) -> Dict[str, Dict[str, Any]]:
+        return {
+            key: {"count": s["count"], "wr": round(s["win_rate"], 3), "avg_r": round(s["avg_r"], 3)}
+            for key, s in self.breakdown("alerts", dim).items() if s["count"]
+        }
+
+    def hour_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Win rate by hour of day (UTC)."""
+        return self._rate_table("hour")
+
+    def rubric_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Win rate by rubric confluence score."""
+        return self._rate_table("rubric")
+
+
+_instances: Dict[str, OutcomeAggregates] = {}
+_instances_lock = threading.Lock()
+
+
+def open_aggregates(path: Union[str, Path] = DEFAULT_AGGREGATES_PATH) -> OutcomeAggregates:
+    """Shared OutcomeAggregates per path."""
+    key = str(Path(path).resolve())
+    with _instances_lock:
+        agg = _instances.get(key)
+        if agg is None:
+            agg = _instances[key] = OutcomeAggregates(path)
+        return agg
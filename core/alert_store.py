@@ -0,0 +1,534 @@
+"""
+Indexed access to the alert log (logs/pid-129-alerts.jsonl).
+
+The log stays the source of truth: one JSON alert per line, append only.
+Outcome updates go to a sidecar patch log (<name>.patches.jsonl, one
+{"alert_id": ..., <fields>} object per line) and are overlaid on read, so
+resolving an alert no longer rewrites the whole file.
+
+A second sidecar (<name>.idx) holds one line per alert with its byte
+offset, length, timestamp, id, symbol, timeframe and resolved flag. It is
+appended by the writer only; readers load it, then parse just the part of
+the log written after it. Individual alerts are read back by seeking to
+their offset, so a query costs the records it returns rather than the
+size of the history.
+
+AlertTail serves views that only ever want the newest N alerts (the
+dashboard): it seeks back from the end of the log for its first fill and
+from then on parses only appended lines into a fixed-size ring.
+"""
+import bisect
+import json
+import os
+import threading
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Union
+
+DEFAULT_ALERTS_PATH = Path("logs/pid-129-alerts.jsonl")
+
+
+def _epoch(value: Any) -> float:
+    if not value:
+        return 0.0
+    try:
+        return datetime.fromisoformat(str(value).replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return 0.0
+
+
+class AlertStore:
+    """Append-only alert log with an offset index and outcome patches."""
+
+    def __init__(self, path: Union[str, Path] = DEFAULT_ALERTS_PATH, writable: bool = False):
+        self.path = Path(path)
+        self.patch_path = self.path.with_name(self.path.stem + ".patches.jsonl")
+        self.index_path = self.path.with_name(self.path.stem + ".idx")
+        self.writable = writable
+        self._lock = threading.RLock()
+        self._reset()
+        self._load_index()
+
+    # ------------------------------------------------------------------
+    # Index maintenance
+    # ------------------------------------------------------------------
+
+    def _reset(self) -> None:
+        self._offsets: List[int] = []
+        self._lengths: List[int] = []
+        self._ts: List[float] = []
+        self._ids: List[Optional[str]] = []
+        self._keys: List[tuple] = []          # (symbol, timeframe)
+        self._logged: List[bool] = []         # resolved flag as written in the log
+        self._resolved: List[bool] = []       # ... with patches applied
+        self._by_id: Dict[str, int] = {}
+        self._by_time: List[tuple] = []       # sorted (ts, seq)
+        self._unresolved: set = set()
+        self._patches: Dict[str, Dict[str, Any]] = {}
+        self._log_offset = 0
+        self._last_line = b""                 # bytes of the last indexed record
+        self._patch_offset = 0
+        self._index_rows = 0
+        self._log_id = None
+
+    def _add(self, offset: int, length: int, ts: float, alert_id, symbol, timeframe, resolved: bool) -> None:
+        seq = len(self._offsets)
+        self._offsets.append(offset)
+        self._lengths.append(length)
+        self._ts.append(ts)
+        self._ids.append(alert_id)
+        self._keys.append((symbol, timeframe))
+        self._logged.append(resolved)
+        if alert_id:
+            self._by_id[alert_id] = seq
+            patch = self._patches.get(alert_id)
+            if patch and "resolved" in patch:
+                resolved = bool(patch["resolved"])
+        self._resolved.append(resolved)
+        if not resolved:
+            self._unresolved.add(seq)
+        if self._by_time and ts < self._by_time[-1][0]:
+            bisect.insort(self._by_time, (ts, seq))
+        else:
+            self._by_time.append((ts, seq))
+
+    def _load_index(self) -> None:
+        """Adopt the persisted index if it still matches the log."""
+        if not self.index_path.exists() or not self.path.exists():
+            return
+        rows = []
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.endswith("\n"):
+                        rows.append(json.loads(line))
+        except (OSError, ValueError):
+            return
+        if not rows:
+            return
+        # The last indexed record must still be where the index says it is
+        offset, length = rows[-1][0], rows[-1][1]
+        try:
+            with open(self.path, "rb") as f:
+                f.seek(offset)
+                tail = f.read(length)
+            if not tail.endswith(b"\n") or json.loads(tail).get("alert_id") != rows[-1][3]:
+                return
+        except (OSError, ValueError, AttributeError):
+            return
+        self._last_line = tail
+        self._read_patches()
+        for row in rows:
+            self._add(*row)
+        self._log_offset = offset + length
+        self._index_rows = len(rows)
+        self._log_id = self._identity()
+
+    def _rewritten(self) -> bool:
+        """True if the log no longer holds what was indexed (rotated or rewritten)."""
+        if self._log_id is None:
+            return False
+        if self._identity() != self._log_id or self.path.stat().st_size < self._log_offset:
+            return True
+        with open(self.path, "rb") as f:
+            f.seek(self._log_offset - len(self._last_line))
+            return f.read(len(self._last_line)) != self._last_line
+
+    def _identity(self):
+        try:
+            st = self.path.stat()
+            return (st.st_dev, st.st_ino)
+        except OSError:
+            return None
+
+    def _read_tail(self, path: Path, offset: int):
+        """Complete lines appended after offset, with their start offsets."""
+        with open(path, "rb") as f:
+            f.seek(offset)
+            data = f.read()
+        end = data.rfind(b"\n") + 1
+        pos = 0
+        while pos < end:
+            nl = data.index(b"\n", pos) + 1
+            yield offset + pos, data[pos:nl]
+            pos = nl
+
+    def _read_patches(self) -> None:
+        if not self.patch_path.exists():
+            return
+        if self.patch_path.stat().st_size < self._patch_offset:
+            self._patches.clear()
+            self._patch_offset = 0
+        for start, line in self._read_tail(self.patch_path, self._patch_offset):
+            self._patch_offset = start + len(line)
+            try:
+                patch = json.loads(line)
+                alert_id = patch.pop("alert_id")
+            except (ValueError, KeyError):
+                continue
+            self._patches.setdefault(alert_id, {}).update(patch)
+            seq = self._by_id.get(alert_id)
+            if seq is not None and "resolved" in patch:
+                self._resolved[seq] = bool(patch["resolved"])
+                if self._resolved[seq]:
+                    self._unresolved.discard(seq)
+                else:
+                    self._unresolved.add(seq)
+
+    def refresh(self) -> None:
+        """Pick up alerts and patches appended since the last call."""
+        with self._lock:
+            if not self.path.exists():
+                if self._offsets:
+                    self._reset()
+                return
+            if self._rewritten():
+                self._reset()
+                self._index_rows = -1
+            self._log_id = self._identity()
+            self._read_patches()
+            for start, line in self._read_tail(self.path, self._log_offset):
+                self._log_offset = start + len(line)
+                self._last_line = line
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    continue
+                if not isinstance(rec, dict):
+                    continue
+                self._add(start, len(line), _epoch(rec.get("timestamp")), rec.get("alert_id"),
+                          rec.get("symbol"), rec.get("timeframe"), bool(rec.get("resolved")))
+            if self.writable:
+                self._persist_index()
+
+    def _persist_index(self) -> None:
+        if self._index_rows < 0:
+            # Rebuild from scratch after a rewrite of the log
+            tmp = self.index_path.with_name(self.index_path.name + ".tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.writelines(self._index_line(seq) for seq in range(len(self._offsets)))
+            os.replace(tmp, self.index_path)
+        elif self._index_rows < len(self._offsets):
+            if self._index_rows == 0 and self.index_path.exists():
+                self.index_path.unlink()
+            with open(self.index_path, "a", encoding="utf-8") as f:
+                f.writelines(self._index_line(seq) for seq in range(self._index_rows, len(self._offsets)))
+        self._index_rows = len(self._offsets)
+
+    def _index_line(self, seq: int) -> str:
+        symbol, timeframe = self._keys[seq]
+        return json.dumps([self._offsets[seq], self._lengths[seq], self._ts[seq], self._ids[seq],
+                           symbol, timeframe, self._logged[seq]]) + "\n"
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+
+    def append(self, record: Dict[str, Any]) -> None:
+        """Append one alert record to the log and the index."""
+        self.append_many([record])
+
+    def append_many(self, records: List[Dict[str, Any]]) -> None:
+        """Append a batch of alert records with one write."""
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "ab") as f:
+                f.write("".join(json.dumps(r) + "\n" for r in records).encode("utf-8"))
+            self.refresh()
+
+    def patch(self, alert_id: str, fields: Dict[str, Any]) -> None:
+        """Record field updates (e.g. an outcome) for an existing alert."""
+        with self._lock:
+            self.patch_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.patch_path, "ab") as f:
+                f.write((json.dumps(dict(fields, alert_id=alert_id)) + "\n").encode("utf-8"))
+            self._read_patches()
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    def _read(self, seq: int, f=None) -> Dict[str, Any]:
+        if f is None:
+            with open(self.path, "rb") as fh:
+                return self._read(seq, fh)
+        f.seek(self._offsets[seq])
+        rec = json.loads(f.read(self._lengths[seq]))
+        patch = self._patches.get(rec.get("alert_id") or "")
+        if patch:
+            rec.update(patch)
+        return rec
+
+    def _records(self, seqs: Iterable[int]) -> List[Dict[str, Any]]:
+        seqs = list(seqs)
+        if not seqs:
+            return []
+        with open(self.path, "rb") as f:
+            return [self._read(seq, f) for seq in seqs]
+
+    def __len__(self) -> int:
+        with self._lock:
+            self.refresh()
+            return len(self._offsets)
+
+    def rows(self, start: int = 0, stop: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Alerts by log position (the order they were appended)."""
+        with self._lock:
+            self.refresh()
+            return self._records(range(len(self._offsets))[start:stop])
+
+    def read_patches(self, offset: int = 0):
+        """(alert_id, fields) pairs appended to the patch log after offset,
+        and the offset to resume from."""
+        patches = []
+        if not self.patch_path.exists():
+            return patches, 0
+        end = offset
+        for start, line in self._read_tail(self.patch_path, offset):
+            end = start + len(line)
+            try:
+                patch = json.loads(line)
+                alert_id = patch.pop("alert_id")
+            except (ValueError, KeyError, AttributeError):
+                continue
+            patches.append((alert_id, patch))
+        return patches, end
+
+    def changes(self, cursor: Optional[Dict[str, Any]] = None):
+        """Everything written since cursor, for consumers that keep derived state.
+
+        Returns (cursor, records, patched_ids, reset): records are the alerts
+        appended since cursor (patches applied), patched_ids the alerts with
+        patch lines since cursor. cursor is a small JSON-able dict to pass
+        back next time. With no cursor, or one the log no longer matches
+        (rotated, rewritten, truncated), it starts from the beginning and
+        reset is True so the consumer can drop what it derived before.
+        """
+        with self._lock:
+            self.refresh()
+            total = len(self._offsets)
+            first = self._ids[0] if total else None
+            patch_size = self.patch_path.stat().st_size if self.patch_path.exists() else 0
+            reset = (cursor is None or total < cursor["rows"] or patch_size < cursor["patch_offset"]
+                     or (cursor["rows"] > 0 and cursor["first_id"] != first))
+            start, offset = (0, 0) if reset else (cursor["rows"], cursor["patch_offset"])
+            records = self._records(range(start, total))
+            patches, end = self.read_patches(offset)
+            patched = list(dict.fromkeys(alert_id for alert_id, _ in patches))
+            return {"rows": total, "patch_offset": end, "first_id": first}, records, patched, reset
+
+    def get(self, alert_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            self.refresh()
+            seq = self._by_id.get(alert_id)
+            return None if seq is None else self._read(seq)
+
+    def unresolved(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            self.refresh()
+            return self._records(sorted(self._unresolved))
+
+    def query(
+        self,
+        since: Optional[Union[datetime, float]] = None,
+        resolved: Optional[bool] = None,
+        symbol: Optional[str] = None,
+        timeframe: Optional[str] = None,
+        where: Optional[Callable[[Dict[str, Any]], bool]] = None,
+        limit: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """Alerts in log order matching every given filter.
+
+        since/resolved/symbol/timeframe are answered from the index; where is
+        applied to the loaded record. With limit, the newest `limit` matches
+        are returned (still oldest first).
+        """
+        with self._lock:
+            self.refresh()
+            if since is not None:
+                cutoff = since.timestamp() if isinstance(since, datetime) else float(since)
+                start = bisect.bisect_left(self._by_time, (cutoff, -1))
+                seqs = sorted(seq for _, seq in self._by_time[start:])
+            else:
+                seqs = range(len(self._offsets))
+            seqs = [
+                s for s in seqs
+                if (resolved is None or self._resolved[s] == resolved)
+                and (symbol is None or self._keys[s][0] == symbol)
+                and (timeframe is None or self._keys[s][1] == timeframe)
+            ]
+            if where is None:
+                return self._records(seqs[-limit:] if limit else seqs)
+            out: List[Dict[str, Any]] = []
+            with open(self.path, "rb") as f:
+                for seq in (reversed(seqs) if limit else seqs):
+                    rec = self._read(seq, f)
+                    if where(rec):
+                        out.append(rec)
+                        if limit and len(out) >= limit:
+                            break
+            return out[::-1] if limit else out
+
+
+TAIL_BLOCK = 64 * 1024
+
+
+class AlertTail:
+    """The newest `maxlen` alerts accepted by `where`, kept current by tailing.
+
+    The first fill reads the log backwards in TAIL_BLOCK chunks until enough
+    matching records are found. Later refreshes resume from the byte offset
+    consumed last time, parse only complete new lines and push them into the
+    ring. Outcome patches are tailed the same way and overlaid on read. A
+    rotated, truncated or rewritten log triggers a fresh backward fill.
+    """
+
+    def __init__(self, path: Union[str, Path], maxlen: int, where: Optional[Callable[[Dict[str, Any]], bool]] = None):
+        self.path = Path(path)
+        self.patch_path = self.path.with_name(self.path.stem + ".patches.jsonl")
+        self.maxlen = maxlen
+        self.where = where
+        self._lock = threading.Lock()
+        self._ring: deque = deque(maxlen=maxlen)
+        self._patches: Dict[str, Dict[str, Any]] = {}
+        self._offset = 0
+        self._patch_offset = 0
+        self._last_line = b""
+        self._log_id = None
+
+    def _accept(self, line: bytes) -> Optional[Dict[str, Any]]:
+        try:
+            rec = json.loads(line)
+        except ValueError:
+            return None
+        if not isinstance(rec, dict) or (self.where is not None and not self.where(rec)):
+            return None
+        return rec
+
+    def _fill_backwards(self, f, size: int) -> None:
+        """Fill the ring from the end of the log; leaves the offset at the last newline."""
+        self._ring.clear()
+        found: List[Dict[str, Any]] = []
+        pos, carry, end = size, b"", None
+        while pos > 0 and len(found) < self.maxlen:
+            step = min(TAIL_BLOCK, pos)
+            pos -= step
+            f.seek(pos)
+            chunk = f.read(step) + carry
+            carry = b""
+            if end is None:
+                # Anything after the last newline is a record still being written
+                nl = chunk.rfind(b"\n")
+                if nl < 0:
+                    carry = chunk
+                    continue
+                end = pos + nl + 1
+                chunk = chunk[:nl + 1]
+            lines = chunk.split(b"\n")
+            if pos > 0:
+                # The first piece may be cut by the block boundary; finish it next read
+                carry = lines.pop(0)
+            for line in reversed(lines):
+                rec = self._accept(line) if line.strip() else None
+                if rec is not None:
+                    found.append(rec)
+                    if len(found) >= self.maxlen:
+                        break
+        self._ring.extend(reversed(found))
+        self._offset = end or 0
+        self._last_line = self._line_before(f, self._offset)
+
+    @staticmethod
+    def _line_before(f, end: int) -> bytes:
+        """The complete line ending at byte offset end."""
+        start = end - 1
+        while start > 0:
+            step = min(TAIL_BLOCK, start)
+            f.seek(start - step)
+            nl = f.read(step).rfind(b"\n")
+            if nl >= 0:
+                start = start - step + nl + 1
+                break
+            start -= step
+        start = max(start, 0)
+        f.seek(start)
+        return f.read(end - start)
+
+    def _rewritten(self, size: int) -> bool:
+        if self._identity() != self._log_id or size < self._offset:
+            return True
+        with open(self.path, "rb") as f:
+            f.seek(self._offset - len(self._last_line))
+            return f.read(len(self._last_line)) != self._last_line
+
+    def _identity(self):
+        st = self.path.stat()
+        return (st.st_dev, st.st_ino)
+
+    def _refresh_patches(self) -> None:
+        if not self.patch_path.exists():
+            return
+        with open(self.patch_path, "rb") as f:
+            if os.fstat(f.fileno()).st_size < self._patch_offset:
+                self._patches.clear()
+                self._patch_offset = 0
+            f.seek(self._patch_offset)
+            data = f.read()
+        end = data.rfind(b"\n") + 1
+        self._patch_offset += end
+        for line in data[:end].splitlines():
+            try:
+                patch = json.loads(line)
+                self._patches.setdefault(patch.pop("alert_id"), {}).update(patch)
+            except (ValueError, KeyError, AttributeError):
+                continue
+
+    def refresh(self) -> None:
+        if not self.path.exists():
+            self._ring.clear()
+            self._log_id = None
+            return
+        size = self.path.stat().st_size
+        if self._log_id is None or self._rewritten(size):
+            self._log_id = self._identity()
+            with open(self.path, "rb") as f:
+                self._fill_backwards(f, size)
+        elif size > self._offset:
+            with open(self.path, "rb") as f:
+                f.seek(self._offset)
+                data = f.read(size - self._offset)
+            end = data.rfind(b"\n") + 1
+            if end:
+                lines = data[:end].split(b"\n")[:-1]
+                self._offset += end
+                self._last_line = lines[-1] + b"\n"
+                for line in lines:
+                    rec = self._accept(line) if line.strip() else None
+                    if rec is not None:
+                        self._ring.append(rec)
+        self._refresh_patches()
+
+    def records(self) -> List[Dict[str, Any]]:
+        """Oldest-first copy of the ring with outcome patches applied."""
+        with self._lock:
+            self.refresh()
+            out = []
+            for rec in self._ring:
+                patch = self._patches.get(rec.get("alert_id") or "")
+                out.append(dict(rec, **patch) if patch else rec)
+            return out
+
+
+_stores: Dict[tuple, AlertStore] = {}
+_stores_lock = threading.Lock()
+
+
+def open_store(path: Union[str, Path] = DEFAULT_ALERTS_PATH, writable: bool = False) -> AlertStore:
+    """Shared AlertStore per path, so repeated calls only read what is new."""
+    key = (str(Path(path).resolve()), writable)
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            store = _stores[key] = AlertStore(path, writable=writable)
+        return store
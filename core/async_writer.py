@@ -0,0 +1,166 @@
+"""
+Background writer for append-only logs.
+
+Callers hand a record and a sink to the shared BackgroundWriter; the record
+goes onto a bounded queue and the call returns immediately. One daemon
+thread drains the queue, groups records per sink and hands each sink a
+batch, so a burst of audit or alert records costs one open/write instead
+of one per record. Batches are flushed when batch_size records are
+pending, when the oldest pending record is flush_interval seconds old, on
+flush() and at interpreter exit.
+
+If the queue is full the record is dropped rather than blocking the
+caller; drops, write failures and records that waited longer than
+lag_warn seconds are counted in stats().
+"""
+import atexit
+import json
+import logging
+import queue
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Union
+
+from core import tracing
+
+logger = logging.getLogger(__name__)
+
+Sink = Callable[[List[Any]], None]
+
+_STOP = object()
+
+
+class BackgroundWriter:
+    def __init__(self, maxsize: int = 10000, batch_size: int = 256, flush_interval: float = 0.5, lag_warn: float = 2.0):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.lag_warn = lag_warn
+        self._queue: "queue.Queue" = queue.Queue(maxsize)
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.lagging = 0
+        self.batches = 0
+        self.max_lag = 0.0
+
+    def _ensure_started(self) -> None:
+        if self._thread is None:
+            with self._start_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="background-writer", daemon=True)
+                    self._thread.start()
+
+    def write(self, sink: Sink, record: Any) -> bool:
+        """Queue one record for sink; False if it was dropped because the queue is full."""
+        self._ensure_started()
+        try:
+            self._queue.put_nowait((sink, record, time.monotonic()))
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def flush(self, timeout: Optional[float] = 5.0) -> bool:
+        """Block until everything queued so far has been handed to its sink."""
+        if self._thread is None:
+            return True
+        done = threading.Event()
+        self._queue.put((None, done, 0.0))
+        return done.wait(timeout)
+
+    def close(self, timeout: Optional[float] = 5.0) -> None:
+        if self._thread is None:
+            return
+        self._queue.put((None, _STOP, 0.0))
+        self._thread.join(timeout)
+        self._thread = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queued": self._queue.qsize(),
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "lagging": self.lagging,
+            "batches": self.batches,
+            "max_lag_s": round(self.max_lag, 3),
+        }
+
+    def _run(self) -> None:
+        pending: Dict[Sink, List] = {}
+        count, deadline = 0, None
+        while True:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                sink, record, queued_at = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                sink = record = None
+            if sink is not None:
+                pending.setdefault(sink, []).append((record, queued_at))
+                count += 1
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+                if count < self.batch_size:
+                    continue
+            self._flush(pending)
+            count, deadline = 0, None
+            if record is _STOP:
+                return
+            if isinstance(record, threading.Event):
+                record.set()
+
+    def _flush(self, pending: Dict[Sink, List]) -> None:
+        if not pending:
+            return
+        now = time.monotonic()
+        for sink, items in pending.items():
+            lag = now - items[0][1]
+            self.max_lag = max(self.max_lag, lag)
+            if lag > self.lag_warn:
+                self.lagging += len(items)
+            started = time.perf_counter()
+            try:
+                sink([record for record, _ in items])
+                self.written += len(items)
+            except Exception as exc:
+                self.failed += len(items)
+                logger.error("Background write of %d records failed: %s", len(items), exc)
+            tracing.record("write batch", "io", started, time.perf_counter() - started, {"records": len(items)})
+        self.batches += 1
+        pending.clear()
+
+
+class JsonlSink:
+    """Appends each batch of dicts to a JSONL file in a single write."""
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+
+    def __call__(self, records: List[Dict[str, Any]]) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write("".join(json.dumps(r) + "\n" for r in records))
+
+    def __eq__(self, other):
+        return isinstance(other, JsonlSink) and other.path == self.path
+
+    def __hash__(self):
+        return hash(self.path)
+
+
+_writer: Optional[BackgroundWriter] = None
+_writer_lock = threading.Lock()
+
+
+def get_writer() -> BackgroundWriter:
+    """The process-wide writer; closed (and flushed) at exit."""
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = BackgroundWriter()
+                atexit.register(_writer.close)
+    return _writer
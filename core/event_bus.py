@@ -0,0 +1,218 @@
+"""
+Local pub/sub for alert, position and cycle events.
+
+Every subscriber binds a Unix datagram socket in data/events.d/ named
+<role>-<pid>-<rand>.sock. publish() sends one JSON datagram to every socket
+in that folder, so there is no broker to run: app.py, the executor and the
+outcome tracker publish directly and each dashboard, paper-trader watch or
+report generator gets its own copy within a millisecond or so.
+
+Events look like {"topic": ..., "ts": ..., "pid": ..., "seq": ..., "data": {...}}.
+seq counts per publishing process, so a subscriber can spot a gap if its
+socket buffer overflowed; the files on disk stay the source of truth and a
+subscriber that sees a gap simply reloads them.
+
+Publishing never blocks and never raises: a full subscriber buffer drops
+that subscriber's copy, a dead subscriber's socket is removed, and where
+Unix sockets are unavailable publish() is a no-op and Subscriber.poll()
+just sleeps, so callers fall back to their periodic reloads.
+"""
+import itertools
+import json
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_EVENTS_DIR = Path("data/events.d")
+
+CYCLE_COMPLETED = "cycle_completed"
+ALERT_SENT = "alert_sent"
+POSITION_OPENED = "position_opened"
+POSITION_CLOSED = "position_closed"
+OUTCOME_RESOLVED = "outcome_resolved"
+TOPICS = (CYCLE_COMPLETED, ALERT_SENT, POSITION_OPENED, POSITION_CLOSED, OUTCOME_RESOLVED)
+
+MAX_DATAGRAM = 64 * 1024
+
+_seq = itertools.count(1)
+_send_sock = None
+_send_lock = threading.Lock()
+stats = {"published": 0, "delivered": 0, "dropped": 0}
+
+
+def _sender():
+    global _send_sock
+    if _send_sock is None:
+        with _send_lock:
+            if _send_sock is None:
+                sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+                sock.setblocking(False)
+                _send_sock = sock
+    return _send_sock
+
+
+def _sockets(folder: Path, role: Optional[str] = None) -> List[Path]:
+    pattern = f"{role}-*.sock" if role else "*.sock"
+    try:
+        return list(folder.glob(pattern))
+    except OSError:
+        return []
+
+
+def publish(topic: str, data: Optional[Dict[str, Any]] = None,
+            directory: Optional[Union[str, Path]] = None) -> int:
+    """Fan an event out to every live subscriber; returns how many got it."""
+    folder = Path(directory or DEFAULT_EVENTS_DIR)
+    if not hasattr(socket, "AF_UNIX") or not folder.is_dir():
+        return 0
+    try:
+        event = {"topic": topic, "ts": time.time(), "pid": os.getpid(), "seq": next(_seq), "data": data or {}}
+        blob = json.dumps(event, default=str).encode("utf-8")
+        if len(blob) > MAX_DATAGRAM:
+            event["data"] = {"truncated": True}
+            blob = json.dumps(event).encode("utf-8")
+        sock = _sender()
+    except Exception as exc:
+        logger.warning("Event publish failed (%s): %s", topic, exc)
+        return 0
+    stats["published"] += 1
+    delivered = 0
+    for entry in _sockets(folder):
+        try:
+            sock.sendto(blob, str(entry))
+            delivered += 1
+        except (ConnectionRefusedError, FileNotFoundError):
+            entry.unlink(missing_ok=True)  # subscriber went away
+        except OSError:
+            stats["dropped"] += 1  # subscriber's buffer is full
+    stats["delivered"] += delivered
+    return delivered
+
+
+def has_subscriber(role: str, directory: Optional[Union[str, Path]] = None) -> bool:
+    """True if a live subscriber registered under role; stale sockets are removed."""
+    folder = Path(directory or DEFAULT_EVENTS_DIR)
+    if not hasattr(socket, "AF_UNIX") or not folder.is_dir():
+        return False
+    alive = False
+    for entry in _sockets(folder, role):
+        try:
+            _sender().sendto(b"", str(entry))  # empty datagram: a ping subscribers ignore
+            alive = True
+        except (ConnectionRefusedError, FileNotFoundError):
+            entry.unlink(missing_ok=True)
+        except OSError:
+            alive = True  # buffer full, but someone is there
+    return alive
+
+
+class Subscriber:
+    """Receives events for the given topics (all topics if None)."""
+
+    def __init__(self, topics: Optional[Iterable[str]] = None, role: str = "sub",
+                 directory: Optional[Union[str, Path]] = None):
+        self.topics = frozenset(topics) if topics is not None else None
+        self.role = role
+        self.directory = Path(directory or DEFAULT_EVENTS_DIR)
+        self.gaps = 0
+        self._last_seq: Dict[int, int] = {}
+        self._sock = None
+        self._path: Optional[Path] = None
+        if hasattr(socket, "AF_UNIX"):
+            try:
+                self.directory.mkdir(parents=True, exist_ok=True)
+                path = self.directory / f"{role}-{os.getpid()}-{uuid.uuid4().hex[:8]}.sock"
+                sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+                sock.bind(str(path))
+            except OSError as exc:
+                logger.info("Event subscription unavailable, falling back to polling: %s", exc)
+            else:
+                self._sock, self._path = sock, path
+
+    @property
+    def listening(self) -> bool:
+        return self._sock is not None
+
+    def fileno(self) -> int:
+        return self._sock.fileno() if self._sock is not None else -1
+
+    def poll(self, timeout: float = 0.0) -> List[Dict[str, Any]]:
+        """Wait up to timeout for the first event, then return everything queued."""
+        if self._sock is None:
+            if timeout > 0:
+                time.sleep(timeout)
+            return []
+        events: List[Dict[str, Any]] = []
+        deadline = time.monotonic() + timeout
+        sock = self._sock
+        while True:
+            remaining = deadline - time.monotonic()
+            sock.settimeout(max(0.0, remaining) if not events else 0)
+            try:
+                blob = sock.recv(MAX_DATAGRAM)
+            except (socket.timeout, BlockingIOError):
+                if events or remaining <= 0:
+                    return events
+                continue
+            if not blob:
+                continue  # has_subscriber() ping
+            try:
+                event = json.loads(blob)
+            except ValueError:
+                continue
+            self._track(event)
+            if self.topics is None or event.get("topic") in self.topics:
+                events.append(event)
+
+    def _track(self, event: Dict[str, Any]) -> None:
+        pid, seq = event.get("pid"), event.get("seq")
+        if not isinstance(seq, int):
+            return
+        last = self._last_seq.get(pid)
+        if last is not None and seq > last + 1:
+            self.gaps += 1
+        self._last_seq[pid] = seq
+
+    def close(self) -> None:
+        if self._sock is not None:
+            self._sock.close()
+            self._path.unlink(missing_ok=True)
+            self._sock = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def watch(handler, topics: Optional[Iterable[str]] = None, role: str = "sub",
+          directory: Optional[Union[str, Path]] = None, debounce: float = 0.25,
+          fallback_interval: float = 60.0) -> None:
+    """Call handler(events) for each burst of events until interrupted.
+
+    Events arriving within debounce seconds of the first are handed over
+    together, so a cycle's alerts and its cycle_completed cost one refresh.
+    Without Unix sockets handler([]) is called every fallback_interval.
+    """
+    with Subscriber(topics, role=role, directory=directory) as sub:
+        if not sub.listening:
+            logger.warning("Event bus unavailable; refreshing every %.0fs instead", fallback_interval)
+        while True:
+            events = sub.poll(3600.0 if sub.listening else fallback_interval)
+            if sub.listening and not events:
+                continue
+            if events and debounce > 0:
+                time.sleep(debounce)
+                events += sub.poll(0)
+            try:
+                handler(events)
+            except Exception as exc:
+                logger.error("Event handler failed: %s", exc, exc_info=True)
@@ -8,15 +8,38 @@ from pathlib import Path
 from typing import Dict, Any
 
 import httpx
+from core import event_bus
+from core.alert_store import open_store
+from core.async_writer import JsonlSink, get_writer
 from core.logger import logger
 from config import COOLDOWN_SECONDS
 from engine import AlertScore
 
+class AlertSink:
+    """Appends a batch of alerts to the store, then announces each one on the event bus."""
+    SUMMARY_FIELDS = ("alert_id", "timestamp", "symbol", "timeframe", "direction", "action",
+                      "entry_price", "confidence", "tier", "resolved")
+
+    def __init__(self, path):
+        self.path = Path(path)
+
+    def __call__(self, records):
+        open_store(self.path, writable=True).append_many(records)
+        for record in records:
+            event_bus.publish(event_bus.ALERT_SENT, {k: record.get(k) for k in self.SUMMARY_FIELDS})
+
+    def __eq__(self, other):
+        return isinstance(other, AlertSink) and other.path == self.path
+
+    def __hash__(self):
+        return hash(("alerts", self.path))
+
 class PersistentLogger:
     """Logs alerts to a JSONL file for outcome tracking."""
     def __init__(self, path: str = "logs/pid-129-alerts.jsonl"):
         self.path = Path(path)
         self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.sink = AlertSink(self.path)
         logger.info(f"PersistentLogger initialized at {self.path}")
 
     def log_alert(self, score: AlertScore, price: float):
@@ -56,9 +79,11 @@ class PersistentLogger:
         if score.direction == "NEUTRAL":
             record["resolved"] = True
         try:
-            with open(self.path, "a") as f:
-                f.write(json.dumps(record) + "\n")
-            logger.info(f"Alert persisted for tracking: {alert_id}")
+            # Written by the background writer; the cycle flushes it before outcome tracking
+            if not get_writer().write(self.sink, record):
+                logger.error(f"Alert write queue full, dropped alert {alert_id}")
+                return None
+            logger.info(f"Alert queued for tracking: {alert_id}")
             return alert_id
         except Exception as exc:
             logger.error(f"Failed to persist alert: {exc}", exc_info=True)
@@ -69,6 +94,7 @@ class AuditLogger:
     def __init__(self, path: str = "logs/audit.jsonl"):
         self.path = Path(path)
         self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.sink = JsonlSink(self.path)
 
     def log_cycle(self, symbol: str, timeframe: str, score: float, action: str):
         record = {
@@ -78,11 +104,7 @@ class AuditLogger:
             "score": score,
             "action": action
         }
-        try:
-            with open(self.path, "a") as f:
-                f.write(json.dumps(record) + "\n")
-        except:
-            pass
+        get_writer().write(self.sink, record)
 
 class Notifier:
     """Handles sending notifications, currently via Telegram."""
@@ -0,0 +1,54 @@
+"""
+Key-level deltas between two JSON-like dicts.
+
+diff(old, new) walks nested dicts and returns
+
+    {"set": [[path, value], ...], "del": [path, ...]}
+
+where each path is the list of keys from the root. Lists and scalars that
+changed are replaced whole; dicts are recursed into, so a price tick inside
+a large payload costs one short entry. apply_delta() is the inverse used by
+tests and Python consumers; the dashboard page carries the same few lines
+in JavaScript.
+"""
+from typing import Any, Dict, List, Optional
+
+
+def diff(old: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, List]:
+    ops: Dict[str, List] = {"set": [], "del": []}
+    _diff(old, new, [], ops)
+    return ops
+
+
+def _diff(old: Dict[str, Any], new: Dict[str, Any], path: List[str], ops: Dict[str, List]) -> None:
+    for key, value in new.items():
+        if key not in old:
+            ops["set"].append([path + [key], value])
+            continue
+        prev = old[key]
+        if isinstance(prev, dict) and isinstance(value, dict):
+            _diff(prev, value, path + [key], ops)
+        elif prev != value or type(prev) is not type(value):
+            ops["set"].append([path + [key], value])
+    for key in old:
+        if key not in new:
+            ops["del"].append(path + [key])
+
+
+def is_empty(ops: Optional[Dict[str, List]]) -> bool:
+    return not ops or (not ops["set"] and not ops["del"])
+
+
+def apply_delta(state: Dict[str, Any], ops: Dict[str, List]) -> Dict[str, Any]:
+    """Apply diff() output to state in place and return it."""
+    for path in ops.get("del", []):
+        target = state
+        for key in path[:-1]:
+            target = target[key]
+        target.pop(path[-1], None)
+    for path, value in ops.get("set", []):
+        target = state
+        for key in path[:-1]:
+            target = target.setdefault(key, {})
+        target[path[-1]] = value
+    return state
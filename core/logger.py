@@ -1,8 +1,14 @@
+import atexit
 import json
 import logging
+import queue
 import sys
 import time
 from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
+
+LOG_QUEUE_SIZE = 10000
+_PLAIN = (str, int, float, bool, type(None))
 
 class JSONFormatter(logging.Formatter):
     """
@@ -42,6 +48,9 @@ class JSONFormatter(logging.Formatter):
 
         for key, value in record.__dict__.items():
             if key not in self.standard_fields:
+                if isinstance(value, _PLAIN):
+                    log_record[key] = value
+                    continue
                 try:
                     json.dumps(value)
                     log_record[key] = value
@@ -53,6 +62,29 @@ class JSONFormatter(logging.Formatter):
         
         return json.dumps(log_record)
 
+class NonBlockingQueueHandler(QueueHandler):
+    """QueueHandler that never blocks the logging thread.
+
+    Records are handed over unformatted (the listener thread runs the
+    formatter), only the message is interpolated so later mutation of the
+    arguments cannot change it. A full queue drops the record and counts it.
+    """
+    def __init__(self, q):
+        super().__init__(q)
+        self.dropped = 0
+
+    def prepare(self, record):
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
 def setup_logger(name="btc_alerts"):
     logger = logging.getLogger(name)
     if not logger.handlers:
@@ -60,7 +92,12 @@ def setup_logger(name="btc_alerts"):
         handler = logging.StreamHandler(sys.stdout)
         formatter = JSONFormatter()
         handler.setFormatter(formatter)
-        logger.addHandler(handler)
+        # Formatting and stdout writes happen on the listener thread
+        log_queue = queue.Queue(LOG_QUEUE_SIZE)
+        listener = QueueListener(log_queue, handler, respect_handler_level=True)
+        listener.start()
+        atexit.register(listener.stop)
+        logger.addHandler(NonBlockingQueueHandler(log_queue))
         logger.propagate = False
     return logger
 
@@ -0,0 +1,218 @@
+"""
+In-process metrics: stage spans, counters, gauges and latency summaries.
+
+The engine wraps each stage of a cycle in span("collect", source="price"),
+span("score", symbol="BTC", timeframe="5m") and so on; each span observes
+its wall time into the stage_seconds summary and counts stage_errors when
+the block raises. Collectors count requests, retries and budget refusals
+per provider. Summaries keep the last WINDOW observations per label set
+and report their p50/p95/p99, plus an all-time count and sum.
+
+The engine saves a snapshot (plain JSON) to data/metrics.json after every
+cycle; the dashboard server merges it with its own registry and serves
+both as OpenMetrics text on /metrics:
+
+    # TYPE ember_stage_seconds summary
+    ember_stage_seconds{stage="collect",source="price",quantile="0.5"} 0.21
+    ember_stage_seconds_count{stage="collect",source="price"} 1440
+    ...
+    # EOF
+
+Everything is guarded by one lock; a span costs two perf_counter() calls
+and a deque append.
+"""
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+from core import tracing
+
+NAMESPACE = "ember"
+QUANTILES = (0.5, 0.95, 0.99)
+WINDOW = 1024
+DEFAULT_SNAPSHOT_PATH = Path("data/metrics.json")
+
+HELP = {
+    "stage_seconds": "Wall time of one cycle stage.",
+    "stage_errors": "Cycle stages that raised.",
+    "cycle_seconds": "Wall time of a whole engine cycle.",
+    "cycle_budget_utilization": "Last cycle time as a fraction of the cycle interval.",
+    "provider_request_seconds": "Latency of one upstream HTTP attempt.",
+    "provider_requests": "Upstream HTTP attempts by result.",
+    "provider_retries": "Upstream HTTP attempts that were retried after a backoff.",
+    "deadline_misses": "Cycle inputs that failed after the cycle deadline passed.",
+    "provider_probes": "Demoted or half-open providers tried first to re-measure them.",
+    "provider_breaker_opened": "Provider circuit breakers opened.",
+    "collector_service_reads": "Collector daemon snapshot reads by result (hit, shared, refresh, failed).",
+    "api_budget_utilization": "Calls in the rate-limit window as a fraction of the allowance.",
+    "api_budget_denied": "Calls refused by the rate-limit budget.",
+    "http_request_seconds": "Dashboard server request handling time.",
+}
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _labels(labels: Dict[str, Any]) -> Labels:
+    return tuple((k, str(v)) for k, v in labels.items())
+
+
+class Summary:
+    """Sliding window of observations with an all-time count and sum."""
+
+    __slots__ = ("window", "count", "total")
+
+    def __init__(self, size: int = WINDOW):
+        self.window: deque = deque(maxlen=size)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value: float) -> None:
+        self.window.append(value)
+        self.count += 1
+        self.total += value
+
+    def quantiles(self) -> Dict[str, float]:
+        values = sorted(self.window)
+        if not values:
+            return {}
+        last = len(values) - 1
+        return {str(q): values[min(last, int(round(q * last)))] for q in QUANTILES}
+
+
+class Registry:
+    def __init__(self, window: int = WINDOW):
+        self._window = window
+        self._lock = threading.Lock()
+        self._counters: Dict[Tuple[str, Labels], float] = {}
+        self._gauges: Dict[Tuple[str, Labels], float] = {}
+        self._summaries: Dict[Tuple[str, Labels], Summary] = {}
+
+    def inc(self, name: str, value: float = 1.0, **labels) -> None:
+        key = (name, _labels(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0.0) + value
+
+    def set_gauge(self, name: str, value: float, **labels) -> None:
+        with self._lock:
+            self._gauges[(name, _labels(labels))] = float(value)
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        key = (name, _labels(labels))
+        with self._lock:
+            summary = self._summaries.get(key)
+            if summary is None:
+                summary = self._summaries[key] = Summary(self._window)
+            summary.observe(value)
+
+    @contextmanager
+    def span(self, stage: str, **labels) -> Iterator[None]:
+        """Time the block into stage_seconds{stage=..., **labels}; count stage_errors if it raises.
+
+        The block also lands on the active cycle trace (core.tracing), if any.
+        """
+        started = time.perf_counter()
+        try:
+            yield
+        except BaseException:
+            self.inc("stage_errors", stage=stage, **labels)
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            self.observe("stage_seconds", elapsed, stage=stage, **labels)
+            tracing.record(" ".join([stage, *map(str, labels.values())]), "stage", started, elapsed, labels)
+
+    def snapshot(self) -> Dict[str, List[Any]]:
+        """JSON-able copy: [name, {label: value}, value] rows, summaries as {count, sum, quantiles}."""
+        with self._lock:
+            return {
+                "counters": [[n, dict(l), v] for (n, l), v in self._counters.items()],
+                "gauges": [[n, dict(l), v] for (n, l), v in self._gauges.items()],
+                "summaries": [[n, dict(l), {"count": s.count, "sum": s.total, "quantiles": s.quantiles()}]
+                              for (n, l), s in self._summaries.items()],
+            }
+
+    def save(self, path: Union[str, Path] = DEFAULT_SNAPSHOT_PATH) -> None:
+        """Write snapshot() atomically, for the dashboard server's /metrics."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(dict(self.snapshot(), ts=time.time()), separators=(",", ":")), encoding="utf-8")
+        os.replace(tmp, path)
+
+
+def load_snapshot(path: Union[str, Path] = DEFAULT_SNAPSHOT_PATH) -> Optional[Dict[str, Any]]:
+    try:
+        return json.loads(Path(path).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _sample(name: str, labels: Dict[str, str], value: float, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = [f'{k}="{_escape(str(v))}"' for k, v in labels.items()]
+    if extra:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return f"{name}{{{','.join(pairs)}}} {value!r}" if pairs else f"{name} {value!r}"
+
+
+def render(*snapshots: Optional[Dict[str, Any]]) -> str:
+    """OpenMetrics text exposition of one or more snapshots (later ones win on identical series)."""
+    families: Dict[str, Tuple[str, Dict[Tuple[Tuple[str, str], ...], Any]]] = {}
+    for snap in snapshots:
+        if not snap:
+            continue
+        for kind, metric_type in (("counters", "counter"), ("gauges", "gauge"), ("summaries", "summary")):
+            for name, labels, value in snap.get(kind, []):
+                family = families.setdefault(name, (metric_type, {}))
+                family[1][tuple(sorted(labels.items()))] = (labels, value)
+    lines = []
+    for name in sorted(families):
+        metric_type, series = families[name]
+        full = f"{NAMESPACE}_{name}"
+        lines.append(f"# TYPE {full} {metric_type}")
+        if name in HELP:
+            lines.append(f"# HELP {full} {HELP[name]}")
+        for _, (labels, value) in sorted(series.items()):
+            if metric_type == "counter":
+                lines.append(_sample(f"{full}_total", labels, float(value)))
+            elif metric_type == "gauge":
+                lines.append(_sample(full, labels, float(value)))
+            else:
+                for q, v in value["quantiles"].items():
+                    lines.append(_sample(full, labels, float(v), ("quantile", q)))
+                lines.append(_sample(f"{full}_count", labels, float(value["count"])))
+                lines.append(_sample(f"{full}_sum", labels, float(value["sum"])))
+    lines.append("# EOF")
+    return "\n".join(lines) + "\n"
+
+
+_registry = Registry()
+
+
+def get_registry() -> Registry:
+    """The process-wide registry."""
+    return _registry
+
+
+def span(stage: str, **labels):
+    return _registry.span(stage, **labels)
+
+
+def inc(name: str, value: float = 1.0, **labels) -> None:
+    _registry.inc(name, value, **labels)
+
+
+def set_gauge(name: str, value: float, **labels) -> None:
+    _registry.set_gauge(name, value, **labels)
+
+
+def observe(name: str, value: float, **labels) -> None:
+    _registry.observe(name, value, **labels)
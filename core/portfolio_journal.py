@@ -0,0 +1,227 @@
+"""
+Paper portfolio persistence: compacted snapshot plus an append-only journal.
+
+data/paper_portfolio.json keeps its old layout (balance, positions,
+closed_trades, peak_balance, max_drawdown, equity_curve) and is now only
+written by compaction, via a temp file and atomic rename. Every change in
+between is one JSON line appended to data/paper_portfolio.journal.jsonl:
+
+    {"type": "open", "position": {...}}
+    {"type": "close", "alert_id": ..., "trade": {...}, "balance": ..., "peak_balance": ..., "max_drawdown": ...}
+    {"type": "balance", "balance": ..., "peak_balance": ..., "max_drawdown": ...}
+    {"type": "execution", "position": {...}}
+    {"type": "execution_close", "id": ..., "reason": ..., "price": ...}
+
+"execution" records an executor fill. Those use the executor's own position
+shape (id, invalidation, ...), so they are kept in a separate "executions"
+list that the paper trader never loads as one of its positions.
+"execution_close" takes a fill off that list once its stop or target has
+traded or it has expired, so "executions" only holds open fills.
+
+State is the snapshot with the journal replayed on top. Both files carry a
+generation number; compaction writes snapshot g+1 and then starts journal
+g+1, so a crash in between leaves an older journal that is simply ignored,
+and the next append replaces it with a fresh g+1 journal.
+Appends and compaction hold an exclusive lock on <name>.lock, so the paper
+trader and the executor no longer overwrite each other. Once an open or
+close is on disk it is announced on the event bus (position_opened /
+position_closed) so the dashboard can refresh without polling.
+"""
+import json
+import os
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+from core import event_bus
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+DEFAULT_PORTFOLIO_PATH = Path("data/paper_portfolio.json")
+STARTING_BALANCE = 10000.0
+COMPACT_BYTES = 256 * 1024  # journal size that triggers a new snapshot
+
+
+def _announce(event: Dict[str, Any]) -> None:
+    kind = event.get("type")
+    if kind in ("open", "execution"):
+        pos = event.get("position") or {}
+        event_bus.publish(event_bus.POSITION_OPENED, {
+            k: pos.get(k) for k in ("alert_id", "id", "symbol", "timeframe", "direction", "entry_price")
+        })
+    elif kind == "close":
+        trade = event.get("trade") or {}
+        event_bus.publish(event_bus.POSITION_CLOSED, {
+            "alert_id": event.get("alert_id"),
+            "symbol": trade.get("symbol"),
+            "outcome": trade.get("outcome"),
+            "pnl_usdt": trade.get("pnl_usdt"),
+            "balance": event.get("balance"),
+        })
+
+
+def empty_state() -> Dict[str, Any]:
+    return {
+        "balance": STARTING_BALANCE,
+        "positions": [],
+        "closed_trades": [],
+        "peak_balance": STARTING_BALANCE,
+        "max_drawdown": 0.0,
+        "equity_curve": [{"timestamp": datetime.now(timezone.utc).isoformat(), "balance": STARTING_BALANCE}],
+        "executions": [],
+    }
+
+
+def apply_event(state: Dict[str, Any], event: Dict[str, Any]) -> None:
+    kind = event.get("type")
+    if kind == "open" and "alert_id" in event["position"]:
+        state["positions"].append(event["position"])
+    elif kind in ("open", "execution"):
+        # Executor fills (older journals wrote them as "open")
+        state.setdefault("executions", []).append(event["position"])
+    elif kind == "execution_close":
+        state["executions"] = [p for p in state.get("executions", []) if p.get("id") != event.get("id")]
+    elif kind == "close":
+        alert_id = event.get("alert_id")
+        for i, p in enumerate(state["positions"]):
+            if p.get("alert_id") == alert_id:
+                del state["positions"][i]
+                break
+        state["closed_trades"].append(event["trade"])
+        state["equity_curve"].append({"timestamp": event["trade"].get("exit_at"), "balance": event["balance"]})
+    for key in ("balance", "peak_balance", "max_drawdown"):
+        if key in event:
+            state[key] = event[key]
+
+
+@contextmanager
+def _exclusive(lock_path: Path):
+    lock_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(lock_path, "a+b") as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+                    break
+                except OSError:
+                    time.sleep(0.01)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _write_atomic(path: Path, text: str) -> None:
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+class PortfolioJournal:
+    """Snapshot + journal pair behind one portfolio file path."""
+
+    def __init__(self, path: Union[str, Path] = DEFAULT_PORTFOLIO_PATH, compact_bytes: int = COMPACT_BYTES):
+        self.path = Path(path)
+        self.journal_path = self.path.with_name(self.path.stem + ".journal.jsonl")
+        self.lock_path = self.path.with_name(self.path.stem + ".lock")
+        self.compact_bytes = compact_bytes
+
+    def _read_snapshot(self) -> Dict[str, Any]:
+        state = empty_state()
+        if self.path.exists():
+            text = self.path.read_text(encoding="utf-8")
+            if text.strip():
+                state.update(json.loads(text))
+        state.setdefault("generation", 0)
+        # Snapshots from before executor fills had their own list
+        fills = [p for p in state["positions"] if "alert_id" not in p]
+        if fills:
+            state["positions"] = [p for p in state["positions"] if "alert_id" in p]
+            state.setdefault("executions", []).extend(fills)
+        return state
+
+    def load(self) -> Dict[str, Any]:
+        """Snapshot with every journal event of the same generation applied."""
+        state = self._read_snapshot()
+        if not self.journal_path.exists():
+            return state
+        with open(self.journal_path, "r", encoding="utf-8") as f:
+            lines = f.read().split("\n")
+        # The last piece is empty or an event still being written
+        for n, line in enumerate(lines[:-1]):
+            if not line.strip():
+                continue
+            try:
+                event = json.loads(line)
+            except ValueError:
+                continue
+            if n == 0 and "generation" in event:
+                if event["generation"] != state["generation"]:
+                    return state  # left over from before the last snapshot
+                continue
+            apply_event(state, event)
+        return state
+
+    def append(self, event: Dict[str, Any], snapshot: bool = False) -> None:
+        """Journal one event; compacts once the journal outgrows compact_bytes
+        (or straight away with snapshot=True)."""
+        line = json.dumps(event) + "\n"
+        with _exclusive(self.lock_path):
+            generation = self._read_snapshot()["generation"]
+            if self._journal_generation() != generation:
+                # Missing, or left over from a compaction that crashed before restarting it
+                self._start_journal(generation)
+            with open(self.journal_path, "a", encoding="utf-8") as f:
+                f.write(line)
+                size = f.tell()
+            if snapshot or size >= self.compact_bytes:
+                self._compact()
+        _announce(event)
+
+    def compact(self) -> None:
+        with _exclusive(self.lock_path):
+            self._compact()
+
+    def _compact(self) -> None:
+        state = self.load()
+        state["generation"] += 1
+        _write_atomic(self.path, json.dumps(state, indent=2))
+        self._start_journal(state["generation"])
+
+    def _journal_generation(self) -> Optional[int]:
+        """Generation in the journal's header line; None if there is no readable header."""
+        try:
+            with open(self.journal_path, "r", encoding="utf-8") as f:
+                return json.loads(f.readline()).get("generation")
+        except (OSError, ValueError, AttributeError):
+            return None
+
+    def _start_journal(self, generation: int) -> None:
+        _write_atomic(self.journal_path, json.dumps({"generation": generation}) + "\n")
+
+    def reset(self) -> None:
+        with _exclusive(self.lock_path):
+            for p in (self.path, self.journal_path):
+                if p.exists():
+                    p.unlink()
+
+
+def load_portfolio_state(path: Union[str, Path] = DEFAULT_PORTFOLIO_PATH) -> Dict[str, Any]:
+    """Current portfolio as the dict readers of paper_portfolio.json expect."""
+    return PortfolioJournal(path).load()
@@ -0,0 +1,201 @@
+"""
+On-demand and slow-cycle profiling for the engine loop.
+
+Profiling is switched on at runtime, without a restart, through the control
+file data/profile_request.json. The dashboard's {"action": "profile_cycles"}
+command writes it (see request_profile()), and an operator can too:
+
+    {"cycles": 3, "mode": "cprofile", "tracemalloc": true}
+
+CycleProfiler.cycle() wraps each run() and picks the request up at the start
+of the next cycle. The next `cycles` cycles are then profiled:
+
+- mode "cprofile" writes logs/profiles/cycle-<stamp>.pstats, which pstats
+  and snakeviz read;
+- mode "sample" only keeps the sampled stacks described below, at much
+  lower overhead;
+- with tracemalloc on, it also writes a snapshot (.tracemalloc) and the
+  biggest allocation growth over the cycle (.alloc.txt).
+
+A sampling profiler runs through every cycle regardless. A daemon thread
+reads the loop thread's stack every sample_interval_seconds through
+sys._current_frames() and counts the collapsed stacks. These are written as
+<prefix>-<stamp>.folded ("frame;frame;frame count", the input of
+flamegraph.pl and speedscope) for profiled cycles. They are also written as
+slow-<stamp>.folded for any cycle slower than slow_cycle_seconds, so a cycle
+that suddenly takes 90 seconds leaves a profile behind without anyone
+asking. Only the newest keep_files files are kept.
+"""
+import cProfile
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONTROL_PATH = Path("data/profile_request.json")
+DEFAULT_PROFILE_DIR = Path("logs/profiles")
+MODES = ("cprofile", "sample")
+TRACEMALLOC_FRAMES = 25
+ALLOC_TOP = 30
+
+
+def request_profile(cycles: int = 1, mode: str = "cprofile", trace_memory: bool = False,
+                    path: Union[str, Path] = DEFAULT_CONTROL_PATH) -> Dict[str, object]:
+    """Ask the running engine to profile its next `cycles` cycles; returns the request written."""
+    if mode not in MODES:
+        raise ValueError(f"mode must be one of {MODES}")
+    request = {"cycles": max(1, int(cycles)), "mode": mode, "tracemalloc": bool(trace_memory),
+               "requested_at": time.time()}
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(request), encoding="utf-8")
+    os.replace(tmp, path)
+    return request
+
+
+class StackSampler:
+    """Counts one thread's collapsed stacks at a fixed interval from a daemon thread."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.counts: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self, thread_id: int) -> None:
+        self.counts = Counter()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(thread_id,), name="stack-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> Counter:
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+        return self.counts
+
+    def _run(self, thread_id: int) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self.counts[";".join(reversed(stack))] += 1
+
+
+class CycleProfiler:
+    def __init__(self, control_path: Union[str, Path] = DEFAULT_CONTROL_PATH,
+                 out_dir: Union[str, Path] = DEFAULT_PROFILE_DIR, slow_cycle_seconds: float = 90.0,
+                 sample_interval_seconds: float = 0.02, keep_files: int = 40):
+        self.control_path = Path(control_path)
+        self.out_dir = Path(out_dir)
+        self.slow_cycle_seconds = slow_cycle_seconds
+        self.keep_files = keep_files
+        self.sampler = StackSampler(sample_interval_seconds) if sample_interval_seconds > 0 else None
+        self.remaining = 0
+        self.mode = "cprofile"
+        self.trace_memory = False
+        self.written: List[Path] = []  # files written by the last cycle, for the caller to log
+
+    def _poll_request(self) -> None:
+        try:
+            request = json.loads(self.control_path.read_text(encoding="utf-8"))
+            self.control_path.unlink()
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as exc:
+            logger.warning(f"Ignoring unreadable profile request {self.control_path}: {exc}")
+            try:
+                self.control_path.unlink()
+            except OSError:
+                pass
+            return
+        self.remaining = max(1, int(request.get("cycles", 1)))
+        self.mode = request.get("mode") if request.get("mode") in MODES else "cprofile"
+        self.trace_memory = bool(request.get("tracemalloc"))
+        logger.info(f"Profiling the next {self.remaining} cycle(s) ({self.mode}, tracemalloc={self.trace_memory})")
+
+    @contextmanager
+    def cycle(self) -> Iterator[None]:
+        """Profile the wrapped cycle if requested; keep its sampled stacks if it turns out slow."""
+        self._poll_request()
+        requested = self.remaining > 0
+        profile = cProfile.Profile() if requested and self.mode == "cprofile" else None
+        trace_memory = requested and self.trace_memory
+        started_tracing = False
+        before = None
+        if trace_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(TRACEMALLOC_FRAMES)
+                started_tracing = True
+            before = tracemalloc.take_snapshot()
+        if self.sampler is not None:
+            self.sampler.start(threading.get_ident())
+        if profile is not None:
+            profile.enable()
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            elapsed = time.monotonic() - started
+            if profile is not None:
+                profile.disable()
+            stacks = self.sampler.stop() if self.sampler is not None else Counter()
+            if requested:
+                self.remaining -= 1
+            self.written = []
+            now = datetime.now(timezone.utc)
+            stamp = f"{now:%Y%m%dT%H%M%S}.{now.microsecond // 1000:03d}Z"
+            try:
+                self._write(stamp, elapsed, requested, profile, stacks, before if trace_memory else None)
+            except OSError as exc:
+                logger.warning(f"Failed to write cycle profile: {exc}")
+            finally:
+                if started_tracing:
+                    tracemalloc.stop()
+
+    def _write(self, stamp: str, elapsed: float, requested: bool, profile: Optional[cProfile.Profile],
+               stacks: Counter, before) -> None:
+        slow = elapsed > self.slow_cycle_seconds
+        if not (requested or slow):
+            return
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        prefix = self.out_dir / f"{'cycle' if requested else 'slow'}-{stamp}"
+        if profile is not None:
+            profile.dump_stats(f"{prefix}.pstats")
+            self.written.append(Path(f"{prefix}.pstats"))
+        if stacks:
+            folded = Path(f"{prefix}.folded")
+            folded.write_text("".join(f"{stack} {n}\n" for stack, n in stacks.most_common()), encoding="utf-8")
+            self.written.append(folded)
+        if before is not None:
+            after = tracemalloc.take_snapshot()
+            after.dump(f"{prefix}.tracemalloc")
+            growth = after.compare_to(before, "lineno")[:ALLOC_TOP]
+            alloc = Path(f"{prefix}.alloc.txt")
+            alloc.write_text("".join(f"{stat}\n" for stat in growth), encoding="utf-8")
+            self.written += [Path(f"{prefix}.tracemalloc"), alloc]
+        self._prune()
+
+    def _prune(self) -> None:
+        files = sorted((p for p in self.out_dir.iterdir() if p.is_file()), key=lambda p: p.stat().st_mtime)
+        for path in files[:-self.keep_files] if len(files) > self.keep_files else []:
+            try:
+                path.unlink()
+            except OSError:
+                pass
@@ -0,0 +1,270 @@
+"""
+Hourly and daily alert rollups for the reports.
+
+The scorecard, the morning briefing, the calibration report and the
+auto-tuner all want the same thing: counts, wins and R over some trailing
+window, split by a few alert fields. Rollups keeps those sums in time
+buckets (one per UTC hour and one per UTC day, by alert timestamp):
+
+    alerts, high_conf (confidence >= 70), resolved, wins (WIN_*), losses,
+    timeouts, positive (R > 0), total_r
+
+overall and per tier, timeframe, regime, session, confidence bin,
+direction, strategy and outcome, plus the highest-confidence alert of the
+bucket. An alert is booked when it is appended and its outcome when it
+resolves, both into the buckets of the time it fired.
+
+window(since) sums hourly buckets up to the first midnight after since and
+daily buckets from there on, so it costs the number of buckets, not the
+number of alerts, and is exact to the hour. Hourly buckets are kept for
+HOURLY_RETENTION_DAYS behind the newest alert; a window starting before
+that is rounded down to its day.
+
+Buckets and the alert store cursor are persisted in data/rollups.json, so
+each sync only reads what was appended since the last one.
+"""
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+from core.aggregates import confidence_bin
+from core.alert_store import _epoch
+
+DEFAULT_ROLLUPS_PATH = Path("data/rollups.json")
+FORMAT_VERSION = 1
+HOUR, DAY = 3600, 86400
+HOURLY_RETENTION_DAYS = 8
+
+DIMENSIONS = ("tier", "timeframe", "regime", "session", "confidence", "direction", "strategy", "outcome")
+FIELDS = ("alerts", "high_conf", "resolved", "wins", "losses", "timeouts", "positive", "total_r")
+
+
+def _empty_stats() -> Dict[str, Any]:
+    return dict.fromkeys(FIELDS, 0)
+
+
+def _empty_cell() -> Dict[str, Any]:
+    return {"all": _empty_stats(), "dims": {}, "best": None}
+
+
+def _merge_stats(into: Dict[str, Any], other: Dict[str, Any]) -> None:
+    for field in FIELDS:
+        into[field] += other[field]
+
+
+def _signal(alert: Dict[str, Any]) -> Dict[str, Any]:
+    return {"alerts": 1, "high_conf": int((alert.get("confidence") or 0) >= 70)}
+
+
+def _outcome(alert: Dict[str, Any]) -> Dict[str, Any]:
+    outcome = alert.get("outcome")
+    r = alert.get("r_multiple") or 0.0
+    return {
+        "resolved": 1,
+        "wins": int(bool(outcome) and "WIN" in outcome),
+        "losses": int(outcome == "LOSS"),
+        "timeouts": int(outcome == "TIMEOUT"),
+        "positive": int(r > 0),
+        "total_r": r,
+    }
+
+
+def _keys(alert: Dict[str, Any]) -> Dict[str, str]:
+    keys = {
+        "tier": str(alert.get("tier") or "UNKNOWN"),
+        "timeframe": str(alert.get("timeframe") or "UNKNOWN"),
+        "regime": str(alert.get("regime") or "unknown").lower(),
+        "session": str(alert.get("session") or "unknown").lower(),
+        "direction": str(alert.get("direction", "NEUTRAL")),
+        "strategy": str(alert.get("strategy", "UNKNOWN")),
+    }
+    conf_bin = confidence_bin(alert.get("confidence"))
+    if conf_bin is not None:
+        keys["confidence"] = conf_bin
+    return keys
+
+
+class Window:
+    """Summed buckets of one time window."""
+
+    def __init__(self, cell: Dict[str, Any]):
+        self.cell = cell
+
+    @property
+    def totals(self) -> Dict[str, Any]:
+        return self.cell["all"]
+
+    def by(self, dim: str) -> Dict[str, Dict[str, Any]]:
+        return self.cell["dims"].get(dim, {})
+
+    @property
+    def best(self) -> Optional[Dict[str, Any]]:
+        """The highest-confidence alert (earliest on ties) as {alert_id, confidence, direction, strategy, timeframe}."""
+        best = self.cell["best"]
+        if best is None:
+            return None
+        return dict(zip(("confidence", "alert_id", "direction", "strategy", "timeframe"), best))
+
+
+class Rollups:
+    """Hourly and daily alert buckets kept in step with the alert store."""
+
+    def __init__(self, path: Union[str, Path] = DEFAULT_ROLLUPS_PATH):
+        self.path = Path(path)
+        self._lock = threading.RLock()
+        self._mtime = None
+        self._reset()
+        self._adopt()
+
+    def _reset(self) -> None:
+        self.cursor: Optional[Dict[str, Any]] = None  # AlertStore.changes() cursor
+        self.resolved_ids = set()
+        self.hours_from = 0.0  # hourly buckets are complete from here on
+        self.hours: Dict[str, Dict[str, Any]] = {}
+        self.days: Dict[str, Dict[str, Any]] = {}
+
+    def _adopt(self) -> None:
+        try:
+            mtime = self.path.stat().st_mtime_ns
+        except OSError:
+            return
+        if mtime == self._mtime:
+            return
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return
+        self._mtime = mtime
+        if data.get("version") != FORMAT_VERSION:
+            return
+        self.cursor = data["cursor"]
+        self.resolved_ids = set(data["resolved_ids"])
+        self.hours_from = data["hours_from"]
+        self.hours, self.days = data["hours"], data["days"]
+
+    def save(self) -> None:
+        data = {
+            "version": FORMAT_VERSION,
+            "cursor": self.cursor,
+            "resolved_ids": sorted(self.resolved_ids, key=str),
+            "hours_from": self.hours_from,
+            "hours": self.hours,
+            "days": self.days,
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(data, separators=(",", ":")), encoding="utf-8")
+        os.replace(tmp, self.path)
+        self._mtime = self.path.stat().st_mtime_ns
+
+    # ------------------------------------------------------------------
+    # Updates
+    # ------------------------------------------------------------------
+
+    def _cells(self, ts: float):
+        cells = [self.days.setdefault(str(int(ts // DAY * DAY)), _empty_cell())]
+        if ts >= self.hours_from:
+            cells.append(self.hours.setdefault(str(int(ts // HOUR * HOUR)), _empty_cell()))
+        return cells
+
+    def _book(self, alert: Dict[str, Any], delta: Dict[str, Any], outcome: bool) -> None:
+        ts = _epoch(alert.get("timestamp"))
+        if not ts:
+            return
+        keys = _keys(alert)
+        if outcome:
+            keys["outcome"] = str(alert.get("outcome"))
+        stats = dict(_empty_stats(), **delta)
+        for cell in self._cells(ts):
+            _merge_stats(cell["all"], stats)
+            for dim, key in keys.items():
+                _merge_stats(cell["dims"].setdefault(dim, {}).setdefault(key, _empty_stats()), stats)
+            conf = alert.get("confidence") or 0
+            if not outcome and (cell["best"] is None or conf > cell["best"][0]):
+                cell["best"] = [conf, alert.get("alert_id"), alert.get("direction"),
+                                alert.get("strategy"), alert.get("timeframe")]
+
+    def _resolve(self, alert: Dict[str, Any]) -> None:
+        alert_id = alert.get("alert_id")
+        if not alert.get("resolved") or alert_id in self.resolved_ids:
+            return
+        if alert_id is not None:
+            self.resolved_ids.add(alert_id)
+        self._book(alert, _outcome(alert), outcome=True)
+
+    def _prune(self) -> None:
+        if not self.hours:
+            return
+        horizon = max(int(k) for k in self.hours) - HOURLY_RETENTION_DAYS * DAY
+        if horizon <= self.hours_from:
+            return
+        self.hours_from = horizon
+        for key in [k for k in self.hours if int(k) < horizon]:
+            del self.hours[key]
+
+    def sync(self, store) -> bool:
+        """Book alerts and outcomes written since the last sync; True if anything moved."""
+        with self._lock:
+            self._adopt()
+            cursor, records, patched, reset = store.changes(self.cursor)
+            if reset:
+                self._reset()
+            for alert in records:
+                self._book(alert, _signal(alert), outcome=False)
+                self._resolve(alert)
+            for alert_id in patched:
+                if alert_id not in self.resolved_ids:
+                    alert = store.get(alert_id)
+                    if alert is not None:
+                        self._resolve(alert)
+            if cursor == self.cursor:
+                return False
+            self.cursor = cursor
+            self._prune()
+            self.save()
+            return True
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    def window(self, since: Optional[float] = None) -> Window:
+        """Sum of every bucket from since (epoch seconds; None for all history) on."""
+        with self._lock:
+            if since is None:
+                cells = list(self.days.items())
+            else:
+                first_day = -(-since // DAY) * DAY  # first midnight at or after since
+                if since >= self.hours_from:
+                    start = since // HOUR * HOUR
+                    cells = [(k, c) for k, c in self.hours.items() if start <= int(k) < first_day]
+                else:
+                    first_day = since // DAY * DAY
+                    cells = []
+                cells += [(k, c) for k, c in self.days.items() if int(k) >= first_day]
+            total = _empty_cell()
+            for _, cell in sorted(cells, key=lambda kc: int(kc[0])):
+                _merge_stats(total["all"], cell["all"])
+                for dim, buckets in cell["dims"].items():
+                    into = total["dims"].setdefault(dim, {})
+                    for key, stats in buckets.items():
+                        _merge_stats(into.setdefault(key, _empty_stats()), stats)
+                if cell["best"] is not None and (total["best"] is None or cell["best"][0] > total["best"][0]):
+                    total["best"] = cell["best"]
+            return Window(total)
+
+
+_instances: Dict[str, Rollups] = {}
+_instances_lock = threading.Lock()
+
+
+def open_rollups(path: Union[str, Path] = DEFAULT_ROLLUPS_PATH) -> Rollups:
+    """Shared Rollups per path."""
+    key = str(Path(path).resolve())
+    with _instances_lock:
+        rollups = _instances.get(key)
+        if rollups is None:
+            rollups = _instances[key] = Rollups(path)
+        return rollups
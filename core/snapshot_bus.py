@@ -0,0 +1,266 @@
+"""
+Shared-memory market snapshot published by app.py.
+
+data/market_snapshot.bin is a fixed-size file that app.py maps read-write
+and readers (executor, dashboard) map read-only. Layout, little-endian:
+
+    0   header   magic "MSB1", layout u16, pad u16, seq u64, published_at f64, json_len u32
+    32  fixed    price, bid_px, bid_sz, ask_px, ask_sz, book_ts, heartbeat_ts, cycle_s (f64 each)
+    96  json     flows / derivatives / heartbeat details, json_len bytes
+
+Writes follow a seqlock: seq is made odd, the fields are written, then seq
+is made even again. A reader takes seq, unpacks, and re-checks seq; if it
+was odd or moved, the read raced a publish and is retried. The numeric
+fields are unpacked straight from the mapping, so a top-of-book read costs
+a few struct calls and no file I/O.
+
+Readers that want to wake on a publish instead of polling call wait(): it
+binds a Unix datagram socket in data/market_snapshot.d/, and the publisher
+sends one byte to every socket there after a publish made with notify=True.
+app.py only notifies on the end-of-cycle heartbeat, so waiting readers wake
+once per cycle rather than on every price and book update. Where Unix
+sockets are unavailable wait() falls back to polling seq.
+"""
+import json
+import logging
+import mmap
+import os
+import socket
+import struct
+import time
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUS_PATH = Path("data/market_snapshot.bin")
+REGION_SIZE = 64 * 1024
+LAYOUT_VERSION = 1
+
+_HEADER = struct.Struct("<4sHHQdI")
+_SEQ_OFFSET = 8
+_SEQ = struct.Struct("<Q")
+_META_OFFSET = 16
+_META = struct.Struct("<dI")  # published_at, json_len
+_FIXED_OFFSET = 32
+_FIXED = struct.Struct("<8d")
+_JSON_OFFSET = _FIXED_OFFSET + _FIXED.size
+_MAGIC = b"MSB1"
+FIXED_FIELDS = ("price", "bid_px", "bid_sz", "ask_px", "ask_sz", "book_ts", "heartbeat_ts", "cycle_s")
+
+
+@dataclass
+class MarketSnapshot:
+    seq: int
+    published_at: float
+    price: float = 0.0
+    bid_px: float = 0.0
+    bid_sz: float = 0.0
+    ask_px: float = 0.0
+    ask_sz: float = 0.0
+    book_ts: float = 0.0
+    heartbeat_ts: float = 0.0
+    cycle_s: float = 0.0
+    extra: Dict[str, Any] = field(default_factory=dict)
+
+    def as_market_cache(self) -> Dict[str, Any]:
+        """The data/market_cache.json shape the executor and dashboard used."""
+        if self.bid_px <= 0 or self.ask_px <= 0:
+            return {}
+        return {"orderbook": {"bids": [[self.bid_px, self.bid_sz]], "asks": [[self.ask_px, self.ask_sz]], "ts": self.book_ts}}
+
+
+def _notify_dir(path: Path) -> Path:
+    return path.with_name(path.stem + ".d")
+
+
+class SnapshotPublisher:
+    """Single writer; each publish() merges the given fields into the snapshot."""
+
+    def __init__(self, path: Union[str, Path] = DEFAULT_BUS_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if os.fstat(fd).st_size < REGION_SIZE:
+                os.ftruncate(fd, REGION_SIZE)
+            self._mm = mmap.mmap(fd, REGION_SIZE, access=mmap.ACCESS_WRITE)
+        finally:
+            os.close(fd)
+        magic, layout, _, seq, _, _ = _HEADER.unpack_from(self._mm, 0)
+        if magic == _MAGIC and layout == LAYOUT_VERSION:
+            self._seq = seq + (seq & 1)
+        else:
+            self._seq = 0
+            _HEADER.pack_into(self._mm, 0, _MAGIC, LAYOUT_VERSION, 0, 0, 0.0, 0)
+        self._fixed = dict.fromkeys(FIXED_FIELDS, 0.0)
+        self._extra: Dict[str, Any] = {}
+        self._sock = None
+
+    def publish(self, notify: bool = False, **fields: Any) -> int:
+        """Update fixed fields by name; anything else lands in the JSON section.
+        With notify=True, readers blocked in wait() are woken."""
+        for key, value in fields.items():
+            if key in self._fixed:
+                self._fixed[key] = float(value or 0.0)
+            else:
+                self._extra[key] = value
+        blob = json.dumps(self._extra, default=str).encode("utf-8")
+        if _JSON_OFFSET + len(blob) > REGION_SIZE:
+            raise ValueError(f"snapshot JSON section too large ({len(blob)} bytes)")
+
+        mm = self._mm
+        _SEQ.pack_into(mm, _SEQ_OFFSET, self._seq + 1)  # odd: write in progress
+        _FIXED.pack_into(mm, _FIXED_OFFSET, *(self._fixed[k] for k in FIXED_FIELDS))
+        mm[_JSON_OFFSET:_JSON_OFFSET + len(blob)] = blob
+        _META.pack_into(mm, _META_OFFSET, time.time(), len(blob))
+        self._seq += 2
+        _SEQ.pack_into(mm, _SEQ_OFFSET, self._seq)  # even again: published
+        if notify:
+            self._notify()
+        return self._seq
+
+    def _notify(self) -> None:
+        folder = _notify_dir(self.path)
+        if not hasattr(socket, "AF_UNIX") or not folder.is_dir():
+            return
+        if self._sock is None:
+            self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            self._sock.setblocking(False)
+        for entry in folder.glob("*.sock"):
+            try:
+                self._sock.sendto(b"1", str(entry))
+            except (ConnectionRefusedError, FileNotFoundError):
+                entry.unlink(missing_ok=True)  # reader went away
+            except OSError:
+                pass  # reader's buffer is full: it has a wake-up pending anyway
+
+    def close(self) -> None:
+        if self._sock is not None:
+            self._sock.close()
+        self._mm.close()
+
+
+class SnapshotReader:
+    """Read-only view of the bus; reopens lazily if the file appears later."""
+
+    def __init__(self, path: Union[str, Path] = DEFAULT_BUS_PATH):
+        self.path = Path(path)
+        self._mm: Optional[mmap.mmap] = None
+        self._sock = None
+        self._sock_path: Optional[Path] = None
+        self._last_seq = 0
+
+    def _map(self) -> Optional[mmap.mmap]:
+        if self._mm is None:
+            try:
+                with open(self.path, "rb") as f:
+                    self._mm = mmap.mmap(f.fileno(), REGION_SIZE, access=mmap.ACCESS_READ)
+            except (OSError, ValueError):
+                return None
+        return self._mm
+
+    def available(self) -> bool:
+        return self._map() is not None
+
+    def seq(self) -> int:
+        mm = self._map()
+        return _SEQ.unpack_from(mm, _SEQ_OFFSET)[0] if mm is not None else 0
+
+    def read(self, with_extra: bool = True, retries: int = 1000) -> Optional[MarketSnapshot]:
+        """Consistent snapshot, or None if nothing has been published yet."""
+        mm = self._map()
+        if mm is None:
+            return None
+        for _ in range(retries):
+            magic, layout, _, seq, published_at, json_len = _HEADER.unpack_from(mm, 0)
+            if magic != _MAGIC or layout != LAYOUT_VERSION:
+                return None
+            if seq & 1:
+                time.sleep(0)
+                continue
+            fixed = _FIXED.unpack_from(mm, _FIXED_OFFSET)
+            blob = mm[_JSON_OFFSET:_JSON_OFFSET + json_len] if with_extra else b""
+            if _SEQ.unpack_from(mm, _SEQ_OFFSET)[0] != seq:
+                continue
+            snap = MarketSnapshot(seq, published_at, *fixed)
+            if blob:
+                snap.extra = json.loads(blob)
+            self._last_seq = seq
+            return snap
+        return None
+
+    def wait(self, timeout: float) -> bool:
+        """Block until a publish newer than the last read or wait, or timeout; True if one happened."""
+        start_seq = self._last_seq
+        if self.seq() != start_seq:
+            self._last_seq = self.seq()
+            return True
+        deadline = time.monotonic() + timeout
+        sock = self._listen()
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            if sock is not None:
+                sock.settimeout(remaining)
+                try:
+                    while True:
+                        sock.recv(16)
+                        sock.settimeout(0)  # drain any queued wake-ups
+                except (socket.timeout, BlockingIOError):
+                    pass
+            else:
+                time.sleep(min(0.05, remaining))
+            seq = self.seq()
+            if seq != start_seq:
+                self._last_seq = seq
+                return True
+
+    def _listen(self):
+        if self._sock is None and hasattr(socket, "AF_UNIX"):
+            folder = _notify_dir(self.path)
+            try:
+                folder.mkdir(parents=True, exist_ok=True)
+                path = folder / f"{os.getpid()}-{uuid.uuid4().hex[:8]}.sock"
+                sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+                sock.bind(str(path))
+            except OSError:
+                return None  # e.g. path too long for AF_UNIX: poll instead
+            self._sock, self._sock_path = sock, path
+        return self._sock
+
+    def close(self) -> None:
+        if self._sock is not None:
+            self._sock.close()
+            self._sock_path.unlink(missing_ok=True)
+            self._sock = None
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+
+
+_publisher: Optional[SnapshotPublisher] = None
+
+
+def publish(notify: bool = False, **fields: Any) -> None:
+    """Publish from app.py; failures never interrupt the cycle."""
+    global _publisher
+    try:
+        if _publisher is None:
+            _publisher = SnapshotPublisher()
+        _publisher.publish(notify=notify, **fields)
+    except Exception as exc:
+        logger.warning("Snapshot publish failed: %s", exc)
+
+
+_readers: Dict[str, SnapshotReader] = {}
+
+
+def read_snapshot(path: Union[str, Path] = DEFAULT_BUS_PATH, with_extra: bool = True) -> Optional[MarketSnapshot]:
+    reader = _readers.get(str(path))
+    if reader is None:
+        reader = _readers[str(path)] = SnapshotReader(path)
+    return reader.read(with_extra=with_extra)
@@ -0,0 +1,143 @@
+"""
+Per-cycle execution timeline in Chrome Trace Event format.
+
+While a cycle trace is active (start_cycle() .. finish_cycle()), every
+span() and every core.metrics span, from any thread, is recorded as a
+complete ("X") event with its thread id. The same goes for collector HTTP
+attempts, retry backoff sleeps, the engine's intelligence layers,
+state-store checks, Telegram sends, housekeeping and background-writer
+batches. finish_cycle() writes the cycle as
+
+    logs/traces/cycle-<UTC stamp>-<seconds>s.json
+
+which chrome://tracing, ui.perfetto.dev and speedscope open directly. Lanes
+are threads, so serialization points and idle sleeps on the critical path
+are visible at a glance. Only the newest keep_files traces are kept.
+
+With no active trace, span() returns a shared no-op, so the instrumented
+engine code costs a global lookup per layer in backtests.
+"""
+import json
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+DEFAULT_TRACE_DIR = Path("logs/traces")
+
+
+class CycleTrace:
+    def __init__(self, name: str = "cycle"):
+        self.name = name
+        self.pid = os.getpid()
+        self.t0 = time.perf_counter()
+        self.events: List[Dict[str, Any]] = []
+        self.threads: Dict[int, str] = {}
+        self._lock = threading.Lock()
+
+    def add(self, name: str, cat: str, started: float, duration: float, args: Optional[Dict[str, Any]] = None) -> None:
+        """Record a complete event; started is a perf_counter() value, duration in seconds."""
+        thread = threading.current_thread()
+        event = {
+            "name": name, "cat": cat, "ph": "X", "pid": self.pid, "tid": thread.ident,
+            "ts": round((started - self.t0) * 1e6, 1), "dur": round(duration * 1e6, 1),
+        }
+        if args:
+            event["args"] = {k: v if isinstance(v, (int, float, bool)) or v is None else str(v) for k, v in args.items()}
+        with self._lock:
+            self.events.append(event)
+            self.threads.setdefault(thread.ident, thread.name)
+
+    def to_json(self) -> Dict[str, Any]:
+        with self._lock:
+            meta = [{"name": "process_name", "ph": "M", "pid": self.pid, "tid": 0, "args": {"name": self.name}}]
+            meta += [{"name": "thread_name", "ph": "M", "pid": self.pid, "tid": tid, "args": {"name": name}}
+                     for tid, name in self.threads.items()]
+            return {"traceEvents": meta + sorted(self.events, key=lambda e: e["ts"]), "displayTimeUnit": "ms"}
+
+
+_active: Optional[CycleTrace] = None
+
+
+class _Span:
+    __slots__ = ("trace", "name", "cat", "args", "started")
+
+    def __init__(self, trace: CycleTrace, name: str, cat: str, args: Dict[str, Any]):
+        self.trace, self.name, self.cat, self.args = trace, name, cat, args
+
+    def __enter__(self) -> "_Span":
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+        self.trace.add(self.name, self.cat, self.started, time.perf_counter() - self.started, self.args)
+        return False
+
+
+class _NoSpan:
+    __slots__ = ()
+
+    def __enter__(self) -> "_NoSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        return False
+
+
+_NO_SPAN = _NoSpan()
+
+
+def span(name: str, cat: str = "stage", **args):
+    """Context manager recording the block on the active cycle trace; a no-op without one."""
+    trace = _active
+    return _NO_SPAN if trace is None else _Span(trace, name, cat, args)
+
+
+def record(name: str, cat: str, started: float, duration: float, args: Optional[Dict[str, Any]] = None) -> None:
+    """Add an already-timed block (perf_counter() start, seconds) to the active trace, if any."""
+    trace = _active
+    if trace is not None:
+        trace.add(name, cat, started, duration, args)
+
+
+def active() -> Optional[CycleTrace]:
+    return _active
+
+
+def start_cycle(name: str = "cycle") -> CycleTrace:
+    global _active
+    _active = CycleTrace(name)
+    return _active
+
+
+def finish_cycle(out_dir: Union[str, Path] = DEFAULT_TRACE_DIR, keep_files: int = 48) -> Optional[Path]:
+    """Stop tracing, record the whole cycle as one event and write the trace file; returns its path."""
+    global _active
+    trace, _active = _active, None
+    if trace is None:
+        return None
+    elapsed = time.perf_counter() - trace.t0
+    trace.add(trace.name, "cycle", trace.t0, elapsed)
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    now = datetime.now(timezone.utc)
+    stem = f"cycle-{now:%Y%m%dT%H%M%S}.{now.microsecond // 1000:03d}Z-{elapsed:.1f}s"
+    path = out_dir / f"{stem}.json"
+    n = 1
+    while path.exists():  # two cycles finished within the same millisecond
+        path = out_dir / f"{stem}-{n}.json"
+        n += 1
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps(trace.to_json(), separators=(",", ":")), encoding="utf-8")
+    os.replace(tmp, path)
+    traces = sorted((p for p in out_dir.glob("cycle-*.json") if p != path), key=lambda p: p.stat().st_mtime)
+    for old in traces[:len(traces) - keep_files + 1] if len(traces) >= keep_files else []:
+        try:
+            old.unlink()
+        except OSError:
+            pass
+    return path
@@ -0,0 +1,296 @@
+"""
+Single-threaded WebSocket broadcast hub for the dashboard.
+
+The HTTP server still answers the upgrade request, then hands the raw socket
+to the hub and frees its thread. The hub runs one asyncio loop on a daemon
+thread and serves every client from it, so idle screens cost a socket and a
+couple of small coroutines instead of a thread each.
+
+publish() takes the already-serialized state, its version and optionally
+the JSON change set from the previous version. Each version is framed once
+and the same bytes are shared by every client; nothing is sent while the
+version stays the same. Clients receive
+
+    {"type": "snapshot", "seq": N, "data": {...}}                on connect or resync
+    {"type": "delta", "seq": N, "base": N-1, "ops": {...}}       afterwards
+
+and send {"type": "resync"} if a delta's base is not the seq they hold.
+The hub tracks the version each client was last sent: a client that is
+exactly one version behind gets the delta, anyone else the snapshot. A slow
+client therefore skips intermediate versions instead of buffering them
+(and gets a snapshot to catch up); one that cannot drain for drain_timeout
+seconds is disconnected.
+
+Masked client frames are decoded per RFC 6455: ping gets a pong, close is
+echoed and ends the session. The hub pings idle clients and drops those
+that stay silent for idle_timeout.
+"""
+import asyncio
+import json
+import logging
+import socket
+import struct
+import threading
+import time
+from typing import Optional, Set
+
+logger = logging.getLogger(__name__)
+
+OP_CONT, OP_TEXT, OP_BINARY, OP_CLOSE, OP_PING, OP_PONG = 0x0, 0x1, 0x2, 0x8, 0x9, 0xA
+MAX_CLIENT_FRAME = 64 * 1024
+
+
+def encode_frame(payload: bytes, opcode: int = OP_TEXT) -> bytes:
+    """Unmasked, unfragmented server frame."""
+    length = len(payload)
+    if length <= 125:
+        header = struct.pack("!BB", 0x80 | opcode, length)
+    elif length <= 65535:
+        header = struct.pack("!BBH", 0x80 | opcode, 126, length)
+    else:
+        header = struct.pack("!BBQ", 0x80 | opcode, 127, length)
+    return header + payload
+
+
+async def read_frame(reader: asyncio.StreamReader):
+    """(fin, opcode, payload) of one client frame."""
+    b1, b2 = await reader.readexactly(2)
+    length = b2 & 0x7F
+    if length == 126:
+        (length,) = struct.unpack("!H", await reader.readexactly(2))
+    elif length == 127:
+        (length,) = struct.unpack("!Q", await reader.readexactly(8))
+    if length > MAX_CLIENT_FRAME:
+        raise ValueError(f"client frame too large ({length} bytes)")
+    mask = await reader.readexactly(4) if b2 & 0x80 else None
+    payload = await reader.readexactly(length)
+    if mask:
+        payload = bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+    return bool(b1 & 0x80), b1 & 0x0F, payload
+
+
+class Client:
+    def __init__(self, hub: "WebSocketHub", reader, writer):
+        self.hub = hub
+        self.reader = reader
+        self.writer = writer
+        self.peer = writer.get_extra_info("peername")
+        self.sent_version: Optional[int] = None  # None: needs a full snapshot
+        self.dirty = False
+        self.wakeup = asyncio.Event()
+        self.last_seen = time.monotonic()
+        self.closed = False
+        self.skipped = 0  # versions superseded before they could be sent
+
+    def mark(self) -> None:
+        if self.dirty:
+            self.skipped += 1
+        self.dirty = True
+        self.wakeup.set()
+
+    def send_control(self, opcode: int, payload: bytes = b"") -> None:
+        if not self.closed:
+            self.writer.write(encode_frame(payload, opcode))
+
+
+class WebSocketHub:
+    def __init__(self, drain_timeout: float = 10.0, ping_interval: float = 20.0, idle_timeout: float = 60.0):
+        self.drain_timeout = drain_timeout
+        self.ping_interval = ping_interval
+        self.idle_timeout = idle_timeout
+        self.clients: Set[Client] = set()
+        # Loop-side view of the latest version
+        self.version = -1
+        self.base: Optional[int] = None
+        self.snapshot_frame: Optional[bytes] = None
+        self.delta_frame: Optional[bytes] = None
+        self.frames_built = 0
+        self.snapshots_sent = 0
+        self.deltas_sent = 0
+        self.resyncs = 0
+        self.disconnects = 0
+        self._published = -1
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._ready = threading.Event()
+
+    # --- thread-safe API -------------------------------------------------
+
+    def start(self) -> "WebSocketHub":
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="ws-hub", daemon=True)
+            self._thread.start()
+            self._ready.wait()
+        return self
+
+    def attach(self, sock: socket.socket) -> None:
+        """Take over an upgraded connection from the HTTP server."""
+        self.start()
+        asyncio.run_coroutine_threadsafe(self._serve(sock), self._loop)
+
+    def publish(self, payload: str, version: int, delta: Optional[str] = None) -> bool:
+        """Broadcast a new version; False if it was already published.
+
+        payload is the full state as JSON; delta (optional) is the JSON
+        change set from the previously published version to this one.
+        """
+        if version == self._published:
+            return False
+        base, self._published = self._published, version
+        snapshot = encode_frame(('{"type":"snapshot","seq":%d,"data":%s}' % (version, payload)).encode("utf-8"))
+        delta_frame = None
+        if delta is not None and base >= 0:
+            delta_frame = encode_frame(
+                ('{"type":"delta","seq":%d,"base":%d,"ops":%s}' % (version, base, delta)).encode("utf-8"))
+        self.frames_built += 1 + (delta_frame is not None)
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._update, version, base, snapshot, delta_frame)
+        else:
+            self._update(version, base, snapshot, delta_frame)
+        return True
+
+    def stats(self):
+        return {
+            "clients": len(self.clients),
+            "version": self.version,
+            "frames_built": self.frames_built,
+            "snapshot_bytes": len(self.snapshot_frame or b""),
+            "delta_bytes": len(self.delta_frame or b""),
+            "snapshots_sent": self.snapshots_sent,
+            "deltas_sent": self.deltas_sent,
+            "resyncs": self.resyncs,
+            "disconnects": self.disconnects,
+            "skipped": sum(c.skipped for c in list(self.clients)),
+        }
+
+    def stop(self) -> None:
+        if self._loop is None:
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self._shutdown(), self._loop).result(5)
+        except Exception:
+            pass
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(5)
+        self._loop.close()
+        self._loop, self._thread = None, None
+        self._ready.clear()
+
+    # --- loop side -------------------------------------------------------
+
+    def _run(self) -> None:
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        self._keepalive_task = self._loop.create_task(self._keepalive())
+        self._ready.set()
+        self._loop.run_forever()
+
+    async def _shutdown(self) -> None:
+        self._keepalive_task.cancel()
+        for client in list(self.clients):
+            client.writer.transport.abort()
+        # Aborting ends each client's session on its own
+        tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+        if tasks:
+            await asyncio.wait(tasks, timeout=2.0)
+
+    def _update(self, version: int, base: int, snapshot: bytes, delta: Optional[bytes]) -> None:
+        self.version, self.base = version, base
+        self.snapshot_frame, self.delta_frame = snapshot, delta
+        for client in self.clients:
+            client.mark()
+
+    def _next_frame(self, client: Client) -> Optional[bytes]:
+        """Delta if the client holds the version it applies to, else a snapshot."""
+        if self.snapshot_frame is None or client.sent_version == self.version:
+            return None
+        if self.delta_frame is not None and client.sent_version == self.base:
+            self.deltas_sent += 1
+            frame = self.delta_frame
+        else:
+            self.snapshots_sent += 1
+            frame = self.snapshot_frame
+        client.sent_version = self.version
+        return frame
+
+    async def _serve(self, sock: socket.socket) -> None:
+        try:
+            reader, writer = await asyncio.open_connection(sock=sock)
+        except OSError:
+            sock.close()
+            return
+        client = Client(self, reader, writer)
+        self.clients.add(client)
+        client.mark()
+        sender = asyncio.ensure_future(self._send_loop(client))
+        try:
+            await self._recv_loop(client)
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError, OSError):
+            pass
+        finally:
+            client.closed = True
+            client.wakeup.set()  # lets the sender return
+            self.clients.discard(client)
+            self.disconnects += 1
+            writer.close()
+            await sender
+
+    async def _send_loop(self, client: Client) -> None:
+        try:
+            while True:
+                await client.wakeup.wait()
+                client.wakeup.clear()
+                if client.closed:
+                    return
+                client.dirty = False
+                frame = self._next_frame(client)
+                if frame is None:
+                    continue
+                client.writer.write(frame)
+                await asyncio.wait_for(client.writer.drain(), self.drain_timeout)
+        except (asyncio.TimeoutError, ConnectionError, OSError):
+            logger.info("Dropping slow WebSocket client %s", client.peer)
+            client.closed = True
+            client.writer.transport.abort()
+
+    async def _recv_loop(self, client: Client) -> None:
+        message = bytearray()
+        while True:
+            fin, opcode, payload = await read_frame(client.reader)
+            client.last_seen = time.monotonic()
+            if opcode == OP_PING:
+                client.send_control(OP_PONG, payload)
+            elif opcode == OP_PONG:
+                pass
+            elif opcode == OP_CLOSE:
+                client.send_control(OP_CLOSE, payload[:2])
+                await client.writer.drain()
+                return
+            elif opcode in (OP_TEXT, OP_CONT):
+                message += payload
+                if len(message) > MAX_CLIENT_FRAME:
+                    raise ValueError("client message too large")
+                if fin:
+                    text, message = message.decode("utf-8", "replace"), bytearray()
+                    self._on_message(client, text)
+
+    def _on_message(self, client: Client, text: str) -> None:
+        try:
+            msg = json.loads(text)
+        except ValueError:
+            return
+        if isinstance(msg, dict) and msg.get("type") == "resync":
+            # The client saw a gap: its next frame is a full snapshot
+            self.resyncs += 1
+            client.sent_version = None
+            client.mark()
+
+    async def _keepalive(self) -> None:
+        while True:
+            await asyncio.sleep(self.ping_interval)
+            now = time.monotonic()
+            for client in list(self.clients):
+                if now - client.last_seen > self.idle_timeout:
+                    client.writer.transport.abort()
+                else:
+                    client.send_control(OP_PING, b"hb")
@@ -1,3 +1,4 @@
+from dataclasses import dataclass
 from typing import Dict, Any, List, Optional, Tuple
 from config import INTELLIGENCE_FLAGS
 from intelligence import IntelligenceBundle, AlertScore
@@ -39,6 +40,7 @@ from intelligence.detectors import (
     _detector_candidates,
     _arbitrate_candidates,
 )
+from core import tracing
 from core.logger import logger
 
 # Phase 20-23: calibrated for live market. Scales raw signal points (~-30 to +30)
@@ -53,11 +55,17 @@ def _tier_and_action(score: int, blockers: List[str], timeframe: str, rubric_sco
     - Threshold adjustments (seasoning) applied to Confidence score.
     """
     cfg = TIMEFRAME_RULES.get(timeframe, TIMEFRAME_RULES["5m"])
-    if blockers:
+    return _tier_for(score, bool(blockers), cfg, CONFLUENCE_RULES, CONFLUENCE_THRESHOLDS, rubric_score, threshold_adj)
+
+
+def _tier_for(score: int, blocked: bool, cfg: Dict[str, Any], conf_rules: Dict[str, Any],
+              thresholds: Dict[str, float], rubric_score: float, threshold_adj: int = 0) -> tuple[str, str]:
+    """_tier_and_action() with the config passed in (see _make_decider)."""
+    if blocked:
         return "NO-TRADE", "SKIP"
     
     # Seasoned thresholds
-    conf_floor = CONFLUENCE_RULES.get("CONFIDENCE_FLOOR_FOR_TRADE", 45)
+    conf_floor = conf_rules.get("CONFIDENCE_FLOOR_FOR_TRADE", 45)
     trade_threshold = max(conf_floor, cfg.get("trade_long" if score > 0 else "trade_short", 40) + threshold_adj)
     watch_threshold = cfg.get("watch_long" if score > 0 else "watch_short", 25) + threshold_adj
 
@@ -73,11 +81,11 @@ def _tier_and_action(score: int, blockers: List[str], timeframe: str, rubric_sco
         action = "WATCH"
 
     # 2. Hard Gate: Weighted Confluence Rubric (Phase 29)
-    if tier == "A+" and rubric_score < CONFLUENCE_THRESHOLDS["A+"]:
+    if tier == "A+" and rubric_score < thresholds["A+"]:
         tier = "B"
     
-    if tier == "B" and rubric_score < CONFLUENCE_THRESHOLDS["B"]:
-        if rubric_score >= CONFLUENCE_THRESHOLDS["C"]:
+    if tier == "B" and rubric_score < thresholds["B"]:
+        if rubric_score >= thresholds["C"]:
             tier = "C"
             action = "MONITOR"
         else:
@@ -85,7 +93,7 @@ def _tier_and_action(score: int, blockers: List[str], timeframe: str, rubric_sco
             action = "SKIP"
     
     # If not already A+/B, check if it qualifies for C-tier monitor
-    if tier == "NO-TRADE" and rubric_score >= CONFLUENCE_THRESHOLDS["C"]:
+    if tier == "NO-TRADE" and rubric_score >= thresholds["C"]:
         tier = "C"
         action = "MONITOR"
 
@@ -123,7 +131,82 @@ def _htf_confirms(recipe_direction: str, candles_htf: List[Candle]) -> bool:
         
     return True
 
-def compute_score(
+
+# Rubric categories in scoring order; bit i of a rubric mask = category i present.
+RUBRIC_CATEGORIES = ("structure", "location", "anchors", "derivatives", "momentum", "volatility")
+
+_RUBRIC_SIGNALS = {
+    "LONG": (
+        ("STRUCTURE_BOS_BULL", "STRUCTURE_CHOCH_BULL", "BOS_CONTINUATION_RECIPE"),
+        ("NEAR_POC", "BID_WALL_SUPPORT", "EQL_SWEEP_BULL", "PDL_SWEEP_BULL", "RANGE_BREAKOUT_RECIPE"),
+        ("AVWAP_RECLAIM_BULL", "AVWAP_ABOVE_1SD", "HTF_REVERSAL_RECIPE"),
+        ("FUNDING_LOW", "OI_SURGE_MINOR", "OI_SURGE_MAJOR", "BASIS_BULLISH", "FUNDING_FLUSH_RECIPE"),
+        ("HTF_ALIGNED", "FLOW_TAKER_BULLISH", "SENTIMENT_BULL", "MOM_DIVERGENCE_RECIPE"),
+        ("SQUEEZE_FIRE", "VOL_EXPANSION_RECIPE"),
+    ),
+    "SHORT": (
+        ("STRUCTURE_BOS_BEAR", "STRUCTURE_CHOCH_BEAR", "BOS_CONTINUATION_RECIPE"),
+        ("NEAR_POC", "ASK_WALL_RESISTANCE", "EQH_SWEEP_BEAR", "PDH_SWEEP_BEAR", "RANGE_BREAKOUT_RECIPE"),
+        ("AVWAP_REJECT_BEAR", "AVWAP_BELOW_1SD", "HTF_REVERSAL_RECIPE"),
+        ("FUNDING_HIGH", "OI_SURGE_MINOR", "OI_SURGE_MAJOR", "BASIS_BEARISH", "FUNDING_FLUSH_RECIPE"),
+        ("HTF_COUNTER", "FLOW_TAKER_BEARISH", "SENTIMENT_BEAR", "MOM_DIVERGENCE_RECIPE"),
+        ("SQUEEZE_FIRE", "VOL_EXPANSION_RECIPE"),
+    ),
+}
+
+
+def _rubric_mask(codes: List[str], side: str) -> int:
+    """Bitmask of RUBRIC_CATEGORIES satisfied by codes (NEUTRAL uses the SHORT lists)."""
+    code_set = set(codes)
+    mask = 0
+    for bit, signals in enumerate(_RUBRIC_SIGNALS[side]):
+        if any(s in code_set for s in signals):
+            mask |= 1 << bit
+    return mask
+
+
+def _trend_sign(struct: Dict[str, Any]) -> int:
+    trend = struct["trend"].upper()
+    if "BULL" in trend:
+        return 1
+    if "BEAR" in trend:
+        return -1
+    return 0
+
+
+@dataclass
+class ScoreFeatures:
+    """Config-independent layer outputs for one bar.
+
+    extract_features() runs every intelligence layer once; score_features()
+    applies the tunable thresholds and weights. Backtests cache these so a
+    config change costs only the scoring step.
+    """
+    symbol: str
+    timeframe: str
+    breakdown: Dict[str, float]         # before HTF cascade bonus
+    codes: List[str]                    # before auto R:R codes
+    reasons: List[str]
+    degraded: List[str]
+    blockers: List[str]                 # stale / dead-zone blockers
+    trace: Dict[str, Any]
+    intel: IntelligenceBundle
+    regime: str
+    session: str
+    strategy: str
+    htf_trends: Tuple[int, int, int]    # 4h, 1h, 15m structure sign (+1 bull, -1 bear, 0 none)
+    funding_rate: float
+    ls_ratio: float
+    rubric_long: int
+    rubric_short: int
+    auto_rr: Dict[str, Optional[Dict[str, Any]]]   # per direction, None if the layer failed
+    recipe: Optional[Tuple[str, float, float, float, float]]  # entry_zone, invalidation, tp1, tp2, exec_px
+    last_price: float
+    local_atr: float
+    last_candle_ts: int
+
+
+def extract_features(
     symbol: str,
     timeframe: str,
     price: PriceSnapshot,
@@ -137,8 +220,17 @@ def compute_score(
     macro: Dict[str, List[Candle]],
     intel: Optional[IntelligenceBundle] = None,
     candles_4h: Optional[List[Candle]] = None,
-) -> AlertScore:
-    tf_cfg = TIMEFRAME_RULES.get(timeframe, TIMEFRAME_RULES["5m"])
+    now: Optional[float] = None,
+    cached_inputs: Optional[Dict[str, float]] = None,
+) -> ScoreFeatures:
+    """Run every intelligence layer for one bar; see compute_score().
+
+    now overrides the wall clock for the staleness check so historical bars
+    can be evaluated as of their own close. cached_inputs maps each input
+    that missed the cycle deadline (or failed) and was replaced by its last
+    good snapshot to that snapshot's age in seconds; each is recorded in
+    degraded as "cached:<source>:<age>s".
+    """
     reasons, codes, degraded, blockers = [], [], [], []
     breakdown: Dict[str, float] = {"trend_alignment": 0.0, "momentum": 0.0, "volatility": 0.0, "volume": 0.0, "htf": 0.0, "penalty": 0.0}
     trace: Dict[str, object] = {"degraded": [], "candidates": {}, "blockers": [], "context": {}, "codes": []}
@@ -193,9 +285,11 @@ def compute_score(
         elif mc["gold_trend"] == "falling": codes.append("GOLD_FALLING_BEARISH")
         trace["context"]["macro_correlation"] = {"dxy": mc["dxy_trend"], "gold": mc["gold_trend"]}
 
+    for source, age in sorted((cached_inputs or {}).items()):
+        degraded.append(f"cached:{source}:{int(age)}s")
     if len(candles) < 40:
         degraded.append("candles")
-    if _is_stale(candles, timeframe):
+    if _is_stale(candles, timeframe, now):
         degraded.append("stale")
         blockers.append("Stale market data")
 
@@ -274,7 +368,8 @@ def compute_score(
     # --- Phase 17: New Intelligence Layers ---
     # Market Structure (BOS/CHoCH)
     try:
-        struct = detect_structure(candles)
+        with tracing.span("structure", "layer"):
+            struct = detect_structure(candles)
         codes.extend(struct["codes"])
         breakdown["momentum"] += struct["pts"]
         trace["context"]["structure"] = {
@@ -288,7 +383,8 @@ def compute_score(
     # --- Phase 28-B: 4H structure (HTF Bias) ---
     if candles_4h and len(candles_4h) >= 20:
         try:
-            struct_4h = detect_structure(candles_4h)
+            with tracing.span("structure_4h", "layer"):
+                struct_4h = detect_structure(candles_4h)
             trace["context"]["structure_4h"] = {
                 "trend": struct_4h["trend"],
                 "event": struct_4h["last_event"],
@@ -304,7 +400,8 @@ def compute_score(
 
     # Session Levels (PDH/PDL + sweep)
     try:
-        sess_lvl = compute_session_levels(candles)
+        with tracing.span("session_levels", "layer"):
+            sess_lvl = compute_session_levels(candles)
         codes.extend(sess_lvl["codes"])
         breakdown["htf"] += sess_lvl["pts"]
         trace["context"]["session_levels"] = {
@@ -317,7 +414,8 @@ def compute_score(
 
     # Equal Highs/Lows + Sweep
     try:
-        eql = detect_equal_levels(candles)
+        with tracing.span("equal_levels", "layer"):
+            eql = detect_equal_levels(candles)
         codes.extend(eql["codes"])
         breakdown["momentum"] += eql["pts"]
         trace["context"]["equal_levels"] = {"eq_highs": len(eql["equal_highs"]), "eq_lows": len(eql["equal_lows"])}
@@ -326,7 +424,8 @@ def compute_score(
 
     # Anchored VWAP
     try:
-        avwap = compute_anchored_vwap(candles)
+        with tracing.span("anchored_vwap", "layer"):
+            avwap = compute_anchored_vwap(candles)
         codes.extend(avwap["codes"])
         breakdown["momentum"] += avwap["pts"]
         trace["context"]["avwap"] = {"value": avwap["avwap"], "position": avwap["price_vs_avwap"]}
@@ -335,7 +434,8 @@ def compute_score(
 
     # Volume Impulse + Micro Volatility
     try:
-        vimp = detect_volume_impulse(candles)
+        with tracing.span("volume_impulse", "layer"):
+            vimp = detect_volume_impulse(candles)
         codes.extend(vimp["codes"])
         breakdown["volume"] += vimp["pts"]
         trace["context"]["volume_impulse"] = {
@@ -349,7 +449,8 @@ def compute_score(
     if derivatives and derivatives.healthy and len(candles) >= 2:
         try:
             price_chg = ((candles[-1].close - candles[-2].close) / candles[-2].close) * 100
-            oi_class = classify_price_oi(price_chg, derivatives)
+            with tracing.span("oi_classifier", "layer"):
+                oi_class = classify_price_oi(price_chg, derivatives)
             codes.extend(oi_class["codes"])
             breakdown["momentum"] += oi_class["pts"]
             trace["context"]["oi_regime"] = oi_class["regime"]
@@ -358,21 +459,22 @@ def compute_score(
 
     # --- Recipe Detection (Phase 22/23) ---
     try:
-        # Detect patterns and answer the "5-Question" validation schema
-        raw_signals = detect_recipes(
-            candles=candles,
-            struct=trace["context"].get("structure", {}),
-            sweeps={"codes": codes, "sweep_low": "EQL_SWEEP_BULL" in codes, "sweep_high": "EQH_SWEEP_BEAR" in codes, 
-                    "equal_lows": trace["context"].get("equal_levels", {}).get("eq_lows", []),
-                    "equal_highs": trace["context"].get("equal_levels", {}).get("eq_highs", [])},
-            avwap=trace["context"].get("avwap", {}),
-            squeeze={"state": trace["context"].get("squeeze", "NONE")},
-            atr_val=local_atr if 'local_atr' in locals() else None,
-            context=trace["context"]
-        )
-        
-        # Phase 23: Resolve contradictions (max 1 recipe)
-        recipe_signals = resolve_conflicts(raw_signals)
+        with tracing.span("recipes", "layer"):
+            # Detect patterns and answer the "5-Question" validation schema
+            raw_signals = detect_recipes(
+                candles=candles,
+                struct=trace["context"].get("structure", {}),
+                sweeps={"codes": codes, "sweep_low": "EQL_SWEEP_BULL" in codes, "sweep_high": "EQH_SWEEP_BEAR" in codes, 
+                        "equal_lows": trace["context"].get("equal_levels", {}).get("eq_lows", []),
+                        "equal_highs": trace["context"].get("equal_levels", {}).get("eq_highs", [])},
+                avwap=trace["context"].get("avwap", {}),
+                squeeze={"state": trace["context"].get("squeeze", "NONE")},
+                atr_val=local_atr if 'local_atr' in locals() else None,
+                context=trace["context"]
+            )
+
+            # Phase 23: Resolve contradictions (max 1 recipe)
+            recipe_signals = resolve_conflicts(raw_signals)
         
         for sig in recipe_signals:
             # Phase 31: Removed binary HTF veto in favor of HTF Cascade Scoring
@@ -384,7 +486,8 @@ def compute_score(
         logger.warning(f"Recipe detection failed: {e}")
 
     # --- Candidates ---
-    candidates, c_reasons, c_codes = _detector_candidates(candles)
+    with tracing.span("detectors", "layer"):
+        candidates, c_reasons, c_codes = _detector_candidates(candles)
     reasons.extend(c_reasons)
     codes.extend(c_codes)
     trace["candidates"] = candidates
@@ -395,205 +498,259 @@ def compute_score(
     breakdown["penalty"] += arb_penalty
     codes.extend(arb_codes)
 
-    # Final score
-    # -- Phase 19 FIX 5: compute direction + auto_rr early so codes reach confluence --
-    prelim_total = sum(breakdown.values())
-    prelim_dir = "LONG" if prelim_total > 0 else "SHORT" if prelim_total < 0 else "NEUTRAL"
+    # HTF structure for the cascade (Phase 31)
+    with tracing.span("htf_cascade", "layer"):
+        t4h = _trend_sign(detect_structure(candles_4h)) if candles_4h and len(candles_4h) >= 20 else 0
+        t1h = _trend_sign(detect_structure(candles_1h)) if candles_1h and len(candles_1h) >= 10 else 0
+        t15m = _trend_sign(detect_structure(candles_15m)) if candles_15m and len(candles_15m) >= 10 else 0
 
-    # Phase 31: HTF Cascade Scoring
-    htf_bonus = 0
-    if candles_4h and len(candles_4h) >= 20:
-        struct_4h = detect_structure(candles_4h)
-        if (prelim_dir == "LONG" and "BULL" in struct_4h["trend"].upper()) or \
-           (prelim_dir == "SHORT" and "BEAR" in struct_4h["trend"].upper()):
-            htf_bonus += HTF_CASCADE_WEIGHTS["4h"]
-    
-    if candles_1h and len(candles_1h) >= 10:
-        struct_1h = detect_structure(candles_1h)
-        if (prelim_dir == "LONG" and "BULL" in struct_1h["trend"].upper()) or \
-           (prelim_dir == "SHORT" and "BEAR" in struct_1h["trend"].upper()):
-            htf_bonus += HTF_CASCADE_WEIGHTS["1h"]
-            
-    if candles_15m and len(candles_15m) >= 10:
-        struct_15m = detect_structure(candles_15m)
-        if (prelim_dir == "LONG" and "BULL" in struct_15m["trend"].upper()) or \
-           (prelim_dir == "SHORT" and "BEAR" in struct_15m["trend"].upper()):
-            htf_bonus += HTF_CASCADE_WEIGHTS["15m"]
-
-    if htf_bonus == 0 and prelim_dir != "NEUTRAL":
-        htf_bonus += HTF_CASCADE_WEIGHTS["counter_aligned"]
+    auto_rr: Dict[str, Optional[Dict[str, Any]]] = {}
+    with tracing.span("auto_rr", "layer"):
+        for side in ("LONG", "SHORT", "NEUTRAL"):
+            try:
+                auto_rr[side] = compute_auto_rr(candles, side)
+            except Exception:
+                auto_rr[side] = None
 
-    breakdown["htf"] += htf_bonus
+    last_price = price.price if symbol == "BTC" else candles[-1].close
+    local_atr = atr(candles, 14) or (last_price * 0.02)
 
-    # Phase 31: Directional Seasoning
-    threshold_adj = 0
-    funding_rate = derivatives.funding_rate if derivatives and derivatives.healthy else 0
-    taker_ratio = flows.taker_ratio if flows and flows.healthy else 1.0
-    ls_ratio = flows.long_short_ratio if flows and flows.healthy else 1.0
-    
-    if funding_rate > DIRECTIONAL_SEASON["funding_threshold_long"]:
-        if prelim_dir == "SHORT":
-            threshold_adj -= DIRECTIONAL_SEASON["funding_relax_pts"]
-        else:
-            threshold_adj += DIRECTIONAL_SEASON["funding_tighten_pts"]
-    elif funding_rate < DIRECTIONAL_SEASON["funding_threshold_short"]:
-        if prelim_dir == "LONG":
-            threshold_adj -= DIRECTIONAL_SEASON["funding_relax_pts"]
+    recipe = None
+    if intel.recipes:
+        # Phase 23: the primary recipe supplies execution levels
+        best_sig = intel.recipes[0]
+        recipe = (
+            best_sig.entry_zone,
+            best_sig.invalidation,
+            best_sig.targets.get("tp1", last_price),
+            best_sig.targets.get("tp2", last_price),
+            best_sig.exec_px,
+        )
+
+    return ScoreFeatures(
+        symbol=symbol,
+        timeframe=timeframe,
+        breakdown=breakdown,
+        codes=codes,
+        reasons=reasons,
+        degraded=degraded,
+        blockers=blockers,
+        trace=trace,
+        intel=intel,
+        regime=regime_name,
+        session=session,
+        strategy=strategy,
+        htf_trends=(t4h, t1h, t15m),
+        funding_rate=derivatives.funding_rate if derivatives and derivatives.healthy else 0,
+        ls_ratio=flows.long_short_ratio if flows and flows.healthy else 1.0,
+        rubric_long=_rubric_mask(codes, "LONG"),
+        rubric_short=_rubric_mask(codes, "SHORT"),
+        auto_rr=auto_rr,
+        recipe=recipe,
+        last_price=last_price,
+        local_atr=local_atr,
+        last_candle_ts=int(float(candles[-1].ts)) if candles else 0,
+    )
+
+
+def _make_decider(timeframe: str, params: Optional[Dict[str, Any]] = None):
+    """Bind the tunable config for one timeframe into the scoring closure.
+
+    params may override any of TIMEFRAME_RULES, CONFLUENCE_RULES,
+    CONFLUENCE_WEIGHTS, CONFLUENCE_THRESHOLDS, HTF_CASCADE_WEIGHTS,
+    DIRECTIONAL_SEASON and TP_MULTIPLIERS by name. The closure takes plain
+    values so backtests can drive it straight from feature columns.
+    """
+    p = params or {}
+    rules = p.get("TIMEFRAME_RULES", TIMEFRAME_RULES)
+    tf_cfg = rules.get(timeframe, rules["5m"])
+    conf_rules = p.get("CONFLUENCE_RULES", CONFLUENCE_RULES)
+    conf_cap = conf_rules.get("CONFIDENCE_CAP", 85)
+    weights = p.get("CONFLUENCE_WEIGHTS", CONFLUENCE_WEIGHTS)
+    rubric_weights = tuple(weights[c] for c in RUBRIC_CATEGORIES)
+    thresholds = p.get("CONFLUENCE_THRESHOLDS", CONFLUENCE_THRESHOLDS)
+    cascade = p.get("HTF_CASCADE_WEIGHTS", HTF_CASCADE_WEIGHTS)
+    w4h, w1h, w15m, w_counter = cascade["4h"], cascade["1h"], cascade["15m"], cascade["counter_aligned"]
+    season = p.get("DIRECTIONAL_SEASON", DIRECTIONAL_SEASON)
+    fund_long = season["funding_threshold_long"]
+    fund_short = season["funding_threshold_short"]
+    relax_pts = season["funding_relax_pts"]
+    tighten_pts = season["funding_tighten_pts"]
+    crowd_ratio = season["crowding_ratio_threshold"]
+    crowd_pts = season["crowding_tighten_pts"]
+    tp_multipliers = p.get("TP_MULTIPLIERS", TP_MULTIPLIERS)
+    min_rr = tf_cfg.get("min_rr", 1.2)
+
+    def decide(buckets, t4h, t1h, t15m, funding_rate, ls_ratio, rubric_long, rubric_short,
+               regime_name, last_price, local_atr, recipe, blocked):
+        # -- Phase 19 FIX 5: compute direction early so codes reach confluence --
+        prelim_total = sum(buckets)
+        prelim_sign = 1 if prelim_total > 0 else -1 if prelim_total < 0 else 0
+
+        # Phase 31: HTF Cascade Scoring
+        htf_bonus = 0
+        if prelim_sign:
+            if t4h == prelim_sign:
+                htf_bonus += w4h
+            if t1h == prelim_sign:
+                htf_bonus += w1h
+            if t15m == prelim_sign:
+                htf_bonus += w15m
+            if htf_bonus == 0:
+                htf_bonus += w_counter
+
+        # Phase 31: Directional Seasoning
+        threshold_adj = 0
+        if funding_rate > fund_long:
+            if prelim_sign < 0:
+                threshold_adj -= relax_pts
+            else:
+                threshold_adj += tighten_pts
+        elif funding_rate < fund_short:
+            if prelim_sign > 0:
+                threshold_adj -= relax_pts
+            else:
+                threshold_adj += tighten_pts
+        if ls_ratio > crowd_ratio:
+            threshold_adj += crowd_pts
+
+        b0, b1, b2, b3, b4, b5 = buckets
+        total_score = sum((b0, b1, b2, b3, b4 + htf_bonus, b5)) * SCORE_MULTIPLIER
+        # Cap raw confidence (Phase 29: Calibration Fix)
+        capped_conf = min(abs(total_score), conf_cap)
+        total_score = capped_conf if total_score >= 0 else -capped_conf  # Preserve direction
+        direction = "LONG" if total_score > 0 else "SHORT" if total_score < 0 else "NEUTRAL"
+
+        # --- Confluence Rubric (Phase 29: Weighted) ---
+        rubric_mask = rubric_long if direction == "LONG" else rubric_short
+        rubric_score = 0.0
+        if rubric_mask:
+            for bit, weight in enumerate(rubric_weights):
+                if rubric_mask >> bit & 1:
+                    rubric_score += weight
+
+        # Exit levels
+        if recipe is not None:
+            # Phase 23: Recipe-Aware Execution Levels (use tp2 for full R:R)
+            entry_zone, invalidation, tp1, tp2, exec_px = recipe
+            risk = abs(exec_px - invalidation)
+            reward = abs(tp2 - exec_px)
         else:
-            threshold_adj += DIRECTIONAL_SEASON["funding_tighten_pts"]
-            
-    if ls_ratio > DIRECTIONAL_SEASON["crowding_ratio_threshold"]:
-        threshold_adj += DIRECTIONAL_SEASON["crowding_tighten_pts"]
+            # Generic ATR-based fallback
+            tp_cfg = tp_multipliers.get(regime_name, tp_multipliers["default"])
+            entry_zone = f"{last_price:,.0f}"
+            if direction == "LONG":
+                invalidation = last_price - (local_atr * tp_cfg["inv"] * 2.0)
+                tp1 = last_price + (local_atr * tp_cfg["tp1"])
+                tp2 = last_price + (local_atr * tp_cfg["tp2"])
+            else:
+                invalidation = last_price + (local_atr * tp_cfg["inv"] * 2.0)
+                tp1 = last_price - (local_atr * tp_cfg["tp1"])
+                tp2 = last_price - (local_atr * tp_cfg["tp2"])
+            risk = abs(last_price - invalidation)
+            reward = abs(tp2 - last_price)
+        rr = reward / risk if risk > 0 else 0.0
 
-    total_score = sum(breakdown.values()) * SCORE_MULTIPLIER
-    # Cap raw confidence (Phase 29: Calibration Fix)
-    raw_conf = abs(total_score)
-    capped_conf = min(raw_conf, CONFLUENCE_RULES.get("CONFIDENCE_CAP", 85))
-    total_score = capped_conf if total_score >= 0 else -capped_conf # Preserve direction
+        # Final Action/Tier Decision (after hard R:R gate)
+        tier, action = _tier_for(int(total_score), blocked or rr < min_rr, tf_cfg, conf_rules,
+                                 thresholds, rubric_score, threshold_adj)
+        return (total_score, direction, htf_bonus, threshold_adj, rubric_score, rubric_mask,
+                entry_zone, invalidation, tp1, tp2, rr, min_rr, tier, action)
+
+    return decide
+
+
+def score_features(features: ScoreFeatures, params: Optional[Dict[str, Any]] = None) -> AlertScore:
+    """Apply thresholds and weights to extracted features; see _make_decider()."""
+    f = features
+    decide = _make_decider(f.timeframe, params)
+    b = f.breakdown
+    (total_score, direction, htf_bonus, threshold_adj, rubric_score, rubric_mask,
+     entry_zone, invalidation, tp1, tp2, rr, min_rr, tier, action) = decide(
+        (b["trend_alignment"], b["momentum"], b["volatility"], b["volume"], b["htf"], b["penalty"]),
+        *f.htf_trends, f.funding_rate, f.ls_ratio, f.rubric_long, f.rubric_short,
+        f.regime, f.last_price, f.local_atr, f.recipe, bool(f.blockers),
+    )
 
-    direction = "LONG" if total_score > 0 else "SHORT" if total_score < 0 else "NEUTRAL"
+    breakdown = dict(b)
+    breakdown["htf"] += htf_bonus
+    codes = list(f.codes)
+    blockers = list(f.blockers)
+    trace = dict(f.trace)
+    trace["context"] = dict(f.trace["context"])
 
-    try:
-        auto_rr = compute_auto_rr(candles, direction)
+    auto_rr = f.auto_rr.get(direction)
+    if auto_rr is not None:
         codes.extend(auto_rr["codes"])
         trace["context"]["auto_rr"] = {
             "rr": auto_rr["rr"], "target": auto_rr["target"],
             "stop": auto_rr["stop"], "entry": auto_rr.get("entry"),
         }
-    except Exception:
-        pass
-
-    # --- Confluence Rubric (Phase 29: Weighted) ---
-    # Sum weighted signals from (Structure, Location, Anchors, Derivatives, Momentum, Volatility)
-    rubric_score = 0.0
-    rubric_details = {}
-
-    def has_any(targets: List[str]) -> bool:
-        return any(t in codes for t in targets)
-
-    # 1. Structure (2.0)
-    struct_signals = ["STRUCTURE_BOS_BULL", "STRUCTURE_CHOCH_BULL", "BOS_CONTINUATION_RECIPE"] if direction == "LONG" else \
-                     ["STRUCTURE_BOS_BEAR", "STRUCTURE_CHOCH_BEAR", "BOS_CONTINUATION_RECIPE"]
-    if has_any(struct_signals):
-        rubric_score += CONFLUENCE_WEIGHTS["structure"]
-        rubric_details["structure"] = True
-
-    # 2. Location (1.5)
-    loc_signals = ["NEAR_POC", "BID_WALL_SUPPORT", "EQL_SWEEP_BULL", "PDL_SWEEP_BULL", "RANGE_BREAKOUT_RECIPE"] if direction == "LONG" else \
-                  ["NEAR_POC", "ASK_WALL_RESISTANCE", "EQH_SWEEP_BEAR", "PDH_SWEEP_BEAR", "RANGE_BREAKOUT_RECIPE"]
-    if has_any(loc_signals):
-        rubric_score += CONFLUENCE_WEIGHTS["location"]
-        rubric_details["location"] = True
-
-    # 3. Anchors (1.5)
-    anchor_signals = ["AVWAP_RECLAIM_BULL", "AVWAP_ABOVE_1SD"] if direction == "LONG" else \
-                     ["AVWAP_REJECT_BEAR", "AVWAP_BELOW_1SD"]
-    if has_any(anchor_signals) or "HTF_REVERSAL_RECIPE" in codes:
-        rubric_score += CONFLUENCE_WEIGHTS["anchors"]
-        rubric_details["anchors"] = True
-
-    # 4. Derivatives (1.0)
-    deriv_signals = ["FUNDING_LOW", "OI_SURGE_MINOR", "OI_SURGE_MAJOR", "BASIS_BULLISH", "FUNDING_FLUSH_RECIPE"] if direction == "LONG" else \
-                    ["FUNDING_HIGH", "OI_SURGE_MINOR", "OI_SURGE_MAJOR", "BASIS_BEARISH", "FUNDING_FLUSH_RECIPE"]
-    if has_any(deriv_signals):
-        rubric_score += CONFLUENCE_WEIGHTS["derivatives"]
-        rubric_details["derivatives"] = True
-
-    # 5. Momentum (1.0)
-    mom_signals = ["HTF_ALIGNED", "FLOW_TAKER_BULLISH", "SENTIMENT_BULL", "MOM_DIVERGENCE_RECIPE"] if direction == "LONG" else \
-                  ["HTF_COUNTER", "FLOW_TAKER_BEARISH", "SENTIMENT_BEAR", "MOM_DIVERGENCE_RECIPE"]
-    if has_any(mom_signals):
-        rubric_score += CONFLUENCE_WEIGHTS["momentum"]
-        rubric_details["momentum"] = True
-
-    # 6. Volatility (1.0)
-    vol_signals = ["SQUEEZE_FIRE", "VOL_EXPANSION_RECIPE"]
-    if has_any(vol_signals):
-        rubric_score += CONFLUENCE_WEIGHTS["volatility"]
-        rubric_details["volatility"] = True
 
+    rubric_details = {cat: True for bit, cat in enumerate(RUBRIC_CATEGORIES) if rubric_mask >> bit & 1}
     trace["rubric"] = {"score": rubric_score, "details": rubric_details}
     trace["confluence_score"] = rubric_score
-    
+
     # --- Phase 27: Strict Vetoes (DISABLED - was hurting performance) ---
     # Vetoes disabled: pre-veto had +0.170 AvgR, post-veto had -0.525 AvgR
     # Re-enable after further tuning
-    pass
-    # blockers.append("Phase 27 vetoes disabled for performance")
-
-    # Exit levels
-    last_price = price.price if symbol == "BTC" else candles[-1].close
-    local_atr = atr(candles, 14) or (last_price * 0.02)
-
 
-    tp_cfg = TP_MULTIPLIERS.get(regime_name, TP_MULTIPLIERS["default"])
-    tp1_mult = tp_cfg["tp1"]
-    inv_mult = tp_cfg["inv"]
-    
-    # Phase 23: Recipe-Aware Execution Levels
-    if intel.recipes:
-        # Use levels from the primary recipe
-        best_sig = intel.recipes[0]
-        entry_zone = best_sig.entry_zone
-        invalidation = best_sig.invalidation
-        tp1 = best_sig.targets.get("tp1", last_price)
-        tp2 = best_sig.targets.get("tp2", last_price)
-        risk_size = best_sig.risk_size
-        
-        # Recalculate RR using recipe execution price (use tp2 for full R:R)
-        exec_px = best_sig.exec_px
-        risk = abs(exec_px - invalidation)
-        reward = abs(tp2 - exec_px)
-        rr = reward / risk if risk > 0 else 0.0
-    else:
-        # Generic ATR-based fallback
-        entry_zone = f"{last_price:,.0f}"
-        if direction == "LONG":
-            invalidation = last_price - (local_atr * inv_mult * 2.0)
-            tp1 = last_price + (local_atr * tp1_mult)
-            tp2 = last_price + (local_atr * tp_cfg["tp2"])
-        else:
-            invalidation = last_price + (local_atr * inv_mult * 2.0)
-            tp1 = last_price - (local_atr * tp1_mult)
-            tp2 = last_price - (local_atr * tp_cfg["tp2"])
-
-        risk = abs(last_price - invalidation)
-        reward = abs(tp2 - last_price)
-        rr = reward / risk if risk > 0 else 0.0
-
-    min_rr = tf_cfg.get("min_rr", 1.2)
     if rr < min_rr:
         blockers.append(f"R:R {rr:.2f} below {min_rr:.2f} threshold")
 
-    # Final Action/Tier Decision (after hard R:R gate)
-    tier, action = _tier_and_action(int(total_score), blockers, timeframe, rubric_score, threshold_adj)
-
     trace["codes"] = list(set(codes))
-    trace["degraded"] = degraded
+    trace["degraded"] = f.degraded
     trace["blockers"] = blockers
 
+    last_price = f.last_price
     return AlertScore(
-        symbol=symbol,
-        timeframe=timeframe,
-        regime=regime_name,
+        symbol=f.symbol,
+        timeframe=f.timeframe,
+        regime=f.regime,
         confidence=min(100, max(0, int(abs(total_score)))),
         tier=tier,
         action=action,
-        reasons=reasons,
+        reasons=f.reasons,
         reason_codes=list(set(codes)),
         blockers=blockers,
         quality="HIGH" if tier == "A+" else "MED",
         direction=direction,
-        strategy_type=strategy,
+        strategy_type=f.strategy,
         entry_zone=entry_zone,
         invalidation=invalidation,
         tp1=tp1,
         tp2=tp2,
         rr_ratio=rr,
-        session=session,
+        session=f.session,
         score_breakdown=breakdown,
-        lifecycle_key=f"{symbol}:{timeframe}:{strategy.lower()}:{direction}:{int(last_price/10)*10}",
-        last_candle_ts=int(float(candles[-1].ts)) if candles else 0,
-        intel=intel,
+        lifecycle_key=f"{f.symbol}:{f.timeframe}:{f.strategy.lower()}:{direction}:{int(last_price/10)*10}",
+        last_candle_ts=f.last_candle_ts,
+        intel=f.intel,
         decision_trace=trace
     )
+
+
+def compute_score(
+    symbol: str,
+    timeframe: str,
+    price: PriceSnapshot,
+    candles: List[Candle],
+    candles_15m: List[Candle],
+    candles_1h: List[Candle],
+    fg: FearGreedSnapshot,
+    news: List[Headline],
+    derivatives: DerivativesSnapshot,
+    flows: FlowSnapshot,
+    macro: Dict[str, List[Candle]],
+    intel: Optional[IntelligenceBundle] = None,
+    candles_4h: Optional[List[Candle]] = None,
+    cached_inputs: Optional[Dict[str, float]] = None,
+) -> AlertScore:
+    with tracing.span("extract_features", "score", symbol=symbol, timeframe=timeframe):
+        features = extract_features(
+            symbol, timeframe, price, candles, candles_15m, candles_1h,
+            fg, news, derivatives, flows, macro, intel, candles_4h,
+            cached_inputs=cached_inputs,
+        )
+    with tracing.span("score_features", "score", symbol=symbol, timeframe=timeframe):
+        return score_features(features)
@@ -1,6 +1,7 @@
 import time
 from datetime import datetime, timezone
-from typing import List, Dict, Tuple
+from itertools import islice
+from typing import List, Dict, Optional, Tuple
 from utils import ema as ema_calc, adx, atr, percentile_rank, Candle
 from config import REGIME, STALE_SECONDS
 
@@ -70,8 +71,10 @@ def _calculate_raw_regime(candles: List[Candle]) -> str:
     e9, e21 = ema_calc(closes, 9), ema_calc(closes, 21)
     slope = (e9 - e21) / e21 if e9 and e21 else 0.0
     local_atr = atr(candles[:-1], 14) or 0.0
-    atr_series = [atr(candles[:i], 14) for i in range(20, len(candles))]
-    atr_clean = [x for x in atr_series if x is not None]
+    # atr(candles[:i], 14) for every prefix, from one pass of true ranges
+    tr = [max(c.high - c.low, abs(c.high - p.close), abs(c.low - p.close))
+          for p, c in zip(candles, islice(candles, 1, None))]
+    atr_clean = [sum(tr[i - 15:i - 1]) / 14 for i in range(20, len(candles))]
     rank = percentile_rank(atr_clean, local_atr) if atr_clean else 50.0
     
     if adx_v > REGIME["adx_trend"] and abs(slope) > REGIME["slope_trend"]:
@@ -110,7 +113,7 @@ def _regime(candles: List[Candle]) -> Tuple[str, float, List[str]]:
         
     return final_regime, pts, [f"REGIME_{final_regime.upper()}"]
 
-def _is_stale(candles: List[Candle], timeframe: str) -> bool:
+def _is_stale(candles: List[Candle], timeframe: str, now: Optional[float] = None) -> bool:
     if not candles:
         return True
     max_age_seconds = STALE_SECONDS.get(timeframe, STALE_SECONDS["5m"])
@@ -118,4 +121,5 @@ def _is_stale(candles: List[Candle], timeframe: str) -> bool:
         last_ts = int(float(candles[-1].ts))
     except (TypeError, ValueError):
         return True
-    return (time.time() - last_ts) > max_age_seconds
+    now = time.time() if now is None else now
+    return (now - last_ts) > max_age_seconds
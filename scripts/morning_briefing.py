@@ -19,31 +19,38 @@ if not (BASE_DIR / "logs").exists():
 ALERTS_FILE = BASE_DIR / "logs" / "pid-129-alerts.jsonl"
 AUDIT_FILE = BASE_DIR / "logs" / "audit.jsonl"
 PORTFOLIO_FILE = BASE_DIR / "data" / "paper_portfolio.json"
+ROLLUPS_FILE = BASE_DIR / "data" / "rollups.json"
 OUTPUT_MD = BASE_DIR / "reports" / "morning_briefing.md"
 OUTPUT_JSON = BASE_DIR / "reports" / "morning_briefing.json"
 
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+from core.alert_store import open_store
+from core.portfolio_journal import PortfolioJournal
+from core.rollups import open_rollups
 
-def _load_alerts(hours=24):
-    """Load alerts from the last N hours."""
+
+def _load_window(now, hours=24):
+    """Rollup totals for the last N hours (None when there is no alert log)."""
     if not ALERTS_FILE.exists():
-        return []
-    cutoff = datetime.now(timezone.utc) - timedelta(hours=hours)
-    alerts = []
+        return None
     try:
-        content = ALERTS_FILE.read_text(encoding="utf-8").strip()
-        for line in content.split("\n"):
-            if not line.strip():
-                continue
-            try:
-                a = json.loads(line)
-                ts = datetime.fromisoformat(a["timestamp"].replace("Z", "+00:00"))
-                if ts >= cutoff:
-                    alerts.append(a)
-            except (json.JSONDecodeError, KeyError):
-                continue
+        rollups = open_rollups(ROLLUPS_FILE)
+        rollups.sync(open_store(ALERTS_FILE))
+        return rollups.window((now - timedelta(hours=hours)).timestamp())
     except Exception:
-        pass
-    return alerts
+        return None
+
+
+def _load_latest_alert(now, hours=24):
+    """Most recent alert of the last N hours, or None."""
+    if not ALERTS_FILE.exists():
+        return None
+    try:
+        latest = open_store(ALERTS_FILE).query(since=now - timedelta(hours=hours), limit=1)
+    except Exception:
+        return None
+    return latest[0] if latest else None
 
 
 def _load_latest_trace():
@@ -51,25 +58,19 @@ def _load_latest_trace():
     if not ALERTS_FILE.exists():
         return {}
     try:
-        lines = ALERTS_FILE.read_text(encoding="utf-8").strip().split("\n")
-        for line in reversed(lines):
-            try:
-                a = json.loads(line)
-                if "decision_trace" in a and a["decision_trace"]:
-                    return a["decision_trace"]
-            except (json.JSONDecodeError, KeyError):
-                continue
+        latest = open_store(ALERTS_FILE).query(where=lambda a: bool(a.get("decision_trace")), limit=1)
     except Exception:
-        pass
-    return {}
+        return {}
+    return latest[0]["decision_trace"] if latest else {}
 
 
 def _load_portfolio():
     """Load paper portfolio stats."""
-    if not PORTFOLIO_FILE.exists():
+    journal = PortfolioJournal(PORTFOLIO_FILE)
+    if not (PORTFOLIO_FILE.exists() or journal.journal_path.exists()):
         return None
     try:
-        return json.loads(PORTFOLIO_FILE.read_text(encoding="utf-8"))
+        return journal.load()
     except:
         return None
 
@@ -97,25 +98,24 @@ def _direction_sentence(direction, confidence):
     return "neutral with no clear edge"
 
 
-def _overnight_recap(alerts):
-    """Summarize overnight activity."""
-    if not alerts:
+def _overnight_recap(window):
+    """Summarize overnight activity from a rollup window."""
+    totals = window.totals if window else None
+    if not totals or not totals["alerts"]:
         return "No signals fired overnight."
 
-    resolved = [a for a in alerts if a.get("resolved")]
-    pending = [a for a in alerts if not a.get("resolved")]
-    wins = [a for a in resolved if a.get("outcome", "").startswith("WIN")]
-    losses = [a for a in resolved if a.get("outcome") == "LOSS"]
+    resolved = totals["resolved"]
+    pending = totals["alerts"] - resolved
 
-    parts = [f"{len(alerts)} signals fired overnight."]
+    parts = [f"{totals['alerts']} signals fired overnight."]
     if resolved:
-        parts.append(f"{len(wins)}W / {len(losses)}L resolved.")
+        parts.append(f"{totals['wins']}W / {totals['losses']}L resolved.")
     if pending:
-        parts.append(f"{len(pending)} still pending.")
+        parts.append(f"{pending} still pending.")
 
     # Best signal
-    if alerts:
-        best = max(alerts, key=lambda a: a.get("confidence", 0))
+    best = window.best
+    if best:
         parts.append(
             f"Best signal: {best.get('direction')} {best.get('strategy')} "
             f"on {best.get('timeframe')} (confidence {best.get('confidence')})."
@@ -126,8 +126,9 @@ def _overnight_recap(alerts):
 def generate_briefing():
     """Main briefing generation logic."""
     now = datetime.now(timezone.utc)
-    alerts_24h = _load_alerts(hours=24)
-    alerts_7d = _load_alerts(hours=168)
+    window_24h = _load_window(now, hours=24)
+    window_7d = _load_window(now, hours=168)
+    latest = _load_latest_alert(now, hours=24)
     trace = _load_latest_trace()
     portfolio = _load_portfolio()
     ctx = trace.get("context", {})
@@ -135,8 +136,8 @@ def generate_briefing():
     # --- Extract intelligence ---
     # Price
     price = trace.get("price", 0.0)
-    if not price and alerts_24h:
-        price = alerts_24h[-1].get("entry_price", 0.0)
+    if not price and latest:
+        price = latest.get("entry_price", 0.0)
 
     # Regime
     regime = trace.get("regime", "unknown")
@@ -174,16 +175,16 @@ def generate_briefing():
     # Direction from most recent alert
     latest_direction = "NEUTRAL"
     latest_confidence = 0
-    if alerts_24h:
-        latest = alerts_24h[-1]
+    if latest:
         latest_direction = latest.get("direction", "NEUTRAL")
         latest_confidence = latest.get("confidence", 0)
 
     # --- Performance stats (7-day) ---
-    resolved_7d = [a for a in alerts_7d if a.get("resolved")]
-    wins_7d = [a for a in resolved_7d if a.get("outcome", "").startswith("WIN")]
-    win_rate = (len(wins_7d) / len(resolved_7d) * 100) if resolved_7d else 0
-    total_r = sum(a.get("r_multiple", 0) for a in resolved_7d)
+    totals_7d = window_7d.totals if window_7d else {"resolved": 0, "wins": 0, "total_r": 0.0}
+    resolved_7d = totals_7d["resolved"]
+    wins_7d = totals_7d["wins"]
+    win_rate = (wins_7d / resolved_7d * 100) if resolved_7d else 0
+    total_r = totals_7d["total_r"]
 
     # --- Portfolio ---
     balance = 10000.0
@@ -192,7 +193,7 @@ def generate_briefing():
     pnl_pct = ((balance - 10000) / 10000) * 100
 
     # --- Build the briefing ---
-    overnight = _overnight_recap(alerts_24h)
+    overnight = _overnight_recap(window_24h)
     bias_sentence = _direction_sentence(latest_direction, latest_confidence)
 
     # Actionable sentence
@@ -245,7 +246,7 @@ def generate_briefing():
 
 ## 📊 7-Day Performance
 
-- **Win Rate:** {win_rate:.0f}% ({len(wins_7d)}W / {len(resolved_7d) - len(wins_7d)}L of {len(resolved_7d)} resolved)
+- **Win Rate:** {win_rate:.0f}% ({wins_7d}W / {resolved_7d - wins_7d}L of {resolved_7d} resolved)
 - **Total P&L:** {total_r:+.2f}R
 - **Paper Balance:** ${balance:,.2f} ({pnl_pct:+.1f}%)
 
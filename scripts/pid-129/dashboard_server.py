@@ -2,7 +2,6 @@ import base64
 import hashlib
 import json
 import os
-import struct
 import threading
 import time
 from datetime import datetime, timezone
@@ -18,20 +17,34 @@ if not (BASE_DIR / "scripts").exists():
 if str(BASE_DIR) not in sys.path:
     sys.path.insert(0, str(BASE_DIR))
 
+from core import event_bus
+from core import json_delta
+from core import metrics
+from core import profiling
+from core.aggregates import open_aggregates, summary
+from core.alert_store import AlertTail, open_store
+from core.portfolio_journal import PortfolioJournal
+from core.snapshot_bus import SnapshotReader
+from core.ws_hub import WebSocketHub
+
 HOST = "0.0.0.0"
 PORT = 8002
 DASHBOARD_PATH = BASE_DIR / "dashboard.html"
 ALERTS_PATH = BASE_DIR / "logs" / "pid-129-alerts.jsonl"
 PORTFOLIO_PATH = BASE_DIR / "data" / "paper_portfolio.json"
+AGGREGATES_PATH = BASE_DIR / "data" / "outcome_aggregates.json"
 OVERRIDES_PATH = BASE_DIR / "data" / "dashboard_overrides.json"
+METRICS_PATH = BASE_DIR / "data" / "metrics.json"  # engine snapshot, saved after every cycle
+PROFILE_REQUEST_PATH = BASE_DIR / "data" / "profile_request.json"  # picked up by the engine next cycle
+ROUTING_PATH = BASE_DIR / "data" / "routing.json"  # engine provider routing table, saved after every cycle
 
 _LAST_CONTEXT = {}  # Last-known intelligence context (anti-flicker)
 _LAST_REBUILD = 0.0
+_LAST_HEARTBEAT_TS = 0.0  # heartbeat_ts of the snapshot the cache was last rebuilt for
 
 try:
-    from collectors.price import fetch_btc_price
-    from collectors.flows import fetch_flow_context
-    from collectors.derivatives import fetch_derivatives_context
+    # Snapshots come from the collector daemon when it runs (python -m collectors.service)
+    from collectors.service import collect
     _HAS_COLLECTORS = True
 except ImportError:
     _HAS_COLLECTORS = False
@@ -46,12 +59,22 @@ except Exception:
 # Module-level shared state
 _STATE_LOCK = threading.Lock()
 _CACHED_DATA = {}          # Latest dashboard JSON payload
-_LAST_ALERT_MTIME = 0.0    # os.stat() mtime of alerts JSONL
-_LAST_PORTFOLIO_MTIME = 0.0 # os.stat() mtime of portfolio JSON
+_CACHE_VERSION = 0         # bumped on every rebuild; the WS hub broadcasts when it moves
+_HUB = WebSocketHub()      # serves every /ws client from one event-loop thread
+_LAST_ALERT_MTIME = 0.0    # os.stat() mtimes of alerts JSONL and its patch log
+_LAST_PORTFOLIO_MTIME = 0.0 # os.stat() mtimes of portfolio snapshot and journal
+_AGGREGATES = open_aggregates(AGGREGATES_PATH)  # code/hour/rubric/portfolio buckets, synced per rebuild
 _OVERRIDES = {}
 
 
+_SNAPSHOT = SnapshotReader(BASE_DIR / "data" / "market_snapshot.bin")
+
+
 def _load_market_cache():
+    # Shared-memory snapshot published by app.py; legacy JSON cache as fallback
+    snap = _SNAPSHOT.read(with_extra=False)
+    if snap is not None and snap.as_market_cache():
+        return snap.as_market_cache()
     return _safe_json(BASE_DIR / "data" / "market_cache.json", {})
 
 
@@ -228,135 +251,43 @@ def _light_alerts(alerts):
     return light
 
 
-def _compute_code_edge(alerts):
-    """Win rate per reason code across all resolved alerts (min 5 trades)."""
-    code_records = {}
-    for a in alerts:
-        outcome = a.get("outcome")
-        r = a.get("r_multiple")
-        if outcome not in ("WIN_TP1", "WIN_TP2", "LOSS", "TIMEOUT"):
-            continue
-        if not isinstance(r, (int, float)):
-            continue
-        codes = (a.get("decision_trace") or {}).get("codes", [])
-        is_win = r > 0
-        for code in codes:
-            if code.startswith("REGIME_") or code.startswith("SESSION_"):
-                continue
-            rec = code_records.setdefault(code, {"wins": 0, "losses": 0})
-            if is_win:
-                rec["wins"] += 1
-            else:
-                rec["losses"] += 1
-    result = {}
-    for code, rec in code_records.items():
-        total = rec["wins"] + rec["losses"]
-        if total < 5:
-            continue
-        result[code] = {
-            "wins": rec["wins"],
-            "losses": rec["losses"],
-            "total": total,
-            "wr": round(rec["wins"] / total, 3),
-        }
-    return result
+# Display uses limit=50 (last ~4 hours of 5-min cycles).
+# Portfolio stats fallback uses limit=1000 for full history.
+def _is_display_alert(row):
+    # ── Phase 26 Gap 3: Filter junk alerts ──
+    if row.get("strategy") in (None, "TEST", "SYNTHETIC"):
+        return False
+    return row.get("symbol") not in ("SPX", "SPX_PROXY")
 
 
-def _compute_hour_stats(alerts):
-    """Win rate by hour of day (UTC) from resolved alerts."""
-    hour_records = {}
-    for a in alerts:
-        outcome = a.get("outcome")
-        r = a.get("r_multiple")
-        if outcome not in ("WIN_TP1", "WIN_TP2", "LOSS", "TIMEOUT"):
-            continue
-        if not isinstance(r, (int, float)):
-            continue
-        ts = a.get("timestamp", "")
-        try:
-            dt = datetime.fromisoformat(str(ts).replace("Z", "+00:00"))
-            hour = dt.hour
-        except Exception:
-            continue
-        rec = hour_records.setdefault(hour, {"wins": 0, "count": 0, "r_total": 0.0})
-        if r > 0:
-            rec["wins"] += 1
-        rec["count"] += 1
-        rec["r_total"] += r
-    result = {}
-    for hour, rec in hour_records.items():
-        if rec["count"] == 0:
-            continue
-        result[str(hour)] = {
-            "count": rec["count"],
-            "wr": round(rec["wins"] / rec["count"], 3),
-            "avg_r": round(rec["r_total"] / rec["count"], 3),
-        }
-    return result
+_ALERT_TAILS = {}  # (alerts path, limit) -> AlertTail ring of display alerts
+_ALERT_TAILS_LOCK = threading.Lock()
 
 
-def _compute_rubric_stats(alerts):
-    """Win rate by rubric confluence score (0-6) from resolved alerts."""
-    rubric_records = {}
-    for a in alerts:
-        outcome = a.get("outcome")
-        r = a.get("r_multiple")
-        if outcome not in ("WIN_TP1", "WIN_TP2", "LOSS", "TIMEOUT"):
-            continue
-        if not isinstance(r, (int, float)):
-            continue
-        dt_obj = a.get("decision_trace") or {}
-        rubric = dt_obj.get("rubric") or {}
-        score = rubric.get("score")
-        if score is None:
-            score = rubric.get("confluence_score")
-        if not isinstance(score, (int, float)):
-            continue
-        score = int(score)
-        rec = rubric_records.setdefault(score, {"wins": 0, "count": 0, "r_total": 0.0})
-        if r > 0:
-            rec["wins"] += 1
-        rec["count"] += 1
-        rec["r_total"] += r
-    result = {}
-    for score, rec in rubric_records.items():
-        if rec["count"] == 0:
-            continue
-        result[str(score)] = {
-            "count": rec["count"],
-            "wr": round(rec["wins"] / rec["count"], 3),
-            "avg_r": round(rec["r_total"] / rec["count"], 3),
-        }
-    return result
-
-
-# Display uses limit=50 (last ~4 hours of 5-min cycles).
-# Portfolio stats fallback uses limit=1000 for full history.
 def _load_alerts(limit=50):
     if not ALERTS_PATH.exists():
         return []
     try:
-        # Use a more robust way to read on Windows to avoid sharing violations
-        with open(ALERTS_PATH, "r", encoding="utf-8", errors="ignore") as f:
-            lines = f.readlines()
-            rows = []
-            for line in lines:
-                if not line.strip(): continue
-                try:
-                    row = json.loads(line)
-                    # ── Phase 26 Gap 3: Filter junk alerts ──
-                    if row.get("strategy") in (None, "TEST", "SYNTHETIC"):
-                        continue
-                    if row.get("symbol") in ("SPX", "SPX_PROXY"):
-                        continue
-                    rows.append(row)
-                except: continue
-            return rows[-limit:]
+        # Tail reader: first call seeks back from EOF, later calls parse only
+        # the lines appended since the last byte offset it consumed
+        with _ALERT_TAILS_LOCK:
+            tail = _ALERT_TAILS.get((ALERTS_PATH, limit))
+            if tail is None:
+                tail = _ALERT_TAILS[(ALERTS_PATH, limit)] = AlertTail(ALERTS_PATH, limit, where=_is_display_alert)
+        return tail.records()
     except Exception as e:
         print(f"Error loading alerts: {e}")
         return []
 
 
+def _sync_aggregates(portfolio):
+    try:
+        store = open_store(ALERTS_PATH) if ALERTS_PATH.exists() else None
+        _AGGREGATES.sync(store, (portfolio or {}).get("closed_trades", []))
+    except Exception as e:
+        print(f"Error syncing outcome aggregates: {e}")
+
+
 def _latest_price(alerts):
     for alert in reversed(alerts):
         # Look for price in various possible fields
@@ -367,126 +298,45 @@ def _latest_price(alerts):
     return 0.0
 
 
-def _portfolio_stats(portfolio, current_price=0.0, alerts=None):
+def _portfolio_stats(portfolio, current_price=0.0, aggregates=None):
     """
     Calculate comprehensive trading analytics from paper portfolio.
+
+    Breakdowns come from the persisted outcome aggregates (core/aggregates.py),
+    kept current by _sync_aggregates(), instead of re-scanning every trade.
     """
-    closed = portfolio.get("closed_trades", []) if isinstance(portfolio, dict) else []
-    
+    aggregates = aggregates or _AGGREGATES
     # ── Phase 26 Gap 2 Fix: Fall back to JSONL outcomes if portfolio file is empty ──
-    if not closed and alerts:
-        for a in alerts:
-            outcome = a.get("outcome")
-            r = a.get("r_multiple")
-            if outcome in ("WIN_TP1", "WIN_TP2", "LOSS", "TIMEOUT") and isinstance(r, (int, float)):
-                closed.append({
-                    "r_multiple": r,
-                    "direction": a.get("direction", "NEUTRAL"),
-                    "alert_id": a.get("alert_id") or a.get("id"),
-                    "outcome": outcome,
-                    "timeframe": a.get("timeframe", "UNKNOWN")
-                })
+    ledger = "trades" if aggregates.total("trades")["count"] else "alerts"
+    total = aggregates.total(ledger)
+    count = total["count"]
 
-    normalized_closed = []
-    for t in closed:
-        r = t.get("r_multiple")
-        if not isinstance(r, (int, float)):
-            continue
-        if r < 0 and str(t.get("outcome", "")).upper().startswith("WIN"):
-            t["outcome"] = "LOSS"
-        normalized_closed.append(t)
-    closed = normalized_closed
-
-    r_values = [t.get("r_multiple") for t in closed if isinstance(t.get("r_multiple"), (int, float))]
-    
-    wins = [r for r in r_values if r > 0]
-    losses = [r for r in r_values if r < 0]
-    count = len(r_values)
-    
-    win_rate = (len(wins) / count) if count else 0.0
-    gross_profit = sum(wins)
-    gross_loss = abs(sum(losses))
+    win_rate = total["win_rate"]
+    gross_profit = total["gross_profit"]
+    gross_loss = total["gross_loss"]
     profit_factor = (gross_profit / gross_loss) if gross_loss > 0 else (gross_profit if gross_profit > 0 else 0.0)
-    avg_r = (sum(r_values) / count) if count else 0.0
-
-    # Directional Stats
-    long_trades = []
-    short_trades = []
-    for t in closed:
-        direction = t.get("direction", "NEUTRAL")
-        r = t.get("r_multiple", 0)
-        if direction == "LONG":
-            long_trades.append(r)
-        elif direction == "SHORT":
-            short_trades.append(r)
-
-    def _calc_subset(rs):
-        c = len(rs)
-        ws = [r for r in rs if r > 0]
-        wr = (len(ws) / c) if c else 0.0
-        ar = (sum(rs) / c) if c else 0.0
-        tr = sum(rs)
-        return {"count": c, "wins": len(ws), "win_rate": round(wr, 4), "avg_r": round(ar, 2), "total_r": round(tr, 2)}
-
-    long_stats = _calc_subset(long_trades)
-    short_stats = _calc_subset(short_trades)
+    avg_r = total["avg_r"]
+
+    def _calc_subset(s):
+        return {"count": s["count"], "wins": s["wins"], "win_rate": round(s["win_rate"], 4),
+                "avg_r": round(s["avg_r"], 2), "total_r": round(s["total_r"], 2)}
+
+    by_direction = aggregates.breakdown(ledger, "direction")
+    long_stats = _calc_subset(by_direction.get("LONG") or summary(None))
+    short_stats = _calc_subset(by_direction.get("SHORT") or summary(None))
 
     # Recipe Stats
-    recipe_performance = {}
-    if alerts:
-        for t in closed:
-            alert_id = t.get("alert_id")
-            recipe = _match_recipe(alert_id, alerts)
-            if recipe not in recipe_performance:
-                recipe_performance[recipe] = []
-            recipe_performance[recipe].append(t.get("r_multiple", 0))
-
-    recipe_stats = {}
-    for name, rs in recipe_performance.items():
-        c = len(rs)
-        ws = [r for r in rs if r > 0]
-        wr = (len(ws) / c) if c else 0.0
-        ar = (sum(rs) / c) if c else 0.0
-        recipe_stats[name] = {"count": c, "wins": len(ws), "win_rate": round(wr, 4), "avg_r": round(ar, 2)}
+    recipe_stats = {
+        name: {"count": s["count"], "wins": s["wins"], "win_rate": round(s["win_rate"], 4), "avg_r": round(s["avg_r"], 2)}
+        for name, s in aggregates.breakdown(ledger, "recipe").items()
+    }
 
     # Timeframe Stats
-    tf_performance = {}
-    for t in closed:
-        tf = t.get("timeframe", "UNKNOWN")
-        if tf not in tf_performance:
-            tf_performance[tf] = []
-        tf_performance[tf].append(t.get("r_multiple", 0))
-    
-    tf_stats = {}
-    for tf, rs in tf_performance.items():
-        tf_stats[tf] = _calc_subset(rs)
+    tf_stats = {tf: _calc_subset(s) for tf, s in aggregates.breakdown(ledger, "timeframe").items()}
 
     # Session and Regime edge attribution (via alert metadata lookup)
-    session_performance = {}
-    regime_performance = {}
-    if alerts:
-        alert_meta = {}
-        for a in alerts:
-            aid = a.get("alert_id") or a.get("id")
-            if aid is not None:
-                alert_meta[aid] = {
-                    "session": str(a.get("session") or "UNKNOWN").lower(),
-                    "regime": str(a.get("regime") or "UNKNOWN").lower(),
-                }
-
-        for t in closed:
-            aid = t.get("alert_id")
-            meta = alert_meta.get(aid, {})
-            r = t.get("r_multiple", 0)
-
-            session = meta.get("session", "unknown")
-            regime = meta.get("regime", "unknown")
-
-            session_performance.setdefault(session, []).append(r)
-            regime_performance.setdefault(regime, []).append(r)
-
-    session_stats = {name: _calc_subset(rs) for name, rs in session_performance.items()}
-    regime_stats = {name: _calc_subset(rs) for name, rs in regime_performance.items()}
+    session_stats = {name: _calc_subset(s) for name, s in aggregates.breakdown(ledger, "session").items()}
+    regime_stats = {name: _calc_subset(s) for name, s in aggregates.breakdown(ledger, "regime").items()}
 
     # Kelly Criterion
     # Kelly % = W - [(1 - W) / R]
@@ -496,10 +346,10 @@ def _portfolio_stats(portfolio, current_price=0.0, alerts=None):
     kelly_significance = ""
     if count < 20:
         kelly_significance = f"({count} trades — need 20+ for significance)"
-    elif wins and losses:
-        W = len(wins) / len(r_values)
-        avg_win = sum(wins) / len(wins)
-        avg_loss = abs(sum(losses) / len(losses))
+    elif total["wins"] and total["losses"]:
+        W = total["wins"] / count
+        avg_win = gross_profit / total["wins"]
+        avg_loss = gross_loss / total["losses"]
         R = avg_win / avg_loss if avg_loss > 0 else 1.0
         kelly = W - ((1 - W) / R)
         kelly_pct = round(max(0.0, min(kelly / 4, 0.25)), 4)  # Quarter Kelly, capped at 25%
@@ -524,14 +374,7 @@ def _portfolio_stats(portfolio, current_price=0.0, alerts=None):
     peak = portfolio.get("peak_balance", balance)
     drawdown_pct = round(((peak - balance) / peak) * 100, 2) if peak > 0 else 0.0
 
-    streak = 0
-    for value in reversed(r_values):
-        if value < 0:
-            streak -= 1
-        elif value > 0:
-            streak += 1
-        else:
-            continue
+    streak = total["streak"]
 
     return {
         "win_rate": round(win_rate, 2),
@@ -539,7 +382,7 @@ def _portfolio_stats(portfolio, current_price=0.0, alerts=None):
         "avg_r": round(avg_r, 2),
         "streak": streak,
         "total_trades": count,
-        "total_r": round(sum(r_values), 2),
+        "total_r": round(total["total_r"], 2),
         "long_stats": long_stats,
         "short_stats": short_stats,
         "recipe_stats": recipe_stats,
@@ -921,7 +764,10 @@ def get_dashboard_data():
             alerts = valid_alerts
         
 
-        portfolio = _safe_json(PORTFOLIO_PATH, {"balance": 10000, "positions": [], "closed_trades": [], "max_drawdown": 0})
+        try:
+            portfolio = PortfolioJournal(PORTFOLIO_PATH).load()  # snapshot + journal replay
+        except Exception:
+            portfolio = {"balance": 10000, "positions": [], "closed_trades": [], "max_drawdown": 0}
 
         # ── Phase 26: Stale Alert Hardening ──
         last_alert_time = 0.0
@@ -940,14 +786,18 @@ def get_dashboard_data():
         # all signals are NO-TRADE.  Using it for alerts_stale means the Risk Gate
         # stays green in quiet markets where no signals meet the trade threshold.
         last_cycle_time = 0.0
-        try:
-            hb = _safe_json(BASE_DIR / "data" / "last_cycle.json", {})
-            hb_ts = hb.get("timestamp", "")
-            if hb_ts:
-                hb_clean = hb_ts.split(".")[0].replace("Z", "").replace("T", " ")
-                last_cycle_time = datetime.strptime(hb_clean, "%Y-%m-%d %H:%M:%S").replace(tzinfo=timezone.utc).timestamp()
-        except Exception:
-            pass
+        snap = _SNAPSHOT.read(with_extra=False)
+        if snap is not None and snap.heartbeat_ts > 0:
+            last_cycle_time = snap.heartbeat_ts
+        else:
+            try:
+                hb = _safe_json(BASE_DIR / "data" / "last_cycle.json", {})
+                hb_ts = hb.get("timestamp", "")
+                if hb_ts:
+                    hb_clean = hb_ts.split(".")[0].replace("Z", "").replace("T", " ")
+                    last_cycle_time = datetime.strptime(hb_clean, "%Y-%m-%d %H:%M:%S").replace(tzinfo=timezone.utc).timestamp()
+            except Exception:
+                pass
 
         now_ts = datetime.now(timezone.utc).timestamp()
         # Liveness is based on engine heartbeat; fall back to last alert when no heartbeat yet.
@@ -973,15 +823,16 @@ def get_dashboard_data():
                     taker_ratio = 0.6
                     break
 
-        budget = {"remaining": 8}
+        # Without the daemon, upstream is only called (with our own budget) while the engine is stale
+        budget = None
         if alerts_stale and _HAS_COLLECTORS:
             try:
                 from collectors.base import BudgetManager
                 budget = BudgetManager()
-                price_snap = fetch_btc_price(budget)
+                price_snap = collect("price", budget)
                 if price_snap.healthy and price_snap.price > 0:
                     mid = price_snap.price
-                flow_snap = fetch_flow_context(budget)
+                flow_snap = collect("flows", budget)
                 if flow_snap.healthy:
                     taker_ratio = flow_snap.taker_ratio
             except Exception:
@@ -997,7 +848,7 @@ def get_dashboard_data():
         flows = {"taker_ratio": round(taker_ratio, 2), "long_short_ratio": 1.0, "crowding_score": 0.0, "healthy": False, "source": "fallback"}
         if _HAS_COLLECTORS:
             try:
-                flow_ctx = fetch_flow_context(budget)
+                flow_ctx = collect("flows", budget, local=budget is not None)
                 flows = {
                     "taker_ratio": flow_ctx.taker_ratio,
                     "long_short_ratio": flow_ctx.long_short_ratio,
@@ -1013,7 +864,7 @@ def get_dashboard_data():
         derivatives = {"funding_rate": 0.0, "oi_change_pct": 0.0, "basis_pct": 0.0, "healthy": False, "source": "none"}
         if _HAS_COLLECTORS:
             try:
-                deriv_ctx = fetch_derivatives_context(budget)
+                deriv_ctx = collect("derivatives", budget, local=budget is not None)
                 derivatives = {
                     "funding_rate": deriv_ctx.funding_rate,
                     "oi_change_pct": deriv_ctx.oi_change_pct,
@@ -1057,14 +908,15 @@ def get_dashboard_data():
             bs_filter = "⚡ HEAVY BUYS — Bullish pressure"
             bs_severity = 0
 
-        # Load full alert history for stats (limit=50 only captures ~36 of 79 resolved trades)
-        _all_alerts_for_stats = _load_alerts(limit=1000)
-        stats = _portfolio_stats(portfolio, current_price=mid, alerts=_all_alerts_for_stats)
+        # Stats cover the full history through the persisted aggregates; a
+        # rebuild only books outcomes resolved since the last one
+        _sync_aggregates(portfolio)
+        stats = _portfolio_stats(portfolio, current_price=mid)
 
         # ── Phase 28+ Edge Intelligence ──
-        code_edge = _compute_code_edge(_all_alerts_for_stats)
-        hour_stats = _compute_hour_stats(_all_alerts_for_stats)
-        rubric_stats = _compute_rubric_stats(_all_alerts_for_stats)
+        code_edge = _AGGREGATES.code_edge()
+        hour_stats = _AGGREGATES.hour_stats()
+        rubric_stats = _AGGREGATES.rubric_stats()
 
         # ── Phase 25: Drawdown Circuit Breaker ──
         dd_pct = stats.get("drawdown_pct", 0.0)
@@ -1136,18 +988,38 @@ def get_dashboard_data():
 
 def _watcher_loop():
     global _LAST_REBUILD
-    """Background thread: polls file mtimes every 1s, rebuilds cache only on change."""
-    global _CACHED_DATA, _LAST_ALERT_MTIME, _LAST_PORTFOLIO_MTIME
+    """Background thread: rebuilds the cache as soon as an alert, position,
+    outcome or cycle event arrives on the event bus, or a watched file changes;
+    the files are only stat()ed on wake-ups."""
+    global _LAST_ALERT_MTIME, _LAST_PORTFOLIO_MTIME, _LAST_HEARTBEAT_TS
+    events = event_bus.Subscriber(role="dashboard", directory=BASE_DIR / "data" / "events.d")
     while True:
         try:
-            changed = False
+            # Sleep until something is published (or the 10s refresh is due)
+            timeout = max(0.1, 10 - (time.time() - _LAST_REBUILD))
+            if events.listening:
+                changed = bool(events.poll(timeout))
+            elif _SNAPSHOT.available():
+                # Mid-cycle price/book publishes also move seq; only a new
+                # end-of-cycle heartbeat is worth a rebuild
+                _SNAPSHOT.wait(timeout)
+                snap = _SNAPSHOT.read(with_extra=False)
+                heartbeat_ts = snap.heartbeat_ts if snap else 0.0
+                changed = heartbeat_ts != _LAST_HEARTBEAT_TS
+                _LAST_HEARTBEAT_TS = heartbeat_ts
+            else:
+                time.sleep(1.0)
+                changed = False
             if ALERTS_PATH.exists():
-                mt = ALERTS_PATH.stat().st_mtime
+                # Outcomes land in the store's patch log, not the alert log
+                patches = open_store(ALERTS_PATH).patch_path
+                mt = (ALERTS_PATH.stat().st_mtime, patches.stat().st_mtime if patches.exists() else 0)
                 if mt != _LAST_ALERT_MTIME:
                     _LAST_ALERT_MTIME = mt
                     changed = True
-            if PORTFOLIO_PATH.exists():
-                mt = PORTFOLIO_PATH.stat().st_mtime
+            journal = PortfolioJournal(PORTFOLIO_PATH).journal_path
+            if PORTFOLIO_PATH.exists() or journal.exists():
+                mt = tuple(p.stat().st_mtime if p.exists() else 0 for p in (PORTFOLIO_PATH, journal))
                 if mt != _LAST_PORTFOLIO_MTIME:
                     _LAST_PORTFOLIO_MTIME = mt
                     changed = True
@@ -1161,25 +1033,52 @@ def _watcher_loop():
             now = time.time()
             if changed or not _CACHED_DATA or (now - _LAST_REBUILD > 10):
 
-                new_data = get_dashboard_data()
-                with _STATE_LOCK:
-                    _CACHED_DATA = new_data
+                with metrics.span("dashboard_rebuild"):
+                    _set_cache(get_dashboard_data())
                 _LAST_REBUILD = now
         except Exception as e:
             print(f"Watcher error: {e}")
-        time.sleep(1)
+            time.sleep(1)
 
 
-def _build_ws_frame(payload: str) -> bytes:
-    data = payload.encode("utf-8")
-    length = len(data)
-    if length <= 125:
-        header = struct.pack("!BB", 0x81, length)
-    elif length <= 65535:
-        header = struct.pack("!BBH", 0x81, 126, length)
-    else:
-        header = struct.pack("!BBQ", 0x81, 127, length)
-    return header + data
+def _set_cache(new_data):
+    """Swap in a rebuilt payload and broadcast it with its delta from the
+    previous version; a rebuild that changed nothing is not a new version."""
+    global _CACHED_DATA, _CACHE_VERSION
+    old = _CACHED_DATA
+    ops = json_delta.diff(old, new_data) if old else None
+    with _STATE_LOCK:
+        _CACHED_DATA = new_data
+        if old and json_delta.is_empty(ops):
+            return
+        _CACHE_VERSION += 1
+        version = _CACHE_VERSION
+    payload = json.dumps(new_data, separators=(",", ":"), default=str)
+    delta = json.dumps(ops, separators=(",", ":"), default=str) if ops is not None else None
+    if delta is not None and len(delta) * 2 > len(payload):
+        delta = None  # most of the state changed: the snapshot is the better frame
+    _HUB.publish(payload, version, delta)
+
+
+class DashboardServer(ThreadingHTTPServer):
+    """Leaves sockets handed to the WebSocket hub open when their handler returns."""
+    daemon_threads = True
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._handed_off = set()
+        self._handoff_lock = threading.Lock()
+
+    def hand_off(self, request):
+        with self._handoff_lock:
+            self._handed_off.add(request)
+
+    def shutdown_request(self, request):
+        with self._handoff_lock:
+            if request in self._handed_off:
+                self._handed_off.discard(request)
+                return
+        super().shutdown_request(request)
 
 
 class DashboardHandler(BaseHTTPRequestHandler):
@@ -1188,7 +1087,16 @@ class DashboardHandler(BaseHTTPRequestHandler):
     def do_GET(self):
         if self.path == "/ws":
             self._handle_websocket()
-        elif self.path.startswith("/api/alert/"):
+            return
+        started = time.perf_counter()
+        self._route_get()
+        route = "/api/alert" if self.path.startswith("/api/alert/") else self.path.split("?")[0]
+        if route not in ("/", "/dashboard.html", "/api/alert", "/api/dashboard", "/api/alerts", "/api/command", "/metrics", "/api/routing"):
+            route = "other"
+        metrics.observe("http_request_seconds", time.perf_counter() - started, route=route)
+
+    def _route_get(self):
+        if self.path.startswith("/api/alert/"):
             self._serve_alert_detail()
         elif self.path == "/api/dashboard":
             with _STATE_LOCK:
@@ -1199,6 +1107,10 @@ class DashboardHandler(BaseHTTPRequestHandler):
         elif self.path == "/api/command":
             # Just show current overrides on GET /api/command
             self._json_response(_load_overrides())
+        elif self.path == "/metrics":
+            self._serve_metrics()
+        elif self.path == "/api/routing":
+            self._serve_routing()
         else:
             self._serve_dashboard()
 
@@ -1332,6 +1244,14 @@ class DashboardHandler(BaseHTTPRequestHandler):
                     "mode": mode
                 })
 
+            elif action == "profile_cycles":
+                request = profiling.request_profile(
+                    cmd.get("cycles", 1), mode=cmd.get("mode", "cprofile"),
+                    trace_memory=bool(cmd.get("tracemalloc", False)), path=PROFILE_REQUEST_PATH,
+                )
+                self._json_response({"status": "success", "profile_request": request,
+                                     "output_dir": str(BASE_DIR / "logs" / "profiles")})
+
             elif action == "run_profit_preflight":
                 with _STATE_LOCK:
                     payload = _CACHED_DATA.copy() if isinstance(_CACHED_DATA, dict) else {}
@@ -1357,6 +1277,23 @@ class DashboardHandler(BaseHTTPRequestHandler):
         self.end_headers()
         self.wfile.write(body)
 
+    def _serve_metrics(self):
+        """GET /metrics — OpenMetrics text: the engine's last cycle snapshot plus this server's own."""
+        body = metrics.render(metrics.load_snapshot(METRICS_PATH), metrics.get_registry().snapshot()).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/openmetrics-text; version=1.0.0; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _serve_routing(self):
+        """GET /api/routing — the engine's provider ranking and circuit breakers as of its last cycle."""
+        try:
+            self._json_response(json.loads(ROUTING_PATH.read_text(encoding="utf-8")))
+        except (OSError, ValueError):
+            self.send_error(404, "No routing table yet")
+
     def _serve_dashboard(self):
         path = DASHBOARD_PATH if (self.path=="/" or self.path=="/dashboard.html") else None
         if not path or not path.exists():
@@ -1382,16 +1319,13 @@ class DashboardHandler(BaseHTTPRequestHandler):
         self.send_header("Sec-WebSocket-Accept", accept)
         self.end_headers()
         
+        self.wfile.flush()
+        # The hub owns the connection from here; this thread goes back to the pool
         print(f"[*] WS connected: {self.client_address}")
-        try:
-            while True:
-                with _STATE_LOCK:
-                    payload = json.dumps(_CACHED_DATA) if _CACHED_DATA else "{}"
-                self.wfile.write(_build_ws_frame(payload))
-                self.wfile.flush()
-                time.sleep(2)
-        except:
-            print(f"[*] WS disconnected: {self.client_address}")
+        self.close_connection = True
+        if isinstance(self.server, DashboardServer):
+            self.server.hand_off(self.connection)
+        _HUB.attach(self.connection)
 
     def log_message(self, fmt, *args):
         return
@@ -1399,15 +1333,14 @@ class DashboardHandler(BaseHTTPRequestHandler):
 
 def main():
     # Seed initial data
-    global _CACHED_DATA
-    with _STATE_LOCK:
-        _CACHED_DATA.update(get_dashboard_data())
+    _HUB.start()
+    _set_cache(get_dashboard_data())
     
     # Start watcher thread
     watcher = threading.Thread(target=_watcher_loop, daemon=True)
     watcher.start()
     
-    server = ThreadingHTTPServer((HOST, PORT), DashboardHandler)
+    server = DashboardServer((HOST, PORT), DashboardHandler)
     print(f"Dashboard Server Alpha: http://localhost:{PORT}")
     try:
         server.serve_forever()
@@ -1,9 +1,11 @@
 #!/usr/bin/env python3
+import hashlib
 import json
-from collections import defaultdict
+import os
+import sys
+import time
 from datetime import datetime, timezone
 from pathlib import Path
-from statistics import median
 # Paths
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
 if not (BASE_DIR / "logs").exists():
@@ -13,6 +15,12 @@ PORTFOLIO_PATH = BASE_DIR / "data" / "paper_portfolio.json"
 SCORECARD_PATH = BASE_DIR / "reports" / "pid-129-daily-scorecard.md"
 ALERTS_PATH = BASE_DIR / "logs" / "pid-129-alerts.jsonl"
 OUTPUT_PATH = BASE_DIR / "dashboard.html"
+AGGREGATES_PATH = BASE_DIR / "data" / "outcome_aggregates.json"
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+from core.aggregates import open_aggregates
+from core.alert_store import open_store
+from core.portfolio_journal import PortfolioJournal
 MAX_DURATION_SECONDS = {"5m": 4 * 3600, "15m": 12 * 3600, "1h": 48 * 3600}
 TARGET_TFS = ["5m", "15m", "1h"]
 def _safe_json(path: Path, default):
@@ -25,7 +33,13 @@ def _safe_json(path: Path, default):
 def get_state():
     return _safe_json(STATE_PATH, {})
 def get_portfolio():
-    return _safe_json(PORTFOLIO_PATH, None)
+    journal = PortfolioJournal(PORTFOLIO_PATH)
+    if not (PORTFOLIO_PATH.exists() or journal.journal_path.exists()):
+        return None
+    try:
+        return journal.load()
+    except Exception:
+        return None
 def get_scorecard():
     if not SCORECARD_PATH.exists():
         return "No scorecard found yet."
@@ -33,15 +47,13 @@ def get_scorecard():
 def get_alerts():
     if not ALERTS_PATH.exists():
         return []
-    rows = []
-    for line in ALERTS_PATH.read_text(encoding="utf-8").splitlines():
-        if not line.strip():
-            continue
-        try:
-            rows.append(json.loads(line))
-        except Exception:
-            continue
-    return rows
+    return open_store(ALERTS_PATH).query()
+def get_aggregates(portfolio):
+    """Outcome aggregates caught up with the alert log and closed trades."""
+    agg = open_aggregates(AGGREGATES_PATH)
+    store = open_store(ALERTS_PATH) if ALERTS_PATH.exists() else None
+    agg.sync(store, (portfolio or {}).get("closed_trades", []))
+    return agg
 def parse_dt(value: str):
     if not value:
         return None
@@ -204,8 +216,9 @@ def _dynamic_risk_pct(quality_score, portfolio, five_alert):
         risk *= 0.75
 
     return round(max(0.25, min(1.25, risk)), 2)
-def execution_decision(latest):
-    portfolio = get_portfolio() or {}
+def execution_decision(latest, portfolio=None):
+    if portfolio is None:
+        portfolio = get_portfolio() or {}
     one_h = latest.get("1h", {})
     fifteen = latest.get("15m", {})
     five = latest.get("5m", {})
@@ -268,14 +281,15 @@ def execution_decision(latest):
 def percentile_used(age_seconds, tf):
     max_s = MAX_DURATION_SECONDS.get(tf, 24 * 3600)
     return (age_seconds / max_s) * 100 if max_s > 0 else 0
-def render_execution_matrix(alerts):
+def render_execution_matrix(alerts, portfolio=None):
+    if portfolio is None:
+        portfolio = get_portfolio() or {}
     latest = latest_btc_by_timeframe(alerts)
-    decision, tone, reasons, risk_pct, quality_score = execution_decision(latest)
+    decision, tone, reasons, risk_pct, quality_score = execution_decision(latest, portfolio)
     risk_html = f"<span class='pill badge-good' style='margin-left:12px;'>Suggested Risk: {risk_pct}%</span>" if risk_pct > 0 else ""
     quality_cls = "badge-good" if quality_score >= 75 else ("badge-warn" if quality_score >= 65 else "badge-bad")
     quality_html = f"<span class='pill {quality_cls}' style='margin-left:12px;'>Setup Quality: {quality_score}/100</span>"
     daily_cap_html = ""
-    portfolio = get_portfolio() or {}
     balance = float(portfolio.get("balance", 10000.0))
     daily_cap = round(balance * 0.02, 2)
     daily_cap_html = f"<span class='mini' style='margin-left:8px;'>Daily risk budget cap: ${daily_cap:,.2f}</span>"
@@ -314,7 +328,6 @@ def render_execution_matrix(alerts):
 
         qty_str = ""
         if risk_pct > 0 and entry > 0 and stop > 0 and abs(entry - stop) > 0.1:
-            portfolio = get_portfolio()
             balance = portfolio.get("balance", 10000) if portfolio else 10000
             risk_amt = balance * (risk_pct / 100.0)
             qty = risk_amt / abs(entry - stop)
@@ -376,7 +389,7 @@ def max_losing_streak(trades):
         else:
             streak = 0
     return max_streak
-def render_edge_scoreboard(portfolio):
+def render_edge_scoreboard(portfolio, aggregates):
     if not portfolio:
         return """
         <section class="panel">
@@ -384,33 +397,27 @@ def render_edge_scoreboard(portfolio):
             <p class="mini">No portfolio data available.</p>
         </section>
         """
-    closed = portfolio.get("closed_trades", [])
-    grouped = defaultdict(list)
-    segmented = defaultdict(list)
-    for t in closed:
-        tf = t.get("timeframe")
+    grouped = aggregates.breakdown("trades", "timeframe")
+    segmented = {}
+    for key, s in aggregates.breakdown("trades", "segment").items():
+        tf, regime, session = key.split("|", 2)
         if tf in TARGET_TFS:
-            grouped[tf].append(t)
-            regime = str(t.get("regime") or "unknown").lower()
-            session = str(t.get("session") or "unknown").lower()
-            segmented[(tf, regime, session)].append(t)
+            segmented[(tf, regime, session)] = s
     rows = []
     best_tf = None
     best_score = -10**9
     min_sample = 10
     for tf in TARGET_TFS:
-        trades = grouped.get(tf, [])
-        n = len(trades)
+        s = grouped.get(tf)
+        n = s["count"] if s else 0
         if n == 0:
             rows.append(f"<tr><td>{tf}</td><td colspan='6' class='mini'>No closed trades yet.</td></tr>")
             continue
-        wins = sum(1 for t in trades if str(t.get("outcome", "")).upper().startswith("WIN"))
-        wr = (wins / n) * 100
-        rs = [float(t.get("r_multiple", 0.0)) for t in trades]
-        avg_r = sum(rs) / n
-        med_r = median(rs)
-        gross_r = sum(rs)
-        lose_streak = max_losing_streak(trades)
+        wr = s["hit_rate"] * 100
+        avg_r = s["avg_r"]
+        med_r = s["median_r"]
+        gross_r = s["total_r"]
+        lose_streak = s["max_loss_streak"]
         if n >= min_sample and avg_r > best_score:
             best_score = avg_r
             best_tf = tf
@@ -425,14 +432,12 @@ def render_edge_scoreboard(portfolio):
     best_hourly = None
     best_hourly_score = -10**9
     min_segment_sample = 8
-    for (tf, regime, session), trades in sorted(segmented.items(), key=lambda x: (tf_sort_key(x[0][0]), x[0][1], x[0][2])):
-        n = len(trades)
-        wins = sum(1 for t in trades if str(t.get("outcome", "")).upper().startswith("WIN"))
-        wr = (wins / n) * 100 if n else 0
-        rs = [float(t.get("r_multiple", 0.0)) for t in trades]
-        avg_r = sum(rs) / n if n else 0
-        med_r = median(rs) if rs else 0.0
-        lose_streak = max_losing_streak(trades)
+    for (tf, regime, session), s in sorted(segmented.items(), key=lambda x: (tf_sort_key(x[0][0]), x[0][1], x[0][2])):
+        n = s["count"]
+        wr = s["hit_rate"] * 100
+        avg_r = s["avg_r"]
+        med_r = s["median_r"]
+        lose_streak = s["max_loss_streak"]
         tone = "badge-good" if n >= min_segment_sample and avg_r > 0 else ("badge-warn" if n >= min_segment_sample else "badge-neutral")
         if tf == "1h" and n >= min_segment_sample and avg_r > best_hourly_score:
             best_hourly = (regime, session)
@@ -782,7 +787,7 @@ def render_recent_alerts(alerts):
     """
 
 
-def render_calibration_panel(portfolio):
+def render_calibration_panel(portfolio, aggregates):
     if not portfolio:
         return """
         <section class="panel">
@@ -791,24 +796,16 @@ def render_calibration_panel(portfolio):
         </section>
         """
     bins = [(0, 20), (21, 40), (41, 60), (61, 80), (81, 100)]
-    grouped = {b: [] for b in bins}
-    for t in portfolio.get("closed_trades", []):
-        conf = int(t.get("confidence", 0) or 0)
-        for b in bins:
-            if b[0] <= conf <= b[1]:
-                grouped[b].append(t)
-                break
+    grouped = aggregates.breakdown("trades", "confidence")
 
     rows = []
     last_wr = None
     monotonic = True
     for b in bins:
-        trades = grouped[b]
-        n = len(trades)
-        wins = sum(1 for t in trades if str(t.get("outcome", "")).upper().startswith("WIN"))
-        wr = (wins / n) * 100 if n else 0.0
-        rs = [float(t.get("r_multiple", 0.0)) for t in trades]
-        avg_r = (sum(rs) / n) if n else 0.0
+        s = grouped.get(f"{b[0]}-{b[1]}")
+        n = s["count"] if s else 0
+        wr = s["hit_rate"] * 100 if n else 0.0
+        avg_r = s["avg_r"] if n else 0.0
         if n > 0 and last_wr is not None and wr < last_wr:
             monotonic = False
         if n > 0:
@@ -867,12 +864,7 @@ def render_no_trade_panel(alerts, portfolio):
     </section>
     """
 
-def generate_html():
-    state = get_state()
-    portfolio = get_portfolio()
-    scorecard = get_scorecard()
-    alerts = get_alerts()
-    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+def render_state_cards(state):
     alerts_html = ""
     for symbol, tfs in state.items():
         if symbol in ["lifecycle_key", "regime", "last_sent", "tp1_hit"]:
@@ -893,6 +885,10 @@ def generate_html():
                 </div>
             </div>
             """
+    return alerts_html
+
+
+def render_portfolio_summary(portfolio):
     p_html = "<p>No portfolio data available.</p>"
     if portfolio:
         balance = portfolio.get("balance", 10000)
@@ -918,33 +914,10 @@ def generate_html():
         </div>
         <div class="chart-container">{equity_svg}</div>
         """
-    vctx = build_verdict_context(alerts, portfolio)
-    latest_codes = ((_latest_btc_alert(alerts).get("decision_trace") or {}).get("codes") or [])[:8]
-    signals_html = "".join(f"<span class='pill badge-neutral'>{c}</span>" for c in latest_codes) or "<span class='mini'>No active reason codes.</span>"
-    gate_color = "var(--accent)" if vctx["gate"] == "GREEN" else ("#ffd700" if vctx["gate"] == "AMBER" else "#ff4d4d")
-    gate_bg = "rgba(0,255,204,0.05)" if vctx["gate"] == "GREEN" else ("rgba(255,215,0,0.08)" if vctx["gate"] == "AMBER" else "rgba(255,77,77,0.08)")
-    gate_rows = "".join(
-        f"<div class='mini' style='color:{'var(--text)' if ok else '#ff4d4d'}'>{'✅' if ok else '❌'} {label}</div>"
-        for label, ok in vctx["checks"]
-    )
-    a_count = vctx["aligned"]
-    ag_count = vctx.get("against", 0)
-    t_probes = vctx["total"]
-    net_score = a_count - ag_count
-    radar_color = "var(--accent)" if a_count >= 7 else ("#ffd700" if a_count >= 4 else "#ff4d4d")
-    radar_label = "STRONG" if a_count >= 7 else ("MODERATE" if a_count >= 4 else "WEAK")
-    net_color = "var(--accent)" if net_score >= 0 else "#ff4d4d"
-    inactive_count = t_probes - a_count - ag_count
-    radar_rows = "".join(
-        f"<div class='mini' title='{diag}'>{icon} <span style='color:{color}'>{label}</span> <span class='mini' style='opacity:0.5; font-size:0.7em;'>({diag})</span></div>"
-        for label, icon, color, diag in vctx["rows"]
-    )
-    execute_html = ""
-    if vctx["direction"] in {"LONG", "SHORT"}:
-        label = "⚠️ EXECUTE (HIGH RISK)" if vctx["gate"] == "RED" else "1-CLICK EXECUTE"
-        bg = "background:#ff4d4d;" if vctx["gate"] == "RED" else ""
-        execute_html = f"<button id='executeBtn' class='pill' style='padding:10px 14px;font-size:.9rem;width:100%;{bg}' onclick=\"requestExecute('latest-btc')\">{label}</button>"
-    playbook_html = """
+    return p_html
+
+
+PLAYBOOK_HTML = """
     <section class='panel'>
       <h2 style='margin:0 0 .7rem 0;'>Best Long vs Best Short (Right Now)</h2>
       <div class='mini' style='margin-bottom:.7rem;'>Operator Decision: <span id='operator-decision' class='pill badge-neutral'>WAIT</span></div>
@@ -971,6 +944,36 @@ def generate_html():
       </div>
     </section>
     """
+
+
+def render_verdict_center(alerts, portfolio):
+    """Verdict Center panel, plus the verdict context the page script starts from."""
+    vctx = build_verdict_context(alerts, portfolio)
+    latest_codes = ((_latest_btc_alert(alerts).get("decision_trace") or {}).get("codes") or [])[:8]
+    signals_html = "".join(f"<span class='pill badge-neutral'>{c}</span>" for c in latest_codes) or "<span class='mini'>No active reason codes.</span>"
+    gate_color = "var(--accent)" if vctx["gate"] == "GREEN" else ("#ffd700" if vctx["gate"] == "AMBER" else "#ff4d4d")
+    gate_bg = "rgba(0,255,204,0.05)" if vctx["gate"] == "GREEN" else ("rgba(255,215,0,0.08)" if vctx["gate"] == "AMBER" else "rgba(255,77,77,0.08)")
+    gate_rows = "".join(
+        f"<div class='mini' style='color:{'var(--text)' if ok else '#ff4d4d'}'>{'✅' if ok else '❌'} {label}</div>"
+        for label, ok in vctx["checks"]
+    )
+    a_count = vctx["aligned"]
+    ag_count = vctx.get("against", 0)
+    t_probes = vctx["total"]
+    net_score = a_count - ag_count
+    radar_color = "var(--accent)" if a_count >= 7 else ("#ffd700" if a_count >= 4 else "#ff4d4d")
+    radar_label = "STRONG" if a_count >= 7 else ("MODERATE" if a_count >= 4 else "WEAK")
+    net_color = "var(--accent)" if net_score >= 0 else "#ff4d4d"
+    inactive_count = t_probes - a_count - ag_count
+    radar_rows = "".join(
+        f"<div class='mini' title='{diag}'>{icon} <span style='color:{color}'>{label}</span> <span class='mini' style='opacity:0.5; font-size:0.7em;'>({diag})</span></div>"
+        for label, icon, color, diag in vctx["rows"]
+    )
+    execute_html = ""
+    if vctx["direction"] in {"LONG", "SHORT"}:
+        label = "⚠️ EXECUTE (HIGH RISK)" if vctx["gate"] == "RED" else "1-CLICK EXECUTE"
+        bg = "background:#ff4d4d;" if vctx["gate"] == "RED" else ""
+        execute_html = f"<button id='executeBtn' class='pill' style='padding:10px 14px;font-size:.9rem;width:100%;{bg}' onclick=\"requestExecute('latest-btc')\">{label}</button>"
     verdict_html = f"""
     <section class='panel'>
       <div style='display:flex;justify-content:space-between;align-items:center;margin-bottom:1rem;'>
@@ -1036,13 +1039,12 @@ def generate_html():
       <div style='background:var(--surface);border:1px solid var(--border);border-radius:12px;padding:1rem;max-width:360px;width:90%;'><h3 style='margin-bottom:.6rem;'>Confirm Execute</h3><div id='executeMeta' class='mini'></div><div style='margin-top:1rem;display:flex;gap:.5rem;justify-content:flex-end;'><button class='pill badge-neutral' onclick='closeExecuteModal()'>Cancel</button><button id='confirmExecuteBtn' class='pill badge-good' disabled>Confirm (3)</button></div></div>
     </div>
     """
-    execution_html = render_execution_matrix(alerts)
-    edge_html = render_edge_scoreboard(portfolio)
-    calibration_html = render_calibration_panel(portfolio)
-    no_trade_html = render_no_trade_panel(alerts, portfolio)
-    lifecycle_html = render_lifecycle_panel(alerts)
-    recent_alerts_html = render_recent_alerts(alerts)
-    balance = (portfolio or {}).get("balance", 10000)
+    return verdict_html, vctx
+
+
+def render_page(now, balance, in_trade, vctx, alerts_html, p_html, playbook_html, verdict_html, execution_html,
+                edge_html, calibration_html, no_trade_html, lifecycle_html, recent_alerts_html, scorecard):
+    """The full dashboard.html around already rendered panels."""
     html = f"""
 <!DOCTYPE html>
 <html lang="en">
@@ -1271,7 +1273,7 @@ def generate_html():
       <div style="display:flex;gap:.5rem;margin-top:1rem;"><button id="cancelExec" class="pill badge-neutral" style="border:0;cursor:pointer;">Cancel</button><button id="confirmExec" class="pill badge-good" style="border:0;cursor:pointer;" disabled>Confirm</button></div>
     </dialog>
     <script>
-      let state = {{livePrice:0,spread:0,inTrade:{'true' if bool(portfolio and portfolio.get('positions')) else 'false'},entryPrice:{vctx['entry']},tp1Price:{vctx['tp1']},stopPrice:{vctx['stop']},direction:"{vctx['direction']}"}};
+      let state = {{livePrice:0,spread:0,inTrade:{'true' if in_trade else 'false'},entryPrice:{vctx['entry']},tp1Price:{vctx['tp1']},stopPrice:{vctx['stop']},direction:"{vctx['direction']}"}};
       const els = {{badge:document.getElementById('connection-badge'),sync:document.getElementById('sync-label'),mid:document.getElementById('live-mid'),spread:document.getElementById('live-spread'),confluence:document.getElementById('live-confluence'),radar:document.getElementById('live-radar'),balance:document.getElementById('live-balance'),winrate:document.getElementById('live-winrate'),pf:document.getElementById('live-pf'),kelly:document.getElementById('live-kelly'),gate:document.getElementById('live-gate'),cbanner:document.getElementById('circuit-breaker-banner'),creason:document.getElementById('circuit-breaker-reason'),execBtn:document.getElementById('executeBtn')}};
       function fmtMoney(n,d=0) {{ return Number.isFinite(n) ? '$' + n.toLocaleString(undefined,{{minimumFractionDigits:d,maximumFractionDigits:d}}) : '--'; }}
       function deriveConfluence(alerts) {{ const t=['5m','15m','1h'],m=Object.create(null); for (const a of (alerts||[])) if (a.symbol==='BTC' && t.includes(a.timeframe)) m[a.timeframe]=a; const p=t.map(tf=>m[tf]).filter(Boolean); if (p.length<3) return 'Partial'; const d=p.map(x=>String(x.direction||'NEUTRAL').toUpperCase()); return d.every(x=>x===d[0]&&x!=='NEUTRAL') ? d[0] + ' aligned' : 'Mixed'; }}
@@ -1362,7 +1364,8 @@ def generate_html():
         const codeEl=document.getElementById(prefix+'-codes');
         if(codeEl) codeEl.innerHTML=((c.reason_codes||[]).slice(0,5)).map(x=>"<span class='pill badge-neutral'>"+x+"</span>").join('');
       }}
-      function connectWS() {{ const p=(location.protocol==='https:'?'wss':'ws')+'://'+location.host+'/ws'; const ws=new WebSocket(p); ws.onopen=()=>{{els.badge.textContent='Live Feed: Online';els.badge.classList.remove('badge-stale');}}; ws.onmessage=(ev)=>{{ try {{ const data=JSON.parse(ev.data); const ob=data.orderbook||{{}}; state.livePrice=Number(ob.mid||0); state.spread=Number(ob.spread||0); updateLivePrice(); els.mid.textContent=fmtMoney(state.livePrice,2); els.spread.textContent=state.spread.toFixed(2); const po=data.portfolio||{{}}; els.balance.textContent=fmtMoney(Number(po.balance||0),2); const st=data.stats||{{}}; window._lastStats = st; window._lastBalance = Number(po.balance || 0); els.winrate.textContent=Number(st.win_rate||0).toFixed(2)+'%'; els.pf.textContent=Number(st.profit_factor||0).toFixed(2); if (els.kelly) els.kelly.textContent=(Number(st.kelly_pct||0)*100).toFixed(2)+'%';
+      let wsState=null,wsSeq=-1;function wsApply(msg,ws){{ if(msg&&msg.type==='snapshot'){{wsState=msg.data;wsSeq=msg.seq;return wsState;}} if(msg&&msg.type==='delta'){{ if(!wsState||msg.base!==wsSeq){{ws.send(JSON.stringify({{type:'resync'}}));return null;}} (msg.ops.del||[]).forEach(p=>{{let t=wsState;for(let i=0;i<p.length-1&&t;i++)t=t[p[i]];if(t)delete t[p[p.length-1]];}}); (msg.ops.set||[]).forEach(([p,v])=>{{let t=wsState;for(let i=0;i<p.length-1;i++){{if(typeof t[p[i]]!=='object'||t[p[i]]===null)t[p[i]]={{}};t=t[p[i]];}}t[p[p.length-1]]=v;}}); wsSeq=msg.seq;return wsState;}} return msg; }}
+      function connectWS() {{ const p=(location.protocol==='https:'?'wss':'ws')+'://'+location.host+'/ws'; const ws=new WebSocket(p); ws.onopen=()=>{{els.badge.textContent='Live Feed: Online';els.badge.classList.remove('badge-stale');}}; ws.onmessage=(ev)=>{{ try {{ const data=wsApply(JSON.parse(ev.data),ws); if(!data) return; const ob=data.orderbook||{{}}; state.livePrice=Number(ob.mid||0); state.spread=Number(ob.spread||0); updateLivePrice(); els.mid.textContent=fmtMoney(state.livePrice,2); els.spread.textContent=state.spread.toFixed(2); const po=data.portfolio||{{}}; els.balance.textContent=fmtMoney(Number(po.balance||0),2); const st=data.stats||{{}}; window._lastStats = st; window._lastBalance = Number(po.balance || 0); els.winrate.textContent=Number(st.win_rate||0).toFixed(2)+'%'; els.pf.textContent=Number(st.profit_factor||0).toFixed(2); if (els.kelly) els.kelly.textContent=(Number(st.kelly_pct||0)*100).toFixed(2)+'%';
 const pf=data.profit_preflight||{{}};
 updateCandidateCard('best-long', pf.best_long_candidate||null);
 updateCandidateCard('best-short', pf.best_short_candidate||null);
@@ -1731,7 +1734,104 @@ if (cpAction && cpMsg) {{
 </body>
 </html>
     """
-    OUTPUT_PATH.write_text(html, encoding="utf-8")
+    return html
+
+
+def get_panel_alerts():
+    """The alerts the panels read, oldest first: the latest BTC alert per
+    timeframe, the last 10 BTC alerts, the last 20 resolved ones and every
+    unresolved one. Answered from the alert store index instead of loading
+    the whole log."""
+    if not ALERTS_PATH.exists():
+        return []
+    store = open_store(ALERTS_PATH)
+    picked = {}
+    groups = [store.query(symbol="BTC", timeframe=tf, limit=1) for tf in TARGET_TFS]
+    groups += [store.query(symbol="BTC", limit=10), store.query(symbol="BTC", resolved=True, limit=20),
+               [a for a in store.unresolved() if a.get("symbol") == "BTC"]]
+    for group in groups:
+        for a in group:
+            picked[a.get("alert_id") or id(a)] = a
+    epoch = datetime.min.replace(tzinfo=timezone.utc)
+    return sorted(picked.values(), key=lambda a: parse_dt(a.get("timestamp")) or epoch)
+def _key(*parts):
+    return hashlib.sha1(json.dumps(parts, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+def _write_atomic(path: Path, text: str):
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp.write_text(text, encoding="utf-8")
+    os.replace(tmp, path)
+class DashboardRenderer:
+    """Builds dashboard.html in-process, keeping each panel's HTML between calls.
+
+    A panel is re-rendered only when the inputs it reads change; panels that
+    show ages (execution matrix, lifecycle, recent alerts, verdict, no-trade)
+    also when the minute changes. The page is reassembled from the cached
+    fragments and replaces dashboard.html atomically.
+    """
+    def __init__(self, output_path=None):
+        self.output_path = Path(output_path or OUTPUT_PATH)
+        self._fragments = {}  # panel -> (input key, html)
+        self.stats = {"renders": 0, "panels_rendered": 0, "panels_reused": 0}
+    def _panel(self, name, key, build):
+        cached = self._fragments.get(name)
+        if cached is not None and cached[0] == key:
+            self.stats["panels_reused"] += 1
+            return cached[1]
+        html = build()
+        self._fragments[name] = (key, html)
+        self.stats["panels_rendered"] += 1
+        return html
+    def render(self):
+        state = get_state()
+        portfolio = get_portfolio()
+        scorecard = get_scorecard()
+        alerts = get_panel_alerts()
+        aggregates = get_aggregates(portfolio)
+        p = portfolio or {}
+        minute = int(time.time() // 60)
+        alerts_key = _key(alerts)
+        portfolio_key = _key(portfolio is not None, p.get("balance"), p.get("max_drawdown"), p.get("peak_balance"),
+                             len(p.get("positions", [])), len(p.get("closed_trades", [])), p.get("equity_curve", [])[-1:])
+        trades_key = _key(portfolio is not None, aggregates.sources["trades"])
+        verdict_html, vctx = self._panel("verdict", (alerts_key, portfolio_key, minute),
+                                         lambda: render_verdict_center(alerts, portfolio))
+        html = render_page(
+            now=datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            balance=p.get("balance", 10000),
+            in_trade=bool(p.get("positions")),
+            vctx=vctx,
+            alerts_html=self._panel("cards", _key(state), lambda: render_state_cards(state)),
+            p_html=self._panel("portfolio", portfolio_key, lambda: render_portfolio_summary(portfolio)),
+            playbook_html=PLAYBOOK_HTML,
+            verdict_html=verdict_html,
+            execution_html=self._panel("execution", (alerts_key, portfolio_key, minute),
+                                       lambda: render_execution_matrix(alerts, p)),
+            edge_html=self._panel("edge", trades_key, lambda: render_edge_scoreboard(portfolio, aggregates)),
+            calibration_html=self._panel("calibration", trades_key,
+                                         lambda: render_calibration_panel(portfolio, aggregates)),
+            no_trade_html=self._panel("no_trade", (alerts_key, portfolio_key, minute),
+                                      lambda: render_no_trade_panel(alerts, portfolio)),
+            lifecycle_html=self._panel("lifecycle", (alerts_key, minute), lambda: render_lifecycle_panel(alerts)),
+            recent_alerts_html=self._panel("recent", (alerts_key, minute), lambda: render_recent_alerts(alerts)),
+            scorecard=scorecard,
+        )
+        self.output_path.parent.mkdir(parents=True, exist_ok=True)
+        _write_atomic(self.output_path, html)
+        self.stats["renders"] += 1
+        return html
+def generate_html():
+    DashboardRenderer().render()
     print(f"Dashboard generated: {OUTPUT_PATH}")
 if __name__ == "__main__":
-    generate_html()
+    if "--watch" in sys.argv[1:]:
+        # Stay resident and rebuild on alert and position events instead of
+        # being spawned by app.py every cycle
+        from core import event_bus
+        renderer = DashboardRenderer()
+        renderer.render()
+        event_bus.watch(lambda events: renderer.render(),
+                        topics=(event_bus.ALERT_SENT, event_bus.POSITION_OPENED,
+                                event_bus.POSITION_CLOSED, event_bus.OUTCOME_RESOLVED),
+                        role="dashboard_html", directory=BASE_DIR / "data" / "events.d")
+    else:
+        generate_html()
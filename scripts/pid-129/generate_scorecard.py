@@ -5,10 +5,11 @@ Generates a daily summary of alerts, performance, and insights.
 """
 
 import json
+import os
 import sys
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from collections import defaultdict
+from collections import deque
 
 # Paths
 SERVICE_DIR = Path(__file__).resolve().parent.parent.parent
@@ -17,169 +18,185 @@ if not (SERVICE_DIR / "logs").exists():
     SERVICE_DIR = Path.cwd()
 LOGS_DIR = SERVICE_DIR / "logs"
 ALERTS_FILE = LOGS_DIR / "pid-129-alerts.jsonl"
+
+if str(SERVICE_DIR) not in sys.path:
+    sys.path.insert(0, str(SERVICE_DIR))
+from core.alert_store import open_store
+from core.rollups import open_rollups
 AUDIT_FILE = LOGS_DIR / "audit.jsonl"
 REPORTS_DIR = SERVICE_DIR / "reports"
 OUTPUT_FILE = REPORTS_DIR / "pid-129-daily-scorecard.md"
+ROLLUPS_FILE = SERVICE_DIR / "data" / "rollups.json"
+
+ALERT_WINDOW_DAYS = 7  # Increase to 7 days for better stats
+AUDIT_WINDOW_HOURS = 24
+
+
+def _parse_ts(value):
+    return datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+
 
 def load_alerts(days=1):
     """Load alerts from JSONL file."""
-    alerts = []
     cutoff = datetime.now(timezone.utc) - timedelta(days=days)
 
     if not ALERTS_FILE.exists():
-        return alerts
+        return []
 
-    with open(ALERTS_FILE, 'r') as f:
-        for line in f:
-            if line.strip():
-                try:
-                    alert = json.loads(line)
-                    # Parse timestamp if present
-                    if 'timestamp' in alert:
-                        alert['parsed_time'] = datetime.fromisoformat(alert['timestamp'].replace('Z', '+00:00'))
-                    else:
-                        alert['parsed_time'] = datetime.now(timezone.utc)
-
-                    if alert['parsed_time'] >= cutoff:
-                        alerts.append(alert)
-                except (json.JSONDecodeError, ValueError) as e:
-                    print(f"Warning: Failed to parse alert: {e}", file=sys.stderr)
+    # The store's time index skips everything older than the cutoff unread
+    alerts = open_store(ALERTS_FILE).query(since=cutoff)
+    for alert in alerts:
+        alert['parsed_time'] = _parse_ts(alert['timestamp'])
 
     # Sort by time
-    alerts.sort(key=lambda x: x.get('parsed_time', datetime.now(timezone.utc)))
+    alerts.sort(key=lambda x: x['parsed_time'])
     return alerts
 
-def load_audit(hours=24):
-    """Load audit heartbeats."""
-    audit = []
-    cutoff = datetime.now(timezone.utc) - timedelta(hours=hours)
-    if not AUDIT_FILE.exists():
-        return audit
-    with open(AUDIT_FILE, 'r') as f:
-        for line in f:
+
+class Scorecard:
+    """
+    Rolling-window scorecard kept in memory between cycles.
+
+    Alert counters for the last ALERT_WINDOW_DAYS are summed from the
+    hourly/daily rollup buckets (core.rollups), which only take in what the
+    alert store gained since the last sync; the recent-alerts table is a
+    limited index query. Audit heartbeats (last AUDIT_WINDOW_HOURS) are
+    tailed from the audit log by byte offset. refresh() therefore costs the
+    new records and the bucket count, not the history.
+    """
+
+    def __init__(self, alerts_file=None, audit_file=None, output_file=None, rollups_file=None):
+        self.alerts_file = Path(alerts_file or ALERTS_FILE)
+        self.audit_file = Path(audit_file or AUDIT_FILE)
+        self.output_file = Path(output_file or OUTPUT_FILE)
+        self.rollups = open_rollups(rollups_file or ROLLUPS_FILE)
+        self.audit = deque()  # (timestamp, score)
+        self._audit_offset = 0
+        self._written = None  # last report body written, without the timestamp line
+        self.window = None  # rollup window of the last refresh
+        self.recent = []
+
+    def _refresh_alerts(self, now):
+        cutoff = now - timedelta(days=ALERT_WINDOW_DAYS)
+        if self.alerts_file.exists():
+            store = open_store(self.alerts_file)
+            self.rollups.sync(store)
+            self.recent = store.query(since=cutoff, limit=10)
+        self.window = self.rollups.window(cutoff.timestamp())
+
+    def _refresh_audit(self, now):
+        cutoff = now - timedelta(hours=AUDIT_WINDOW_HOURS)
+        if not self.audit_file.exists():
+            return
+        if self.audit_file.stat().st_size < self._audit_offset:
+            self.audit.clear()  # rotated
+            self._audit_offset = 0
+        with open(self.audit_file, 'rb') as f:
+            f.seek(self._audit_offset)
+            data = f.read()
+        end = data.rfind(b'\n') + 1
+        self._audit_offset += end
+        for line in data[:end].splitlines():
             if line.strip():
                 try:
                     entry = json.loads(line)
-                    ts = datetime.fromisoformat(entry['timestamp'].replace('Z', '+00:00'))
+                    ts = _parse_ts(entry['timestamp'])
                     if ts >= cutoff:
-                        audit.append(entry)
+                        self.audit.append((ts, entry['score']))
                 except:
                     continue
-    return audit
-
-def generate_scorecard():
-    """Generate daily scorecard report."""
-    alerts = load_alerts(days=7) # Increase to 7 days for better stats
-    today = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S UTC")
-
-    # Initialize counters
-    stats = {
-        'total_alerts': len(alerts),
-        'long_alerts': 0,
-        'short_alerts': 0,
-        'resolved_trades': 0,
-        'wins': 0,
-        'losses': 0,
-        'timeouts': 0,
-        'total_r': 0.0,
-        'high_confidence': 0,
-    }
-
-    strategies = defaultdict(int)
-    resolved_outcomes = defaultdict(int)
-
-    for alert in alerts:
-        # Count by direction
-        direction = alert.get('direction', 'NEUTRAL')
-        if direction == 'LONG':
-            stats['long_alerts'] += 1
-        elif direction == 'SHORT':
-            stats['short_alerts'] += 1
-
-        # Count confidence
-        confidence = alert.get('confidence', 0)
-        if confidence >= 70:
-            stats['high_confidence'] += 1
-
-        # Count strategies
-        strategy = alert.get('strategy', 'UNKNOWN')
-        strategies[strategy] += 1
-
-        # Outcome tracking
-        if alert.get('resolved'):
-            stats['resolved_trades'] += 1
-            outcome = alert.get('outcome')
-            resolved_outcomes[outcome] += 1
-            if outcome and 'WIN' in outcome:
-                stats['wins'] += 1
-            elif outcome == 'LOSS':
-                stats['losses'] += 1
-            elif outcome == 'TIMEOUT':
-                stats['timeouts'] += 1
-            
-            stats['total_r'] += alert.get('r_multiple', 0.0)
-
-    # Calculate metrics
-    win_rate = (stats['wins'] / stats['resolved_trades'] * 100) if stats['resolved_trades'] > 0 else 0.0
-    avg_r = (stats['total_r'] / stats['resolved_trades']) if stats['resolved_trades'] > 0 else 0.0
-
-    # Generate report
-    report = f"""# PID-129 BTC Alerts Performance Scorecard
+        while self.audit and self.audit[0][0] < cutoff:
+            self.audit.popleft()
+
+    def refresh(self, now=None):
+        now = now or datetime.now(timezone.utc)
+        self._refresh_alerts(now)
+        self._refresh_audit(now)
+
+    def report(self, now=None):
+        """Generate daily scorecard report."""
+        now = now or datetime.now(timezone.utc)
+        self.refresh(now)
+        return self._render(now.strftime("%Y-%m-%d %H:%M:%S UTC"))
+
+    def _render(self, today):
+        totals = self.window.totals
+        directions = self.window.by('direction')
+        resolved = totals['resolved']
+
+        # Calculate metrics
+        win_rate = (totals['wins'] / resolved * 100) if resolved > 0 else 0.0
+        total_r = round(totals['total_r'], 6) + 0.0  # no "-0.00R" from float residue
+        avg_r = (total_r / resolved) if resolved > 0 else 0.0
+        resolved_outcomes = {k: v['resolved'] for k, v in self.window.by('outcome').items()}
+
+        # Generate report
+        report = f"""# PID-129 BTC Alerts Performance Scorecard
 
 **Generated:** {today}
 
 ## Signal Summary (Last 7 Days)
 
-- **Total Alerts:** {stats['total_alerts']}
-- **Directional Split:** {stats['long_alerts']} LONG / {stats['short_alerts']} SHORT
-- **High Confidence (>=70):** {stats['high_confidence']}
+- **Total Alerts:** {totals['alerts']}
+- **Directional Split:** {directions.get('LONG', {}).get('alerts', 0)} LONG / {directions.get('SHORT', {}).get('alerts', 0)} SHORT
+- **High Confidence (>=70):** {totals['high_conf']}
 
 ## Trading Performance (Paper)
 
-- **Resolved Trades:** {stats['resolved_trades']}
+- **Resolved Trades:** {resolved}
 - **Win Rate:** {win_rate:.1f}%
-- **Total P&L (R):** {stats['total_r']:.2f}R
+- **Total P&L (R):** {total_r:.2f}R
 - **Average R per Trade:** {avg_r:.2f}R
-- **Outcomes:** {dict(resolved_outcomes)}
+- **Outcomes:** {resolved_outcomes}
 
 ## Strategy Breakdown
 
 """
-    for strategy, count in sorted(strategies.items(), key=lambda x: x[1], reverse=True):
-        report += f"- **{strategy}**: {count} alerts\n"
-
-    report += "\n## Recent Alerts (Last 10)\n\n"
-    report += "| Time | Direction | Strategy | Confidence | Outcome |\n"
-    report += "|:---|:---|:---|:---|:---|\n"
-    for alert in alerts[-10:]:
-        ts = alert.get('timestamp', 'N/A')[:16].replace('T', ' ')
-        outcome = alert.get('outcome') or 'PENDING'
-        report += f"| {ts} | {alert.get('direction')} | {alert.get('strategy')} | {alert.get('confidence')} | {outcome} |\n"
-
-    report += "\n## System Health (Audit Log - Last 24h)\n\n"
-    audits = load_audit(24)
-    if audits:
-        count = len(audits)
-        best_score = max([a['score'] for a in audits]) if audits else 0
-        report += f"- **Cycles Completed:** {count}\n"
-        report += f"- **Peak Confidence Seen:** {best_score}\n"
-        report += f"- **Status:** Bot Active & Scanning\n"
-    else:
-        report += "- **Status:** No monitoring activity recorded in last 24h.\n"
+        strategies = {k: v['alerts'] for k, v in self.window.by('strategy').items() if v['alerts']}
+        for strategy, count in sorted(strategies.items(), key=lambda x: x[1], reverse=True):
+            report += f"- **{strategy}**: {count} alerts\n"
+
+        report += "\n## Recent Alerts (Last 10)\n\n"
+        report += "| Time | Direction | Strategy | Confidence | Outcome |\n"
+        report += "|:---|:---|:---|:---|:---|\n"
+        for alert in self.recent:
+            ts = alert.get('timestamp', 'N/A')[:16].replace('T', ' ')
+            outcome = alert.get('outcome') or 'PENDING'
+            report += f"| {ts} | {alert.get('direction')} | {alert.get('strategy')} | {alert.get('confidence')} | {outcome} |\n"
+
+        report += "\n## System Health (Audit Log - Last 24h)\n\n"
+        if self.audit:
+            count = len(self.audit)
+            best_score = max(score for _, score in self.audit)
+            report += f"- **Cycles Completed:** {count}\n"
+            report += f"- **Peak Confidence Seen:** {best_score}\n"
+            report += f"- **Status:** Bot Active & Scanning\n"
+        else:
+            report += "- **Status:** No monitoring activity recorded in last 24h.\n"
+
+        return report
+
+    def write(self, now=None):
+        """Refresh and rewrite the scorecard file if its content changed; returns the report."""
+        report = self.report(now)
+        body = report.split('\n', 3)[3]  # everything after the Generated line
+        if body != self._written or not self.output_file.exists():
+            self.output_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.output_file.with_name(self.output_file.name + '.tmp')
+            tmp.write_text(report, encoding='utf-8')
+            os.replace(tmp, self.output_file)
+            self._written = body
+        return report
 
-    return report
 
-def main():
-    """Main entry point."""
-    # Create reports directory if it doesn't exist
-    REPORTS_DIR.mkdir(parents=True, exist_ok=True)
+def generate_scorecard():
+    """Generate daily scorecard report."""
+    return Scorecard().report()
 
-    # Generate report
-    report = generate_scorecard()
 
-    # Write to file
-    with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
-        f.write(report)
+def main(scorecard=None):
+    """Main entry point."""
+    report = (scorecard or Scorecard()).write()
 
     print(f"Scorecard generated: {OUTPUT_FILE}")
     print(f"Total signals: {len(load_alerts())}")
@@ -191,4 +208,14 @@ def main():
         print("Report contains characters terminal cannot display. See markdown file.")
 
 if __name__ == "__main__":
-    main()
+    if "--watch" in sys.argv[1:]:
+        # Stay resident and regenerate when the engine finishes a cycle or
+        # resolves an outcome; app.py skips its own run while this is up.
+        from core import event_bus
+        print(f"Watching for cycle events; regenerating {OUTPUT_FILE}")
+        scorecard = Scorecard()
+        main(scorecard)
+        event_bus.watch(lambda events: main(scorecard), topics=(event_bus.CYCLE_COMPLETED, event_bus.OUTCOME_RESOLVED),
+                        role="scorecard", directory=SERVICE_DIR / "data" / "events.d")
+    else:
+        main()
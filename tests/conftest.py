@@ -1,6 +1,31 @@
+import math
+import random
 import sys
 from pathlib import Path
 
+import pytest
+
 ROOT = Path(__file__).resolve().parents[1]
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
+
+from utils import Candle
+
+
+def _random_walk(n=300, seed=11):
+    rng = random.Random(seed)
+    px = 60000.0
+    out = []
+    for i in range(n):
+        o = px
+        px *= math.exp(rng.gauss(0, 0.002))
+        h = max(o, px) * (1 + abs(rng.gauss(0, 0.001)))
+        l = min(o, px) * (1 - abs(rng.gauss(0, 0.001)))
+        out.append(Candle(str(1_700_000_000 + 300 * i), o, h, l, px, rng.uniform(10, 100)))
+    return out
+
+
+@pytest.fixture
+def random_walk():
+    """Seeded 5m random-walk candle generator: random_walk(n, seed)."""
+    return _random_walk
@@ -0,0 +1,73 @@
+from datetime import datetime, timedelta, timezone
+
+from core.aggregates import OutcomeAggregates
+from core.alert_store import AlertStore
+
+T0 = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def _alert(i, **kw):
+    alert = {
+        "alert_id": f"a{i}", "timestamp": (T0 + timedelta(hours=i)).isoformat(),
+        "symbol": "BTC", "timeframe": "5m", "strategy": "TREND", "direction": "LONG",
+        "regime": "TREND", "session": "LONDON", "resolved": False,
+        "decision_trace": {"codes": ["SQUEEZE_FIRE", "REGIME_TREND", "BOS_RECIPE"], "rubric": {"score": 4}},
+    }
+    alert.update(kw)
+    return alert
+
+
+def _resolve(store, i, r):
+    store.patch(f"a{i}", {"resolved": True, "outcome": "WIN_TP1" if r > 0 else "LOSS", "r_multiple": r})
+
+
+def test_outcomes_are_booked_once_and_survive_a_restart(tmp_path):
+    store = AlertStore(tmp_path / "alerts.jsonl", writable=True)
+    store.append_many([_alert(i) for i in range(6)])
+    agg = OutcomeAggregates(tmp_path / "agg.json")
+    assert agg.sync(store)  # watermark moved, nothing booked yet
+    assert agg.code_edge() == {}
+
+    for i, r in enumerate([1.5, -1.0, 2.0, -1.0, 1.0]):
+        _resolve(store, i, r)
+    agg.sync(store)
+    edge = agg.code_edge()
+    assert edge == {"SQUEEZE_FIRE": {"wins": 3, "losses": 2, "total": 5, "wr": 0.6},
+                    "BOS_RECIPE": {"wins": 3, "losses": 2, "total": 5, "wr": 0.6}}
+    assert agg.rubric_stats() == {"4": {"count": 5, "wr": 0.6, "avg_r": 0.5}}
+    assert agg.hour_stats()["1"] == {"count": 1, "wr": 0.0, "avg_r": -1.0}
+
+    # A fresh process resumes from the file instead of re-reading the log
+    again = OutcomeAggregates(tmp_path / "agg.json")
+    assert again.code_edge() == edge
+    assert not again.sync(store)
+
+    # Re-patching a booked alert, and a junk alert, change nothing
+    _resolve(store, 0, 1.5)
+    store.append(_alert(9, strategy="SYNTHETIC", resolved=True, outcome="LOSS", r_multiple=-1.0))
+    again.sync(store)
+    assert again.code_edge() == edge
+
+
+def test_trades_ledger_tracks_segments_streaks_and_resets(tmp_path):
+    store = AlertStore(tmp_path / "alerts.jsonl", writable=True)
+    store.append_many([_alert(i) for i in range(4)])
+    trades = [
+        {"alert_id": f"a{i}", "exit_at": str(i), "timeframe": "1h", "regime": "Trend", "session": "london",
+         "direction": "LONG", "confidence": 70, "outcome": outcome, "r_multiple": r}
+        for i, (outcome, r) in enumerate([("WIN", 2.0), ("LOSS", -1.0), ("TIMEOUT", -0.5), ("WIN", 1.0)])
+    ]
+    agg = OutcomeAggregates(tmp_path / "agg.json")
+    agg.sync(store, trades[:3])
+    agg.sync(store, trades)
+
+    tf = agg.breakdown("trades", "timeframe")["1h"]
+    assert (tf["count"], tf["hits"], tf["median_r"], tf["max_loss_streak"]) == (4, 2, 0.25, 2)
+    assert list(agg.breakdown("trades", "segment")) == ["1h|trend|london"]
+    assert agg.breakdown("trades", "confidence")["61-80"]["count"] == 4
+    assert set(agg.breakdown("trades", "recipe")) == {"BOS"}
+    assert agg.total("trades")["streak"] == 1
+
+    # A reset portfolio rebuilds the ledger rather than adding to it
+    agg.sync(store, trades[3:])
+    assert agg.total("trades")["count"] == 1
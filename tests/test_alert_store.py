@@ -0,0 +1,128 @@
+import json
+from datetime import datetime, timedelta, timezone
+
+from core import alert_store
+from core.alert_store import AlertStore, AlertTail
+
+T0 = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def _alert(i, **kw):
+    alert = {
+        "alert_id": f"a{i}", "timestamp": (T0 + timedelta(minutes=5 * i)).isoformat(),
+        "symbol": "BTC", "timeframe": "5m", "strategy": "TREND", "resolved": False,
+    }
+    alert.update(kw)
+    return alert
+
+
+def test_index_is_reused_and_only_the_tail_is_parsed(tmp_path):
+    path = tmp_path / "alerts.jsonl"
+    writer = AlertStore(path, writable=True)
+    for i in range(5):
+        writer.append(_alert(i))
+    assert len((tmp_path / "alerts.idx").read_text().splitlines()) == 5
+
+    # Appended by another process, not yet indexed
+    with open(path, "a") as f:
+        f.write(json.dumps(_alert(5)) + "\n")
+        f.write(json.dumps(_alert(6))[:20])  # partial line still being written
+
+    reader = AlertStore(path)
+    assert reader._index_rows == 5
+    assert [a["alert_id"] for a in reader.query()] == [f"a{i}" for i in range(6)]
+
+    with open(path, "a") as f:
+        f.write(json.dumps(_alert(6))[20:] + "\n")
+    assert reader.query(limit=2)[-1]["alert_id"] == "a6"
+
+
+def test_patches_overlay_records_without_rewriting_the_log(tmp_path):
+    path = tmp_path / "alerts.jsonl"
+    store = AlertStore(path, writable=True)
+    for i in range(3):
+        store.append(_alert(i))
+    before = path.read_bytes()
+
+    store.patch("a1", {"resolved": True, "outcome": "WIN_TP1", "r_multiple": 2.0})
+    assert path.read_bytes() == before
+    assert store.get("a1")["outcome"] == "WIN_TP1"
+    assert [a["alert_id"] for a in store.unresolved()] == ["a0", "a2"]
+
+    fresh = AlertStore(path)
+    assert [a["alert_id"] for a in fresh.query(resolved=True)] == ["a1"]
+    assert fresh.query(resolved=True)[0]["r_multiple"] == 2.0
+
+
+def test_query_filters(tmp_path):
+    path = tmp_path / "alerts.jsonl"
+    store = AlertStore(path, writable=True)
+    for i in range(10):
+        store.append(_alert(i, timeframe="5m" if i % 2 else "1h", strategy=None if i == 9 else "TREND"))
+
+    recent = store.query(since=T0 + timedelta(minutes=30))
+    assert [a["alert_id"] for a in recent] == [f"a{i}" for i in range(6, 10)]
+    assert [a["alert_id"] for a in store.query(timeframe="1h", limit=2)] == ["a6", "a8"]
+    with_strategy = store.query(where=lambda a: a.get("strategy") is not None, limit=3)
+    assert [a["alert_id"] for a in with_strategy] == ["a6", "a7", "a8"]
+
+
+def test_rewritten_log_is_reindexed(tmp_path):
+    path = tmp_path / "alerts.jsonl"
+    store = AlertStore(path, writable=True)
+    for i in range(4):
+        store.append(_alert(i))
+    assert len(store) == 4
+
+    path.write_text("".join(json.dumps(_alert(i, symbol="ETH")) + "\n" for i in (7, 8, 9, 10)))
+    assert [a["alert_id"] for a in store.query(symbol="ETH")] == ["a7", "a8", "a9", "a10"]
+    assert len((tmp_path / "alerts.idx").read_text().splitlines()) == 4
+    assert [a["alert_id"] for a in AlertStore(path).query()] == ["a7", "a8", "a9", "a10"]
+
+
+def test_tail_matches_full_scan_across_block_boundaries(tmp_path, monkeypatch):
+    monkeypatch.setattr(alert_store, "TAIL_BLOCK", 97)
+    path = tmp_path / "alerts.jsonl"
+    alerts = [_alert(i, strategy=None if i % 3 == 0 else "TREND", note="x" * (i % 7) * 40) for i in range(40)]
+    path.write_text("".join(json.dumps(a) + "\n" for a in alerts) + json.dumps(_alert(40))[:15])
+
+    def want(n):
+        return [a for a in alerts if a["strategy"] is not None][-n:]
+
+    tail = AlertTail(path, 5, where=lambda a: a.get("strategy") is not None)
+    assert tail.records() == want(5)
+    assert AlertTail(path, 100, where=lambda a: a.get("strategy") is not None).records() == want(100)
+
+    # Finish the partial line, append more, resolve one through the patch log
+    with open(path, "a") as f:
+        f.write(json.dumps(_alert(40))[15:] + "\n")
+        f.write(json.dumps(_alert(41)) + "\n")
+    AlertStore(path).patch("a41", {"resolved": True, "outcome": "LOSS"})
+    got = tail.records()
+    assert [a["alert_id"] for a in got] == ["a35", "a37", "a38", "a40", "a41"]
+    assert got[-1]["outcome"] == "LOSS"
+
+
+def test_tail_refills_after_rotation(tmp_path):
+    path = tmp_path / "alerts.jsonl"
+    path.write_text("".join(json.dumps(_alert(i)) + "\n" for i in range(10)))
+    tail = AlertTail(path, 3)
+    assert [a["alert_id"] for a in tail.records()] == ["a7", "a8", "a9"]
+
+    path.rename(tmp_path / "alerts.jsonl.1")
+    path.write_text(json.dumps(_alert(20)) + "\n")
+    assert [a["alert_id"] for a in tail.records()] == ["a20"]
+
+    path.write_text("")
+    assert tail.records() == []
+
+
+def test_audit_log_does_not_get_alert_store_sidecars(tmp_path, monkeypatch):
+    from core import infrastructure
+    from core.async_writer import BackgroundWriter
+    writer = BackgroundWriter()
+    monkeypatch.setattr(infrastructure, "get_writer", lambda: writer)
+    infrastructure.AuditLogger(str(tmp_path / "audit.jsonl")).log_cycle("BTC", "5m", 50.0, "SKIP")
+    writer.flush()
+    writer.close()
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["audit.jsonl"]
@@ -0,0 +1,67 @@
+import json
+import threading
+
+from core.async_writer import BackgroundWriter, JsonlSink
+from core.infrastructure import AuditLogger
+
+
+def test_records_are_batched_per_sink(tmp_path):
+    calls = []
+    writer = BackgroundWriter(batch_size=1000, flush_interval=60)
+    for i in range(10):
+        writer.write(calls.append, i)
+    writer.write(JsonlSink(tmp_path / "a.jsonl"), {"n": 1})
+    writer.write(JsonlSink(tmp_path / "a.jsonl"), {"n": 2})
+    assert writer.flush()
+
+    assert calls == [list(range(10))]
+    assert [json.loads(line)["n"] for line in (tmp_path / "a.jsonl").read_text().splitlines()] == [1, 2]
+    stats = writer.stats()
+    assert stats["written"] == 12 and stats["batches"] == 1 and stats["dropped"] == 0
+    writer.close()
+
+
+def test_full_queue_drops_instead_of_blocking():
+    release = threading.Event()
+    started = threading.Event()
+
+    def slow_sink(records):
+        started.set()
+        release.wait(5)
+
+    writer = BackgroundWriter(maxsize=3, batch_size=1)
+    writer.write(slow_sink, 0)
+    started.wait(5)  # the worker is now stuck in the sink
+    accepted = [writer.write(slow_sink, i) for i in range(1, 10)]
+    assert accepted.count(True) == 3
+    assert writer.stats()["dropped"] == 6
+
+    release.set()
+    assert writer.flush()
+    assert writer.stats()["written"] == 4
+    writer.close()
+
+
+def test_failing_sink_is_counted_and_close_flushes(tmp_path):
+    def broken(records):
+        raise OSError("disk full")
+
+    writer = BackgroundWriter(batch_size=1000, flush_interval=60)
+    writer.write(broken, 1)
+    writer.write(JsonlSink(tmp_path / "b.jsonl"), {"n": 1})
+    writer.close()
+    assert writer.stats()["failed"] == 1
+    assert (tmp_path / "b.jsonl").read_text().count("\n") == 1
+
+
+def test_audit_logger_goes_through_the_writer(tmp_path, monkeypatch):
+    from core import infrastructure
+    writer = BackgroundWriter()
+    monkeypatch.setattr(infrastructure, "get_writer", lambda: writer)
+    audit = AuditLogger(str(tmp_path / "audit.jsonl"))
+    for tf in ("5m", "15m", "1h"):
+        audit.log_cycle("BTC", tf, 50.0, "SKIP")
+    writer.flush()
+    rows = [json.loads(line) for line in (tmp_path / "audit.jsonl").read_text().splitlines()]
+    assert [r["timeframe"] for r in rows] == ["5m", "15m", "1h"]
+    writer.close()
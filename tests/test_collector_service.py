@@ -0,0 +1,75 @@
+import threading
+import time
+
+import httpx
+import pytest
+
+from collectors import service
+from collectors.base import BudgetManager
+from collectors.price import PriceSnapshot
+from collectors.social import FearGreedSnapshot
+
+
+@pytest.fixture
+def daemon(monkeypatch, tmp_path):
+    calls = []
+
+    def fake_price(budget):
+        calls.append(budget)
+        time.sleep(0.05)
+        return PriceSnapshot(65000.0 + len(calls), time.time(), source="kraken")
+
+    monkeypatch.setitem(service.SOURCES, "price", (fake_price, service.SOURCES["price"][1]))
+    budget = BudgetManager(str(tmp_path / "budget.json"))
+    svc = service.CollectorService(budget, min_refresh_seconds={"price": 60})
+    server = service.serve("127.0.0.1", 0, svc)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    client = httpx.Client(base_url=f"http://127.0.0.1:{server.server_address[1]}")
+    monkeypatch.setattr(service, "_client", client)
+    yield server, calls, budget
+    server.shutdown()
+    server.server_close()
+    client.close()
+
+
+def test_consumers_share_one_upstream_fetch(daemon):
+    server, calls, budget = daemon
+    results = []
+    readers = [threading.Thread(target=lambda: results.append(service.collect("price", "engine-budget")))
+               for _ in range(5)]
+    for t in readers:
+        t.start()
+    for t in readers:
+        t.join()
+
+    assert calls == [budget]  # one fetch, with the daemon's own budget
+    assert {r.price for r in results} == {65001.0} and all(isinstance(r, PriceSnapshot) for r in results)
+    snap, age = service.read("price", max_age=0)  # max_age is floored at min_refresh
+    assert len(calls) == 1 and 0 <= age < 60
+
+    health = httpx.get(f"http://127.0.0.1:{server.server_address[1]}/health").json()
+    assert set(health["sources"]) == {"price"}
+
+
+def test_without_a_daemon_consumers_collect_in_process(daemon):
+    server, calls, _ = daemon
+    server.shutdown()
+    server.server_close()
+
+    assert service.collect("price", "engine-budget").price == 65001.0
+    assert calls == ["engine-budget"]
+    with pytest.raises(service.ServiceUnavailable):
+        service.collect("price", None, local=False)
+
+
+def test_failed_results_are_retried_sooner_than_the_refresh_interval(daemon, monkeypatch):
+    _, calls, budget = daemon
+    svc = service.CollectorService(budget, min_refresh_seconds={"fear_greed": 600})
+    monkeypatch.setitem(service.SOURCES, "fear_greed",
+                        (lambda b: calls.append(b) or FearGreedSnapshot(50, "Neutral", False), service.SOURCES["fear_greed"][1]))
+    assert svc.snapshot("fear_greed")["ok"] is False
+    svc.snapshot("fear_greed")
+    assert len(calls) == 1
+    monkeypatch.setattr(service, "RETRY_SECONDS", 0.0)
+    svc.snapshot("fear_greed")
+    assert len(calls) == 2
@@ -0,0 +1,71 @@
+import time
+
+import httpx
+import pytest
+
+from collectors import base
+from collectors.base import DeadlineExceeded, SnapshotCache, cycle_deadline, request_json
+from collectors.derivatives import DerivativesSnapshot
+from collectors.flows import FlowSnapshot
+from collectors.price import PriceSnapshot
+from collectors.social import FearGreedSnapshot
+from engine import compute_score
+from utils import Candle
+
+
+def _unavailable(url, params=None, headers=None, timeout=None):
+    request = httpx.Request("GET", url)
+    return httpx.Response(503, headers={"Retry-After": "30"}, request=request)
+
+
+def test_requests_give_up_at_the_deadline_instead_of_backing_off(monkeypatch):
+    timeouts = []
+
+    def fake_get(url, params=None, headers=None, timeout=None):
+        timeouts.append(timeout)
+        return _unavailable(url)
+
+    monkeypatch.setattr(base.httpx, "get", fake_get)
+    started = time.monotonic()
+    with cycle_deadline(2.0):
+        with pytest.raises(DeadlineExceeded):
+            request_json("https://api.bybit.com/v5/market/tickers", timeout=10.0)
+    assert time.monotonic() - started < 1.0  # Retry-After 30s is never slept
+    assert len(timeouts) == 1 and timeouts[0] <= 2.0
+    assert base.time_left() is None
+
+    with cycle_deadline(0.0):
+        with pytest.raises(DeadlineExceeded):
+            request_json("https://api.bybit.com/v5/market/tickers")
+    assert len(timeouts) == 1  # nothing is sent once the deadline has passed
+
+
+def test_cached_inputs_are_served_with_their_age_and_tagged_degraded():
+    cache = SnapshotCache()
+    assert cache.get("derivatives", 60) is None
+    cache.put("derivatives", DerivativesSnapshot(0.01, 1.0, 0.1, source="bybit"))
+    value, age = cache.get("derivatives", 60)
+    assert value.source == "bybit" and 0 <= age < 1
+    assert cache.get("derivatives", -1) is None  # older than allowed
+
+    candles = [Candle(ts=i, open=50000, high=50010, low=49990, close=50000, volume=100) for i in range(50)]
+    alert = compute_score(
+        "BTC", "5m", PriceSnapshot(50000.0, 0, source="test"), candles, [], [],
+        FearGreedSnapshot(50, "Neutral", True), [], value, FlowSnapshot(1.0, 1.0, 0.0),
+        {}, cached_inputs={"derivatives": 95.4, "news": 610.0},
+    )
+    assert alert.decision_trace["degraded"][:2] == ["cached:derivatives:95s", "cached:news:610s"]
+
+
+def test_candle_fallback_fills_only_the_missing_timeframe(monkeypatch):
+    import app
+    monkeypatch.setattr(app, "_LAST_GOOD", SnapshotCache())
+    old = {tf: [Candle(ts=1, open=1, high=1, low=1, close=1, volume=1)] for tf in ("5m", "15m", "1h", "4h")}
+    app._settle_candles(old, {})
+
+    fresh = [Candle(ts=2, open=2, high=2, low=2, close=2, volume=2)]
+    cached_inputs = {}
+    settled = app._settle_candles({"5m": fresh, "15m": [], "1h": fresh, "4h": fresh}, cached_inputs)
+    assert settled["5m"] is fresh and settled["1h"] is fresh and settled["4h"] is fresh
+    assert settled["15m"] == old["15m"]
+    assert list(cached_inputs) == ["candles:15m"]
@@ -0,0 +1,54 @@
+import json
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+scripts_dir = Path(__file__).parent.parent / "scripts" / "pid-129"
+sys.path.append(str(scripts_dir))
+
+import generate_dashboard as gd
+
+
+def _setup(tmp_path, monkeypatch):
+    for name, rel in (("STATE_PATH", ".mvp_alert_state.json"), ("PORTFOLIO_PATH", "data/paper_portfolio.json"),
+                      ("SCORECARD_PATH", "reports/scorecard.md"), ("ALERTS_PATH", "logs/alerts.jsonl"),
+                      ("OUTPUT_PATH", "dashboard.html"), ("AGGREGATES_PATH", "data/aggregates.json")):
+        monkeypatch.setattr(gd, name, tmp_path / rel)
+    (tmp_path / "logs").mkdir()
+    (tmp_path / "data").mkdir()
+    now = datetime.now(timezone.utc).isoformat()
+    with open(tmp_path / "logs/alerts.jsonl", "w") as f:
+        for i, tf in enumerate(("5m", "15m", "1h")):
+            f.write(json.dumps({"alert_id": f"a{i}", "timestamp": now, "symbol": "BTC", "timeframe": tf,
+                                "strategy": "TREND", "direction": "LONG", "confidence": 70}) + "\n")
+
+
+def _write_portfolio(tmp_path, trades):
+    (tmp_path / "data/paper_portfolio.json").write_text(json.dumps({
+        "balance": 10000, "positions": [], "closed_trades": trades, "max_drawdown": 0.0,
+        "equity_curve": [{"timestamp": "t0", "balance": 10000}],
+    }))
+
+
+def test_renderer_reuses_panels_until_their_inputs_change(tmp_path, monkeypatch):
+    _setup(tmp_path, monkeypatch)
+    _write_portfolio(tmp_path, [])
+    renderer = gd.DashboardRenderer()
+    monkeypatch.setattr(gd.time, "time", lambda: 1_000_000.0)  # hold the minute still
+
+    html = renderer.render()
+    assert (tmp_path / "dashboard.html").read_text(encoding="utf-8") == html
+    assert "Timeframe Edge Scoreboard" in html
+    first = renderer.stats["panels_rendered"]
+
+    renderer.render()
+    assert renderer.stats["panels_rendered"] == first
+    assert renderer.stats["panels_reused"] == first
+
+    # A closed trade re-renders the panels that read trades, not the alert panels
+    _write_portfolio(tmp_path, [{"alert_id": "a0", "exit_at": "t1", "timeframe": "1h", "outcome": "WIN",
+                                 "r_multiple": 1.5, "confidence": 70}])
+    html = renderer.render()
+    assert "<td>1h</td><td>1</td><td>100.0%</td>" in html
+    assert renderer.stats["panels_rendered"] == first + 6  # portfolio, edge, calibration, verdict, execution, no-trade
+    assert not list(tmp_path.glob("*.tmp"))
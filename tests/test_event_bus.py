@@ -0,0 +1,70 @@
+import threading
+import time
+
+from core import event_bus
+from core.event_bus import Subscriber
+from core.portfolio_journal import PortfolioJournal
+from tools.paper_trader import Portfolio
+
+
+def test_events_fan_out_to_every_subscriber(tmp_path):
+    folder = tmp_path / "events.d"
+    assert event_bus.publish(event_bus.ALERT_SENT, {"alert_id": "a0"}, directory=folder) == 0
+
+    everything = Subscriber(directory=folder)
+    alerts_only = Subscriber([event_bus.ALERT_SENT], directory=folder)
+    assert event_bus.publish(event_bus.CYCLE_COMPLETED, {"alerts_sent": 1}, directory=folder) == 2
+    assert event_bus.publish(event_bus.ALERT_SENT, {"alert_id": "a1"}, directory=folder) == 2
+
+    assert [e["topic"] for e in everything.poll(1.0)] == [event_bus.CYCLE_COMPLETED, event_bus.ALERT_SENT]
+    assert [e["data"]["alert_id"] for e in alerts_only.poll(1.0)] == ["a1"]
+    assert everything.poll(0) == []
+    everything.close()
+    alerts_only.close()
+    assert list(folder.glob("*.sock")) == []
+
+
+def test_poll_wakes_within_milliseconds(tmp_path):
+    folder = tmp_path / "events.d"
+    sub = Subscriber(directory=folder)
+    threading.Timer(0.1, event_bus.publish, args=(event_bus.OUTCOME_RESOLVED, {"alert_id": "x"}),
+                    kwargs={"directory": folder}).start()
+    start = time.monotonic()
+    events = sub.poll(5.0)
+    assert events and events[0]["topic"] == event_bus.OUTCOME_RESOLVED
+    assert time.monotonic() - start < 1.0
+    sub.close()
+
+
+def test_dead_subscribers_are_pruned_and_roles_are_separate(tmp_path):
+    folder = tmp_path / "events.d"
+    scorecard = Subscriber(role="scorecard", directory=folder)
+    assert event_bus.has_subscriber("scorecard", directory=folder)
+    assert not event_bus.has_subscriber("dashboard_html", directory=folder)
+    assert scorecard.poll(0) == []  # the ping is not an event
+
+    # A crashed subscriber leaves its socket file behind
+    scorecard._sock.close()
+    scorecard._sock = None
+    assert not event_bus.has_subscriber("scorecard", directory=folder)
+    assert list(folder.glob("*.sock")) == []
+
+
+def test_portfolio_changes_are_announced(tmp_path, monkeypatch):
+    folder = tmp_path / "events.d"
+    monkeypatch.setattr(event_bus, "DEFAULT_EVENTS_DIR", folder)
+    sub = Subscriber(directory=folder)
+    p = Portfolio(str(tmp_path / "portfolio.json"))
+    p.on_alert("a1", "BTC", "5m", "LONG", 60000.0, 59000.0, 62000.0, "TRADE")
+    p.update(62000.0)
+    events = sub.poll(1.0)
+    assert [e["topic"] for e in events] == [event_bus.POSITION_OPENED, event_bus.POSITION_CLOSED]
+    assert events[1]["data"]["outcome"] and events[1]["data"]["balance"] == p.balance
+
+    # Another process's open shows up after refresh()
+    PortfolioJournal(p.path).append({"type": "open", "position": {
+        "alert_id": "a2", "symbol": "BTC", "timeframe": "15m", "direction": "SHORT", "entry_price": 60000.0,
+        "size_usdt": 100.0, "sl": 61000.0, "tp1": 58000.0, "opened_at": "2026-01-01T00:00:00+00:00"}})
+    p.refresh()
+    assert [pos.alert_id for pos in p.positions] == ["a2"]
+    sub.close()
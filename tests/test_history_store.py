@@ -0,0 +1,112 @@
+import time
+
+import pytest
+
+from collectors.base import BudgetManager
+from tools import history_store
+from tools.history_store import download_series, latest_candles, load_history, merge_candles
+from utils import Candle
+
+T0 = 1_700_000_100 // 300 * 300  # first bar the fake venue has
+
+
+def _fake_pager(calls, fail_after=None):
+    def page(timeframe, end_ts):
+        calls.append(end_ts)
+        if fail_after is not None and len(calls) > fail_after:
+            raise RuntimeError("venue down")
+        end = end_ts // 300 * 300
+        start = max(T0, end - 299 * 300)
+        return [Candle(str(t), 1.0, 2.0, 0.5, float(t), 1.0) for t in range(start, end + 1, 300)]
+    return page
+
+
+def test_download_backfills_resumes_and_catches_up(tmp_path, monkeypatch):
+    budget = BudgetManager(str(tmp_path / "budget.json"))
+    now = T0 + 2000 * 300 + 10
+    calls = []
+    monkeypatch.setitem(history_store.PAGERS, "bybit", _fake_pager(calls, fail_after=3))
+    download_series("bybit", "5m", T0, root=tmp_path, budget=budget, now=now)
+    partial = load_history("bybit", "5m", root=tmp_path)
+    assert 0 < len(partial) < 2000
+
+    calls.clear()
+    monkeypatch.setitem(history_store.PAGERS, "bybit", _fake_pager(calls))
+    download_series("bybit", "5m", T0, root=tmp_path, budget=budget, now=now)
+    ts = list(load_history("bybit", "5m", root=tmp_path).columns["ts"])
+    assert ts == list(range(T0, T0 + 1999 * 300 + 1, 300))
+    assert calls[0] < int(partial.columns["ts"][0])  # resumed below what was already stored
+
+    # later run only fetches the new bars
+    calls.clear()
+    download_series("bybit", "5m", T0, root=tmp_path, budget=budget, now=now + 50 * 300)
+    assert len(calls) == 1
+    assert len(load_history("bybit", "5m", root=tmp_path)) == 2050
+
+
+def test_partitions_by_month_and_loader_ranges(tmp_path):
+    day = 86400
+    start = 1_704_067_200  # 2024-01-01
+    candles = [Candle(str(start + i * 3600), 1.0, 2.0, 0.5, float(i), 1.0) for i in range(24 * 45)]
+    merge_candles(tmp_path, "binance", "1h", candles)
+    merge_candles(tmp_path, "binance", "1h", candles[:10])  # idempotent upsert
+    assert sorted(p.name for p in (tmp_path / "binance" / "1h").glob("*.bin")) == ["2024-01.bin", "2024-02.bin"]
+
+    s = load_history("binance", "1h", start=start + 40 * day, end=start + 41 * day, root=tmp_path)
+    assert list(s.columns["ts"]) == list(range(start + 40 * day, start + 41 * day + 1, 3600))
+    assert latest_candles("1h", 5, root=tmp_path)[-1].close == pytest.approx(24 * 45 - 1)
+    assert len(load_history("binance", "1h", root=tmp_path)) == 24 * 45
+
+
+def test_concurrent_acquire_never_overshoots_the_budget(tmp_path):
+    import threading
+
+    budget = BudgetManager(str(tmp_path / "budget.json"))
+    admitted = []
+    barrier = threading.Barrier(8)
+
+    def worker():
+        barrier.wait()
+        for _ in range(10):
+            if budget.try_acquire("bybit"):
+                admitted.append(1)
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(admitted) == BudgetManager.LIMITS["bybit"][0]
+
+
+def test_backfill_keeps_its_own_budget_file(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    engine_budget = tmp_path / ".mvp_budget.json"
+    engine_budget.write_text('{"bybit": [1.0]}')
+    calls = []
+    monkeypatch.setitem(history_store.PAGERS, "bybit", _fake_pager(calls))
+    history_store.download(["bybit"], ["5m"], int(time.time()) - 2 * 86400, root=tmp_path / "history", workers=1)
+
+    assert calls
+    assert engine_budget.read_text() == '{"bybit": [1.0]}'
+    assert len(BudgetManager(history_store.BUDGET_PATH)._buckets["bybit"].timestamps) == len(calls)
+
+
+def test_backfill_writes_each_month_partition_once(tmp_path, monkeypatch):
+    t0 = 1_701_388_800 - 3000 * 300  # 3000 bars of November 2023, then December
+    budget = BudgetManager(str(tmp_path / "budget.json"))
+    calls, writes = [], []
+
+    def page(timeframe, end_ts):
+        calls.append(end_ts)
+        start = max(t0, end_ts - 299 * 300)
+        return [Candle(str(t), 1.0, 2.0, 0.5, float(t), 1.0) for t in range(start, end_ts + 1, 300)]
+
+    write = history_store.write_partition
+    monkeypatch.setattr(history_store, "write_partition", lambda path, *a: writes.append(path.name) or write(path, *a))
+    monkeypatch.setitem(history_store.PAGERS, "binance", page)
+    download_series("binance", "5m", t0, root=tmp_path, budget=budget, now=t0 + 4000 * 300 + 10)
+
+    assert len(calls) > 10
+    assert sorted(writes) == ["2023-11.bin", "2023-12.bin"]
+    assert list(load_history("binance", "5m", root=tmp_path).columns["ts"]) == list(range(t0, t0 + 3999 * 300 + 1, 300))
@@ -0,0 +1,74 @@
+import threading
+from collections import Counter
+
+import httpx
+import pytest
+
+from collectors import bundle
+from collectors.base import BudgetManager
+from collectors.derivatives import _fetch_bybit
+from collectors.flows import _fetch_bybit_flow
+from collectors.orderbook import _fetch_bybit_book
+
+BYBIT = {
+    "/v5/market/tickers": {"result": {"list": [{"markPrice": "101", "indexPrice": "100", "fundingRate": "0.0001"}]}},
+    "/v5/market/open-interest": {"result": {"list": [{"openInterest": "110"}, {"openInterest": "100"}]}},
+    "/v5/market/account-ratio": {"result": {"list": [{"buyRatio": "0.6", "sellRatio": "0.4"}]}},
+    "/v5/market/orderbook": {"result": {"b": [["100", "2"]], "a": [["101", "3"]]}, "time": 1700000000000},
+}
+
+
+class FakeClient:
+    def __init__(self, status=200):
+        self.status = status
+        self.calls = Counter()
+        self.lock = threading.Lock()
+
+    def get(self, url, params=None, headers=None, timeout=None):
+        request = httpx.Request("GET", url)
+        with self.lock:
+            self.calls[request.url.path] += 1
+        if self.status != 200:
+            return httpx.Response(self.status, request=request)
+        return httpx.Response(200, json=BYBIT[request.url.path], request=request)
+
+
+@pytest.fixture
+def venue(monkeypatch):
+    client = FakeClient()
+    monkeypatch.setitem(bundle._clients, "bybit", client)
+    bundle.new_cycle()
+    yield client
+    bundle.new_cycle()
+
+
+def test_snapshots_share_one_bundle_fetch_per_cycle(venue, tmp_path):
+    budget = BudgetManager(str(tmp_path / "budget.json"))
+    threads = [threading.Thread(target=_fetch_bybit_book, args=(budget,)) for _ in range(3)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    derivatives = _fetch_bybit(budget, 5.0)
+    flows = _fetch_bybit_flow(budget, 5.0)
+    book = _fetch_bybit_book(budget)
+
+    assert derivatives.healthy and round(derivatives.oi_change_pct, 6) == 10.0
+    assert flows.healthy and round(flows.taker_ratio, 6) == 1.5
+    assert book.mid_price == 100.5
+    assert set(venue.calls.values()) == {1} and len(venue.calls) == 4
+    assert len(budget._buckets["bybit"].timestamps) == 1
+
+    bundle.new_cycle()
+    _fetch_bybit_flow(budget, 5.0)
+    assert venue.calls["/v5/market/account-ratio"] == 2
+
+
+def test_venue_wide_failure_fails_the_whole_bundle_once(venue, tmp_path):
+    venue.status = 403
+    budget = BudgetManager(str(tmp_path / "budget.json"))
+    with pytest.raises(httpx.HTTPStatusError):
+        _fetch_bybit(budget, 5.0)
+    with pytest.raises(httpx.HTTPStatusError):
+        _fetch_bybit_flow(budget, 5.0)
+    assert sum(venue.calls.values()) == 1
@@ -0,0 +1,45 @@
+import pytest
+
+from collectors.base import _provider
+from core import metrics
+
+
+def test_spans_feed_summaries_and_error_counters():
+    reg = metrics.Registry()
+    for ms in range(1, 101):
+        reg.observe("stage_seconds", ms / 1000, stage="collect", source="price")
+    with pytest.raises(ValueError):
+        with reg.span("score", timeframe="5m"):
+            raise ValueError("boom")
+
+    snap = reg.snapshot()
+    by_labels = {tuple(sorted(l.items())): v for _, l, v in snap["summaries"]}
+    price = by_labels[(("source", "price"), ("stage", "collect"))]
+    assert price["count"] == 100 and price["quantiles"] == {"0.5": 0.051, "0.95": 0.095, "0.99": 0.099}
+    assert by_labels[(("stage", "score"), ("timeframe", "5m"))]["count"] == 1
+    assert snap["counters"] == [["stage_errors", {"stage": "score", "timeframe": "5m"}, 1.0]]
+
+
+def test_render_merges_snapshots_as_openmetrics(tmp_path):
+    engine = metrics.Registry()
+    engine.inc("provider_requests", provider="bybit", result="ok")
+    engine.set_gauge("api_budget_utilization", 0.25, source="bybit")
+    engine.observe("cycle_seconds", 12.5)
+    engine.save(tmp_path / "metrics.json")
+    server = metrics.Registry()
+    server.observe("http_request_seconds", 0.002, route="/metrics")
+
+    text = metrics.render(metrics.load_snapshot(tmp_path / "metrics.json"), server.snapshot())
+    lines = text.splitlines()
+    assert lines[-1] == "# EOF"
+    assert "# TYPE ember_provider_requests counter" in lines
+    assert 'ember_provider_requests_total{provider="bybit",result="ok"} 1.0' in lines
+    assert 'ember_api_budget_utilization{source="bybit"} 0.25' in lines
+    assert 'ember_cycle_seconds{quantile="0.99"} 12.5' in lines
+    assert "ember_cycle_seconds_count 1.0" in lines
+    assert 'ember_http_request_seconds_sum{route="/metrics"} 0.002' in lines
+
+
+def test_provider_label_is_the_registered_domain():
+    assert _provider("https://api.bybit.com/v5/market/tickers") == "bybit"
+    assert _provider("https://query1.finance.yahoo.com/v8/finance/chart/%5EGSPC") == "yahoo"
@@ -0,0 +1,86 @@
+import json
+from datetime import datetime, timezone
+
+import pytest
+
+from tools import outcome_tracker
+from core.alert_store import AlertStore
+from tools.outcome_tracker import resolve_outcomes
+from utils import Candle
+
+
+def _write_alert(path, ts, **kw):
+    alert = {
+        "alert_id": "a1", "timestamp": datetime.fromtimestamp(ts, tz=timezone.utc).isoformat(),
+        "symbol": "BTC", "timeframe": "5m", "direction": "LONG",
+        "entry_price": 100.0, "invalidation": 95.0, "tp1": 110.0, "tp2": 120.0,
+    }
+    alert.update(kw)
+    path.write_text(json.dumps(alert) + "\n")
+
+
+def _read(path):
+    return AlertStore(path).query()[0]
+
+
+@pytest.fixture(autouse=True)
+def no_network(monkeypatch):
+    def _fail(*_):
+        raise AssertionError("resolve_outcomes should reuse the cycle price")
+    monkeypatch.setattr(outcome_tracker, "collect", _fail)
+
+
+def _now_bars(start, rows):
+    return [Candle(str(start + i * 300), *row, 1.0) for i, row in enumerate(rows)]
+
+
+def test_wick_through_target_resolves_at_level(tmp_path):
+    now = int(datetime.now(timezone.utc).timestamp()) // 300 * 300
+    start = now - 3600
+    path = tmp_path / "alerts.jsonl"
+    _write_alert(path, start)
+    bars = _now_bars(start - 600, [
+        (100, 130, 90, 100),   # before the alert: ignored
+        (100, 101, 99, 100),
+        (100, 101, 99, 100),
+        (100, 111, 99, 101),   # wick through tp1
+        (101, 102, 100, 100),
+    ])
+    resolve_outcomes(str(path), candles={"5m": bars}, price=100.0)
+    a = _read(path)
+    assert a["outcome"] == "WIN_TP1"
+    assert a["outcome_price"] == 110.0
+    assert a["r_multiple"] == 2.0
+
+
+@pytest.mark.parametrize("rule,bar_open,expected", [
+    ("stop_first", 100, "LOSS"),
+    ("target_first", 100, "WIN_TP1"),
+    ("open_distance", 108, "WIN_TP1"),
+    ("open_distance", 97, "LOSS"),
+])
+def test_same_bar_stop_and_target(tmp_path, rule, bar_open, expected):
+    now = int(datetime.now(timezone.utc).timestamp()) // 300 * 300
+    start = now - 900
+    path = tmp_path / "alerts.jsonl"
+    _write_alert(path, start)
+    bars = _now_bars(start, [(bar_open, 112, 94, 100)])
+    resolve_outcomes(str(path), candles={"5m": bars}, price=100.0, same_bar=rule)
+    assert _read(path)["outcome"] == expected
+
+
+def test_falls_back_to_price_and_coarser_candles(tmp_path):
+    now = int(datetime.now(timezone.utc).timestamp()) // 300 * 300
+    path = tmp_path / "alerts.jsonl"
+    _write_alert(path, now - 3 * 3600, direction="SHORT", invalidation=105.0, tp1=90.0, tp2=80.0)
+    five = _now_bars(now - 3600, [(100, 101, 99, 100)] * 12)
+    hourly = [Candle(str(now - 3 * 3600 + i * 3600), 100, 101, 85, 100, 1.0) for i in range(3)]
+    resolve_outcomes(str(path), candles={"5m": five, "1h": hourly}, price=100.0)
+    a = _read(path)
+    assert a["outcome"] == "WIN_TP1"  # the 1h wick to 85 covers the start the 5m series misses
+
+    _write_alert(path, now - 600, alert_id="a2")
+    resolve_outcomes(str(path), candles={}, price=96.0)
+    assert "outcome" not in _read(path)
+    resolve_outcomes(str(path), candles={}, price=94.0)
+    assert _read(path)["outcome"] == "LOSS"
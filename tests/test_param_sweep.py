@@ -0,0 +1,46 @@
+import csv
+
+import pytest
+
+import config
+from tools.param_sweep import build_params, expand_grid, run_sweep
+from tools.replay import _aggregate
+from tools.vector_backtest import build_features
+
+
+def test_build_params_overrides_copy_not_module_config():
+    params = build_params({"TIMEFRAME_RULES.5m.trade_long": 60, "CONFLUENCE_WEIGHTS.structure": 3.0})
+    assert params["TIMEFRAME_RULES"]["5m"]["trade_long"] == 60
+    assert params["TIMEFRAME_RULES"]["15m"] == config.TIMEFRAME_RULES["15m"]
+    assert params["CONFLUENCE_WEIGHTS"]["structure"] == 3.0
+    assert config.CONFLUENCE_WEIGHTS["structure"] == 2.0
+
+
+def test_build_params_rejects_bad_candidates():
+    with pytest.raises(ValueError):
+        build_params({"TIMEFRAME_RULES.5m.trade_long": 10})  # below watch_long
+    with pytest.raises(KeyError):
+        build_params({"CONFLUENCE_WEIGHTS.nonsense": 1.0})
+    with pytest.raises(ValueError):
+        list(expand_grid({"SCORE_MULTIPLIER": [1, 2]}))
+
+
+def test_sweep_writes_table_and_resumes(tmp_path, random_walk):
+    c5 = random_walk(200, seed=2)
+    table = build_features(c5, "5m", {"15m": _aggregate(c5, 3), "1h": _aggregate(c5, 12)})
+    grid = {"TIMEFRAME_RULES.5m.trade_long": [40, 49], "TP_MULTIPLIERS.range.tp2": [2.0, 2.4]}
+    out = str(tmp_path / "sweep.csv")
+
+    rows = run_sweep(table, {"TIMEFRAME_RULES.5m.trade_long": [40], "TP_MULTIPLIERS.range.tp2": [2.0]}, out, workers=2)
+    assert len(rows) == 1
+    rows = run_sweep(table, grid, out, workers=2)
+    assert len(rows) == 4
+    with open(out, newline="") as f:
+        assert len(list(csv.DictReader(f))) == 4  # the first candidate was not re-run
+    assert [float(r["expectancy_r"]) for r in rows] == sorted((float(r["expectancy_r"]) for r in rows), reverse=True)
+
+    # Same output, different history: refuse rather than reuse the old rows
+    c5 = random_walk(220, seed=3)
+    other = build_features(c5, "5m", {"15m": _aggregate(c5, 3), "1h": _aggregate(c5, 12)})
+    with pytest.raises(ValueError, match="different dataset"):
+        run_sweep(other, grid, out, workers=2)
@@ -0,0 +1,132 @@
+import json
+
+from core.portfolio_journal import PortfolioJournal, load_portfolio_state
+from tools.paper_trader import Portfolio
+
+
+def _trade(portfolio, alert_id, tf, exit_price):
+    portfolio.on_alert(alert_id, "BTC", tf, "LONG", 60000.0, 59000.0, 62000.0, "TRADE")
+    portfolio.update(exit_price)
+
+
+def test_replay_matches_in_memory_state(tmp_path):
+    path = tmp_path / "portfolio.json"
+    p = Portfolio(str(path))
+    _trade(p, "a1", "5m", 62000.0)
+    _trade(p, "a2", "5m", 59000.0)
+    p.on_alert("a3", "BTC", "15m", "LONG", 60000.0, 59000.0, 62000.0, "TRADE")
+
+    assert not path.exists()  # nothing rewritten, only journaled
+    state = load_portfolio_state(path)
+    assert state["balance"] == p.balance == 10098.0
+    assert [t["alert_id"] for t in state["closed_trades"]] == ["a1", "a2"]
+    assert [pos["alert_id"] for pos in state["positions"]] == ["a3"]
+    assert [e["balance"] for e in state["equity_curve"][1:]] == [10200.0, 10098.0]
+
+    reloaded = Portfolio(str(path))
+    assert reloaded.get_report() == p.get_report()
+
+
+def test_compaction_keeps_state_and_bounds_the_journal(tmp_path):
+    path = tmp_path / "portfolio.json"
+    p = Portfolio(str(path))
+    p.journal.compact_bytes = 2000
+    for i in range(20):
+        _trade(p, f"a{i}", "5m", 62000.0 if i % 2 else 59000.0)
+
+    snapshot = json.loads(path.read_text())
+    assert snapshot["generation"] >= 1
+    assert p.journal.journal_path.stat().st_size < 2000 + 1000
+    state = load_portfolio_state(path)
+    assert len(state["closed_trades"]) == 20
+    assert state["balance"] == p.balance
+    assert state["max_drawdown"] == p.max_drawdown
+
+
+def test_journal_from_before_the_snapshot_is_ignored(tmp_path):
+    path = tmp_path / "portfolio.json"
+    p = Portfolio(str(path))
+    _trade(p, "a1", "5m", 62000.0)
+    stale = p.journal.journal_path.read_text()
+    p.compact()
+    # Crash between writing the snapshot and starting the new journal
+    p.journal.journal_path.write_text(stale)
+    state = load_portfolio_state(path)
+    assert len(state["closed_trades"]) == 1
+    assert state["balance"] == 10200.0
+
+
+def test_append_after_a_crashed_compaction_restarts_the_journal(tmp_path):
+    path = tmp_path / "portfolio.json"
+    p = Portfolio(str(path))
+    _trade(p, "a1", "5m", 62000.0)
+    stale = p.journal.journal_path.read_text()
+    p.compact()
+    p.journal.journal_path.write_text(stale)  # crash between the snapshot and the new journal
+
+    _trade(p, "a2", "5m", 59000.0)
+    state = load_portfolio_state(path)
+    assert [t["alert_id"] for t in state["closed_trades"]] == ["a1", "a2"]
+    assert state["balance"] == p.balance == 10098.0
+    assert Portfolio(str(path)).get_report() == p.get_report()
+
+
+def test_executor_and_paper_trader_share_the_journal(tmp_path, monkeypatch):
+    from tools import executor
+    path = tmp_path / "portfolio.json"
+    monkeypatch.setattr(executor, "PAPER_PORTFOLIO_PATH", path)
+    p = Portfolio(str(path))
+    p.on_alert("a1", "BTC", "5m", "LONG", 60000.0, 59000.0, 62000.0, "TRADE")
+    executor._record_open({"id": "PAPER-1", "direction": "SHORT", "entry_price": 60000.0,
+                           "invalidation": 61000.0, "size_usdt": 100, "status": "open"})
+
+    # The executor's fill must not break loading the paper trader's own positions
+    reloaded = Portfolio(str(path))
+    assert [pos.alert_id for pos in reloaded.positions] == ["a1"]
+    assert reloaded.balance == 10000.0
+
+    p.update(62000.0)
+    p.compact()
+    state = load_portfolio_state(path)
+    assert state["positions"] == []
+    assert [e["id"] for e in state["executions"]] == ["PAPER-1"]
+    assert state["closed_trades"][0]["alert_id"] == "a1"
+    assert Portfolio(str(path)).balance == p.balance
+
+
+def test_legacy_executor_open_in_snapshot_moves_to_executions(tmp_path):
+    path = tmp_path / "portfolio.json"
+    path.write_text(json.dumps({"balance": 10100.0, "positions": [
+        {"id": "PAPER-1", "direction": "SHORT", "status": "open"},
+        {"alert_id": "a1", "symbol": "BTC", "timeframe": "5m", "direction": "LONG", "entry_price": 60000.0,
+         "size_usdt": 600.0, "sl": 59000.0, "tp1": 62000.0, "opened_at": "2026-01-01T00:00:00+00:00"},
+    ]}))
+    p = Portfolio(str(path))
+    assert [pos.alert_id for pos in p.positions] == ["a1"]
+    assert p.balance == 10100.0
+    assert [e["id"] for e in load_portfolio_state(path)["executions"]] == ["PAPER-1"]
+
+
+def test_executor_fills_count_toward_the_cap_until_they_close(tmp_path, monkeypatch):
+    from datetime import datetime, timedelta
+    from tools import executor
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(executor, "PAPER_PORTFOLIO_PATH", tmp_path / "portfolio.json")
+    book = {"orderbook": {"bids": [[60000.0, 50.0]], "asks": [[60000.5, 50.0]]}}
+    monkeypatch.setattr(executor, "_load_market_cache", lambda: book)
+    alert = {"tier": "A+", "direction": "LONG", "entry_price": 60000.0, "invalidation": 59000.0, "tp1": 62000.0}
+
+    for i in range(3):
+        executor._record_open({"id": f"PAPER-{i}", "direction": "LONG", "entry_price": 60000.0,
+                               "invalidation": 59000.0 + i * 500, "tp1": 62000.0, "status": "open",
+                               "opened_at": datetime.utcnow().isoformat()})
+    assert executor.execute_trade(alert)["reason"] == "max positions reached"
+
+    book["orderbook"] = {"bids": [[59800.0, 50.0]], "asks": [[59800.5, 50.0]]}  # PAPER-2's stop at 60000 traded
+    assert executor.execute_trade(alert)["status"] == "PAPER"
+    ids = [e["id"] for e in load_portfolio_state(tmp_path / "portfolio.json")["executions"]]
+    assert "PAPER-2" not in ids and len(ids) == 3
+
+    monkeypatch.setattr(executor, "EXECUTION_MAX_AGE", timedelta(0))
+    executor._settle_executions(load_portfolio_state(tmp_path / "portfolio.json"), book)
+    assert load_portfolio_state(tmp_path / "portfolio.json")["executions"] == []
@@ -0,0 +1,41 @@
+import pstats
+import time
+
+from core.profiling import CycleProfiler, request_profile
+
+
+def _busy(seconds):
+    end = time.monotonic() + seconds
+    while time.monotonic() < end:
+        sum(range(1000))
+
+
+def test_requested_cycles_are_profiled_then_profiling_stops(tmp_path):
+    control, out = tmp_path / "profile_request.json", tmp_path / "profiles"
+    profiler = CycleProfiler(control, out, slow_cycle_seconds=60, sample_interval_seconds=0.005)
+    request_profile(cycles=1, trace_memory=True, path=control)
+
+    with profiler.cycle():
+        _busy(0.1)
+    assert not control.exists()
+    suffixes = sorted(p.suffix for p in profiler.written)
+    assert suffixes == [".folded", ".pstats", ".tracemalloc", ".txt"]
+    stats = pstats.Stats(str(next(p for p in profiler.written if p.suffix == ".pstats")))
+    assert any(func[2] == "_busy" for func in stats.stats)
+    folded = next(p for p in profiler.written if p.suffix == ".folded").read_text()
+    assert "_busy (test_profiling.py:" in folded
+
+    with profiler.cycle():
+        _busy(0.01)
+    assert profiler.written == []
+
+
+def test_slow_cycles_leave_sampled_stacks_and_old_files_are_pruned(tmp_path):
+    out = tmp_path / "profiles"
+    profiler = CycleProfiler(tmp_path / "none.json", out, slow_cycle_seconds=0.05,
+                             sample_interval_seconds=0.005, keep_files=2)
+    for _ in range(3):
+        with profiler.cycle():
+            _busy(0.08)
+    assert [p.name.split("-")[0] for p in profiler.written] == ["slow"]
+    assert len(list(out.iterdir())) == 2
@@ -0,0 +1,46 @@
+from tools.replay import CandleView, ContextStreams, _aggregate
+from utils import Candle
+
+
+def _candles(n):
+    return [Candle(str(1_700_000_000 + 300 * i), 100 + i, 101 + i, 99 + i, 100.5 + i, 1.0 + i) for i in range(n)]
+
+
+def test_context_streams_match_prefix_aggregation():
+    c5 = _candles(150)
+    streams = ContextStreams()
+    for i, c in enumerate(c5):
+        streams.push(c)
+        if i % 17 == 0 or i == len(c5) - 1:
+            prefix = c5[: i + 1]
+            assert streams.series["15m"] == _aggregate(prefix, 3)
+            assert streams.series["1h"] == _aggregate(prefix, 12)
+            assert streams.series["4h"] == _aggregate(prefix, 48)
+
+
+def test_candle_view_behaves_like_list_slice():
+    data = _candles(40)
+    view = CandleView(data, 10)
+    ref = data[10:]
+    assert len(view) == len(ref)
+    assert view[0] is ref[0] and view[-1] is ref[-1]
+    assert list(view[:-1]) == ref[:-1]
+    assert list(view[-14:]) == ref[-14:]
+    assert list(view[5:3]) == []
+    assert view[::2] == ref[::2]
+    assert [c.close for c in view] == [c.close for c in ref]
+    assert isinstance(view[:-2], CandleView)
+    try:
+        view[len(ref)]
+    except IndexError:
+        pass
+    else:
+        raise AssertionError("expected IndexError")
+
+
+def test_run_backtest_replays_history_without_stale_patching(random_walk):
+    from tools import run_backtest
+
+    m = run_backtest.replay_symbol_timeframe("BTC", "5m", random_walk(200), window=120)
+    assert m.htf_mode == "aggregated" and m.horizon_bars > 0
+    assert 0.0 <= m.noise_ratio <= 1.0 and m.trades <= m.alerts
@@ -0,0 +1,61 @@
+from datetime import datetime, timedelta, timezone
+
+from core.alert_store import AlertStore
+from core.rollups import HOURLY_RETENTION_DAYS, Rollups
+
+T0 = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def _alert(i, hours, **kw):
+    alert = {"alert_id": f"a{i}", "timestamp": (T0 + timedelta(hours=hours)).isoformat(), "symbol": "BTC",
+             "timeframe": "5m", "tier": "A+", "regime": "TREND", "session": "LONDON", "strategy": "TREND",
+             "direction": "LONG", "confidence": 50 + i}
+    alert.update(kw)
+    return alert
+
+
+def _since(hours):
+    return (T0 + timedelta(hours=hours)).timestamp()
+
+
+def test_windows_sum_hourly_and_daily_buckets(tmp_path):
+    store = AlertStore(tmp_path / "alerts.jsonl", writable=True)
+    # Hours 0..71 of three days, one alert every 6h
+    store.append_many([_alert(i, 6 * i) for i in range(12)])
+    rollups = Rollups(tmp_path / "rollups.json")
+    assert rollups.sync(store)
+    store.patch("a10", {"resolved": True, "outcome": "WIN_TP1", "r_multiple": 2.0})
+    store.patch("a11", {"resolved": True, "outcome": "LOSS", "r_multiple": -1.0})
+    rollups.sync(store)
+
+    # Hour 30 onwards: hourly buckets for day 1, daily buckets for day 2
+    window = rollups.window(_since(30))
+    assert window.totals["alerts"] == 7  # hours 30, 36, ..., 66
+    assert (window.totals["resolved"], window.totals["wins"], window.totals["losses"]) == (2, 1, 1)
+    assert window.totals["total_r"] == 1.0
+    assert {k: v["alerts"] for k, v in window.by("confidence").items()} == {"41-60": 6, "61-80": 1}
+    assert {k: v["total_r"] for k, v in window.by("outcome").items()} == {"WIN_TP1": 2.0, "LOSS": -1.0}
+    assert window.by("regime")["trend"]["alerts"] == 7
+    assert window.best == {"confidence": 61, "alert_id": "a11", "direction": "LONG", "strategy": "TREND",
+                           "timeframe": "5m"}
+    assert rollups.window().totals["alerts"] == 12
+
+    # A fresh instance resumes from the file; re-patching books nothing twice
+    again = Rollups(tmp_path / "rollups.json")
+    store.patch("a10", {"resolved": True, "outcome": "WIN_TP1", "r_multiple": 2.0})
+    again.sync(store)
+    assert again.window(_since(30)).totals == window.totals
+
+
+def test_old_hours_are_pruned_to_days(tmp_path):
+    store = AlertStore(tmp_path / "alerts.jsonl", writable=True)
+    store.append(_alert(0, 5))
+    rollups = Rollups(tmp_path / "rollups.json")
+    rollups.sync(store)
+    store.append(_alert(1, 24 * (HOURLY_RETENTION_DAYS + 2)))
+    rollups.sync(store)
+
+    assert min(int(k) for k in rollups.hours) >= rollups.hours_from > _since(5)
+    # A window starting in a pruned hour falls back to the whole day
+    assert rollups.window(_since(10)).totals["alerts"] == 2
+    assert rollups.window(_since(24)).totals["alerts"] == 1
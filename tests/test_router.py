@@ -0,0 +1,45 @@
+import time
+
+from collectors.router import ProviderRouter
+
+
+def test_slow_and_failing_providers_are_demoted_then_probed_back():
+    router = ProviderRouter(ewma_alpha=0.5, probe_interval_seconds=3600)
+    chain = ["kraken", "bybit", "binance"]
+    assert router.order("candles", chain) == chain  # no history: static order
+
+    for _ in range(3):
+        router.record("candles", "kraken", False, 10.0)
+        router.record("candles", "bybit", True, 0.2)
+        router.record("candles", "binance", True, 0.8)
+    assert router.order("candles", chain) == ["bybit", "binance", "kraken"]
+    assert router.order("derivatives", ["kraken", "bybit"]) == ["kraken", "bybit"]  # stats are per endpoint
+
+    router.probe_interval = 0.0
+    assert router.order("candles", chain)[0] == "kraken"  # least recently tried goes first
+    table = router.table()["endpoints"]["candles"]
+    assert [r["provider"] for r in table] == ["bybit", "binance", "kraken"]
+    assert table[-1]["failures"] == 3
+
+
+def test_circuit_breaker_opens_half_opens_and_backs_off():
+    router = ProviderRouter(failure_threshold=2, open_seconds=0.05, max_open_seconds=1.0)
+    router.record_call("okx", False)
+    assert router.allow("okx")
+    router.record_call("okx", False)
+    assert not router.allow("okx")
+    assert router.order("orderbook", ["okx", "bybit"]) == ["bybit", "okx"]
+
+    time.sleep(0.06)
+    assert router.table()["breakers"]["okx"]["state"] == "half_open"
+    assert router.order("orderbook", ["bybit", "okx"])[0] == "okx"  # probed first
+    router.record_call("okx", False)  # failed probe: open again, twice as long
+    assert not router.allow("okx")
+    time.sleep(0.06)
+    assert not router.allow("okx")
+    time.sleep(0.05)
+    router.record_call("okx", True)
+    assert router.table()["breakers"]["okx"]["state"] == "closed"
+
+    router.trip("bybit", 60)  # mark_source_broken on a 403
+    assert not router.allow("bybit")
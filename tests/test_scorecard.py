@@ -0,0 +1,58 @@
+import json
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+scripts_dir = Path(__file__).parent.parent / "scripts" / "pid-129"
+sys.path.append(str(scripts_dir))
+
+import generate_scorecard as gs
+from core.alert_store import AlertStore
+
+NOW = datetime(2026, 3, 10, 12, 0, tzinfo=timezone.utc)
+
+
+def _alert(i, age, **kw):
+    alert = {"alert_id": f"a{i}", "timestamp": (NOW - age).isoformat(), "symbol": "BTC", "strategy": "TREND",
+             "direction": "LONG" if i % 2 else "SHORT", "confidence": 60 + i}
+    alert.update(kw)
+    return alert
+
+
+def _body(report):
+    return report.split("\n", 3)[3]
+
+
+def test_rolling_scorecard_matches_a_fresh_build(tmp_path):
+    alerts_file, audit_file = tmp_path / "alerts.jsonl", tmp_path / "audit.jsonl"
+    store = AlertStore(alerts_file, writable=True)
+    store.append_many([_alert(i, timedelta(days=8 - i)) for i in range(8)])
+    audit_file.write_text("".join(
+        json.dumps({"timestamp": (NOW - timedelta(hours=h)).isoformat(), "score": 10 * h}) + "\n" for h in (30, 5, 1)))
+    card = gs.Scorecard(alerts_file, audit_file, tmp_path / "scorecard.md", tmp_path / "rollups.json")
+    first = card.write(NOW)
+    assert "**Total Alerts:** 7" in first  # the 8-day-old alert is outside the window
+    assert "**Cycles Completed:** 2" in first and "**Peak Confidence Seen:** 50" in first
+
+    # New alert, an outcome for a windowed alert, a new heartbeat, and time moving on
+    store.append(_alert(8, timedelta(0)))
+    store.patch("a5", {"resolved": True, "outcome": "WIN_TP1", "r_multiple": 1.5})
+    with open(audit_file, "a") as f:
+        f.write(json.dumps({"timestamp": (NOW + timedelta(days=1)).isoformat(), "score": 90}) + "\n")
+    later = NOW + timedelta(days=1, hours=1)  # windows move by the hour
+    report = card.write(later)
+    assert "**Total Alerts:** 6" in report
+    assert "**Resolved Trades:** 1" in report and "**Total P&L (R):** 1.50R" in report
+    assert "**Cycles Completed:** 1" in report and "**Peak Confidence Seen:** 90" in report
+    fresh = gs.Scorecard(alerts_file, audit_file, rollups_file=tmp_path / "fresh.json")
+    assert _body(report) == _body(fresh.report(later))
+
+
+def test_scorecard_is_rewritten_only_when_it_changes(tmp_path):
+    AlertStore(tmp_path / "alerts.jsonl", writable=True).append(_alert(1, timedelta(hours=1)))
+    out = tmp_path / "scorecard.md"
+    card = gs.Scorecard(tmp_path / "alerts.jsonl", tmp_path / "audit.jsonl", out, tmp_path / "rollups.json")
+    card.write(NOW)
+    out.write_text("sentinel")  # would be overwritten by any rewrite
+    card.write(NOW + timedelta(minutes=5))
+    assert out.read_text() == "sentinel"
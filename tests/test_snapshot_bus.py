@@ -0,0 +1,86 @@
+import threading
+import time
+
+from core import snapshot_bus
+from core.snapshot_bus import SnapshotPublisher, SnapshotReader
+from tools import executor
+
+
+def test_publish_and_read_round_trip(tmp_path):
+    path = tmp_path / "snap.bin"
+    reader = SnapshotReader(path)
+    assert reader.read() is None
+
+    pub = SnapshotPublisher(path)
+    pub.publish(price=65000.5, price_source="bybit")
+    pub.publish(bid_px=64999.0, bid_sz=2.0, ask_px=65001.0, ask_sz=1.5, flows={"taker_ratio": 1.1})
+
+    snap = reader.read()
+    assert snap.seq == 4
+    assert (snap.price, snap.bid_px, snap.ask_sz) == (65000.5, 64999.0, 1.5)
+    assert snap.extra == {"price_source": "bybit", "flows": {"taker_ratio": 1.1}}
+    assert snap.as_market_cache()["orderbook"]["asks"] == [[65001.0, 1.5]]
+
+    # A restarted publisher keeps the sequence moving forward
+    pub.close()
+    assert SnapshotPublisher(path).publish(price=1.0) == 6
+
+
+def test_reader_never_returns_a_torn_write(tmp_path):
+    path = tmp_path / "snap.bin"
+    pub = SnapshotPublisher(path)
+    pub.publish(price=1.0)
+    # Freeze the region mid-write: seq odd
+    snapshot_bus._SEQ.pack_into(pub._mm, snapshot_bus._SEQ_OFFSET, pub._seq + 1)
+    assert SnapshotReader(path).read(retries=5) is None
+
+    stop = threading.Event()
+
+    def hammer():
+        i = 0
+        while not stop.is_set():
+            i += 1
+            pub.publish(price=float(i), bid_px=float(i), ask_px=float(i))
+
+    t = threading.Thread(target=hammer)
+    t.start()
+    try:
+        reader = SnapshotReader(path)
+        for _ in range(2000):
+            snap = reader.read(with_extra=False)
+            if snap is not None:
+                assert snap.price == snap.bid_px == snap.ask_px
+    finally:
+        stop.set()
+        t.join()
+
+
+def test_wait_wakes_on_publish(tmp_path):
+    path = tmp_path / "snap.bin"
+    pub = SnapshotPublisher(path)
+    pub.publish(price=1.0)
+    reader = SnapshotReader(path)
+    reader.read()
+    assert reader.wait(0.05) is False
+
+    threading.Timer(0.1, pub.publish, kwargs={"notify": True, "price": 2.0}).start()
+    start = time.monotonic()
+    assert reader.wait(5.0) is True
+    assert time.monotonic() - start < 2.0
+    assert reader.read().price == 2.0
+
+    # Without notify the publish lands but sleeping readers are not woken early
+    threading.Timer(0.05, pub.publish, kwargs={"price": 3.0}).start()
+    start = time.monotonic()
+    reader.wait(0.5)
+    assert time.monotonic() - start >= 0.45
+    assert reader.read().price == 3.0
+    reader.close()
+
+
+def test_executor_reads_top_of_book_from_the_bus(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(snapshot_bus, "_readers", {})
+    assert executor._execution_micro_mode() == "BLOCKED"
+    SnapshotPublisher().publish(bid_px=65000.0, bid_sz=50.0, ask_px=65000.5, ask_sz=50.0)
+    assert executor._execution_micro_mode() == "FAST"
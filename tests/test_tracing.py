@@ -0,0 +1,35 @@
+import json
+import threading
+
+from core import metrics, tracing
+
+
+def test_cycle_trace_collects_spans_from_every_thread(tmp_path):
+    assert tracing.span("idle") is tracing.span("other")  # shared no-op while no trace is active
+
+    tracing.start_cycle()
+    with metrics.get_registry().span("collect", source="price"):
+        pass
+    worker = threading.Thread(target=lambda: tracing.record("write batch", "io", 0.0, 0.001), name="background-writer")
+    worker.start()
+    worker.join()
+    try:
+        with tracing.span("structure", "layer"):
+            raise KeyError("x")
+    except KeyError:
+        pass
+    path = tracing.finish_cycle(tmp_path, keep_files=1)
+    assert tracing.active() is None
+
+    events = json.loads(path.read_text())["traceEvents"]
+    spans = {e["name"]: e for e in events if e["ph"] == "X"}
+    assert set(spans) == {"cycle", "collect price", "write batch", "structure"}
+    assert spans["collect price"]["args"] == {"source": "price"}
+    assert spans["structure"]["args"] == {"error": "KeyError"}
+    assert spans["write batch"]["tid"] != spans["collect price"]["tid"]
+    names = {e["args"]["name"] for e in events if e["name"] == "thread_name"}
+    assert {"background-writer", threading.current_thread().name} <= names
+
+    tracing.start_cycle()
+    assert tracing.finish_cycle(tmp_path, keep_files=1) != path
+    assert len(list(tmp_path.glob("cycle-*.json"))) == 1
@@ -0,0 +1,65 @@
+import engine
+from collectors.derivatives import DerivativesSnapshot
+from collectors.flows import FlowSnapshot
+from collectors.price import PriceSnapshot
+from collectors.social import FearGreedSnapshot
+from tools.replay import _aggregate
+from tools.vector_backtest import (
+    ACTIONS,
+    TIERS,
+    _bar_intel,
+    _context_window,
+    build_features,
+    score_table,
+    simulate_trades,
+)
+
+
+def test_score_table_matches_compute_score(monkeypatch, random_walk):
+    monkeypatch.setattr(engine, "_is_stale", lambda *args: False)
+    c5 = random_walk()
+    ctx = {"15m": _aggregate(c5, 3), "1h": _aggregate(c5, 12), "4h": _aggregate(c5, 48)}
+    ctx_ts = {tf: [int(c.ts) for c in cs] for tf, cs in ctx.items()}
+    window, warmup = 120, 40
+
+    table = build_features(c5, "5m", ctx, window=window, warmup=warmup)
+    scored = score_table(table)
+    assert len(table) == len(c5) - warmup
+
+    fg = FearGreedSnapshot(50, "Neutral", healthy=False)
+    deriv = DerivativesSnapshot(0.0, 0.0, 0.0, source="backtest", healthy=False, meta={"provider": "backtest"})
+    flows = FlowSnapshot(1.0, 1.0, 0.0, healthy=False, source="backtest", meta={"provider": "backtest"})
+    for row in range(0, len(table), 5):
+        i = row + warmup
+        w = c5[max(0, i + 1 - window):i + 1]
+        ts = int(w[-1].ts)
+        s = engine.compute_score(
+            "BTC", "5m", PriceSnapshot(w[-1].close, float(ts), "backtest"), w,
+            _context_window(ctx["15m"], ctx_ts["15m"], ts, window),
+            _context_window(ctx["1h"], ctx_ts["1h"], ts, window),
+            fg, [], deriv, flows, {},
+            intel=_bar_intel(w),
+            candles_4h=_context_window(ctx["4h"], ctx_ts["4h"], ts, window),
+        )
+        assert ACTIONS[scored.action[row]] == s.action
+        assert TIERS[scored.tier[row]] == s.tier
+        assert scored.confidence[row] == s.confidence
+        assert {1: "LONG", -1: "SHORT", 0: "NEUTRAL"}[scored.direction[row]] == s.direction
+        assert scored.rr[row] == s.rr_ratio
+        assert scored.invalidation[row] == s.invalidation
+        assert scored.tp1[row] == s.tp1
+
+
+def test_params_override_changes_decisions_without_rebuilding(random_walk):
+    c5 = random_walk(200, seed=3)
+    table = build_features(c5, "5m", {"15m": _aggregate(c5, 3), "1h": _aggregate(c5, 12)})
+    base = score_table(table)
+    strict = score_table(table, {"TIMEFRAME_RULES": {"5m": {"min_rr": 99.0, "trade_long": 999, "trade_short": 999,
+                                                            "watch_long": 999, "watch_short": 999}}})
+    assert ACTIONS.index("TRADE") not in strict.action
+    assert list(base.direction) == list(strict.direction)
+
+    m = simulate_trades(table, base)
+    assert m.bars == len(table)
+    assert m.trades <= m.signals
+    assert m.max_drawdown_r >= 0.0
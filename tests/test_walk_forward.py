@@ -0,0 +1,44 @@
+import pytest
+
+from tools.param_sweep import build_params
+from tools.replay import _aggregate
+from tools.vector_backtest import build_features, score_table, simulate_trades
+from tools.walk_forward import efficiency, make_folds, optimize_fold, walk_forward
+
+
+def test_make_folds_roll_without_oos_overlap():
+    folds = make_folds(1000, 400, 200)
+    assert folds == [((0, 400), (400, 600)), ((200, 600), (600, 800)), ((400, 800), (800, 1000))]
+    assert make_folds(500, 400, 200) == []
+    assert make_folds(1000, 400, 200, step=300) == [((0, 400), (400, 600)), ((300, 700), (700, 900))]
+    with pytest.raises(ValueError):
+        make_folds(1000, 400, 200, step=100)
+
+
+def test_efficiency_is_undefined_when_is_expectancy_averages_to_zero():
+    assert efficiency(0.2, [0.5, -0.5]) is None
+    assert efficiency(0.2, []) is None
+    assert efficiency(0.2, [0.4, 0.4]) == 0.5
+
+
+def test_walk_forward_stitches_oos_folds(random_walk):
+    c5 = random_walk(300, seed=4)
+    table = build_features(c5, "5m", {"15m": _aggregate(c5, 3), "1h": _aggregate(c5, 12)})
+    grid = {"TIMEFRAME_RULES.5m.trade_long": [40, 49, 60]}
+
+    report = walk_forward(table, grid, is_bars=120, oos_bars=60, min_trades=1, workers=2)
+    folds = report["folds"]
+    assert len(folds) == len(make_folds(len(table), 120, 60))
+    stitched = [r for f in folds for r in f["oos_returns"]]
+    assert report["oos"]["trades"] == len(stitched)
+    assert report["oos_equity_r"][-1:] == ([round(sum(stitched), 4)] if stitched else [])
+
+    # the parallel result matches optimising a fold in-process
+    f0 = folds[0]
+    local = optimize_fold(table, 0, tuple(f0["is_range"]), tuple(f0["oos_range"]),
+                          [{"TIMEFRAME_RULES.5m.trade_long": v} for v in (40, 49, 60)], min_trades=1)
+    assert local.overrides == f0["overrides"]
+    assert local.oos_returns == f0["oos_returns"]
+    if local.overrides:
+        is_table = table.slice(*local.is_range)
+        assert simulate_trades(is_table, score_table(is_table, build_params(local.overrides))).trades >= 1
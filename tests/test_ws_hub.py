@@ -0,0 +1,171 @@
+import base64
+import json
+import os
+import socket
+import struct
+import sys
+import threading
+import time
+from pathlib import Path
+
+from core.json_delta import apply_delta, diff
+from core.ws_hub import OP_CLOSE, OP_PING, OP_PONG, OP_TEXT, WebSocketHub
+
+sys.path.append(str(Path(__file__).parent.parent / "scripts" / "pid-129"))
+
+
+def _send(sock, opcode, payload=b""):
+    mask = os.urandom(4)
+    masked = bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+    sock.sendall(struct.pack("!BB", 0x80 | opcode, 0x80 | len(payload)) + mask + masked)
+
+
+def _recv_exact(sock, n):
+    buf = b""
+    while len(buf) < n:
+        chunk = sock.recv(n - len(buf))
+        assert chunk, "connection closed"
+        buf += chunk
+    return buf
+
+
+def _recv(sock):
+    b1, b2 = _recv_exact(sock, 2)
+    length = b2 & 0x7F
+    if length == 126:
+        (length,) = struct.unpack("!H", _recv_exact(sock, 2))
+    elif length == 127:
+        (length,) = struct.unpack("!Q", _recv_exact(sock, 8))
+    return b1 & 0x0F, _recv_exact(sock, length)
+
+
+def _msg(sock):
+    opcode, payload = _recv(sock)
+    assert opcode == OP_TEXT
+    return json.loads(payload)
+
+
+def test_broadcast_once_per_version_and_control_frames():
+    hub = WebSocketHub().start()
+    clients = []
+    for _ in range(3):
+        server_side, client_side = socket.socketpair()
+        client_side.settimeout(5)
+        hub.attach(server_side)
+        clients.append(client_side)
+    deadline = time.monotonic() + 5
+    while len(hub.clients) < 3 and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    assert hub.publish(json.dumps({"v": 1}), 1)
+    assert not hub.publish(json.dumps({"v": 1}), 1)  # same version: nothing sent
+    for c in clients:
+        assert _msg(c) == {"type": "snapshot", "seq": 1, "data": {"v": 1}}
+
+    _send(clients[0], OP_PING, b"hi")
+    assert _recv(clients[0]) == (OP_PONG, b"hi")
+
+    _send(clients[1], OP_CLOSE, struct.pack("!H", 1000))
+    assert _recv(clients[1])[0] == OP_CLOSE
+    deadline = time.monotonic() + 5
+    while len(hub.clients) > 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert len(hub.clients) == 2
+
+    hub.publish(json.dumps({"v": 2}), 2, delta=json.dumps(diff({"v": 1}, {"v": 2})))
+    assert _msg(clients[2]) == {"type": "delta", "seq": 2, "base": 1, "ops": {"set": [[["v"], 2]], "del": []}}
+    assert hub.stats()["frames_built"] == 3
+    for c in clients:
+        c.close()
+    hub.stop()
+
+
+def test_late_joiner_gets_latest_frame_and_slow_clients_skip_versions():
+    hub = WebSocketHub().start()
+    hub.publish('"old"', 1)
+    hub.publish('"new"', 2)
+    server_side, client_side = socket.socketpair()
+    client_side.settimeout(5)
+    hub.attach(server_side)
+    assert _msg(client_side)["data"] == "new"
+
+    # A client that never reads only ever holds the newest pending frame
+    big = "x" * 200_000
+    for v in range(3, 40):
+        hub.publish(json.dumps([v, big]), v)
+    time.sleep(0.2)
+    assert hub.stats()["skipped"] > 0
+    client_side.close()
+    hub.stop()
+
+
+def test_dashboard_hands_upgraded_sockets_to_the_hub(monkeypatch):
+    import dashboard_server as ds
+
+    hub = WebSocketHub().start()
+    monkeypatch.setattr(ds, "_HUB", hub)
+    monkeypatch.setattr(ds, "_CACHED_DATA", {})
+    server = ds.DashboardServer(("127.0.0.1", 0), ds.DashboardHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        alerts = [{"alert_id": f"a{i}", "confidence": 70} for i in range(50)]
+        ds._set_cache({"portfolio": {"balance": 1.0}, "alerts": alerts})
+        sock = socket.create_connection(server.server_address, timeout=5)
+        key = base64.b64encode(os.urandom(16)).decode()
+        sock.sendall((f"GET /ws HTTP/1.1\r\nHost: x\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                      f"Sec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n\r\n").encode())
+        head = b""
+        while not head.endswith(b"\r\n\r\n"):
+            head += sock.recv(1)
+        assert head.startswith(b"HTTP/1.1 101")
+        first = _msg(sock)
+        assert first["type"] == "snapshot" and first["data"]["portfolio"] == {"balance": 1.0}
+
+        ds._set_cache({"portfolio": {"balance": 2.0}, "alerts": alerts})
+        delta = _msg(sock)
+        assert delta["type"] == "delta" and delta["base"] == first["seq"]
+        assert delta["ops"] == {"set": [[["portfolio", "balance"], 2.0]], "del": []}
+        assert len(hub.clients) == 1
+
+        # An identical rebuild is not a new version
+        ds._set_cache({"portfolio": {"balance": 2.0}, "alerts": alerts})
+        assert hub.stats()["version"] == delta["seq"]
+        sock.close()
+    finally:
+        server.shutdown()
+        server.server_close()
+        hub.stop()
+
+
+def test_client_resyncs_after_a_gap_and_deltas_rebuild_the_state():
+    hub = WebSocketHub().start()
+    server_side, client_side = socket.socketpair()
+    client_side.settimeout(5)
+    hub.attach(server_side)
+    states = [{"price": 1.0, "alerts": [1], "stats": {"wr": 0.5, "n": 2}},
+              {"price": 2.0, "alerts": [1], "stats": {"wr": 0.5, "n": 2}},
+              {"price": 2.0, "alerts": [1, 2], "stats": {"n": 3}}]
+    hub.publish(json.dumps(states[0]), 1)
+    msg = _msg(client_side)
+    state, seq = msg["data"], msg["seq"]
+    for v, (old, new) in enumerate(zip(states, states[1:]), 2):
+        hub.publish(json.dumps(new), v, delta=json.dumps(diff(old, new)))
+        msg = _msg(client_side)
+        assert msg["type"] == "delta" and msg["base"] == seq
+        state, seq = apply_delta(state, msg["ops"]), msg["seq"]
+        assert state == new
+
+    _send(client_side, OP_TEXT, json.dumps({"type": "resync"}).encode())
+    msg = _msg(client_side)
+    assert msg["type"] == "snapshot" and msg["data"] == states[-1] and hub.stats()["resyncs"] == 1
+    client_side.close()
+    hub.stop()
+
+
+def test_diff_round_trips_nested_changes():
+    old = {"a": 1, "b": {"c": [1, 2], "d": "x", "z": 1}, "gone": 3}
+    new = {"a": 2, "b": {"c": [1, 2, 3], "d": "x", "e": {"f": 1}}, "n": None}
+    ops = diff(old, new)
+    assert ["b", "d"] not in [path for path, _ in ops["set"]]
+    assert apply_delta(json.loads(json.dumps(old)), ops) == new
+    assert diff(new, new) == {"set": [], "del": []}
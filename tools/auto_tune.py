@@ -14,35 +14,28 @@ import sys
 from datetime import datetime, timezone, timedelta
 from pathlib import Path
 
+from core.alert_store import open_store
+from core.rollups import open_rollups
+
 BASE_DIR = Path(__file__).resolve().parent.parent
 ALERTS_FILE = BASE_DIR / "logs" / "pid-129-alerts.jsonl"
+ROLLUPS_FILE = BASE_DIR / "data" / "rollups.json"
 CONFIG_FILE = BASE_DIR / "config.py"
 TUNE_LOG = BASE_DIR / "logs" / "auto_tune.jsonl"
 
 
 def _load_resolved(days=7):
-    """Load resolved alerts from the last N days."""
+    """Outcome totals (resolved, wins, losses, total_r) of alerts from the last N days."""
+    empty = {"resolved": 0, "wins": 0, "losses": 0, "total_r": 0.0}
     if not ALERTS_FILE.exists():
-        return []
+        return empty
     cutoff = datetime.now(timezone.utc) - timedelta(days=days)
-    resolved = []
     try:
-        content = ALERTS_FILE.read_text(encoding="utf-8").strip()
-        for line in content.split("\n"):
-            if not line.strip():
-                continue
-            try:
-                a = json.loads(line)
-                if not a.get("resolved"):
-                    continue
-                ts = datetime.fromisoformat(a["timestamp"].replace("Z", "+00:00"))
-                if ts >= cutoff:
-                    resolved.append(a)
-            except (json.JSONDecodeError, KeyError):
-                continue
+        rollups = open_rollups(ROLLUPS_FILE)
+        rollups.sync(open_store(ALERTS_FILE))
+        return rollups.window(cutoff.timestamp()).totals
     except Exception:
-        pass
-    return resolved
+        return empty
 
 
 def _current_thresholds():
@@ -121,7 +114,8 @@ def main():
     parser.add_argument("--force", action="store_true", help="Tune even if data is thin")
     args = parser.parse_args()
 
-    resolved = _load_resolved(args.days)
+    totals = _load_resolved(args.days)
+    resolved = totals["resolved"]
     rules = _current_thresholds()
 
     if not rules:
@@ -129,21 +123,19 @@ def main():
         return
 
     print(f"=== AUTO-TUNER ===")
-    print(f"Resolved trades (last {args.days}d): {len(resolved)}")
+    print(f"Resolved trades (last {args.days}d): {resolved}")
 
     # Not enough data to tune
     min_data = 1 if args.force else 5
-    if len(resolved) < min_data:
+    if resolved < min_data:
         print(f"Not enough resolved trades to tune. Need >= {min_data}. Skipping.")
-        _log_tune("SKIP", {"reason": "insufficient_data", "resolved_count": len(resolved)})
+        _log_tune("SKIP", {"reason": "insufficient_data", "resolved_count": resolved})
         return
 
     # Calculate metrics
-    wins = [a for a in resolved if a.get("outcome", "").startswith("WIN")]
-    losses = [a for a in resolved if a.get("outcome") == "LOSS"]
-    win_rate = (len(wins) / len(resolved) * 100) if resolved else 0
-    total_r = sum(a.get("r_multiple", 0) for a in resolved)
-    avg_r = (total_r / len(resolved)) if resolved else 0
+    win_rate = (totals["wins"] / resolved * 100) if resolved else 0
+    total_r = totals["total_r"]
+    avg_r = (total_r / resolved) if resolved else 0
 
     print(f"Win rate: {win_rate:.1f}%")
     print(f"Total R: {total_r:+.2f}")
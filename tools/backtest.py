@@ -9,6 +9,7 @@ import os
 import sys
 import time
 from datetime import datetime, timezone
+from pathlib import Path
 
 from collectors.base import BudgetManager
 from collectors.price import _fetch_kraken_ohlc, PriceSnapshot
@@ -18,6 +19,7 @@ from collectors.flows import FlowSnapshot
 from engine import compute_score
 from intelligence import IntelligenceBundle
 from intelligence.squeeze import detect_squeeze
+from tools.history_store import latest_candles
 
 logger = logging.getLogger(__name__)
 
@@ -90,13 +92,17 @@ def main():
     parser = argparse.ArgumentParser(description="BTC Alert Historical Backtest")
     parser.add_argument("--limit", type=int, default=500, help="Number of 1h candles")
     parser.add_argument("--output", type=str, default="reports/backtest_results.csv")
+    parser.add_argument("--store", type=str, help="Read candles from a tools/history_store.py warehouse")
     args = parser.parse_args()
 
-    bm = BudgetManager(".backtest_budget.json")
-
-    print(f"Fetching {args.limit} 1h candles from Kraken...")
-    # interval=60 for 1h candles
-    candles = _fetch_kraken_ohlc(bm, interval=60, limit=args.limit)
+    if args.store:
+        print(f"Loading {args.limit} 1h candles from {args.store}...")
+        candles = latest_candles("1h", args.limit, Path(args.store))
+    else:
+        bm = BudgetManager(".backtest_budget.json")
+        print(f"Fetching {args.limit} 1h candles from Kraken...")
+        # interval=60 for 1h candles
+        candles = _fetch_kraken_ohlc(bm, interval=60, limit=args.limit)
 
     if len(candles) < 50:
         print(f"ERROR: Only got {len(candles)} candles. Need >= 50.")
@@ -1,6 +1,9 @@
 import json
 import os
-from collections import defaultdict
+
+from core.alert_store import open_store
+from core.aggregates import CONFIDENCE_BINS
+from core.rollups import open_rollups
 
 def generate_calibration_report():
     log_file = "logs/pid-129-alerts.jsonl"
@@ -9,45 +12,20 @@ def generate_calibration_report():
     if not os.path.exists("reports"):
         os.makedirs("reports")
 
-    # Bins: 0-20, 21-40, 41-60, 61-80, 81-100
-    bins = [
-        (0, 20),
-        (21, 40),
-        (41, 60),
-        (61, 80),
-        (81, 100)
-    ]
-    
-    stats = {f"{b[0]}-{b[1]}": {"count": 0, "wins": 0, "total_r": 0.0} for b in bins}
-    
     if not os.path.exists(log_file):
         print(f"Error: {log_file} not found.")
         return
 
-    with open(log_file, "r") as f:
-        for line in f:
-            try:
-                alert = json.loads(line)
-                if alert.get("outcome") is None or not alert.get("resolved", False):
-                    continue
-                
-                conf = alert.get("confidence", 0)
-                r_multiple = alert.get("r_multiple", 0.0)
-                
-                # Find bin
-                bin_key = None
-                for b in bins:
-                    if b[0] <= conf <= b[1]:
-                        bin_key = f"{b[0]}-{b[1]}"
-                        break
-                
-                if bin_key:
-                    stats[bin_key]["count"] += 1
-                    stats[bin_key]["total_r"] += r_multiple
-                    if r_multiple > 0:
-                        stats[bin_key]["wins"] += 1
-            except (json.JSONDecodeError, KeyError):
-                continue
+    # All-time outcomes per confidence bin (0-20, 21-40, 41-60, 61-80, 81-100),
+    # summed from the daily rollup buckets rather than re-reading the log
+    rollups = open_rollups("data/rollups.json")
+    rollups.sync(open_store(log_file))
+    by_conf = rollups.window().by("confidence")
+    stats = {}
+    for lo, hi in CONFIDENCE_BINS:
+        b = by_conf.get(f"{lo}-{hi}", {})
+        stats[f"{lo}-{hi}"] = {"count": b.get("resolved", 0), "wins": b.get("positive", 0),
+                               "total_r": b.get("total_r", 0.0)}
 
     # Compute averages and print table
     print(f"{'Bin':<10} | {'Count':<6} | {'Win Rate':<10} | {'Avg R':<10} | {'Total R':<10}")
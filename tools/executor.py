@@ -3,34 +3,80 @@ import json
 import os
 from pathlib import Path
 from typing import Dict, Any, Optional
-from datetime import datetime
+from datetime import datetime, timedelta
 
+from core.portfolio_journal import PortfolioJournal
+from core.snapshot_bus import read_snapshot
 
 PAPER_PORTFOLIO_PATH = Path("data/paper_portfolio.json")
 EXECUTION_LOG_PATH = Path("logs/execution_log.jsonl")
 DISABLED_FLAG = Path("DISABLED")
 MARKET_CACHE_PATH = Path("data/market_cache.json")
+EXECUTION_MAX_AGE = timedelta(hours=24)  # paper fills still open after this are expired
 
 
 def _load_portfolio() -> dict:
-    if PAPER_PORTFOLIO_PATH.exists():
-        return json.loads(PAPER_PORTFOLIO_PATH.read_text(encoding="utf-8"))
-    return {"peak_balance": 10000, "max_drawdown": 0, "positions": [], "closed_trades": [], "balance": 10000}
+    return PortfolioJournal(PAPER_PORTFOLIO_PATH).load()
 
 
-def _save_portfolio(portfolio: dict) -> None:
-    PAPER_PORTFOLIO_PATH.write_text(json.dumps(portfolio, indent=2), encoding="utf-8")
+def _record_open(position: dict) -> None:
+    """Journal a paper fill. It goes to the portfolio's "executions" list, not
+    "positions": the paper trader loads those as its own Position records."""
+    PortfolioJournal(PAPER_PORTFOLIO_PATH).append({"type": "execution", "position": position})
+
+
+def _settle_executions(portfolio: dict, cache: Optional[dict] = None) -> None:
+    """Close paper fills whose stop or target has traded at the current mid,
+    or that are older than EXECUTION_MAX_AGE, and drop them from portfolio."""
+    mid = _mid_price(cache)
+    now = datetime.utcnow()
+    still_open = []
+    for pos in portfolio.get("executions", []):
+        reason = None
+        sl, tp = pos.get("invalidation"), pos.get("tp1")
+        if mid and sl and tp:
+            long = pos.get("direction") == "LONG"
+            if (mid <= sl) if long else (mid >= sl):
+                reason = "sl"
+            elif (mid >= tp) if long else (mid <= tp):
+                reason = "tp1"
+        if reason is None:
+            try:
+                opened = datetime.fromisoformat(pos.get("opened_at", ""))
+            except (TypeError, ValueError):
+                opened = None  # legacy fill without a usable timestamp
+            if opened is None or now - opened.replace(tzinfo=None) > EXECUTION_MAX_AGE:
+                reason = "expired"
+        if reason is None:
+            still_open.append(pos)
+            continue
+        PortfolioJournal(PAPER_PORTFOLIO_PATH).append(
+            {"type": "execution_close", "id": pos.get("id"), "reason": reason, "price": mid})
+    portfolio["executions"] = still_open
 
 
 def _load_market_cache() -> dict:
+    # Top of book from the shared-memory snapshot app.py publishes; the JSON
+    # file is only a fallback for setups that still write it
+    snap = read_snapshot(with_extra=False)
+    if snap is not None and snap.as_market_cache():
+        return snap.as_market_cache()
     if MARKET_CACHE_PATH.exists():
         return json.loads(MARKET_CACHE_PATH.read_text(encoding="utf-8"))
     return {}
 
 
-def _get_spread_pct() -> float:
+def _mid_price(cache: Optional[dict] = None) -> float:
+    try:
+        ob = (cache or {}).get("orderbook", {})
+        return (float(ob["bids"][0][0]) + float(ob["asks"][0][0])) / 2.0
+    except (KeyError, IndexError, TypeError, ValueError):
+        return 0.0
+
+
+def _get_spread_pct(cache: Optional[dict] = None) -> float:
     try:
-        cache = _load_market_cache()
+        cache = _load_market_cache() if cache is None else cache
         if cache and "orderbook" in cache:
             ob = cache["orderbook"]
             bid = ob.get("bids", [0])[0]
@@ -42,13 +88,13 @@ def _get_spread_pct() -> float:
     return 0.0
 
 
-def _execution_micro_mode() -> str:
+def _execution_micro_mode(cache: Optional[dict] = None) -> str:
     """
     Real micro-spread defense mode from cached orderbook:
     FAST | DEFENSIVE | BLOCKED
     """
     try:
-        cache = _load_market_cache()
+        cache = _load_market_cache() if cache is None else cache
         ob = cache.get("orderbook", {}) if isinstance(cache, dict) else {}
         bids = ob.get("bids", []) if isinstance(ob, dict) else []
         asks = ob.get("asks", []) if isinstance(ob, dict) else []
@@ -105,7 +151,8 @@ def _check_circuit_breaker(portfolio: dict) -> bool:
 def _check_position_cap(portfolio: dict) -> bool:
     """Return True if under cap, False if max positions reached."""
     MAX_OPEN_POSITIONS = 3
-    open_count = len(portfolio.get("positions", [])) # 'positions' are open trades in this codebase
+    # Paper trader positions plus the executor's own open fills
+    open_count = len(portfolio.get("positions", [])) + len(portfolio.get("executions", []))
     if open_count >= MAX_OPEN_POSITIONS:
         print(f"POSITION CAP: {open_count} open, max = {MAX_OPEN_POSITIONS}. Skipping.")
         return False
@@ -132,6 +179,8 @@ def execute_trade(alert: dict, mode: str = "PAPER") -> dict:
         return {"status": "REJECTED", "reason": "operator off", "order_id": "", "fill_price": 0.0}
     
     portfolio = _load_portfolio()
+    market = _load_market_cache()
+    _settle_executions(portfolio, market)
 
     # Phase 30: Circuit Breakers
     if not _check_circuit_breaker(portfolio):
@@ -149,8 +198,8 @@ def execute_trade(alert: dict, mode: str = "PAPER") -> dict:
     else:
         size = base_usdt
     
-    spread_pct = _get_spread_pct()
-    micro_mode = _execution_micro_mode()
+    spread_pct = _get_spread_pct(market)
+    micro_mode = _execution_micro_mode(market)
     if micro_mode == "BLOCKED":
         return {"status": "REJECTED", "reason": "micro-spread defense blocked", "order_id": "", "fill_price": 0.0}
     use_limit = (micro_mode == "DEFENSIVE") or (spread_pct > 0.0015)
@@ -170,8 +219,7 @@ def execute_trade(alert: dict, mode: str = "PAPER") -> dict:
             "opened_at": timestamp,
             "status": "open"
         }
-        portfolio["positions"].append(position)
-        _save_portfolio(portfolio)
+        _record_open(position)
         
         _log_execution({
             "timestamp": timestamp,
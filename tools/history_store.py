@@ -0,0 +1,374 @@
+"""
+Local kline warehouse: bulk download and fast loading of historical candles.
+
+Each (venue, timeframe) series is paged backwards from the last closed bar
+through the venue's kline API, inside the shared BudgetManager limits, and
+stored as one columnar file per UTC month:
+
+    data/history/<venue>/<timeframe>/<YYYY-MM>.bin
+
+A file is a JSON header line padded to 8 bytes followed by the ts/open/high/
+low/close/volume columns. checkpoint.json next to the partitions records the
+covered range so an interrupted download resumes where it stopped, and a
+re-run only fetches bars newer than the last one stored. Pages are buffered
+per month and each partition is written once the pager has moved past it,
+rather than rewritten for every page.
+
+Usage: PYTHONPATH=. python tools/history_store.py --venues bybit binance --timeframes 5m 1h --days 90
+"""
+import argparse
+import json
+import logging
+import mmap
+import os
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from collectors.base import BudgetManager, request_json
+from utils import Candle
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ROOT = Path("data/history")
+# Own budget file: bulk back-fills must not rewrite or race the live engine's .mvp_budget.json
+BUDGET_PATH = ".history_budget.json"
+VENUES = ("bybit", "binance", "kraken")
+TF_SECONDS = {"5m": 300, "15m": 900, "1h": 3600, "4h": 14400}
+INTERVALS = {
+    "bybit": {"5m": "5", "15m": "15", "1h": "60", "4h": "240"},
+    "binance": {"5m": "5m", "15m": "15m", "1h": "1h", "4h": "4h"},
+    "kraken": {"5m": 5, "15m": 15, "1h": 60, "4h": 240},
+}
+COLUMNS = (("ts", "q"), ("open", "d"), ("high", "d"), ("low", "d"), ("close", "d"), ("volume", "d"))
+PAGE_SIZE = 1000
+
+
+# ---------------------------------------------------------------------------
+# Venue pagers: every page is ascending and holds bars opening at or before end_ts
+# ---------------------------------------------------------------------------
+
+def _page_bybit(timeframe: str, end_ts: int) -> List[Candle]:
+    payload = request_json(
+        "https://api.bybit.com/v5/market/kline",
+        params={"category": "spot", "symbol": "BTCUSDT", "interval": INTERVALS["bybit"][timeframe],
+                "end": end_ts * 1000, "limit": PAGE_SIZE},
+        timeout=10,
+    )
+    rows = payload.get("result", {}).get("list", [])
+    return [Candle(str(int(r[0]) // 1000), float(r[1]), float(r[2]), float(r[3]), float(r[4]), float(r[5]))
+            for r in reversed(rows)]
+
+
+def _page_binance(timeframe: str, end_ts: int) -> List[Candle]:
+    rows = request_json(
+        "https://api.binance.com/api/v3/klines",
+        params={"symbol": "BTCUSDT", "interval": INTERVALS["binance"][timeframe],
+                "endTime": end_ts * 1000 + 999, "limit": PAGE_SIZE},
+        timeout=10,
+    )
+    return [Candle(str(int(r[0]) // 1000), float(r[1]), float(r[2]), float(r[3]), float(r[4]), float(r[5]))
+            for r in rows]
+
+
+def _page_kraken(timeframe: str, end_ts: int) -> List[Candle]:
+    # Kraken only serves the most recent 720 bars per interval, whatever `since` says;
+    # the pager stops once a page brings nothing older.
+    payload = request_json(
+        "https://api.kraken.com/0/public/OHLC",
+        params={"pair": "XXBTZUSD", "interval": INTERVALS["kraken"][timeframe]},
+        timeout=10,
+    )
+    rows = payload["result"].get("XXBTZUSD", [])
+    return [Candle(str(r[0]), float(r[1]), float(r[2]), float(r[3]), float(r[4]), float(r[6])) for r in rows]
+
+
+PAGERS: Dict[str, Callable[[str, int], List[Candle]]] = {
+    "bybit": _page_bybit,
+    "binance": _page_binance,
+    "kraken": _page_kraken,
+}
+
+
+# ---------------------------------------------------------------------------
+# Columnar partitions
+# ---------------------------------------------------------------------------
+
+def _month(ts: int) -> str:
+    return datetime.fromtimestamp(ts, tz=timezone.utc).strftime("%Y-%m")
+
+
+def _series_dir(root: Path, venue: str, timeframe: str) -> Path:
+    return Path(root) / venue / timeframe
+
+
+def write_partition(path: Path, meta: Dict, columns: Dict[str, array]) -> None:
+    """Atomically write one partition file."""
+    meta = dict(meta, rows=len(columns["ts"]), columns=[list(c) for c in COLUMNS])
+    header = json.dumps(meta).encode() + b"\n"
+    header += b" " * (-len(header) % 8)
+    tmp = path.with_suffix(".tmp")
+    with open(tmp, "wb") as f:
+        f.write(header)
+        for name, _ in COLUMNS:
+            raw = columns[name].tobytes()
+            f.write(raw + b"\0" * (-len(raw) % 8))
+    os.replace(tmp, path)
+
+
+def map_partition(path: Path) -> Tuple[Dict, Dict[str, memoryview]]:
+    """Memory-map a partition; the returned columns are views into the mapping."""
+    with open(path, "rb") as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    end = mm.find(b"\n")
+    meta = json.loads(mm[:end])
+    offset = end + 1 + (-(end + 1) % 8)
+    view = memoryview(mm)
+    cols = {}
+    for name, code in meta["columns"]:
+        size = array(code).itemsize * meta["rows"]
+        cols[name] = view[offset:offset + size].cast(code)
+        offset += size + (-size % 8)
+    return meta, cols
+
+
+def merge_candles(root: Path, venue: str, timeframe: str, candles: List[Candle]) -> int:
+    """Upsert candles into their month partitions; returns rows added."""
+    by_month: Dict[str, List[Candle]] = {}
+    for c in candles:
+        by_month.setdefault(_month(int(c.ts)), []).append(c)
+    series = _series_dir(root, venue, timeframe)
+    series.mkdir(parents=True, exist_ok=True)
+    added = 0
+    for month, rows in by_month.items():
+        path = series / f"{month}.bin"
+        merged: Dict[int, Tuple[float, ...]] = {}
+        if path.exists():
+            _, cols = map_partition(path)
+            for row in zip(cols["ts"], cols["open"], cols["high"], cols["low"], cols["close"], cols["volume"]):
+                merged[row[0]] = row[1:]
+            for col in cols.values():
+                col.release()
+        before = len(merged)
+        for c in rows:
+            merged[int(c.ts)] = (c.open, c.high, c.low, c.close, c.volume)
+        added += len(merged) - before
+        out = {name: array(code) for name, code in COLUMNS}
+        for ts in sorted(merged):
+            out["ts"].append(ts)
+            for (name, _), value in zip(COLUMNS[1:], merged[ts]):
+                out[name].append(value)
+        write_partition(path, {"venue": venue, "timeframe": timeframe, "month": month}, out)
+    return added
+
+
+# ---------------------------------------------------------------------------
+# Loader
+# ---------------------------------------------------------------------------
+
+@dataclass
+class HistorySeries:
+    venue: str
+    timeframe: str
+    columns: Dict[str, array]
+
+    def __len__(self) -> int:
+        return len(self.columns["ts"])
+
+    def candles(self) -> List[Candle]:
+        c = self.columns
+        return [Candle(str(ts), o, h, l, cl, v)
+                for ts, o, h, l, cl, v in zip(c["ts"], c["open"], c["high"], c["low"], c["close"], c["volume"])]
+
+
+def load_history(
+    venue: str,
+    timeframe: str,
+    start: Optional[int] = None,
+    end: Optional[int] = None,
+    root: Path = DEFAULT_ROOT,
+) -> HistorySeries:
+    """Map the month partitions covering [start, end] and join their columns."""
+    series = _series_dir(root, venue, timeframe)
+    lo = _month(start) if start is not None else ""
+    hi = _month(end) if end is not None else "9999-99"
+    cols = {name: array(code) for name, code in COLUMNS}
+    for path in sorted(series.glob("*.bin")) if series.exists() else []:
+        if not lo <= path.stem <= hi:
+            continue
+        _, mapped = map_partition(path)
+        for name, view in mapped.items():
+            cols[name].frombytes(view.cast("B"))
+            view.release()
+    ts = cols["ts"]
+    i = bisect_left(ts, start) if start is not None else 0
+    j = bisect_right(ts, end) if end is not None else len(ts)
+    if i or j < len(ts):
+        cols = {name: col[i:j] for name, col in cols.items()}
+    return HistorySeries(venue, timeframe, cols)
+
+
+def latest_candles(timeframe: str, limit: int, root: Path = DEFAULT_ROOT) -> List[Candle]:
+    """Most recent `limit` stored bars from whichever venue holds the most."""
+    best: Optional[HistorySeries] = None
+    for venue in VENUES:
+        s = load_history(venue, timeframe, root=root)
+        if best is None or len(s) > len(best):
+            best = s
+    if best is None or not len(best):
+        return []
+    return best.candles()[-limit:]
+
+
+# ---------------------------------------------------------------------------
+# Downloader
+# ---------------------------------------------------------------------------
+
+def _load_checkpoint(root: Path, venue: str, timeframe: str) -> Dict:
+    path = _series_dir(root, venue, timeframe) / "checkpoint.json"
+    try:
+        return json.loads(path.read_text())
+    except Exception:
+        return {}
+
+
+def _save_checkpoint(root: Path, venue: str, timeframe: str, ck: Dict) -> None:
+    path = _series_dir(root, venue, timeframe) / "checkpoint.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(ck))
+    os.replace(tmp, path)
+
+
+def _wait_for_budget(budget: BudgetManager, venue: str, poll: float = 1.0) -> None:
+    while not budget.try_acquire(venue):
+        time.sleep(poll)
+
+
+def _fill(
+    venue: str, timeframe: str, hi: int, lo: int, root: Path, budget: BudgetManager,
+    on_write: Optional[Callable[[int, int], None]] = None,
+) -> Tuple[int, bool]:
+    """Page backwards from bar hi down to bar lo. Returns (rows added, history exhausted).
+
+    Pages are held per month until the pager is past that month, so each
+    partition is written once; on_write(oldest, newest) follows every write.
+    Whatever is buffered is also written if a page fails.
+    """
+    step = TF_SECONDS[timeframe]
+    pager = PAGERS[venue]
+    pending: Dict[str, List[Candle]] = {}
+    added = 0
+
+    def _flush(months: List[str]) -> None:
+        nonlocal added
+        rows = [c for month in months for c in pending.pop(month)]
+        added += merge_candles(root, venue, timeframe, rows)
+        if on_write:
+            ts = [int(c.ts) for c in rows]
+            on_write(min(ts), max(ts))
+
+    cursor = hi
+    exhausted = False
+    try:
+        while cursor >= lo:
+            _wait_for_budget(budget, venue)
+            page = [c for c in pager(timeframe, cursor) if lo <= int(c.ts) <= cursor]
+            if not page:
+                exhausted = True
+                break
+            for c in page:
+                pending.setdefault(_month(int(c.ts)), []).append(c)
+            oldest = int(page[0].ts)
+            done = [month for month in pending if month > _month(oldest)]
+            if done:
+                _flush(done)
+            cursor = oldest - step
+    finally:
+        if pending:
+            _flush(list(pending))
+    return added, exhausted
+
+
+def download_series(
+    venue: str,
+    timeframe: str,
+    since: int,
+    root: Path = DEFAULT_ROOT,
+    budget: Optional[BudgetManager] = None,
+    now: Optional[float] = None,
+) -> int:
+    """Bring one series up to the last closed bar and back-fill it to `since`."""
+    budget = budget or BudgetManager(BUDGET_PATH)
+    step = TF_SECONDS[timeframe]
+    now = time.time() if now is None else now
+    last_closed = (int(now) // step - 1) * step
+    since = since // step * step
+    ck = _load_checkpoint(root, venue, timeframe)
+    added = 0
+
+    try:
+        # 1) Catch up on bars newer than the stored range. The checkpoint only
+        #    moves once the gap is closed, so an interrupted run redoes it.
+        if ck and ck["newest"] < last_closed:
+            n, _ = _fill(venue, timeframe, last_closed, ck["newest"] + step, root, budget)
+            added += n
+            ck["newest"] = last_closed
+            _save_checkpoint(root, venue, timeframe, ck)
+
+        # 2) Back-fill older history, checkpointing after every partition write.
+        if not ck:
+            ck = {"oldest": last_closed + step, "newest": last_closed, "exhausted": False}
+        if ck["oldest"] > since and not ck.get("exhausted"):
+            def _advance(oldest: int, newest: int) -> None:
+                ck["oldest"] = min(ck["oldest"], oldest)
+                _save_checkpoint(root, venue, timeframe, ck)
+
+            n, exhausted = _fill(venue, timeframe, ck["oldest"] - step, since, root, budget, _advance)
+            added += n
+            if exhausted:
+                ck["exhausted"] = True
+                _save_checkpoint(root, venue, timeframe, ck)
+    except Exception as exc:
+        logger.error(f"History download failed for {venue} {timeframe}: {exc}")
+    return added
+
+
+def download(
+    venues: List[str],
+    timeframes: List[str],
+    since: int,
+    root: Path = DEFAULT_ROOT,
+    workers: int = 4,
+) -> Dict[str, int]:
+    """Download every (venue, timeframe) series concurrently under one budget."""
+    budget = BudgetManager(BUDGET_PATH)
+    jobs = [(v, tf) for v in venues for tf in timeframes]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {f"{v}/{tf}": pool.submit(download_series, v, tf, since, root, budget) for v, tf in jobs}
+        return {key: fut.result() for key, fut in futures.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Download and store historical klines")
+    parser.add_argument("--venues", nargs="+", default=["bybit", "binance"], choices=list(VENUES))
+    parser.add_argument("--timeframes", nargs="+", default=["5m", "15m", "1h", "4h"], choices=list(TF_SECONDS))
+    parser.add_argument("--days", type=int, default=90, help="How far back to back-fill")
+    parser.add_argument("--root", type=str, default=str(DEFAULT_ROOT))
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    since = int(time.time()) - args.days * 86400
+    for key, added in download(args.venues, args.timeframes, since, Path(args.root), args.workers).items():
+        venue, tf = key.split("/")
+        print(f"{key:<14} +{added:<7} stored: {len(load_history(venue, tf, root=Path(args.root)))}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,17 @@
 #!/usr/bin/env python3
-import json
 import logging
 import time
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple, Union
 
 from collectors.base import BudgetManager
-from collectors.price import fetch_btc_price
+from collectors.price import PriceSnapshot
+from collectors.service import collect
+from config import OUTCOME_RESOLUTION
+from core import event_bus
+from core.alert_store import open_store
+from utils import Candle
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
@@ -19,52 +23,153 @@ MAX_DURATION = {
     "1h": 48 * 3600   # 48 hours
 }
 
-def resolve_outcomes(alerts_path: str = "logs/pid-129-alerts.jsonl"):
+TF_SECONDS = {"1m": 60, "5m": 300, "15m": 900, "1h": 3600, "4h": 14400}
+
+
+def _levels(alert: Dict) -> Optional[Tuple[int, float, float, float, Optional[float]]]:
+    """(sign, entry, stop, tp1, tp2) for a trackable alert; tp2 is None if unusable."""
+    sign = {"LONG": 1, "SHORT": -1}.get(alert.get("direction"))
+    entry, sl, tp1, tp2 = alert.get("entry_price"), alert.get("invalidation"), alert.get("tp1"), alert.get("tp2")
+    if not sign or not all([entry, tp1, sl]):
+        return None
+    if not (tp2 and (tp2 - entry) * sign > 0):
+        tp2 = None
+    return sign, entry, sl, tp1, tp2
+
+
+def _bar_outcome(sign, entry, sl, tp1, tp2, bar: Candle, same_bar: str) -> Optional[Tuple[str, float]]:
+    """Outcome and fill level if this bar touches the stop or a target."""
+    high, low = bar.high, bar.low
+    hit_stop = low <= sl if sign > 0 else high >= sl
+    target = None
+    if tp2 is not None and (high >= tp2 if sign > 0 else low <= tp2):
+        target = ("WIN_TP2", tp2)
+    elif (tp1 - entry) * sign > 0 and (high >= tp1 if sign > 0 else low <= tp1):
+        target = ("WIN_TP1", tp1)
+    if hit_stop and target:
+        if same_bar == "target_first":
+            return target
+        if same_bar == "open_distance" and abs(bar.open - target[1]) < abs(bar.open - sl):
+            return target
+        return "LOSS", sl
+    if hit_stop:
+        return "LOSS", sl
+    return target
+
+
+def resolve_paths(
+    pending: List[Tuple[int, float, Dict]],
+    candles: List[Candle],
+    timeframe: str,
+    same_bar: str,
+) -> Dict[int, Tuple[str, float, float]]:
+    """Walk the candle path once for every pending alert.
+
+    pending holds (key, start_epoch, alert). Only bars opening at or after an
+    alert's timestamp and before its MAX_DURATION expiry count, since the
+    part of the bar before the alert is unknown. Returns
+    {key: (outcome, fill_price, bar_close_epoch)} for alerts that touched a level.
+    """
+    bar_seconds = TF_SECONDS.get(timeframe, 300)
+    queue = sorted(pending, key=lambda p: p[1])
+    active: List[Tuple[int, float, float, Tuple]] = []
+    hits: Dict[int, Tuple[str, float, float]] = {}
+    q = 0
+    for bar in candles:
+        ts = int(float(bar.ts))
+        while q < len(queue) and queue[q][1] <= ts:
+            key, start, alert = queue[q]
+            q += 1
+            levels = _levels(alert)
+            if levels:
+                active.append((key, start, start + MAX_DURATION.get(alert.get("timeframe"), 24 * 3600), levels))
+        if not active:
+            continue
+        still = []
+        for item in active:
+            key, start, expiry, levels = item
+            if ts >= expiry:
+                continue
+            hit = _bar_outcome(*levels, bar, same_bar)
+            if hit:
+                hits[key] = (hit[0], hit[1], ts + bar_seconds)
+            else:
+                still.append(item)
+        active = still
+    return hits
+
+
+def resolve_outcomes(
+    alerts_path: str = "logs/pid-129-alerts.jsonl",
+    candles: Optional[Dict[str, List[Candle]]] = None,
+    price: Optional[Union[PriceSnapshot, float]] = None,
+    same_bar: Optional[str] = None,
+):
+    """Settle unresolved BTC alerts against the price path since they fired.
+
+    candles maps timeframe -> candles already collected this cycle; the finest
+    series covering an alert's start is walked bar by bar, so wicks through the
+    stop or a target count. price is the cycle's BTC price (fetched only when not
+    given) and settles anything the closed bars have not, plus timeouts.
+    """
+    same_bar = same_bar or OUTCOME_RESOLUTION["same_bar"]
     path = Path(alerts_path)
     if not path.exists():
         logger.warning(f"No alerts file found at {alerts_path}")
         return
 
-    # Load all alerts
-    alerts = []
-    with open(path, "r") as f:
-        for line in f:
-            if line.strip():
-                alerts.append(json.loads(line))
-
-    unresolved = [a for a in alerts if not a.get("resolved")]
-    if not unresolved:
+    # Only the open alerts are read; outcomes are appended as patches
+    store = open_store(path, writable=True)
+    alerts = store.unresolved()
+    if not alerts:
         logger.info("No unresolved alerts to track.")
         return
 
-    logger.info(f"Checking outcomes for {len(unresolved)} unresolved alerts...")
+    logger.info(f"Checking outcomes for {len(alerts)} unresolved alerts...")
     
-    # Fetch current price
-    bm = BudgetManager(".mvp_budget.json")
-    px_snapshot = fetch_btc_price(bm)
-    if not px_snapshot.healthy:
+    # Current price: reuse the cycle's snapshot, only fetch when run standalone
+    if price is None:
+        price = collect("price", BudgetManager(".mvp_budget.json"))
+    if isinstance(price, PriceSnapshot):
+        price = price.price if price.healthy else None
+    series = sorted(((tf, c) for tf, c in (candles or {}).items() if c and tf in TF_SECONDS),
+                    key=lambda item: TF_SECONDS[item[0]])
+    if not price and series:
+        price = series[0][1][-1].close
+    if not price:
         logger.error("Failed to fetch current price for outcome tracking.")
         return
-    
-    current_price = px_snapshot.price
+
+    current_price = price
     now = datetime.now(timezone.utc)
-    
-    updated = False
-    for alert in alerts:
-        if alert.get("resolved"):
+
+    starts: Dict[int, float] = {}
+    for i, alert in enumerate(alerts):
+        if alert.get("symbol") != "BTC" or not alert.get("alert_id"):  # Only BTC for now
             continue
-        
-        # Calculate time elapsed
         try:
-            start_time = datetime.fromisoformat(alert["timestamp"])
-            elapsed = (now - start_time).total_seconds()
+            starts[i] = datetime.fromisoformat(alert["timestamp"]).timestamp()
         except Exception as e:
             logger.error(f"Error parsing timestamp for alert {alert.get('alert_id')}: {e}")
-            continue
 
-        symbol = alert.get("symbol")
-        if symbol != "BTC": # Only BTC for now
+    # Intrabar path: each alert is walked on the finest series that covers its start
+    path_hits: Dict[int, Tuple[str, float, float]] = {}
+    remaining = dict(starts)
+    for tf, tf_candles in series:
+        first_ts = int(float(tf_candles[0].ts))
+        batch = [(i, start, alerts[i]) for i, start in remaining.items() if start >= first_ts]
+        if batch:
+            path_hits.update(resolve_paths(batch, tf_candles, tf, same_bar))
+            for i, _, _ in batch:
+                remaining.pop(i)
+    if remaining and series:
+        coarsest_tf, coarsest = series[-1]
+        path_hits.update(resolve_paths([(i, s, alerts[i]) for i, s in remaining.items()], coarsest, coarsest_tf, same_bar))
+
+    for i, alert in enumerate(alerts):
+        if i not in starts:
             continue
+        elapsed = now.timestamp() - starts[i]
 
         direction = alert.get("direction")
         entry = alert.get("entry_price")
@@ -76,15 +181,20 @@ def resolve_outcomes(alerts_path: str = "logs/pid-129-alerts.jsonl"):
         resolved = False
         outcome = None
         outcome_price = current_price
+        outcome_time = now
         r_multiple = 0.0
 
         # Logic for resolution
-        risk = abs(entry - sl) if abs(entry - sl) > 0 else 1.0
-        
         if not all([entry, tp1, sl]):
             continue
+        risk = abs(entry - sl) if abs(entry - sl) > 0 else 1.0
 
-        if direction == "LONG":
+        if i in path_hits:
+            outcome, outcome_price, bar_close = path_hits[i]
+            resolved = True
+            outcome_time = datetime.fromtimestamp(min(bar_close, now.timestamp()), tz=timezone.utc)
+            r_multiple = -1.0 if outcome == "LOSS" else abs(outcome_price - entry) / risk
+        elif direction == "LONG":
             if current_price <= sl:
                 resolved = True
                 outcome = "LOSS"
@@ -119,20 +229,21 @@ def resolve_outcomes(alerts_path: str = "logs/pid-129-alerts.jsonl"):
             logger.info(f"Alert {alert['alert_id']} timed out after {elapsed/3600:.1f}h")
 
         if resolved:
-            alert["resolved"] = True
-            alert["outcome"] = outcome
-            alert["outcome_timestamp"] = now.isoformat()
-            alert["outcome_price"] = outcome_price
-            alert["r_multiple"] = round(r_multiple, 2)
-            updated = True
+            store.patch(alert["alert_id"], {
+                "resolved": True,
+                "outcome": outcome,
+                "outcome_timestamp": outcome_time.isoformat(),
+                "outcome_price": outcome_price,
+                "r_multiple": round(r_multiple, 2),
+            })
+            event_bus.publish(event_bus.OUTCOME_RESOLVED, {
+                "alert_id": alert["alert_id"],
+                "symbol": alert.get("symbol"),
+                "timeframe": tf,
+                "outcome": outcome,
+                "r_multiple": round(r_multiple, 2),
+            })
             logger.info(f"Resolved alert {alert['alert_id']}: {outcome} ({r_multiple:.2f}R)")
 
-    if updated:
-        # Write back all alerts
-        with open(path, "w") as f:
-            for alert in alerts:
-                f.write(json.dumps(alert) + "\n")
-        logger.info("Updated alerts file with resolved outcomes.")
-
 if __name__ == "__main__":
     resolve_outcomes()
@@ -1,13 +1,15 @@
 #!/usr/bin/env python3
 import json
 import logging
-import os
 import sys
 from dataclasses import dataclass, asdict, field
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import List, Dict, Optional
 
+from core import event_bus
+from core.portfolio_journal import PortfolioJournal
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
 logger = logging.getLogger("paper_trader")
@@ -53,57 +55,45 @@ class Portfolio:
         self.peak_balance = 10000.0
         self.max_drawdown = 0.0
         self.equity_curve: List[Dict] = [{"timestamp": datetime.now(timezone.utc).isoformat(), "balance": 10000.0}]
+        self.journal = PortfolioJournal(self.path)
         self._load()
 
     def _load(self):
-        if self.path.exists():
-            try:
-                data = json.loads(self.path.read_text())
-                self.balance = data.get("balance", 10000.0)
-                self.positions = [Position(**p) for p in data.get("positions", [])]
-                self.closed_trades = [ClosedTrade(**t) for t in data.get("closed_trades", [])]
-                self.peak_balance = data.get("peak_balance", 10000.0)
-                self.max_drawdown = data.get("max_drawdown", 0.0)
-                self.equity_curve = data.get("equity_curve", [{"timestamp": datetime.now(timezone.utc).isoformat(), "balance": 10000.0}])
-            except Exception as e:
-                logger.error(f"Failed to load portfolio: {e}")
-
-    def save(self):
-        data = {
-            "balance": self.balance,
-            "positions": [asdict(p) for p in self.positions],
-            "closed_trades": [asdict(t) for t in self.closed_trades],
-            "peak_balance": self.peak_balance,
-            "max_drawdown": self.max_drawdown,
-            "equity_curve": self.equity_curve
-        }
-        self.path.parent.mkdir(parents=True, exist_ok=True)
-        
-        # Phase 31 Hardening: Use file locking to prevent corruption during concurrent access
         try:
-            import msvcrt
-            import time
-            success = False
-            for _ in range(100): # Try for 1 second max
+            data = self.journal.load()
+            self.balance = data.get("balance", 10000.0)
+            self.positions = []
+            for p in data.get("positions", []):
                 try:
-                    # Open file, lock it, write, unlock
-                    with open(self.path, "w") as f:
-                        msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
-                        f.write(json.dumps(data, indent=2))
-                        f.seek(0)
-                        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
-                    success = True
-                    break
-                except IOError:
-                    time.sleep(0.01)
-            
-            if not success:
-                logger.error(f"Failed to acquire file lock for {self.path}")
-                # Fallback to write directly if lock times out
-                self.path.write_text(json.dumps(data, indent=2))
-        except ImportError:
-            # Fallback for non-Windows
-            self.path.write_text(json.dumps(data, indent=2))
+                    self.positions.append(Position(**p))
+                except TypeError:
+                    # Not one of ours (e.g. an executor fill journaled as "open" by older code)
+                    logger.warning(f"Ignoring malformed portfolio position: {p}")
+            self.closed_trades = [ClosedTrade(**t) for t in data.get("closed_trades", [])]
+            self.peak_balance = data.get("peak_balance", 10000.0)
+            self.max_drawdown = data.get("max_drawdown", 0.0)
+            self.equity_curve = data.get("equity_curve", self.equity_curve)
+        except Exception as e:
+            logger.error(f"Failed to load portfolio: {e}")
+
+    def refresh(self):
+        """Pick up opens and closes journaled by other processes (e.g. the executor)."""
+        self._load()
+
+    def _metrics(self) -> Dict:
+        return {"balance": self.balance, "peak_balance": self.peak_balance, "max_drawdown": self.max_drawdown}
+
+    def save(self):
+        """Journal the current balance figures and write a full snapshot.
+
+        Opens and closes are journaled as they happen, so this is only
+        needed after changing balance fields directly.
+        """
+        self.journal.append({"type": "balance", **self._metrics()}, snapshot=True)
+
+    def compact(self):
+        """Fold the journal into a fresh snapshot (also happens automatically)."""
+        self.journal.compact()
 
     def on_alert(self, alert_id: str, symbol: str, tf: str, direction: str, price: float, sl: float, tp1: float, tier: str, confidence: int = 0, regime: str = "unknown", session: str = "unknown"):
         if tier != "TRADE":
@@ -148,7 +138,7 @@ class Portfolio:
         )
         self.positions.append(pos)
         logger.info(f"Opened {direction} on {symbol} {tf} @ {price}. Size: ${size_usdt:.2f}")
-        self.save()
+        self.journal.append({"type": "open", "position": asdict(pos)})
 
     def update(self, current_price: float):
         for p in list(self.positions):
@@ -225,7 +215,7 @@ class Portfolio:
                 })
                 
                 logger.info(f"Closed {p.direction} on {p.symbol}: {outcome} PnL: ${pnl:.2f} ({r_multiple:.2f}R)")
-                self.save()
+                self.journal.append({"type": "close", "alert_id": p.alert_id, "trade": asdict(ct), **self._metrics()})
 
     def get_report(self):
         total_trades = len(self.closed_trades)
@@ -255,9 +245,11 @@ if __name__ == "__main__":
         if cmd == "status":
             print(json.dumps(portfolio.get_report(), indent=2))
         elif cmd == "reset":
-            if os.path.exists(portfolio.path):
-                os.remove(portfolio.path)
+            portfolio.journal.reset()
             print("Portfolio reset.")
+        elif cmd == "compact":
+            portfolio.compact()
+            print("Portfolio journal compacted.")
         elif cmd == "report":
             report = portfolio.get_report()
             print("======================================")
@@ -266,3 +258,13 @@ if __name__ == "__main__":
             for k, v in report.items():
                 print(f"{k:<20}: {v}")
             print("======================================")
+        elif cmd == "watch":
+            # Reprint the report whenever a position opens or closes anywhere
+            def _on_events(events):
+                portfolio.refresh()
+                for e in events:
+                    print(f"[{e['topic']}] {json.dumps(e.get('data', {}))}")
+                print(json.dumps(portfolio.get_report()))
+            print(json.dumps(portfolio.get_report()))
+            event_bus.watch(_on_events, topics=(event_bus.POSITION_OPENED, event_bus.POSITION_CLOSED),
+                            role="paper_trader", debounce=0.05)
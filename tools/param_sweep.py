@@ -0,0 +1,230 @@
+"""
+Grid search over the engine's scoring config against cached historical features.
+
+Features are extracted once (tools/vector_backtest.py), copied into one
+shared-memory block and scored by a process pool, one candidate config per
+task. Each finished candidate is appended to the results CSV, so an
+interrupted sweep picks up where it stopped when re-run with the same output.
+Every row records a fingerprint of the feature table it was scored on, and
+resuming into a file built from different data is refused.
+
+The grid is a JSON object mapping dotted config paths to candidate values:
+    {"TIMEFRAME_RULES.5m.trade_long": [45, 49, 53],
+     "CONFLUENCE_WEIGHTS.structure": [1.5, 2.0],
+     "TP_MULTIPLIERS.trend.tp2": [2.5, 3.0]}
+
+Usage: PYTHONPATH=. python tools/param_sweep.py --grid sweep.json --timeframe 5m --limit 5000
+"""
+import argparse
+import copy
+import csv
+import hashlib
+import itertools
+import json
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import config
+from tools.vector_backtest import (
+    FeatureTable,
+    build_features,
+    load_features,
+    save_features,
+    score_table,
+    simulate_trades,
+)
+
+logger = logging.getLogger(__name__)
+
+SWEEPABLE = (
+    "TIMEFRAME_RULES",
+    "CONFLUENCE_WEIGHTS",
+    "CONFLUENCE_THRESHOLDS",
+    "HTF_CASCADE_WEIGHTS",
+    "DIRECTIONAL_SEASON",
+    "TP_MULTIPLIERS",
+)
+RESULT_FIELDS = [
+    "dataset", "config_id", "overrides", "signals", "trades", "win_rate",
+    "expectancy_r", "total_r", "max_drawdown_r",
+]
+
+
+def config_id(overrides: Dict) -> str:
+    return hashlib.sha1(json.dumps(overrides, sort_keys=True).encode()).hexdigest()[:12]
+
+
+def dataset_id(table: FeatureTable) -> str:
+    """Fingerprint of the data a sweep scores: symbol, timeframe, rows and ts span."""
+    ts = table.columns["ts"]
+    key = [table.symbol, table.timeframe, len(table), ts[0] if len(ts) else None, ts[-1] if len(ts) else None]
+    return hashlib.sha1(json.dumps(key).encode()).hexdigest()[:12]
+
+
+def expand_grid(grid: Dict[str, List]) -> Iterator[Dict]:
+    """Every combination of the grid, as {dotted_path: value} dicts."""
+    for path in grid:
+        if path.split(".", 1)[0] not in SWEEPABLE:
+            raise ValueError(f"{path}: not a sweepable config ({', '.join(SWEEPABLE)})")
+    keys = sorted(grid)
+    for values in itertools.product(*(grid[k] for k in keys)):
+        yield dict(zip(keys, values))
+
+
+def build_params(overrides: Dict) -> Dict:
+    """Turn dotted overrides into full config dicts for engine._make_decider."""
+    params: Dict[str, Dict] = {}
+    for path, value in overrides.items():
+        name, *keys = path.split(".")
+        target = params.setdefault(name, copy.deepcopy(getattr(config, name)))
+        for key in keys[:-1]:
+            target = target[key]
+        if keys[-1] not in target:
+            raise KeyError(f"{path}: unknown key")
+        target[keys[-1]] = value
+    if "TIMEFRAME_RULES" in params:
+        config.validate_timeframe_rules(params["TIMEFRAME_RULES"])
+    return params
+
+
+def share_features(table: FeatureTable) -> Tuple[shared_memory.SharedMemory, Dict]:
+    """Copy a table into a new shared-memory block; the caller unlinks it."""
+    payload = table.to_bytes()
+    shm = shared_memory.SharedMemory(create=True, size=max(1, len(payload)))
+    shm.buf[:len(payload)] = payload
+    return shm, table.meta()
+
+
+_worker_shm: Optional[shared_memory.SharedMemory] = None
+_worker_table: Optional[FeatureTable] = None
+
+
+def _init_worker(shm_name: str, meta: Dict) -> None:
+    global _worker_shm, _worker_table
+    _worker_shm = shared_memory.SharedMemory(name=shm_name)
+    _worker_table = FeatureTable.from_buffer(_worker_shm.buf, meta)
+
+
+def evaluate(table: FeatureTable, overrides: Dict) -> Dict:
+    m = simulate_trades(table, score_table(table, build_params(overrides)))
+    return {
+        "dataset": dataset_id(table),
+        "config_id": config_id(overrides),
+        "overrides": json.dumps(overrides, sort_keys=True),
+        "signals": m.signals,
+        "trades": m.trades,
+        "win_rate": m.win_rate,
+        "expectancy_r": m.expectancy_r,
+        "total_r": m.total_r,
+        "max_drawdown_r": m.max_drawdown_r,
+    }
+
+
+def _evaluate_shared(overrides: Dict) -> Dict:
+    return evaluate(_worker_table, overrides)
+
+
+def _load_done(path: str, dataset: str) -> set:
+    if not os.path.exists(path):
+        return set()
+    with open(path, newline="", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    stale = {row.get("dataset") for row in rows} - {dataset}
+    if stale:
+        raise ValueError(f"{path} holds results for a different dataset ({', '.join(sorted(map(str, stale)))}); "
+                         f"use another --output to sweep dataset {dataset}")
+    return {row["config_id"] for row in rows}
+
+
+def run_sweep(
+    table: FeatureTable,
+    grid: Dict[str, List],
+    output: str,
+    workers: Optional[int] = None,
+) -> List[Dict]:
+    """Score every untried candidate in the grid, appending rows to output.
+
+    Returns all rows in the output file, best expectancy first.
+    """
+    done = _load_done(output, dataset_id(table))
+    pending, invalid = [], 0
+    for overrides in expand_grid(grid):
+        if config_id(overrides) in done:
+            continue
+        try:
+            build_params(overrides)
+        except (KeyError, ValueError) as e:
+            invalid += 1
+            logger.debug("Skipping candidate %s: %s", overrides, e)
+            continue
+        pending.append(overrides)
+    logger.info("Sweep: %d done, %d pending, %d invalid", len(done), len(pending), invalid)
+
+    if pending:
+        os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+        new_file = not os.path.exists(output)
+        shm, meta = share_features(table)
+        try:
+            with open(output, "a", newline="", encoding="utf-8") as f, ProcessPoolExecutor(
+                max_workers=workers, initializer=_init_worker, initargs=(shm.name, meta)
+            ) as pool:
+                writer = csv.DictWriter(f, fieldnames=RESULT_FIELDS)
+                if new_file:
+                    writer.writeheader()
+                futures = [pool.submit(_evaluate_shared, o) for o in pending]
+                for n, fut in enumerate(as_completed(futures), 1):
+                    writer.writerow(fut.result())
+                    f.flush()
+                    if n % 50 == 0:
+                        logger.info("Sweep: %d/%d", n, len(pending))
+        finally:
+            shm.close()
+            shm.unlink()
+
+    with open(output, newline="", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    rows.sort(key=lambda r: float(r["expectancy_r"]), reverse=True)
+    return rows
+
+
+def main():
+    from tools.replay import _aggregate
+    from tools.run_backtest import get_history
+
+    parser = argparse.ArgumentParser(description="Parallel config sweep over cached features")
+    parser.add_argument("--grid", type=str, required=True, help="JSON file of dotted config paths -> values")
+    parser.add_argument("--symbol", type=str, default="BTC")
+    parser.add_argument("--timeframe", type=str, default="5m", choices=["5m", "15m", "1h"])
+    parser.add_argument("--limit", type=int, default=1000, help="Number of 5m candles")
+    parser.add_argument("--store", type=str, help="Read candles from a tools/history_store.py warehouse")
+    parser.add_argument("--features", type=str, help="Feature cache (built and saved here if missing)")
+    parser.add_argument("--output", type=str, default="reports/param_sweep.csv")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    with open(args.grid, encoding="utf-8") as f:
+        grid = json.load(f)
+
+    if args.features and os.path.exists(args.features):
+        table = load_features(args.features)
+    else:
+        c5 = get_history(symbol=args.symbol, limit=args.limit, store=args.store)
+        series = {"5m": c5, "15m": _aggregate(c5, 3), "1h": _aggregate(c5, 12), "4h": _aggregate(c5, 48)}
+        table = build_features(series[args.timeframe], args.timeframe, series, symbol=args.symbol)
+        if args.features:
+            save_features(table, args.features)
+
+    rows = run_sweep(table, grid, args.output, workers=args.workers)
+    print(f"{'CONFIG':<12} | {'TRADES':<6} | {'WIN':<6} | {'EXP (R)':<8} | {'DD (R)':<7} | OVERRIDES")
+    for r in rows[:args.top]:
+        print(f"{r['config_id']:<12} | {r['trades']:<6} | {float(r['win_rate']) * 100:5.1f}% | "
+              f"{float(r['expectancy_r']):+8.3f} | {float(r['max_drawdown_r']):7.2f} | {r['overrides']}")
+
+
+if __name__ == "__main__":
+    main()
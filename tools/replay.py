@@ -1,7 +1,9 @@
 """Backtest-lite replay harness for deterministic alert tuning."""
 
+from collections.abc import Sequence
 from dataclasses import dataclass
-from typing import Dict, List, Tuple
+from itertools import islice
+from typing import Dict, List, Optional
 
 from collectors.derivatives import DerivativesSnapshot
 from collectors.flows import FlowSnapshot
@@ -11,6 +13,8 @@ from engine import AlertScore, compute_score
 from utils import Candle
 
 FORWARD_BARS = {"5m": 3, "15m": 2, "1h": 1}
+# Candles per series handed to the engine; matches the live collectors' fetch limit.
+REPLAY_WINDOW = 120
 
 
 @dataclass
@@ -23,10 +27,6 @@ class ReplayMetrics:
     htf_mode: str
 
 
-def _slice(candles: List[Candle], end: int) -> List[Candle]:
-    return candles[: max(40, end)]
-
-
 def _aggregate(candles: List[Candle], factor: int) -> List[Candle]:
     if factor <= 1:
         return candles
@@ -48,12 +48,82 @@ def _aggregate(candles: List[Candle], factor: int) -> List[Candle]:
     return out
 
 
-def _context_streams(candles_5m: List[Candle]) -> Tuple[List[Candle], List[Candle]]:
-    """Generates 15m and 1h context streams from a 5m source."""
-    return _aggregate(candles_5m, 3), _aggregate(candles_5m, 12)
-
-
-def replay_symbol_timeframe(symbol: str, timeframe: str, candles_5m: List[Candle]) -> ReplayMetrics:
+class CandleView(Sequence):
+    """Read-only window over a candle list; slicing returns another view, not a copy."""
+
+    __slots__ = ("_data", "_start", "_stop")
+
+    def __init__(self, data: List[Candle], start: int = 0, stop: Optional[int] = None):
+        self._data = data
+        self._start = start
+        self._stop = len(data) if stop is None else stop
+
+    def __len__(self) -> int:
+        return self._stop - self._start
+
+    def __getitem__(self, idx):
+        n = self._stop - self._start
+        if idx.__class__ is int:  # hot path: indicators index bar by bar
+            if idx < 0:
+                idx += n
+            if 0 <= idx < n:
+                return self._data[self._start + idx]
+            raise IndexError("candle view index out of range")
+        start, stop, step = idx.indices(n)
+        if step != 1:
+            return self._data[self._start + start:self._start + stop:step]
+        return CandleView(self._data, self._start + start, self._start + max(start, stop))
+
+    def __iter__(self):
+        return islice(self._data, self._start, self._stop)
+
+    def __repr__(self) -> str:
+        return f"CandleView({len(self)} candles)"
+
+
+class ContextStreams:
+    """Grows the 5m source and its 15m/1h/4h aggregates one 5m bar at a time.
+
+    Buckets are aligned to the first pushed bar, matching _aggregate(); a
+    higher-timeframe candle only appears once all of its 5m bars are in.
+    """
+
+    FACTORS = {"5m": 1, "15m": 3, "1h": 12, "4h": 48}
+
+    def __init__(self):
+        self.series: Dict[str, List[Candle]] = {tf: [] for tf in self.FACTORS}
+        self._open: Dict[str, Optional[List[float]]] = {tf: None for tf in self.FACTORS if tf != "5m"}
+
+    def push(self, candle: Candle) -> None:
+        self.series["5m"].append(candle)
+        n = len(self.series["5m"])
+        for tf, bucket in self._open.items():
+            if bucket is None:
+                bucket = [candle.open, candle.high, candle.low, candle.volume]
+                self._open[tf] = bucket
+            else:
+                bucket[1] = max(bucket[1], candle.high)
+                bucket[2] = min(bucket[2], candle.low)
+                bucket[3] += candle.volume
+            if n % self.FACTORS[tf] == 0:
+                self.series[tf].append(Candle(ts=candle.ts, open=bucket[0], high=bucket[1],
+                                              low=bucket[2], close=candle.close, volume=bucket[3]))
+                self._open[tf] = None
+
+    def view(self, timeframe: str, window: Optional[int] = None) -> CandleView:
+        data = self.series[timeframe]
+        start = 0 if window is None else max(0, len(data) - window)
+        return CandleView(data, start)
+
+
+def replay_symbol_timeframe(
+    symbol: str, timeframe: str, candles_5m: List[Candle], window: Optional[int] = REPLAY_WINDOW
+) -> ReplayMetrics:
+    """Replay the engine over a 5m history, scoring at each closed timeframe bar.
+
+    Context series are grown incrementally and handed to compute_score as
+    views of the trailing `window` candles (None passes the full prefix).
+    """
     factors = {"5m": 1, "15m": 3, "1h": 12}
     factor = factors.get(timeframe, 1)
     
@@ -70,28 +140,26 @@ def replay_symbol_timeframe(symbol: str, timeframe: str, candles_5m: List[Candle
     # The horizon in 5m source candles is (horizon_bars * factor)
     horizon_5m = horizon_bars * factor
     
+    streams = ContextStreams()
+    for c in candles_5m[:50]:
+        streams.push(c)
+
     for i in range(50, len(candles_5m)):
+        streams.push(candles_5m[i])
         # Gating: only evaluate at the end of a candle for the target timeframe
         # i is the current 5m candle index (0-indexed)
         if (i + 1) % factor != 0:
             continue
-            
-        # Get the slice of 5m candles up to i (inclusive)
-        c_5m = candles_5m[: i + 1]
-        
+
         # Higher timeframe context ALWAYS derived from 5m source
-        c15, c1h = _context_streams(c_5m)
-        
+        c_5m = streams.view("5m", window)
+        c15 = streams.view("15m", window)
+        c1h = streams.view("1h", window)
+        c4h = streams.view("4h", window)
+
         # The main candles for the engine must match the target timeframe
-        if timeframe == "5m":
-            c_main = c_5m
-        elif timeframe == "15m":
-            c_main = c15
-        elif timeframe == "1h":
-            c_main = c1h
-        else:
-            c_main = c_5m
-            
+        c_main = streams.view(timeframe if timeframe in factors else "5m", window)
+
         if len(c_main) < 30: # Ensure enough history for indicators
             continue
 
@@ -99,7 +167,8 @@ def replay_symbol_timeframe(symbol: str, timeframe: str, candles_5m: List[Candle
         score = compute_score(
             symbol, timeframe, px, c_main, c15, c1h, 
             fg, [], deriv, flow, 
-            {"spx": c_5m, "vix": c_5m, "nq": c_5m} # Use 5m for macro proxy
+            {"spx": c_5m, "vix": c_5m, "nq": c_5m}, # Use 5m for macro proxy
+            candles_4h=c4h,
         )
         
         if score.action == "SKIP":
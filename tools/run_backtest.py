@@ -7,11 +7,11 @@ Fetches historical data and replays the engine to measure performance.
 import sys
 import logging
 import time
+from pathlib import Path
 from collectors.base import BudgetManager
 from collectors.price import _fetch_kraken_ohlc, _fetch_bybit_ohlc
-from tools.replay import replay_symbol_timeframe, summarize
-
-import engine
+from tools.history_store import latest_candles
+from tools.replay import REPLAY_WINDOW, replay_symbol_timeframe, summarize
 
 import argparse
 
@@ -21,14 +21,22 @@ if sys.stdout.encoding.lower() != 'utf-8':
     import io
     sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
 
-# Monkeypatch: Disable stale checks for replay
-engine._is_stale = lambda candles, timeframe: False
-
 # Configure logging
 logging.basicConfig(level=logging.INFO, format="%(message)s")
 
-def get_history(symbol="BTC", limit=720):
-    """Fetch max available candles for the given symbol."""
+def get_history(symbol="BTC", limit=720, store=None):
+    """Fetch max available candles for the given symbol.
+
+    With store set, 5m candles come from the local history warehouse
+    (tools/history_store.py) and the network is only used if it is empty.
+    """
+    if store:
+        candles = latest_candles("5m", limit, Path(store))
+        if candles:
+            logging.info(f"Loaded {len(candles)} candles (5m timeframe) from {store}.")
+            return candles
+        logging.info(f"No stored 5m history under {store}, fetching instead...")
+
     budget = BudgetManager()
     
     # If limit > 720, try Bybit first as Kraken is typically capped at 720
@@ -59,6 +67,9 @@ def main():
     parser.add_argument("--limit", type=int, default=1000, help="Number of 5m candles")
     parser.add_argument("--since", type=str, help="Start date (kept for CLI compatibility)")
     parser.add_argument("--to", type=str, help="End date (kept for CLI compatibility)")
+    parser.add_argument("--window", type=int, default=REPLAY_WINDOW,
+                        help="Candles per series passed to the engine (0 = full history)")
+    parser.add_argument("--store", type=str, help="Read candles from a tools/history_store.py warehouse")
     args = parser.parse_args()
 
     print("==================================================")
@@ -66,7 +77,7 @@ def main():
     print("==================================================")
     
     # 1. Fetch History
-    candles = get_history(symbol=args.symbol, limit=args.limit)
+    candles = get_history(symbol=args.symbol, limit=args.limit, store=args.store)
     
     # 2. Run Replays
     print("\n>>> RUNNING REPLAYS <<<")
@@ -75,7 +86,7 @@ def main():
     for tf in ["5m", "15m", "1h"]:
         print(f"Testing {tf} strategy...", end=" ", flush=True)
         try:
-            metrics = replay_symbol_timeframe(args.symbol, tf, candles)
+            metrics = replay_symbol_timeframe(args.symbol, tf, candles, window=args.window or None)
             results[tf] = metrics
             print("DONE")
         except Exception as e:
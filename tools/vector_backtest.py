@@ -0,0 +1,381 @@
+"""
+Columnar backtest engine built on the live scoring layers.
+
+The sliding-window tools (tools/backtest.py, tools/replay.py) call the full
+compute_score() per bar, so every config change repeats every intelligence
+layer. Here the layers run once per bar into a FeatureTable of typed columns
+(engine.extract_features), and the tunable part of the engine
+(engine._make_decider) is replayed over those columns. Scoring a table gives
+the same tier/action/levels as compute_score() on the same windows.
+
+Usage: PYTHONPATH=. python tools/vector_backtest.py --limit 1000 --timeframe 5m
+"""
+import argparse
+import json
+import logging
+import mmap
+import time
+from array import array
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from collectors.derivatives import DerivativesSnapshot
+from collectors.flows import FlowSnapshot
+from collectors.price import PriceSnapshot
+from collectors.social import FearGreedSnapshot
+from config import INTELLIGENCE_FLAGS
+from engine import _make_decider, extract_features
+from intelligence import IntelligenceBundle
+from intelligence.squeeze import detect_squeeze
+from intelligence.volume_profile import compute_volume_profile
+from tools.outcome_tracker import MAX_DURATION
+from utils import Candle
+
+logger = logging.getLogger(__name__)
+
+TF_SECONDS = {"5m": 300, "15m": 900, "1h": 3600, "4h": 14400}
+REGIMES = ("trend", "range", "vol_chop", "chop")
+ACTIONS = ("SKIP", "MONITOR", "WATCH", "TRADE")
+TIERS = ("NO-TRADE", "C", "B", "A+")
+
+# (name, array typecode). Breakdown buckets are stored before the HTF cascade.
+FEATURE_COLUMNS: Tuple[Tuple[str, str], ...] = (
+    ("ts", "q"), ("high", "d"), ("low", "d"), ("close", "d"),
+    ("b_trend", "d"), ("b_momentum", "d"), ("b_volatility", "d"),
+    ("b_volume", "d"), ("b_htf", "d"), ("b_penalty", "d"),
+    ("t4h", "b"), ("t1h", "b"), ("t15m", "b"),
+    ("funding", "d"), ("ls_ratio", "d"),
+    ("rubric_long", "b"), ("rubric_short", "b"),
+    ("regime", "b"), ("last_price", "d"), ("atr", "d"),
+    ("recipe", "b"), ("r_inv", "d"), ("r_tp1", "d"), ("r_tp2", "d"), ("r_exec", "d"),
+    ("blocked", "b"),
+)
+
+
+@dataclass
+class FeatureTable:
+    """Per-bar engine features for one symbol/timeframe, one array per column."""
+    symbol: str
+    timeframe: str
+    columns: Dict[str, array]
+    zones: List[str] = field(default_factory=list)  # recipe entry_zone per bar ("" if none)
+
+    def __len__(self) -> int:
+        return len(self.columns["ts"])
+
+    @classmethod
+    def empty(cls, symbol: str, timeframe: str) -> "FeatureTable":
+        return cls(symbol, timeframe, {name: array(code) for name, code in FEATURE_COLUMNS})
+
+    def recipe_levels(self) -> List[Optional[Tuple[str, float, float, float, float]]]:
+        c = self.columns
+        zones = self.zones or [""] * len(self)
+        return [
+            (zones[i], c["r_inv"][i], c["r_tp1"][i], c["r_tp2"][i], c["r_exec"][i]) if c["recipe"][i] else None
+            for i in range(len(self))
+        ]
+
+    def slice(self, start: int, stop: int) -> "FeatureTable":
+        cols = {name: col[start:stop] for name, col in self.columns.items()}
+        return FeatureTable(self.symbol, self.timeframe, cols, self.zones[start:stop])
+
+    def meta(self) -> Dict:
+        return {"symbol": self.symbol, "timeframe": self.timeframe, "rows": len(self), "zones": self.zones}
+
+    def to_bytes(self) -> bytes:
+        """Columns back to back, each padded to 8 bytes (see column_layout)."""
+        parts = []
+        for name, _ in FEATURE_COLUMNS:
+            raw = self.columns[name].tobytes()
+            parts.append(raw + b"\0" * (-len(raw) % 8))
+        return b"".join(parts)
+
+    @classmethod
+    def from_buffer(cls, buf, meta: Dict) -> "FeatureTable":
+        """Zero-copy table over a to_bytes() payload (bytes, mmap or shared memory)."""
+        layout, _ = column_layout(meta["rows"])
+        view = memoryview(buf)
+        cols = {name: view[off:off + size].cast(code) for name, (off, size, code) in layout.items()}
+        return cls(meta["symbol"], meta["timeframe"], cols, list(meta["zones"]))
+
+
+def column_layout(rows: int) -> Tuple[Dict[str, Tuple[int, int, str]], int]:
+    """Byte offset, size and typecode of every column for a table of `rows` bars."""
+    layout, offset = {}, 0
+    for name, code in FEATURE_COLUMNS:
+        size = array(code).itemsize * rows
+        layout[name] = (offset, size, code)
+        offset += size + (-size % 8)
+    return layout, offset
+
+
+def save_features(table: FeatureTable, path: str) -> None:
+    """Write a feature cache: one JSON header line, padding, then the columns."""
+    header = json.dumps(table.meta()).encode() + b"\n"
+    header += b" " * (-len(header) % 8)
+    with open(path, "wb") as f:
+        f.write(header)
+        f.write(table.to_bytes())
+
+
+def load_features(path: str) -> FeatureTable:
+    """Memory-map a save_features() file; columns are views into the mapping."""
+    with open(path, "rb") as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    end = mm.find(b"\n")
+    meta = json.loads(mm[:end])
+    start = end + 1 + (-(end + 1) % 8)
+    return FeatureTable.from_buffer(memoryview(mm)[start:], meta)
+
+
+@dataclass
+class ScoredBars:
+    """Decisions for every bar of a FeatureTable."""
+    direction: array      # +1 LONG, -1 SHORT, 0 NEUTRAL
+    confidence: array
+    action: array         # index into ACTIONS
+    tier: array           # index into TIERS
+    rr: array
+    invalidation: array
+    tp1: array
+    tp2: array
+
+
+@dataclass
+class BacktestMetrics:
+    bars: int
+    signals: int
+    trades: int
+    wins: int
+    win_rate: float
+    expectancy_r: float
+    total_r: float
+    max_drawdown_r: float
+
+
+def _neutral_inputs():
+    fg = FearGreedSnapshot(50, "Neutral", healthy=False)
+    deriv = DerivativesSnapshot(0.0, 0.0, 0.0, source="backtest", healthy=False, meta={"provider": "backtest"})
+    flows = FlowSnapshot(1.0, 1.0, 0.0, healthy=False, source="backtest", meta={"provider": "backtest"})
+    return fg, deriv, flows
+
+
+def _bar_intel(window: List[Candle]) -> IntelligenceBundle:
+    """Candle-only intelligence layers (the network-backed ones stay neutral)."""
+    intel = IntelligenceBundle()
+    if INTELLIGENCE_FLAGS.get("squeeze_enabled", True):
+        try:
+            intel.squeeze = detect_squeeze(window)
+        except Exception:
+            pass
+    if INTELLIGENCE_FLAGS.get("volume_profile_enabled", True):
+        try:
+            intel.volume_profile = compute_volume_profile(window)
+        except Exception:
+            pass
+    return intel
+
+
+def _context_window(candles: List[Candle], ts_index: List[int], ts: int, window: int) -> List[Candle]:
+    """HTF candles closed at or before ts, trimmed to the trailing window."""
+    end = bisect_right(ts_index, ts)
+    return candles[max(0, end - window):end]
+
+
+def build_features(
+    candles: List[Candle],
+    timeframe: str,
+    context: Optional[Dict[str, List[Candle]]] = None,
+    symbol: str = "BTC",
+    window: int = 120,
+    warmup: int = 40,
+) -> FeatureTable:
+    """Run every intelligence layer once per bar over trailing windows.
+
+    context holds the 15m/1h/4h series; each bar only sees context candles
+    whose timestamp is at or before its own. Bars are evaluated as of their
+    close, so historical data is never marked stale.
+    """
+    context = context or {}
+    ctx = {tf: (context.get(tf) or []) for tf in ("15m", "1h", "4h")}
+    ctx_ts = {tf: [int(float(c.ts)) for c in cs] for tf, cs in ctx.items()}
+    fg, deriv, flows = _neutral_inputs()
+    bar_seconds = TF_SECONDS.get(timeframe, 300)
+
+    table = FeatureTable.empty(symbol, timeframe)
+    cols = table.columns
+    regime_index = {name: i for i, name in enumerate(REGIMES)}
+
+    for i in range(warmup, len(candles)):
+        w = candles[max(0, i + 1 - window):i + 1]
+        last = w[-1]
+        ts = int(float(last.ts))
+        px = PriceSnapshot(price=last.close, timestamp=float(ts), source="backtest")
+        f = extract_features(
+            symbol, timeframe, px, w,
+            _context_window(ctx["15m"], ctx_ts["15m"], ts, window),
+            _context_window(ctx["1h"], ctx_ts["1h"], ts, window),
+            fg, [], deriv, flows, {},
+            intel=_bar_intel(w),
+            candles_4h=_context_window(ctx["4h"], ctx_ts["4h"], ts, window),
+            now=ts + bar_seconds,
+        )
+        b = f.breakdown
+        recipe = f.recipe or ("", 0.0, 0.0, 0.0, 0.0)
+        row = (
+            ts, last.high, last.low, last.close,
+            b["trend_alignment"], b["momentum"], b["volatility"], b["volume"], b["htf"], b["penalty"],
+            f.htf_trends[0], f.htf_trends[1], f.htf_trends[2],
+            f.funding_rate, f.ls_ratio,
+            f.rubric_long, f.rubric_short,
+            regime_index[f.regime], f.last_price, f.local_atr,
+            1 if f.recipe else 0, recipe[1], recipe[2], recipe[3], recipe[4],
+            1 if f.blockers else 0,
+        )
+        for (name, _), value in zip(FEATURE_COLUMNS, row):
+            cols[name].append(value)
+        table.zones.append(recipe[0])
+
+    return table
+
+
+def score_table(table: FeatureTable, params: Optional[Dict] = None) -> ScoredBars:
+    """Replay the engine's scoring rules over every bar of a FeatureTable."""
+    decide = _make_decider(table.timeframe, params)
+    c = table.columns
+    recipes = table.recipe_levels()
+    action_index = {name: i for i, name in enumerate(ACTIONS)}
+    tier_index = {name: i for i, name in enumerate(TIERS)}
+    dir_sign = {"LONG": 1, "SHORT": -1, "NEUTRAL": 0}
+
+    direction, confidence, action, tier = array("b"), array("b"), array("b"), array("b")
+    rr_col, inv_col, tp1_col, tp2_col = array("d"), array("d"), array("d"), array("d")
+
+    rows = zip(
+        zip(c["b_trend"], c["b_momentum"], c["b_volatility"], c["b_volume"], c["b_htf"], c["b_penalty"]),
+        c["t4h"], c["t1h"], c["t15m"], c["funding"], c["ls_ratio"],
+        c["rubric_long"], c["rubric_short"], c["regime"], c["last_price"], c["atr"],
+        recipes, c["blocked"],
+    )
+    for buckets, t4h, t1h, t15m, fr, ls, rl, rs, regime, last_price, local_atr, recipe, blocked in rows:
+        res = decide(buckets, t4h, t1h, t15m, fr, ls, rl, rs, REGIMES[regime],
+                     last_price, local_atr, recipe, blocked)
+        direction.append(dir_sign[res[1]])
+        confidence.append(min(100, max(0, int(abs(res[0])))))
+        inv_col.append(res[7])
+        tp1_col.append(res[8])
+        tp2_col.append(res[9])
+        rr_col.append(res[10])
+        tier.append(tier_index[res[12]])
+        action.append(action_index[res[13]])
+
+    return ScoredBars(direction, confidence, action, tier, rr_col, inv_col, tp1_col, tp2_col)
+
+
+def trade_returns(table: FeatureTable, scored: ScoredBars, horizon_bars: Optional[int] = None) -> List[Tuple[int, float]]:
+    """Walk each TRADE signal forward on bar highs/lows, one position at a time.
+
+    Entry is the signal bar's close, exit at tp1 or invalidation; a bar that
+    touches both counts as a loss. Open trades close at market after
+    horizon_bars (default: outcome_tracker.MAX_DURATION for the timeframe).
+    Returns (signal bar index, R multiple) per trade.
+    """
+    c = table.columns
+    highs, lows, closes = c["high"], c["low"], c["close"]
+    n = len(table)
+    if horizon_bars is None:
+        horizon_bars = max(1, MAX_DURATION.get(table.timeframe, 24 * 3600) // TF_SECONDS.get(table.timeframe, 300))
+    trade_code = ACTIONS.index("TRADE")
+
+    results: List[Tuple[int, float]] = []
+    i = 0
+    while i < n:
+        sign = scored.direction[i]
+        if scored.action[i] != trade_code or sign == 0:
+            i += 1
+            continue
+        entry, stop, target = closes[i], scored.invalidation[i], scored.tp1[i]
+        risk = abs(entry - stop)
+        if risk <= 0 or (target - entry) * sign <= 0:
+            i += 1
+            continue
+        r = None
+        end = min(n - 1, i + horizon_bars)
+        j = i + 1
+        while j <= end:
+            hit_stop = lows[j] <= stop if sign > 0 else highs[j] >= stop
+            hit_target = highs[j] >= target if sign > 0 else lows[j] <= target
+            if hit_stop:
+                r = -1.0
+                break
+            if hit_target:
+                r = abs(target - entry) / risk
+                break
+            j += 1
+        if r is None:
+            j = end
+            r = (closes[j] - entry) * sign / risk
+        results.append((i, r))
+        i = j + 1
+    return results
+
+
+def summarize_returns(results: List[float], bars: int, signals: int) -> BacktestMetrics:
+    wins = sum(1 for r in results if r > 0)
+    equity = peak = max_dd = 0.0
+    for r in results:
+        equity += r
+        peak = max(peak, equity)
+        max_dd = max(max_dd, peak - equity)
+    trades = len(results)
+    total_r = sum(results)
+    return BacktestMetrics(
+        bars=bars,
+        signals=signals,
+        trades=trades,
+        wins=wins,
+        win_rate=round(wins / trades, 4) if trades else 0.0,
+        expectancy_r=round(total_r / trades, 4) if trades else 0.0,
+        total_r=round(total_r, 4),
+        max_drawdown_r=round(max_dd, 4),
+    )
+
+
+def simulate_trades(table: FeatureTable, scored: ScoredBars, horizon_bars: Optional[int] = None) -> BacktestMetrics:
+    """trade_returns() summarised into win rate, expectancy and drawdown."""
+    results = [r for _, r in trade_returns(table, scored, horizon_bars)]
+    signals = sum(1 for a in scored.action if a != 0)
+    return summarize_returns(results, len(table), signals)
+
+
+def main():
+    from tools.replay import _aggregate
+    from tools.run_backtest import get_history
+
+    parser = argparse.ArgumentParser(description="Columnar backtest over cached engine features")
+    parser.add_argument("--symbol", type=str, default="BTC")
+    parser.add_argument("--limit", type=int, default=1000, help="Number of 5m candles")
+    parser.add_argument("--store", type=str, help="Read candles from a tools/history_store.py warehouse")
+    parser.add_argument("--timeframe", type=str, default="5m", choices=["5m", "15m", "1h"])
+    parser.add_argument("--window", type=int, default=120, help="Trailing candles per bar")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    c5 = get_history(symbol=args.symbol, limit=args.limit, store=args.store)
+    series = {"5m": c5, "15m": _aggregate(c5, 3), "1h": _aggregate(c5, 12), "4h": _aggregate(c5, 48)}
+
+    t0 = time.perf_counter()
+    table = build_features(series[args.timeframe], args.timeframe, series, symbol=args.symbol, window=args.window)
+    t1 = time.perf_counter()
+    scored = score_table(table)
+    t2 = time.perf_counter()
+    m = simulate_trades(table, scored)
+
+    print(f"Features: {len(table)} bars in {t1 - t0:.2f}s | Scoring: {len(table) / max(t2 - t1, 1e-9):,.0f} bars/s")
+    print(f"Signals: {m.signals} | Trades: {m.trades} | Win rate: {m.win_rate * 100:.1f}% | "
+          f"Expectancy: {m.expectancy_r:+.2f}R | Total: {m.total_r:+.2f}R | Max DD: {m.max_drawdown_r:.2f}R")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+"""
+Walk-forward optimisation of the scoring config on cached historical features.
+
+History is cut into rolling folds of in-sample (IS) bars followed by
+out-of-sample (OOS) bars. For each fold the sweep grid (see
+tools/param_sweep.py) is scored on IS, the best candidate is frozen and
+scored on the OOS bars that follow. Folds run in parallel over one
+shared-memory copy of the features, so a fold costs scoring only. OOS trades
+from consecutive folds are stitched into a single equity curve.
+
+Usage: PYTHONPATH=. python tools/walk_forward.py --grid sweep.json --features reports/features_5m.bin \
+    --is-bars 2000 --oos-bars 500
+"""
+import argparse
+import json
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Optional, Tuple
+
+from tools import param_sweep
+from tools.param_sweep import build_params, expand_grid, share_features
+from tools.vector_backtest import (
+    FeatureTable,
+    build_features,
+    load_features,
+    save_features,
+    score_table,
+    simulate_trades,
+    summarize_returns,
+    trade_returns,
+)
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class FoldResult:
+    fold: int
+    is_range: Tuple[int, int]
+    oos_range: Tuple[int, int]
+    overrides: Dict
+    is_trades: int
+    is_expectancy_r: float
+    oos_trades: int
+    oos_expectancy_r: float
+    oos_total_r: float
+    oos_returns: List[float]
+
+
+def make_folds(rows: int, is_bars: int, oos_bars: int, step: Optional[int] = None) -> List[Tuple[Tuple[int, int], Tuple[int, int]]]:
+    """Rolling (IS, OOS) index ranges; by default OOS windows tile without overlap.
+
+    A step below oos_bars would overlap consecutive OOS windows and count their
+    shared trades twice in the stitched OOS results, so it is rejected.
+    """
+    step = step or oos_bars
+    if step < oos_bars:
+        raise ValueError(f"step {step} is shorter than the {oos_bars}-bar OOS window; OOS folds would overlap")
+    folds = []
+    start = 0
+    while start + is_bars + oos_bars <= rows:
+        folds.append(((start, start + is_bars), (start + is_bars, start + is_bars + oos_bars)))
+        start += step
+    return folds
+
+
+def optimize_fold(
+    table: FeatureTable,
+    fold: int,
+    is_range: Tuple[int, int],
+    oos_range: Tuple[int, int],
+    candidates: List[Dict],
+    min_trades: int = 5,
+) -> FoldResult:
+    """Pick the best IS candidate (expectancy, then total R) and score it OOS.
+
+    Candidates with fewer than min_trades IS trades are not eligible; if none
+    qualify the live config ({} overrides) is carried forward.
+    """
+    is_table = table.slice(*is_range)
+    best, best_key, best_metrics = {}, None, None
+    for overrides in candidates:
+        m = simulate_trades(is_table, score_table(is_table, build_params(overrides)))
+        if m.trades < min_trades:
+            continue
+        key = (m.expectancy_r, m.total_r)
+        if best_key is None or key > best_key:
+            best, best_key, best_metrics = overrides, key, m
+    if best_metrics is None:
+        best_metrics = simulate_trades(is_table, score_table(is_table))
+
+    oos_table = table.slice(*oos_range)
+    returns = [r for _, r in trade_returns(oos_table, score_table(oos_table, build_params(best)))]
+    oos = summarize_returns(returns, len(oos_table), 0)
+    return FoldResult(
+        fold=fold,
+        is_range=is_range,
+        oos_range=oos_range,
+        overrides=best,
+        is_trades=best_metrics.trades,
+        is_expectancy_r=best_metrics.expectancy_r,
+        oos_trades=oos.trades,
+        oos_expectancy_r=oos.expectancy_r,
+        oos_total_r=oos.total_r,
+        oos_returns=returns,
+    )
+
+
+def _optimize_shared(args) -> FoldResult:
+    return optimize_fold(param_sweep._worker_table, *args)
+
+
+def walk_forward(
+    table: FeatureTable,
+    grid: Dict[str, List],
+    is_bars: int,
+    oos_bars: int,
+    step: Optional[int] = None,
+    min_trades: int = 5,
+    workers: Optional[int] = None,
+) -> Dict:
+    """Run every fold and return the per-fold table plus stitched OOS metrics."""
+    candidates = []
+    for overrides in expand_grid(grid):
+        try:
+            build_params(overrides)
+        except (KeyError, ValueError):
+            continue
+        candidates.append(overrides)
+    folds = make_folds(len(table), is_bars, oos_bars, step)
+    if not folds:
+        raise ValueError(f"{len(table)} bars is too short for one {is_bars}+{oos_bars} fold")
+    logger.info("Walk-forward: %d folds x %d candidates", len(folds), len(candidates))
+
+    jobs = [(i, is_r, oos_r, candidates, min_trades) for i, (is_r, oos_r) in enumerate(folds)]
+    shm, meta = share_features(table)
+    try:
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=param_sweep._init_worker, initargs=(shm.name, meta)
+        ) as pool:
+            results = list(pool.map(_optimize_shared, jobs))
+    finally:
+        shm.close()
+        shm.unlink()
+
+    stitched = [r for fr in results for r in fr.oos_returns]
+    equity, curve = 0.0, []
+    for r in stitched:
+        equity += r
+        curve.append(round(equity, 4))
+    oos = summarize_returns(stitched, sum(b - a for _, (a, b) in folds), 0)
+    return {
+        "symbol": table.symbol,
+        "timeframe": table.timeframe,
+        "folds": [asdict(fr) for fr in results],
+        "oos": {k: v for k, v in asdict(oos).items() if k != "signals"},
+        "oos_equity_r": curve,
+        "efficiency": efficiency(oos.expectancy_r, [fr.is_expectancy_r for fr in results]),
+    }
+
+
+def efficiency(oos_expectancy: float, is_expectancies: List[float]) -> Optional[float]:
+    """OOS expectancy as a fraction of the average IS expectancy it was chosen on."""
+    mean_is = sum(is_expectancies) / len(is_expectancies) if is_expectancies else 0.0
+    if mean_is == 0:
+        return None
+    return round(oos_expectancy / mean_is, 4)
+
+
+def main():
+    from tools.replay import _aggregate
+    from tools.run_backtest import get_history
+
+    parser = argparse.ArgumentParser(description="Walk-forward optimisation over cached features")
+    parser.add_argument("--grid", type=str, required=True, help="JSON file of dotted config paths -> values")
+    parser.add_argument("--symbol", type=str, default="BTC")
+    parser.add_argument("--timeframe", type=str, default="5m", choices=["5m", "15m", "1h"])
+    parser.add_argument("--limit", type=int, default=5000, help="Number of 5m candles")
+    parser.add_argument("--store", type=str, help="Read candles from a tools/history_store.py warehouse")
+    parser.add_argument("--features", type=str, help="Feature cache (built and saved here if missing)")
+    parser.add_argument("--is-bars", type=int, default=2000)
+    parser.add_argument("--oos-bars", type=int, default=500)
+    parser.add_argument("--step", type=int, default=None, help="Bars between fold starts (default and minimum: oos-bars)")
+    parser.add_argument("--min-trades", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--output", type=str, default="reports/walk_forward.json")
+    args = parser.parse_args()
+    if args.step is not None and args.step < args.oos_bars:
+        parser.error("--step must be at least --oos-bars, or the stitched OOS folds overlap")
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    with open(args.grid, encoding="utf-8") as f:
+        grid = json.load(f)
+
+    if args.features and os.path.exists(args.features):
+        table = load_features(args.features)
+    else:
+        c5 = get_history(symbol=args.symbol, limit=args.limit, store=args.store)
+        series = {"5m": c5, "15m": _aggregate(c5, 3), "1h": _aggregate(c5, 12), "4h": _aggregate(c5, 48)}
+        table = build_features(series[args.timeframe], args.timeframe, series, symbol=args.symbol)
+        if args.features:
+            save_features(table, args.features)
+
+    report = walk_forward(table, grid, args.is_bars, args.oos_bars, args.step, args.min_trades, args.workers)
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"{'FOLD':<5} | {'IS EXP':<8} | {'OOS EXP':<8} | {'OOS TRADES':<10} | OVERRIDES")
+    for fr in report["folds"]:
+        print(f"{fr['fold']:<5} | {fr['is_expectancy_r']:+8.3f} | {fr['oos_expectancy_r']:+8.3f} | "
+              f"{fr['oos_trades']:<10} | {json.dumps(fr['overrides'], sort_keys=True)}")
+    oos = report["oos"]
+    print(f"Stitched OOS: {oos['trades']} trades | Win rate {oos['win_rate'] * 100:.1f}% | "
+          f"Expectancy {oos['expectancy_r']:+.3f}R | Total {oos['total_r']:+.2f}R | Max DD {oos['max_drawdown_r']:.2f}R")
+    print(f"Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -69,14 +69,14 @@ def keltner_channels(candles: List[Candle], period: int = 20, atr_mult: float =
 def atr(candles: List[Candle], period: int = 14) -> Optional[float]:
     if len(candles) < period + 1:
         return None
+    # Only the trailing `period` true ranges are used; regime scoring builds
+    # ATR series from growing prefixes, so don't walk the whole history.
     true_ranges = []
-    for i in range(1, len(candles)):
+    for i in range(len(candles) - period, len(candles)):
         c = candles[i]
         p = candles[i - 1]
         true_ranges.append(max(c.high - c.low, abs(c.high - p.close), abs(c.low - p.close)))
-    if len(true_ranges) < period:
-        return None
-    return sum(true_ranges[-period:]) / period
+    return sum(true_ranges) / period
 
 
 def adx(candles: List[Candle], period: int = 14) -> Optional[float]: